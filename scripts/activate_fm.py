@@ -1,4 +1,6 @@
-from pywinauto import Application, Desktop
+import lazy_import
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
 import time
 import sys
 
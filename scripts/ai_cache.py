@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import time
+import hashlib
+
+# Gemini 応答のディスクキャッシュ (内容アドレス方式)。
+# キー = モデル名 + system instruction + temperature + 正規化したプロンプト/フィールド一覧。
+# LRU (ファイルの mtime をアクセス時刻として使う)、合計サイズ上限、TTL で古いものから削除する。
+# CLUBMAKER_AI_CACHE=off で無効化できる。
+
+CACHE_DIR = os.getenv("CLUBMAKER_AI_CACHE_DIR", os.path.join(os.getcwd(), "data", "ai_cache"))
+MAX_BYTES = int(os.getenv("CLUBMAKER_AI_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+TTL_SEC = float(os.getenv("CLUBMAKER_AI_CACHE_TTL", str(7 * 24 * 3600)))
+
+def enabled():
+    return os.getenv("CLUBMAKER_AI_CACHE", "on").lower() not in ("off", "0", "false")
+
+def normalize_text(text):
+    """空白の違いだけのプロンプトを同一視する"""
+    return " ".join(str(text).split())
+
+def make_key(model, system_instruction, temperature, payload):
+    if isinstance(payload, str):
+        payload = normalize_text(payload)
+    material = json.dumps({
+        "model": model,
+        "system_instruction": normalize_text(system_instruction or ""),
+        "temperature": temperature,
+        "payload": payload,
+    }, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def _path(key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, f"{key}.json")
+
+def get(key, cache_dir=None, ttl=None):
+    """ヒットすれば値を返し、アクセス時刻を更新する (無ければ None)"""
+    path = _path(key, cache_dir)
+    ttl = TTL_SEC if ttl is None else ttl
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry.get("created", 0) > ttl:
+        try: os.remove(path)
+        except OSError: pass
+        return None
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    return entry.get("value")
+
+def put(key, value, cache_dir=None, max_bytes=None):
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _path(key, cache_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"created": time.time(), "value": value}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    evict(cache_dir, MAX_BYTES if max_bytes is None else max_bytes, keep=path)
+
+def evict(cache_dir=None, max_bytes=None, ttl=None, keep=None):
+    """期限切れを削除し、合計サイズが上限を超えていれば最後に使われたのが古い順に削除する"""
+    cache_dir = cache_dir or CACHE_DIR
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    ttl = TTL_SEC if ttl is None else ttl
+    now = time.time()
+    entries = []
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        # 中身を読まずに済むよう、ここでは mtime (最終アクセス) で判定する。作成からの TTL は get() で判定
+        if now - st.st_mtime > ttl:
+            try: os.remove(path)
+            except OSError: pass
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def cached(key, compute, use_cache=True, cache_dir=None):
+    """
+    キャッシュがあればそれを返し、無ければ compute() の結果を保存して返す。
+    compute() が None を返した場合 (失敗) は保存しない。
+    """
+    if use_cache and enabled():
+        value = get(key, cache_dir)
+        if value is not None:
+            print(f"  > [AI Cache] hit {key[:12]}", file=sys.stderr)
+            return value
+    value = compute()
+    if value is not None and enabled():
+        try:
+            put(key, value, cache_dir)
+        except OSError as e:
+            print(f"  > [AI Cache] write failed: {e}", file=sys.stderr)
+    return value
@@ -0,0 +1,260 @@
+import sys
+import json
+import time
+import lazy_import
+pyautogui = lazy_import.lazy("pyautogui")
+
+import fm_utils
+import fm_wait
+import fm_trace
+import fm_snippet
+import dialog_watcher
+import schema_planner
+import schema_snapshots
+import get_fm_fields
+import field_fixer
+import batch_create_fields
+
+# AI の設計 (design["tables"]) をまとめて FileMaker に反映する。
+# 1. フィールドタブのテーブルメニューから既存のテーブルを読む
+# 2. 無いテーブルは「テーブル」タブで FMTable スニペット (フィールドごと) を1回だけ貼り付けて作る。
+#    貼り付けで作れなかったテーブルだけ、名前を入力して1つずつ作る
+# 3. テーブルごとに1回だけ切り替えて一覧を読み、差分を計画して足りないフィールドを作成 (FMField 貼り付け) する
+# 既存のテーブルの改名・型変更は自動では行わず、pending_fixes として返す。UI で確認した結果は次の呼び出しの
+# confirmed ({テーブル名: [修整 + "accept": bool]}) で渡す。承認されたものは作成の前に batch_fix で適用し、
+# 断られた改名は改名先を新規に作成する (断られた型変更は何もしない)。
+# テーブルが1つ終わるたびに emit({"event": "table", ...}) で結果を送る。
+
+def design_tables(design):
+    """設計からテーブルを取り出す (名前の無いもの・同名の2つ目以降は除く)"""
+    tables = design.get("tables") if isinstance(design, dict) else design
+    result, seen = [], set()
+    for table in tables or []:
+        name = str(table.get("name") or "").strip()
+        if not name or name.casefold() in seen:
+            continue
+        seen.add(name.casefold())
+        result.append({"name": name, "fields": [f for f in table.get("fields") or [] if f.get("name")]})
+    return result
+
+def _dismiss_alerts():
+    """貼り付け・作成の後に出た警告 (名前の重複など) を閉じて、その本文を返す"""
+    messages = []
+    find_alert = lambda: fm_utils.find_popup(dialog_watcher.ALERT_KINDS)
+    while True:
+        popup = find_alert()
+        if not popup:
+            break
+        messages.append(popup.text or popup.title)
+        print(f"  > Alert: {popup.text or popup.title}. Dismissing...", file=sys.stderr)
+        fm_utils.dialog_window(popup).set_focus()
+        pyautogui.press('enter')
+        if not fm_wait.wait_gone(find_alert, timeout=1.0, name="alert_close"):
+            break
+    return messages
+
+def _paste_tables(dialog, tables):
+    import set_fm_clipboard
+    import clipboard_writer
+    xml = fm_snippet.build_tables_snippet(tables)
+    if not set_fm_clipboard.set_fm_xml_clipboard(xml, writer=clipboard_writer.get_writer()):
+        return False
+    before = fm_utils.read_table_count(dialog)
+    dialog.set_focus()
+    pyautogui.hotkey('ctrl', 'v')
+    find_alert = lambda: fm_utils.find_popup(dialog_watcher.ALERT_KINDS)
+    if before is not None:
+        expected = before + len(tables)
+        fm_wait.wait_until(lambda: (fm_utils.read_table_count(dialog) or 0) >= expected or find_alert(),
+                           timeout=max(3.0, 0.2 * len(tables)), name="table_paste")
+    else:
+        # 件数が読めない版: 警告が出るか少し待つだけ (結果はテーブルメニューで確かめる)
+        fm_wait.wait_until(find_alert, timeout=1.0, name="table_paste_alert", adaptive=True)
+    return True
+
+def _create_table_gui(dialog, name):
+    controls = fm_utils.get_controls(dialog)
+    name_edit = controls.require("table_name_edit")
+    name_edit.set_focus()
+    name_edit.set_text(name)
+    if not fm_wait.wait_until(fm_wait.text_equals(name_edit, name), timeout=0.5, name="table_name_entry"):
+        fm_trace.retry()
+        name_edit.click_input()
+        pyautogui.hotkey('ctrl', 'a')
+        pyautogui.press('backspace')
+        pyautogui.typewrite(name)
+    create_btn = controls.get("table_create_btn")
+    if create_btn is not None:
+        create_btn.click_input()
+    else:
+        dialog.type_keys("%e")
+    fm_wait.wait_until(lambda: fm_wait.edit_cleared(name_edit)() or fm_utils.find_popup(dialog_watcher.ALERT_KINDS),
+                       timeout=2.0, name="table_create")
+
+@fm_trace.traced("design.create_tables")
+def create_tables(dialog, tables):
+    """
+    テーブルタブで足りないテーブルを作る。
+    戻り値: {"pasted": [名前], "gui": [名前], "failed": [名前], "alerts": [...]}
+    pasted のテーブルはフィールドも作成済み、gui のテーブルは空。
+    """
+    result = {"pasted": [], "gui": [], "failed": [], "alerts": []}
+    fm_utils.select_tables_tab(dialog)
+    if _paste_tables(dialog, tables):
+        result["alerts"] += _dismiss_alerts()
+    fm_utils.select_fields_tab(dialog)
+    existing = {t.casefold() for t in fm_utils.list_tables(dialog) or []}
+    missing = []
+    for table in tables:
+        (result["pasted"] if table["name"].casefold() in existing else missing).append(table["name"])
+
+    if missing:
+        # 貼り付けで作れなかった分だけ1つずつ作る (フィールドはテーブルごとの処理で作る)
+        print(f"  > {len(missing)} tables were not pasted. Creating via GUI...", file=sys.stderr)
+        fm_utils.select_tables_tab(dialog)
+        for name in missing:
+            _create_table_gui(dialog, name)
+            result["alerts"] += _dismiss_alerts()
+        fm_utils.select_fields_tab(dialog)
+        existing = {t.casefold() for t in fm_utils.list_tables(dialog) or []}
+        for name in missing:
+            (result["gui"] if name.casefold() in existing else result["failed"]).append(name)
+    return result
+
+def _fix_key(fix):
+    return (schema_planner._name_key(fix.get("old_name")), schema_planner._name_key(fix.get("new_name")),
+            schema_planner.normalize_type(fix.get("new_type")) if fix.get("new_type") else None)
+
+def apply_table(dialog, table, origin=None, confirmed=None):
+    """
+    1つのテーブルに切り替えて、足りないフィールドを作成する。
+    改名・型変更は confirmed (確認の結果) にあるものだけを扱い、残りは pending_fixes で返す。
+    origin: 今回作ったテーブルなら "snippet" (フィールドごと貼り付け済み) / "gui" (空)。この場合は改名・型変更をしない
+    """
+    name = table["name"]
+    fields = table["fields"]
+    result = {"table": name, "success": False, "status": "failed", "created": 0, "fixed": 0, "pending_fixes": []}
+    with fm_trace.span("design.table", table=name, fields=len(fields)) as step:
+        if not fm_utils.select_table(dialog, name):
+            result["error"] = f"Could not switch to table '{name}'."
+            return result
+
+        # 貼り付けで作ったテーブルは件数が合えばそれで完了 (一覧は読まない)
+        if origin == "snippet" and fm_utils.read_field_count(dialog) == len(fields):
+            result.update(success=True, status="created", created=len(fields), method="snippet")
+            step.set(status="created")
+            return result
+
+        current = get_fm_fields.read_fields(dialog)
+        schema_snapshots.save(current["file"], current["table"], current["fields"])
+        plan = schema_planner.plan_result(current["fields"], fields)
+        result["summary"] = plan["summary"]
+
+        fixes, create = [], list(plan["fields"])
+        if origin is None:
+            # 既存のデータに触れるので確認の済んだものだけ (確認の結果は今の差分と突き合わせる)
+            answers = {_fix_key(f): bool(f.get("accept")) for f in confirmed or ()}
+            targets = {schema_planner._name_key(f.get("name")): f for f in fields}
+            for fix in plan["fixes"] + plan["proposed"]:
+                answer = answers.get(_fix_key(fix))
+                if answer is None:
+                    result["pending_fixes"].append(fix)
+                elif answer:
+                    fixes.append(fix)
+                elif fix in plan["proposed"]:
+                    create.append(targets[schema_planner._name_key(fix["new_name"])])
+        if fixes:
+            fixed = field_fixer.batch_fix(fixes, current_fields=current["fields"])
+            result["fixed"] = fixed.get("succeeded", 0)
+            if not fixed.get("success") or fixed.get("errors"):
+                result["error"] = fixed.get("error") or f"Fix failed: {', '.join(fixed.get('errors', []))}"
+        if create:
+            created = batch_create_fields.bulk_create_fields(create)
+            result["created"] = created.get("count", 0)
+            result["method"] = created.get("method")
+            if not created.get("success"):
+                result["error"] = created.get("error")
+
+        result["success"] = "error" not in result
+        if not result["success"]:
+            result["status"] = "failed"
+        elif fixes or create:
+            result["status"] = "created" if origin else "updated"
+        else:
+            result["status"] = "unchanged"
+        step.set(status=result["status"])
+    return result
+
+def apply_design(design, emit=None, confirmed=None):
+    """
+    設計の全テーブルを反映する。emit を渡すとテーブルごとの結果を途中経過として送る。
+    confirmed: {テーブル名: [修整 + "accept"]} (前回の pending_fixes を UI で確認した結果)
+    戻り値: {"success", "tables": [テーブルごとの結果], "created_tables": {...}, "elapsed_s"}
+    """
+    emit = emit or (lambda event: None)
+    confirmed = {str(k).casefold(): v for k, v in (confirmed or {}).items()}
+    tables = design_tables(design)
+    if not tables:
+        return {"success": False, "error": "No tables in design."}
+
+    start = time.perf_counter()
+    fm_utils.start_overlay(f"設計を反映: {len(tables)}テーブル")
+    fm_utils.set_input_block(True)
+    results = []
+    try:
+        if not fm_utils.ensure_manage_database():
+            return {"success": False, "error": "Could not open 'Manage Database' dialog."}
+        dialog = fm_utils.find_manage_database_dialog()
+        if not dialog:
+            return {"success": False, "error": "Manage Database dialog not found."}
+        dialog.set_focus()
+        fm_utils.select_fields_tab(dialog)
+
+        existing = fm_utils.list_tables(dialog)
+        if existing is None:
+            return {"success": False, "error": "Could not read the table list."}
+        existing_keys = {t.casefold() for t in existing}
+        new_tables = [t for t in tables if t["name"].casefold() not in existing_keys]
+
+        created = {"pasted": [], "gui": [], "failed": [], "alerts": []}
+        if new_tables:
+            fm_utils.update_overlay(f"テーブルを作成中: {len(new_tables)}件")
+            created = create_tables(dialog, new_tables)
+            emit({"event": "tables_created", **created})
+        origins = {n.casefold(): "snippet" for n in created["pasted"]}
+        origins.update({n.casefold(): "gui" for n in created["gui"]})
+        failed = {n.casefold() for n in created["failed"]}
+
+        for i, table in enumerate(tables):
+            fm_utils.update_overlay(f"テーブル「{table['name']}」を反映中", i + 1, len(tables))
+            if table["name"].casefold() in failed:
+                result = {"table": table["name"], "success": False, "status": "failed", "created": 0, "fixed": 0,
+                          "pending_fixes": [], "error": "Table could not be created."}
+            else:
+                try:
+                    key = table["name"].casefold()
+                    result = apply_table(dialog, table, origins.get(key), confirmed.get(key))
+                except Exception as e:
+                    result = {"table": table["name"], "success": False, "status": "failed", "created": 0, "fixed": 0,
+                              "pending_fixes": [], "error": str(e)}
+            results.append(result)
+            emit({"event": "table", "index": i, "total": len(tables), **result})
+
+        fm_utils.update_overlay("設計の反映が完了しました")
+        return {"success": all(r["success"] for r in results), "tables": results, "created_tables": created,
+                "elapsed_s": round(time.perf_counter() - start, 3)}
+    finally:
+        fm_utils.set_input_block(False)
+        fm_utils.stop_overlay()
+        print(f"  > [Control Cache] {json.dumps(fm_utils.control_stats(), ensure_ascii=False)}", file=sys.stderr)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        try:
+            with open(sys.argv[1], "r", encoding="utf-8") as f:
+                design = json.load(f)
+            print(json.dumps(apply_design(design, emit=lambda e: print(json.dumps(e), file=sys.stderr))))
+        except Exception as e:
+            print(json.dumps({"success": False, "error": str(e)}))
+    else:
+        print(json.dumps({"success": False, "error": "No design file provided"}))
@@ -1,11 +1,13 @@
 import sys
 import time
 import os
-import pyautogui
-import pygetwindow as gw
+import lazy_import
+pyautogui = lazy_import.lazy("pyautogui")
+gw = lazy_import.lazy("pygetwindow")
 from click_button import click_template
 
-from pywinauto import Application, Desktop
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
 
 def focus_filemaker():
     print("Searching for FileMaker by process...")
@@ -0,0 +1,269 @@
+import sys
+import os
+import io
+import json
+import time
+import argparse
+import threading
+import lazy_import
+import fm_trace
+subprocess = lazy_import.lazy("subprocess")
+import contextlib
+import socketserver
+
+# 常駐ワーカー: pywinauto / genai などの import と FileMaker への接続を温めたまま、
+# 1行1リクエストの JSON-RPC 風メッセージを stdin/stdout (またはローカルソケット) で処理する。
+#
+#   -> {"id": 1, "method": "get_existing_fields", "params": {}}
+#   <- {"id": 1, "result": {...}}   /   {"id": 1, "error": {"message": "..."}}
+#
+# ストリーミング対応のメソッド (streaming 属性付きのハンドラ) は、最終応答の前に途中経過を送る。
+#   <- {"id": 1, "event": {...}}   (0回以上)
+
+def streaming(handler):
+    """handler(params, emit) の形で呼ばれるストリーミングハンドラとして印を付ける"""
+    handler.streaming = True
+    return handler
+
+def plan_schema(p, current_fields=None):
+    """
+    目標のフィールド (targetFields) への最小の操作を計画する。
+    現在のフィールドは currentFields、無ければ file/table の最新スナップショットを使う。
+    """
+    import schema_planner
+    import schema_snapshots
+    if current_fields is None:
+        current_fields = p.get("currentFields")
+    if current_fields is None:
+        snapshot = schema_snapshots.latest(p.get("file"), p.get("table"))
+        if snapshot is None:
+            return {"success": False, "error": "No snapshot for this table. Read the fields first."}
+        current_fields = snapshot["fields"]
+    return schema_planner.plan_result(current_fields, p.get("targetFields", []))
+
+def layout_snippet(p):
+    """
+    レイアウト (layout、または design と name) を LayoutObjectList スニペットにする (fm_layout)。
+    重なりは先に解消する (pack: false で無効)。clipboard が真ならクリップボードに登録して XML は返さない。
+    """
+    import fm_layout
+    layout = p.get("layout") or fm_layout.find_layout(p.get("design") or {}, p.get("name"))
+    if layout is None:
+        return {"success": False, "error": f"Layout not found: {p.get('name') or '(none)'}"}
+    buf = io.StringIO()
+    plan = fm_layout.write_layout_snippet(layout, buf, pack=p.get("pack", True))
+    result = {"success": True, **plan.summary()}
+    if p.get("clipboard"):
+        import clipboard_writer
+        result["success"] = bool(clipboard_writer.get_writer().write_fm_snippet(buf.getvalue()))
+    else:
+        result["xml"] = buf.getvalue()
+    return result
+
+def pack_layout(p):
+    """レイアウトの重なりを解消したレイアウトと、要素ごとの移動量を返す (layout_packer)"""
+    import fm_layout
+    import layout_packer
+    layout = p.get("layout") or fm_layout.find_layout(p.get("design") or {}, p.get("name"))
+    if layout is None:
+        return {"success": False, "error": f"Layout not found: {p.get('name') or '(none)'}"}
+    packed, report = layout_packer.pack_layout(layout, compact=p.get("compact", True))
+    return {"success": True, "layout": packed, "report": report}
+
+def load_handlers(backend="fm"):
+    """バックエンドごとのハンドラを返す。ここで重い import を一度だけ済ませる"""
+    if backend == "fake":
+        import fake_automation as fake
+        return {
+            "generate_db_design_stream": streaming(lambda p, emit: fake.stream_db_design(p.get("prompt", ""), emit)),
+            "get_existing_fields": lambda p: fake.get_existing_fields(),
+            "batch_create_fields": lambda p: {"success": True, "count": fake.batch_create_fields(p.get("fields", []))},
+            "bulk_create_fields": lambda p: fake.bulk_create_fields(p.get("fields", [])),
+            "batch_fix": lambda p: fake.batch_fix(p.get("fixes", [])),
+            "generate_db_design": lambda p: fake.generate_db_design(p.get("prompt", "")),
+            "suggest_field_fix": lambda p: fake.suggest_field_fix(p.get("currentFields", []), p.get("context", "")),
+            "plan_schema": lambda p: plan_schema(p, p.get("currentFields") or fake.get_existing_fields()["fields"]),
+            "apply_design": streaming(lambda p, emit: fake.apply_design(p.get("design") or {}, emit)),
+            "layout_snippet": layout_snippet,
+            "pack_layout": pack_layout,
+        }
+
+    if backend == "sim":
+        # 疑似 FileMaker (fm_sim) に対して実際の自動操作スクリプトを動かす
+        import fm_sim
+        fm_sim.install(fm_sim.FileMakerSim.from_env())
+
+    import fm_utils
+    import get_fm_fields
+    import batch_create_fields
+    import field_fixer
+    import generate_design_ai
+    import suggest_field_fix
+    import apply_design
+
+    def _generate(p):
+        # generate_db_design は結果を stdout に print するため、取り込んで JSON として返す
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf):
+            generate_design_ai.generate_db_design(p.get("prompt", ""), not p.get("noCache", False))
+        return json.loads(buf.getvalue().strip().splitlines()[-1])
+
+    @streaming
+    def _generate_stream(p, emit):
+        design = generate_design_ai.stream_db_design(p.get("prompt", ""), emit, not p.get("noCache", False))
+        if design is None:
+            raise RuntimeError("Design generation failed")
+        return design
+
+    def _capture(p):
+        # capture_screen は stdout に print するので stderr へ逃がす。書き出しは待たずに戻る
+        import capture_screen
+        with contextlib.redirect_stdout(sys.stderr):
+            return capture_screen.capture_screen(wait=False, focus=p.get("focus", True))
+
+    def _get_fields(p):
+        result = get_fm_fields.get_existing_fields()
+        get_fm_fields.save_current_fields(result)
+        return result
+
+    return {
+        "get_existing_fields": _get_fields,
+        "batch_create_fields": lambda p: {"success": True, "count": batch_create_fields.batch_create_fields(p.get("fields", []))},
+        "bulk_create_fields": lambda p: batch_create_fields.bulk_create_fields(p.get("fields", [])),
+        "batch_fix": lambda p: field_fixer.batch_fix(p.get("fixes", [])),
+        "generate_db_design": _generate,
+        "generate_db_design_stream": _generate_stream,
+        "suggest_field_fix": lambda p: suggest_field_fix.suggest_field_fix(p.get("currentFields", []), p.get("context", ""),
+                                                                           not p.get("noCache", False)),
+        "plan_schema": plan_schema,
+        "capture_screen": _capture,
+        "apply_design": streaming(lambda p, emit: apply_design.apply_design(p.get("design") or {}, emit,
+                                                                            p.get("confirmed"))),
+        "layout_snippet": layout_snippet,
+        "pack_layout": pack_layout,
+    }
+
+def handle_request(handlers, line, send=None):
+    """1行分のリクエストを処理してレスポンス辞書を返す。途中経過のイベントは send(message) で送る"""
+    try:
+        req = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"id": None, "error": {"message": f"Invalid JSON: {e}"}}
+
+    req_id = req.get("id")
+    method = req.get("method")
+    handler = handlers.get(method)
+    if handler is None:
+        return {"id": req_id, "error": {"message": f"Unknown method: {method}"}}
+
+    start = time.perf_counter()
+    try:
+        # ハンドラ内の print が応答チャネル(stdout)を汚さないよう stderr に逃がす
+        with contextlib.redirect_stdout(sys.stderr):
+            if getattr(handler, "streaming", False):
+                def emit(event):
+                    if send is not None:
+                        send({"id": req_id, "event": event})
+                result = handler(req.get("params") or {}, emit)
+            else:
+                result = handler(req.get("params") or {})
+        return {"id": req_id, "result": result, "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+    except Exception as e:
+        return {"id": req_id, "error": {"message": str(e)}}
+    finally:
+        if fm_trace.enabled():
+            fm_trace.dump_request(f"{req_id}_{method}")
+
+def serve_stdio(handlers, stdin=None, stdout=None):
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+
+    def send(message):
+        stdout.write(json.dumps(message, ensure_ascii=True) + "\n")
+        stdout.flush()
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        send(handle_request(handlers, line, send))
+
+def serve_socket(handlers, port, host="127.0.0.1"):
+    # GUI 操作は同時に1つしか走らせられないため、接続をまたいで直列化する
+    lock = threading.Lock()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode("utf-8")
+                if not line.strip():
+                    continue
+                with lock:
+                    self.send(handle_request(handlers, line, self.send))
+
+        def send(self, message):
+            self.wfile.write((json.dumps(message, ensure_ascii=True) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer((host, port), Handler) as server:
+        print(f"Automation worker listening on {host}:{port}", file=sys.stderr)
+        server.serve_forever()
+
+class WorkerClient:
+    """ワーカーを子プロセスとして1度だけ起動し、以後は同じプロセスに要求を送る"""
+
+    def __init__(self, backend="fm", python_cmd=None):
+        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "automation_worker.py")
+        cmd = [python_cmd or sys.executable, script_path, "--backend", backend]
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     text=True, encoding="utf-8", bufsize=1)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def call(self, method, params=None, on_event=None):
+        """on_event を渡すと、ストリーミングメソッドの途中経過をイベントごとに受け取る"""
+        with self._lock:
+            self._next_id += 1
+            req = {"id": self._next_id, "method": method, "params": params or {}}
+            self.proc.stdin.write(json.dumps(req, ensure_ascii=True) + "\n")
+            self.proc.stdin.flush()
+            while True:
+                line = self.proc.stdout.readline()
+                if not line:
+                    raise RuntimeError("Automation worker exited unexpectedly")
+                response = json.loads(line)
+                if "event" not in response:
+                    break
+                if on_event is not None:
+                    on_event(response["event"])
+        if "error" in response:
+            raise RuntimeError(response["error"].get("message"))
+        return response.get("result")
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except:
+            self.proc.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="ClubMaker automation worker")
+    parser.add_argument("--backend", choices=["fm", "fake", "sim"], default=os.getenv("CLUBMAKER_BACKEND", "fm"))
+    parser.add_argument("--port", type=int, default=0, help="指定するとローカルソケットで待ち受ける")
+    args = parser.parse_args()
+
+    handlers = load_handlers(args.backend)
+    if args.port:
+        serve_socket(handlers, args.port)
+    else:
+        serve_stdio(handlers)
+
+if __name__ == "__main__":
+    main()
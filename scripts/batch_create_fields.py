@@ -2,17 +2,42 @@ import sys
 import time
 import json
 import os
-from pywinauto import Application, Desktop
-import pyautogui
+import lazy_import
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
+pyautogui = lazy_import.lazy("pyautogui")
 import fm_utils
+import fm_wait
+import dialog_watcher
+import fm_snippet
+import fm_trace
+import schema_snapshots
+import progress_journal
+from field_list_scan import scan_field_list, visible_items, read_field_row
+
+def _created_at_end(dialog, controls, name):
+    """一覧の末尾 (作成順で最後) に name があるか。件数が読めないときと、前回落ちた1件の確認に使う"""
+    try:
+        grid = controls.require("field_list")
+        grid.set_focus()
+        pyautogui.press('end')
+        fm_wait.wait_until(lambda: visible_items(grid), timeout=0.5, name="list_end")
+        found = any(read_field_row(item)[0] == name for item in visible_items(grid))
+        pyautogui.press('home')
+        return found
+    except Exception as e:
+        print(f"  > Could not check list end for '{name}': {e}", file=sys.stderr)
+        return False
 
 def batch_create_fields(field_list):
     print(f"--- Batch Generate: {len(field_list)} fields ---", file=sys.stderr)
     
-    fm_utils.start_overlay()
+    fm_utils.start_overlay(f"フィールド生成: {len(field_list)}件")
     fm_utils.set_input_block(True)
     
     success_count = 0
+    journal = None
+    completed = False
     try:
         dialog = fm_utils.find_manage_database_dialog()
         if not dialog:
@@ -23,7 +48,23 @@ def batch_create_fields(field_list):
         dialog.set_focus()
         # 確実に「フィールド」タブを選択
         fm_utils.select_fields_tab(dialog)
-        time.sleep(0.5)
+        controls = fm_utils.get_controls(dialog)
+        field_count = fm_utils.read_field_count(dialog)
+
+        # 前回の同じテーブルへの作成が途中で止まっていれば、作成済みはスキップし、落ちた時点の1件だけ確かめる
+        journal = progress_journal.open_batch("create", *fm_utils.read_table_context(dialog))
+        if journal.in_flight() and fm_utils.find_popup():
+            # 落ちたときに開いていた計算式・警告のダイアログを閉じる (計算式は OK で作成が確定する)
+            print(f"  > [Journal] Closing a dialog left open by the interrupted batch...", file=sys.stderr)
+            pyautogui.press('enter')
+            fm_wait.wait_gone(fm_utils.find_popup, timeout=2.0, name="leftover_dialog_close")
+            dialog.set_focus()
+        for name in journal.in_flight():
+            if _created_at_end(dialog, controls, name):
+                print(f"  > [Journal] '{name}' was created before the interruption.", file=sys.stderr)
+                journal.verified(name, recovered=True)
+            else:
+                journal.failed(name, "not created before the interruption")
         
         type_map = {
             "Text": "t", "テキスト": "t",
@@ -40,89 +81,201 @@ def batch_create_fields(field_list):
             name = f.get("name")
             f_type = f.get("type", "Text")
             comment = f.get("comment", "")
+            op_digest = progress_journal.digest({"name": name, "type": f_type})
+            if journal.is_verified(name, op_digest):
+                print(f"  > [Step {i+1}] '{name}' already created (journal). Skipping.", file=sys.stderr)
+                success_count += 1
+                continue
             
-            fm_utils.update_overlay(f"生成中: {i+1} / {len(field_list)} ({name})")
+            fm_utils.update_overlay(f"生成中: {name}", i + 1, len(field_list))
             print(f"  > [Step {i+1}] Creating '{name}' ({f_type})...", file=sys.stderr)
             
             try:
-                # 1. 名前入力
-                name_edit = dialog.child_window(auto_id="IDC_DEFFIELDS_FIELDNAME_EDIT", control_type="Edit")
-                name_edit.set_focus()
-                name_edit.set_text(name)
-                time.sleep(0.2)
-                
-                # 入力検証
-                actual_name = name_edit.window_text() or name_edit.get_value() or ""
-                if actual_name != name:
-                    print(f"  > Warning: set_text failed. Using manual typing...", file=sys.stderr)
-                    name_edit.click_input()
-                    pyautogui.hotkey('ctrl', 'a')
-                    pyautogui.press('backspace')
-                    pyautogui.typewrite(name)
-                    time.sleep(0.2)
+                with fm_trace.span("create.field", field=name, type=f_type) as field_span:
+                    journal.intent(name, op_digest)
+                    # 1. 名前入力
+                    with fm_trace.span("create.name_entry"):
+                        name_edit = controls.require("name_edit")
+                        name_edit.set_focus()
+                        name_edit.set_text(name)
 
-                # 2. 型選択
-                key = type_map.get(f_type, "t")
-                try:
-                    type_combo = dialog.child_window(auto_id="IDC_FIELD_TYPE_MENU", control_type="ComboBox")
-                    type_combo.set_focus()
-                    type_combo.type_keys(key)
-                except: pass
-                
-                # 3. 作成ボタンクリック
-                # Alt+E (作成) は非常に強力で確実
-                print(f"  > Sending Alt+E (Create)...", file=sys.stderr)
-                # ボタン自体の存在を確認（デバッグ用）
-                try:
-                    create_btn = dialog.child_window(title_re=".*作成.*|.*Create.*", auto_id="IDC_DEFFIELDS_CREATE_BTN", control_type="Button")
-                    if not create_btn.exists():
-                        create_btn = dialog.child_window(title_re=".*作成.*|.*Create.*", control_type="Button")
+                        # 入力検証
+                        if not fm_wait.wait_until(fm_wait.text_equals(name_edit, name), timeout=0.5, name="name_entry"):
+                            print(f"  > Warning: set_text failed. Using manual typing...", file=sys.stderr)
+                            fm_trace.retry()
+                            name_edit.click_input()
+                            pyautogui.hotkey('ctrl', 'a')
+                            pyautogui.press('backspace')
+                            pyautogui.typewrite(name)
+                            fm_wait.wait_until(fm_wait.text_equals(name_edit, name), timeout=1.0, name="name_entry_typed")
+
+                    # 2. 型選択
+                    with fm_trace.span("create.type_select"):
+                        key = type_map.get(f_type, "t")
+                        try:
+                            type_combo = controls.require("type_combo")
+                            type_combo.set_focus()
+                            type_combo.type_keys(key)
+                        except: pass
+                    
+                    # 3. 作成ボタンクリック
+                    # Alt+E (作成) は非常に強力で確実
+                    with fm_trace.span("create.commit"):
+                        journal.commit(name)
+                        print(f"  > Sending Alt+E (Create)...", file=sys.stderr)
+                        # ボタン自体の存在を確認（デバッグ用）
+                        try:
+                            # auto_id で見つからなければ UI 言語の「作成 / Create」で探す
+                            create_btn = controls.get("create_btn")
+                            
+                            # 確実にボタンが見えるようにする
+                            if create_btn is not None:
+                                 # ボタンを直接クリックする代わりにショートカットを送る（フォーカスが外れるのを防ぐため）
+                                 dialog.type_keys("%e")
+                            else:
+                                 # 見つからない場合も強引に Alt+E
+                                 pyautogui.hotkey('alt', 'e')
+                        except:
+                            pyautogui.hotkey('alt', 'e')
                     
-                    # 確実にボタンが見えるようにする
-                    if create_btn.exists():
-                         # ボタンを直接クリックする代わりにショートカットを送る（フォーカスが外れるのを防ぐため）
-                         dialog.type_keys("%e")
+                    # 4. 特殊なダイアログ対応
+                    # 計算/集計の場合は必ずダイアログが出る
+                    with fm_trace.span("create.dialog") as dialog_span:
+                        if f_type in ["Calculation", "Summary", "計算", "集計"]:
+                            if fm_wait.wait_until(fm_utils.find_popup, timeout=3.0, name="extra_dialog_open"):
+                                # 前面のダイアログに Enter を送る
+                                pyautogui.press('enter')
+                                fm_wait.wait_gone(fm_utils.find_popup, timeout=2.0, name="extra_dialog_close")
+                                dialog_span.set(dismissed=f_type)
+                                print(f"  > Dismissed extra dialog for {f_type}", file=sys.stderr)
+                        else:
+                            # フィールド数が増えるか、重複エラー等の警告ダイアログ (タイトルが "FileMaker Pro") が出るまで待つ
+                            # (件数が読めなければ、作成した行が一覧に表示されるまで)
+                            find_alert = lambda: fm_utils.find_popup(dialog_watcher.ALERT_KINDS)
+                            if field_count is not None:
+                                before = field_count
+                                created_now = lambda: (fm_utils.read_field_count(dialog) or 0) > before
+                            else:
+                                grid = controls.require("field_list")
+                                created_now = lambda: any(read_field_row(item)[0] == name for item in visible_items(grid))
+                            fm_wait.wait_until(lambda: created_now() or find_alert(),
+                                               timeout=2.0, name="create_commit")
+                            try:
+                                popup = find_alert()
+                                if popup:
+                                     print(f"  > Alert detected: {popup.text or popup.title}. Dismissing...", file=sys.stderr)
+                                     dialog_span.set(alert=popup.kind)
+                                     fm_utils.dialog_window(popup).set_focus()
+                                     pyautogui.press('esc') # 警告を閉じる
+                                     fm_wait.wait_gone(find_alert, timeout=1.0, name="alert_close")
+                            except: pass
+                    
+                    # 5. 作成されたか確かめてジャーナルに記録 (件数が読めなければ一覧の末尾で確認)
+                    new_count = fm_utils.read_field_count(dialog)
+                    if new_count is not None and field_count is not None:
+                        created = new_count > field_count
                     else:
-                         # 見つからない場合も強引に Alt+E
-                         pyautogui.hotkey('alt', 'e')
-                except:
-                    pyautogui.hotkey('alt', 'e')
-                
-                # 4. 特殊なダイアログ対応
-                time.sleep(0.8)
-                
-                # 計算/集計の場合は必ずダイアログが出る
-                if f_type in ["Calculation", "Summary", "計算", "集計"]:
-                    time.sleep(1.0)
-                    # 前面のダイアログに Enter を送る
-                    pyautogui.press('enter')
-                    print(f"  > Dismissed extra dialog for {f_type}", file=sys.stderr)
-                    time.sleep(0.5)
-                else:
-                    # 重複エラー等による警告ダイアログが出ているか確認 (タイトルが "FileMaker Pro")
-                    try:
-                        desktop = Desktop(backend="uia")
-                        popup = desktop.window(title="FileMaker Pro", control_type="Window", top_level_only=True)
-                        if popup.exists(timeout=0):
-                             print(f"  > Alert detected: {popup.window_text()}. Dismissing...", file=sys.stderr)
-                             popup.set_focus()
-                             pyautogui.press('esc') # 警告を閉じる
-                             time.sleep(0.5)
-                    except: pass
-                
-                success_count += 1
-                time.sleep(0.1)
+                        created = _created_at_end(dialog, controls, name)
+                    field_count = new_count if new_count is not None else field_count
+                    if created:
+                        journal.verified(name)
+                        success_count += 1
+                    else:
+                        journal.failed(name, "field count did not increase")
+                        field_span.set(created=False)
+                        print(f"  > '{name}' was not created.", file=sys.stderr)
                 
             except Exception as e:
                 print(f"  > Failed to create '{name}': {e}", file=sys.stderr)
+                journal.failed(name, str(e))
                 # ここでの不用意な Esc はメインダイアログを閉じてしまうため、何もしない
+        completed = True
         
     finally:
+        if journal is not None:
+            journal.close(completed)
         fm_utils.set_input_block(False)
         fm_utils.stop_overlay()
+        print(f"  > [Wait Stats] {json.dumps(fm_wait.summary(), ensure_ascii=False)}", file=sys.stderr)
+        print(f"  > [Control Cache] {json.dumps(fm_utils.control_stats(), ensure_ascii=False)}", file=sys.stderr)
     
     return success_count
 
+def bulk_create_fields(field_list):
+    """
+    FMField スニペットを1回貼り付けて一括作成する (計算・集計の追加ダイアログも出ない)。
+    フィールド数の増加で確認し、合わなければ一覧を読み直して不足分だけ1件ずつ GUI で作る。
+    """
+    print(f"--- Bulk Generate (snippet paste): {len(field_list)} fields ---", file=sys.stderr)
+    if not field_list:
+        return {"success": True, "count": 0, "method": "snippet"}
+
+    import set_fm_clipboard
+    import clipboard_writer
+    fm_utils.start_overlay(f"フィールド一括生成: {len(field_list)}件")
+    try:
+        dialog = fm_utils.find_manage_database_dialog()
+        if not dialog:
+            if not fm_utils.ensure_manage_database():
+                return {"success": False, "error": "Manage Database dialog not found."}
+            dialog = fm_utils.find_manage_database_dialog()
+        dialog.set_focus()
+        fm_utils.select_fields_tab(dialog)
+        before_count = fm_utils.read_field_count(dialog)
+        file_name, table = fm_utils.read_table_context(dialog)
+        # 件数が合わなかったときの比較用 (直前に読んだ一覧)
+        before_snapshot = schema_snapshots.latest(file_name, table)
+
+        # 1. スニペットをクリップボードへ登録して1回だけ貼り付ける
+        #    (遅延レンダリング: FileMaker が要求する形式だけを貼り付け時に変換する)
+        fm_utils.update_overlay("クリップボードに登録中...")
+        xml = fm_snippet.build_fields_snippet(field_list)
+        if not set_fm_clipboard.set_fm_xml_clipboard(xml, writer=clipboard_writer.get_writer()):
+            print("  > Clipboard registration failed. Falling back to GUI loop.", file=sys.stderr)
+            fm_utils.stop_overlay()
+            return {"success": True, "count": batch_create_fields(field_list), "method": "gui"}
+
+        grid = fm_utils.get_controls(dialog).require("field_list")
+        grid.set_focus()
+        fm_utils.update_overlay(f"貼り付け中: {len(field_list)}件")
+        pyautogui.hotkey('ctrl', 'v')
+
+        # 2. フィールド数が増えるか、警告が出るまで待つ
+        expected = (before_count or 0) + len(field_list)
+        find_alert = lambda: fm_utils.find_popup(dialog_watcher.ALERT_KINDS)
+        fm_wait.wait_until(lambda: fm_wait.count_reached(lambda: fm_utils.read_field_count(dialog), expected)() or find_alert(),
+                           timeout=max(3.0, 0.05 * len(field_list)), name="snippet_paste")
+        while True:
+            popup = find_alert()
+            if not popup:
+                break
+            print(f"  > Alert after paste: {popup.text or popup.title}. Dismissing...", file=sys.stderr)
+            fm_utils.dialog_window(popup).set_focus()
+            pyautogui.press('enter')
+            if not fm_wait.wait_gone(find_alert, timeout=1.0, name="alert_close"):
+                break
+
+        after_count = fm_utils.read_field_count(dialog)
+        if fm_snippet.count_confirms(before_count, after_count, field_list):
+            fm_utils.update_overlay(f"一括生成完了: {len(field_list)}件")
+            return {"success": True, "count": len(field_list), "method": "snippet"}
+
+        # 3. 件数が合わない: 一覧を読み直して、作られなかったものだけ GUI で作る
+        print(f"  > Field count {before_count} -> {after_count} does not match {len(field_list)}. Checking list...", file=sys.stderr)
+        grid.set_focus()
+        pyautogui.press('home')
+        after_fields = scan_field_list(grid, pyautogui.press, after_count or 0)
+        schema_snapshots.save(file_name, table, after_fields)
+        diff = fm_snippet.check_paste(before_snapshot["fields"] if before_snapshot else [], after_fields, field_list)
+    finally:
+        fm_utils.stop_overlay()
+        print(f"  > [Wait Stats] {json.dumps(fm_wait.summary(), ensure_ascii=False)}", file=sys.stderr)
+
+    missing = [f for f in field_list if f.get("name") in diff["missing"]]
+    gui_count = batch_create_fields(missing) if missing else 0
+    return {"success": True, "count": len(diff["created"]) + gui_count, "method": "snippet+gui",
+            "pasted": len(diff["created"]), "gui": gui_count, "unexpected": diff["unexpected"]}
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         try:
@@ -136,8 +289,11 @@ if __name__ == "__main__":
             if not isinstance(field_list, list):
                 field_list = [field_list]
                 
-            count = batch_create_fields(field_list)
-            print(json.dumps({"success": True, "count": count}))
+            if "--bulk" in sys.argv[2:]:
+                print(json.dumps(bulk_create_fields(field_list)))
+            else:
+                count = batch_create_fields(field_list)
+                print(json.dumps({"success": True, "count": count}))
         except Exception as e:
             print(json.dumps({"success": False, "error": str(e)}))
     else:
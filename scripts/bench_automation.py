@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+import fm_sim
+
+# 疑似 FileMaker (fm_sim) に対して自動操作スクリプトをそのまま動かし、
+# 実時間・UIA 呼び出し回数・キー操作数・想定所要時間 (sleep + UIA 遅延の合計) を測る。
+#
+#   python bench_automation.py                              100 / 1000 / 3000 / 10000 フィールドで全シナリオ
+#   python bench_automation.py --save bench_baseline.json   結果を保存
+#   python bench_automation.py --compare bench_baseline.json
+#       UIA 呼び出し・キー操作・要素ツリーの探索が基準より 10% 以上増えたシナリオを表示して終了コード 1
+# 一覧を辿るシナリオ (SCALED) は、フィールド数に対してキー操作・UIA 呼び出しが線形より速く増えたら終了コード 1
+
+SCENARIOS = ("get_existing_fields", "batch_fix", "batch_create_fields", "reset_fields", "apply_design")
+FIX_COUNT = 20
+CREATE_COUNT = 50
+CREATE_TYPES = ["Text", "Number", "Date", "Calculation", "Text", "Summary"]
+DESIGN_TABLES = 8
+DESIGN_FIELDS = 12
+# フィールド数に比例してよいシナリオと、線形を超えたとみなす倍率の余裕
+SCALED = ("batch_fix", "get_existing_fields")
+SCALING_SLACK = 1.5
+
+def _fixes(n):
+    step = max(n // FIX_COUNT, 1)
+    rows = list(range(0, n, step))[:FIX_COUNT]
+    return [{"old_name": f"field_{r:05d}", "new_name": f"field_{r:05d}_fixed", "new_type": "Number" if i % 2 else None}
+            for i, r in enumerate(rows)]
+
+def _design(sim):
+    """既存テーブル (今のフィールド + 新規 5件) と新しいテーブル DESIGN_TABLES 個の設計"""
+    current = [{"name": f["name"], "type": f["type"]} for f in sim.fields]
+    current += [{"name": f"new_{i:03d}", "type": CREATE_TYPES[i % len(CREATE_TYPES)]} for i in range(5)]
+    tables = [{"name": "Sample", "fields": current}]
+    for t in range(DESIGN_TABLES):
+        tables.append({"name": f"Table_{t:02d}", "fields": [
+            {"name": f"t{t}_f{i:02d}", "type": CREATE_TYPES[i % len(CREATE_TYPES)]} for i in range(DESIGN_FIELDS)]})
+    return {"tables": tables}
+
+def run_scenario(name, n, latency, viewport):
+    sim = fm_sim.FileMakerSim.with_fields(n, latency=latency, viewport=viewport)
+    modules = fm_sim.install(sim)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull), contextlib.redirect_stdout(devnull):
+        if name == "get_existing_fields":
+            result = modules["get_fm_fields"].get_existing_fields()
+            ok = len(result.get("fields", [])) == n
+        elif name == "batch_fix":
+            fixes = _fixes(n)
+            result = modules["field_fixer"].batch_fix(fixes)
+            names = set(sim.field_names())
+            ok = not result.get("errors") and all(f["new_name"] in names for f in fixes)
+        elif name == "batch_create_fields":
+            new = [{"name": f"new_{i:03d}", "type": CREATE_TYPES[i % len(CREATE_TYPES)]} for i in range(CREATE_COUNT)]
+            modules["batch_create_fields"].batch_create_fields(new)
+            ok = len(sim.fields) == n + CREATE_COUNT and not sim.popups
+        elif name == "apply_design":
+            modules["apply_design"].schema_snapshots.SNAPSHOT_DIR = tempfile.mkdtemp(prefix="bench_snapshots_")
+            design = _design(sim)
+            result = modules["apply_design"].apply_design(design)
+            ok = result.get("success") and all(
+                sim.field_names(t["name"]) == [f["name"] for f in t["fields"]] for t in design["tables"])
+        elif name == "reset_fields":
+            modules["reset_fields"].reset_fields()
+            ok = not sim.fields
+        else:
+            raise ValueError(f"Unknown scenario: {name}")
+    wall = time.perf_counter() - start
+    row = {"scenario": name, "fields": n, "ok": ok, "wall_s": round(wall, 3), **sim.stats()}
+    cache = modules["fm_utils"].control_stats()
+    if cache:
+        row["control_cache"] = {"hits": cache["hits"], "misses": cache["misses"], "stale": cache["stale"]}
+    return row
+
+def compare(results, baseline, tolerance=0.10):
+    """UIA 呼び出し・キー操作が基準より増えたものを返す"""
+    base = {(r["scenario"], r["fields"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = base.get((r["scenario"], r["fields"]))
+        if not b:
+            continue
+        for key in ("uia_calls", "key_presses", "tree_searches"):
+            if b[key] and r[key] > b[key] * (1 + tolerance):
+                regressions.append(f"{r['scenario']}@{r['fields']}: {key} {b[key]} -> {r[key]}")
+        if not r["ok"] and b["ok"]:
+            regressions.append(f"{r['scenario']}@{r['fields']}: result check failed")
+    return regressions
+
+def check_scaling(results, scenarios=SCALED, slack=SCALING_SLACK):
+    """隣り合うサイズの間で、キー操作・UIA 呼び出しの増え方がフィールド数の増え方 x slack を超えたものを返す"""
+    problems = []
+    for name in scenarios:
+        rows = sorted((r for r in results if r["scenario"] == name), key=lambda r: r["fields"])
+        for small, large in zip(rows, rows[1:]):
+            growth = large["fields"] / small["fields"]
+            for key in ("key_presses", "uia_calls"):
+                if small[key] and large[key] > small[key] * growth * slack:
+                    problems.append(f"{name}: {key} {small[key]}@{small['fields']} -> {large[key]}@{large['fields']} "
+                                    f"(x{large[key] / small[key]:.1f} for x{growth:.1f} fields)")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,3000,10000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.005, help="UIA 呼び出し1回あたりの想定遅延 (秒, 仮想時間)")
+    parser.add_argument("--viewport", type=int, default=20, help="一覧に同時に表示される行数")
+    parser.add_argument("--save", help="結果を JSON で保存する")
+    parser.add_argument("--compare", help="基準の JSON と比較する")
+    args = parser.parse_args()
+
+    results = []
+    for n in [int(s) for s in args.sizes.split(",")]:
+        for name in args.scenarios.split(","):
+            row = run_scenario(name, n, args.latency, args.viewport)
+            results.append(row)
+            print(json.dumps(row, ensure_ascii=False), file=sys.stderr)
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    regressions = [f"SCALING {line}" for line in check_scaling(results)]
+    regressions += [f"{r['scenario']}@{r['fields']}: result check failed" for r in results if not r["ok"]]
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions += compare(results, json.load(f))
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
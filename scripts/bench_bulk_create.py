@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+
+import fm_sim
+import fm_snippet
+from automation_worker import WorkerClient
+
+# 1件ずつの GUI 作成 (batch_create_fields) と XML スニペットの一括貼り付け (bulk_create_fields) を比較する。
+# 既定は疑似 FileMaker (fm_sim) に対して実際のスクリプトを動かす。一括作成の時間にはスニペットの生成・
+# クリップボードへの登録・貼り付け (FMField の解釈)・フィールド数での確認がすべて含まれる。
+#   wall_s      : 実時間 (スニペット生成やクリップボード変換などの CPU 時間)
+#   simulated_s : 待ち・UIA 遅延の想定時間 (仮想時間)
+#   total_s     : 両者の合計 (実機での所要時間の目安)
+# Windows で FileMaker を開いた状態なら --live で実機を計測する (ベンチ用のフィールドが作成される)。
+
+TYPES = ["Text", "Number", "Date", "Calculation", "Summary"]
+
+def make_fields(prefix, n):
+    return [{"name": f"{prefix}_{i:04d}", "type": TYPES[i % len(TYPES)]} for i in range(n)]
+
+def bench_snippet(n):
+    fields = make_fields("snippet", n)
+    start = time.perf_counter()
+    xml = fm_snippet.build_fields_snippet(fields)
+    return {"fields": n, "xml_bytes": len(xml.encode("utf-8")), "build_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+def bench_sim(n, existing, latency):
+    result = {"fields": n}
+    for method in ("batch_create_fields", "bulk_create_fields"):
+        sim = fm_sim.FileMakerSim.with_fields(existing, latency=latency)
+        modules = fm_sim.install(sim)
+        fields = make_fields(f"bench_{method[:4]}", n)
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+            res = getattr(modules["batch_create_fields"], method)(fields)
+        wall = time.perf_counter() - start
+        count = res if isinstance(res, int) else res.get("count")
+        stats = sim.stats()
+        created = sim.field_names()[existing:]
+        result[method] = {"wall_s": round(wall, 3), "simulated_s": stats["simulated_s"],
+                          "total_s": round(wall + stats["simulated_s"], 3),
+                          "uia_calls": stats["uia_calls"], "key_presses": stats["key_presses"],
+                          "count": count, "method": "gui" if isinstance(res, int) else res.get("method"),
+                          "ok": created == [f["name"] for f in fields]}
+    return result
+
+def bench_live(n):
+    prefix = f"bench{int(time.time())}"
+    result = {"fields": n}
+    with WorkerClient(backend="fm") as client:
+        for method in ("batch_create_fields", "bulk_create_fields"):
+            fields = make_fields(f"{prefix}_{method[:4]}", n)
+            start = time.perf_counter()
+            res = client.call(method, {"fields": fields})
+            result[method] = {"seconds": round(time.perf_counter() - start, 3), "count": res.get("count"),
+                              "method": res.get("method", "gui")}
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,50,200")
+    parser.add_argument("--live", action="store_true", help="実機の FileMaker で計測する")
+    parser.add_argument("--existing", type=int, default=100, help="疑似 FileMaker に最初からあるフィールド数")
+    parser.add_argument("--latency", type=float, default=0.005, help="UIA 呼び出し1回あたりの想定遅延 (秒, 仮想時間)")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.sizes.split(",")]
+    if args.live:
+        create = [bench_live(n) for n in sizes]
+    else:
+        create = [bench_sim(n, args.existing, args.latency) for n in sizes]
+    print(json.dumps({
+        "backend": "fm" if args.live else "sim",
+        "snippet_build": [bench_snippet(n) for n in sizes + [10000]],
+        "create": create,
+    }, indent=2), file=sys.stdout)
+    # 疑似 FileMaker では作られたフィールドの名前と順序まで確かめる
+    failed = [f"{method}@{row['fields']}" for row in create for method in ("batch_create_fields", "bulk_create_fields")
+              if row[method].get("ok") is False]
+    for line in failed:
+        print(f"FAILED {line}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
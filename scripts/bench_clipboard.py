@@ -0,0 +1,64 @@
+import json
+import time
+import argparse
+import tracemalloc
+
+import clipboard_writer
+from clipboard_writer import Payload, MemoryBackend, DEFAULT_FORMATS, FM_SNIPPET_FORMAT
+
+# 従来の方法 (str を受け取り、4形式をすべて毎回変換して登録) と
+# clipboard_writer (UTF-8 のまま受け取り、貼り付け先が要求した形式だけ変換) を比較する。
+# FileMaker への貼り付けで読まれるのは "FileMaker XML Snippet" だけなので、読み出しはその1形式とする。
+
+def make_xml(mb):
+    field = '  <Field datatype="Text" id="0" name="項目_{:06d}">\n    <Storage autoIndex="True" maxRepeat="1" />\n  </Field>\n'
+    parts = ['<FMPXmlSnippet type="FMField">\n']
+    size, i = 0, 0
+    while size < mb * 1024 * 1024:
+        part = field.format(i)
+        parts.append(part)
+        size += len(part.encode("utf-8"))
+        i += 1
+    parts.append("</FMPXmlSnippet>")
+    return "".join(parts).encode("utf-8")
+
+def legacy_write(data):
+    # 旧 set_fm_clipboard と同じ: ファイルを str として読み、全形式を作る
+    xml = data.decode("utf-8")
+    return {
+        "CF_UNICODETEXT": xml,
+        FM_SNIPPET_FORMAT: xml.encode("utf-8"),
+        "CF_TEXT": xml.encode("ascii", "ignore"),
+        "HTML Format": f"<html><body><!--StartFragment-->{xml}<!--EndFragment--></body></html>".encode("utf-8"),
+    }
+
+def writer_write(data):
+    backend = MemoryBackend()
+    clipboard_writer.ClipboardWriter(backend).write_fm_snippet(Payload(data), DEFAULT_FORMATS)
+    backend.get(FM_SNIPPET_FORMAT)
+    return backend
+
+def measure(fn, data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"ms": round(elapsed * 1000, 2), "peak_mb": round(peak / 1024 / 1024, 2)}
+
+def run(mb):
+    data = make_xml(mb)
+    _, legacy = measure(legacy_write, data)
+    backend, lazy = measure(writer_write, data)
+    return {"xml_mb": round(len(data) / 1024 / 1024, 2), "legacy": legacy, "writer": lazy,
+            "rendered_formats": sorted(backend.render_counts)}
+
+if __name__ == "__main__":
+    import io, contextlib
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1,8,32", help="XML サイズ (MB)")
+    args = parser.parse_args()
+    with contextlib.redirect_stderr(io.StringIO()):
+        results = [run(float(mb)) for mb in args.sizes.split(",")]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
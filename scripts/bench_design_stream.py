@@ -0,0 +1,58 @@
+import json
+import time
+import argparse
+
+from json_stream import ArrayItemStreamer
+
+# 設計 JSON をチャンクで受け取る偽ストリームで、
+# 「全体を待ってから解析」と「逐次解析」の最初のテーブルが使えるまでの時間を比較する。
+
+def make_design(tables, fields):
+    return {
+        "thoughts": ["要望を整理しています", "テーブルを分割します"],
+        "tables": [{"name": f"テーブル{t}", "fields": [{"name": f"項目{t}_{i}", "type": "Text"} for i in range(fields)]}
+                   for t in range(tables)],
+        "layouts": [{"name": f"レイアウト{t}", "table": f"テーブル{t}", "elements": []} for t in range(tables)],
+    }
+
+def fake_stream(text, chunk_chars, delay):
+    for i in range(0, len(text), chunk_chars):
+        time.sleep(delay)
+        yield text[i:i + chunk_chars]
+
+def run(tables, fields, chunk_chars, delay):
+    text = json.dumps(make_design(tables, fields), ensure_ascii=False, indent=2)
+
+    start = time.perf_counter()
+    whole = "".join(fake_stream(text, chunk_chars, delay))
+    json.loads(whole)["tables"][0]
+    blocking = time.perf_counter() - start
+
+    start = time.perf_counter()
+    streamer = ArrayItemStreamer()
+    first_table = None
+    events = 0
+    for chunk in fake_stream(text, chunk_chars, delay):
+        for key, index, value in streamer.feed(chunk):
+            events += 1
+            if key == "tables" and first_table is None:
+                first_table = time.perf_counter() - start
+    total = time.perf_counter() - start
+
+    return {
+        "tables": tables,
+        "response_chars": len(text),
+        "blocking_first_table_s": round(blocking, 3),
+        "streaming_first_table_s": round(first_table, 3),
+        "streaming_total_s": round(total, 3),
+        "events": events,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tables", default="3,10")
+    parser.add_argument("--fields", type=int, default=12)
+    parser.add_argument("--chunk-chars", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.01, help="チャンク間隔 (秒)")
+    args = parser.parse_args()
+    print(json.dumps([run(int(t), args.fields, args.chunk_chars, args.delay) for t in args.tables.split(",")], indent=2))
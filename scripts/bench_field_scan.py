@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import argparse
+import contextlib
+
+from field_list_scan import scan_field_list, read_field_row, HEADER_NAMES
+from field_seek import FieldIndex, seek_field
+
+# 合成 DataGrid (仮想化された DataItem) に対するフィールド一覧読み取りのベンチマーク。
+# 旧実装 (1行ずつ Down + any() による重複判定) と scan_field_list、
+# および field_fixer の Home→Down 探索とインデックスシークを比較する。
+
+class _Node:
+    def __init__(self, grid, text="", children=None):
+        self._grid = grid
+        self._text = text
+        self._children = children or []
+
+    def window_text(self):
+        self._grid.calls += 1
+        return self._text
+
+    def click_input(self):
+        self._grid.calls += 1
+
+    def children(self, control_type=None):
+        self._grid.calls += 1
+        return self._children
+
+    def descendants(self, control_type=None):
+        self._grid.calls += 1
+        return [c for c in self._children if c._text]
+
+class _Info:
+    def __init__(self, row):
+        self.runtime_id = (42, row)
+
+class _Item(_Node):
+    def __init__(self, grid, row, name, f_type):
+        cells = [_Node(grid, "", [_Node(grid, name)]), _Node(grid, "", [_Node(grid, f_type)])]
+        super().__init__(grid, f"並べ替え {name} {f_type}", cells)
+        self.element_info = _Info(row)
+        self._row = row
+
+    def select(self):
+        self._grid.calls += 1
+        self._grid.selected = self._row
+
+    def click_input(self):
+        self._grid.calls += 1
+
+class SyntheticGrid:
+    """表示行数 viewport の仮想化グリッド。見えている行だけ DataItem を返す"""
+
+    def __init__(self, n_rows, viewport=20, latency=0.0):
+        self.rows = [(f"field_{i:05d}", "テキスト") for i in range(n_rows)]
+        self.viewport = viewport
+        self.latency = latency
+        self.selected = 0
+        self.top = 0
+        self.calls = 0
+        self.keys = 0
+
+    def _item(self, row):
+        name, f_type = self.rows[row]
+        return _Item(self, row, name, f_type)
+
+    def children(self, control_type=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        end = min(self.top + self.viewport, len(self.rows))
+        return [self._item(r) for r in range(self.top, end)]
+
+    def descendants(self, control_type=None):
+        return self.children(control_type)
+
+    def press(self, key):
+        self.keys += 1
+        last = len(self.rows) - 1
+        if key == "home":
+            self.selected = 0
+        elif key == "end":
+            self.selected = last
+        elif key == "down":
+            self.selected = min(self.selected + 1, last)
+        elif key == "up":
+            self.selected = max(self.selected - 1, 0)
+        elif key == "pageup":
+            if self.selected > self.top:
+                self.selected = self.top
+            else:
+                self.selected = max(self.selected - self.viewport + 1, 0)
+        elif key == "pagedown":
+            # Windows のリストと同様、まず画面下端へ、下端なら1画面分スクロール
+            bottom = min(self.top + self.viewport - 1, last)
+            self.selected = bottom if self.selected < bottom else min(self.selected + self.viewport - 1, last)
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + self.viewport:
+            self.top = self.selected - self.viewport + 1
+
+def legacy_scan(grid, total_expected):
+    """旧 get_existing_fields のループ (比較用)"""
+    ordered_fields = []
+    max_loops = max(total_expected * 2, 20) if total_expected > 0 else 100
+    for i in range(max_loops):
+        for item in grid.descendants(control_type="DataItem"):
+            n_text, t_text = read_field_row(item)
+            if n_text and not any(f["name"] == n_text for f in ordered_fields):
+                if n_text not in HEADER_NAMES:
+                    ordered_fields.append({"name": n_text, "type": t_text})
+        if total_expected > 0 and len(ordered_fields) >= total_expected:
+            break
+        grid.press("down")
+    return ordered_fields
+
+def run_case(n_rows, use_legacy):
+    grid = SyntheticGrid(n_rows)
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(open(os.devnull, "w")):
+        if use_legacy:
+            fields = legacy_scan(grid, n_rows)
+        else:
+            fields = scan_field_list(grid, grid.press, n_rows, settle=0)
+    elapsed = time.perf_counter() - start
+    assert len(fields) == n_rows, f"collected {len(fields)} / {n_rows}"
+    return {"rows": n_rows, "wall_ms": round(elapsed * 1000, 2), "uia_calls": grid.calls, "key_presses": grid.keys}
+
+def legacy_select(grid, field_name):
+    """旧 select_field_by_name の探索 (比較用)"""
+    grid.press("home")
+    for i in range(300):
+        for item in grid.descendants(control_type="DataItem"):
+            if read_field_row(item)[0] == field_name:
+                item.select()
+                return True
+        grid.press("down")
+    return False
+
+def run_seek_case(n_rows, n_targets, use_legacy):
+    grid = SyntheticGrid(n_rows)
+    # 200件のリネーム相当。旧実装はランダム順、新実装は sweep_order で上から下へ
+    step = max(n_rows // n_targets, 1)
+    targets = [grid.rows[i][0] for i in range(0, n_rows, step)][:n_targets]
+    fixes = [{"old_name": name} for name in reversed(targets)]
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(open(os.devnull, "w")):
+        if use_legacy:
+            found = sum(legacy_select(grid, f["old_name"]) for f in fixes)
+        else:
+            index = FieldIndex([r[0] for r in grid.rows])
+            found = sum(seek_field(grid, index, f["old_name"], grid.press, settle=0) for f in index.sweep_order(fixes))
+    elapsed = time.perf_counter() - start
+    return {"rows": n_rows, "targets": len(fixes), "found": found, "wall_ms": round(elapsed * 1000, 2),
+            "uia_calls": grid.calls, "key_presses": grid.keys}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--legacy-max", type=int, default=1000, help="旧実装を計測する最大行数 (二乗時間のため)")
+    args = parser.parse_args()
+
+    results = []
+    for n in [int(x) for x in args.sizes.split(",")]:
+        row = {"scan": run_case(n, False), "seek": run_seek_case(n, 200, False)}
+        if n <= args.legacy_max:
+            row["legacy_scan"] = run_case(n, True)
+            row["legacy_seek"] = run_seek_case(n, 200, True)
+        results.append(row)
+    print(json.dumps(results, indent=2))
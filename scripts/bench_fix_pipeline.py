@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+import fm_sim
+import suggest_chunks
+
+# run_field_fix の「提案 → 適用」を、順番に実行した場合とパイプライン (fix_pipeline) で比べる。
+# GUI は疑似 FileMaker (fm_sim) を実時間で、AI は応答時間がフィールド数に比例する偽モデルで動かす。
+# どちらも --scale 倍に縮めて待つ (0.01 なら 1/100)。報告する時間は縮める前の値に戻している。
+#
+#   python bench_fix_pipeline.py --fields 300
+
+FIX_RATIO = 3          # 3件に1件を改名する
+
+def fake_model(scale, base_s, per_field_s):
+    def fetch(chunk):
+        time.sleep((base_s + per_field_s * len(chunk)) * scale)
+        return [{"old_name": f["name"], "new_name": f"{f['name']}_renamed", "new_type": f["type"],
+                 "should_fix": int(f["name"].rsplit("_", 1)[-1]) % FIX_RATIO == 0} for f in chunk]
+    return fetch
+
+def fake_stream(fetch, first_tokens):
+    """suggest_field_fix.stream_field_fix と同じ形 (API を呼ぶ代わりに fetch)"""
+    def stream(current_fields, context=""):
+        chunks = suggest_chunks.chunk_fields(current_fields, first_tokens=first_tokens)
+        taken = suggest_chunks.reserve_names(current_fields)
+        for i, result, error in suggest_chunks.iter_chunks(chunks, fetch):
+            yield {"index": i, "total": len(chunks), "error": error,
+                   "suggestions": suggest_chunks.merge_chunk(chunks[i], result, taken)}
+    return stream
+
+def setup(n, scale, latency):
+    sim = fm_sim.FileMakerSim.with_fields(n, latency=latency, virtual_time=False, time_scale=scale)
+    modules = fm_sim.install(sim)
+    current = [{"name": f["name"], "type": f["type"]} for f in sim.fields]
+    return sim, modules, current
+
+def renamed_ok(sim, n):
+    names = set(sim.field_names())
+    return all((f"field_{i:05d}_renamed" in names) == (i % FIX_RATIO == 0) for i in range(n))
+
+def run_sequential(n, scale, latency, fetch, first_tokens):
+    sim, modules, current = setup(n, scale, latency)
+    start = time.perf_counter()
+    fixes = [row for chunk in fake_stream(fetch, first_tokens)(current) for row in chunk["suggestions"]
+             if row["should_fix"]]
+    ai_s = time.perf_counter() - start
+    result = modules["field_fixer"].batch_fix(fixes, current_fields=current)
+    total = time.perf_counter() - start
+    return {"mode": "sequential", "ok": result["success"] and renamed_ok(sim, n), "fixes": len(fixes),
+            "ai_s": round(ai_s / scale, 1), "gui_s": round((total - ai_s) / scale, 1), "total_s": round(total / scale, 1)}
+
+def run_pipeline(n, scale, latency, fetch, first_tokens):
+    import fix_pipeline
+    sim, modules, current = setup(n, scale, latency)
+    result = fix_pipeline.run_field_fix(current, stream=fake_stream(fetch, first_tokens))
+    st = result["stages"]
+    return {"mode": "pipeline", "ok": result["success"] and renamed_ok(sim, n), "fixes": result["applied"]["succeeded"],
+            "ai_s": round(st["produce_s"] / scale, 1), "gui_s": round(st["consume_s"] / scale, 1),
+            "total_s": round(st["total_s"] / scale, 1), "first_chunk_s": round(st["first_chunk_s"] / scale, 1),
+            "gui_wait_s": round(st["consumer_wait_s"] / scale, 1), "ai_blocked_s": round(st["producer_blocked_s"] / scale, 1),
+            "chunks": st["chunks"], "max_depth": st["max_depth"], "mean_depth": st["mean_depth"]}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fields", type=int, default=300)
+    parser.add_argument("--scale", type=float, default=0.01)
+    parser.add_argument("--latency", type=float, default=0.005, help="UIA 呼び出し1回の遅延 (秒, 縮める前)")
+    parser.add_argument("--ai-base", type=float, default=4.0, help="AI 1回あたりの固定の応答時間 (秒)")
+    parser.add_argument("--ai-per-field", type=float, default=1.0, help="AI のフィールド1件あたりの応答時間 (秒)")
+    parser.add_argument("--first-tokens", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("CLUBMAKER_JOURNAL_DIR", tempfile.mkdtemp(prefix="bench_journal_"))
+    fetch = fake_model(args.scale, args.ai_base, args.ai_per_field)
+    rows = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+        rows.append(run_sequential(args.fields, args.scale, args.latency, fetch, args.first_tokens))
+        rows.append(run_pipeline(args.fields, args.scale, args.latency, fetch, args.first_tokens))
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False), file=sys.stderr)
+    seq, pipe = rows
+    print(json.dumps({"fields": args.fields, "sequential_s": seq["total_s"], "pipeline_s": pipe["total_s"],
+                      "max_ai_gui_s": max(seq["ai_s"], seq["gui_s"]),
+                      "speedup": round(seq["total_s"] / pipe["total_s"], 2) if pipe["total_s"] else None}))
@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# 1リクエスト1プロセスで動くスクリプトの import 時間を python -X importtime で測る。
+# - スクリプトごとの予算 (ms, 累計) を超えたら失敗
+# - 重い依存 (pywinauto, pyautogui, cv2, google.genai, dotenv ...) が読み込み時に import されていたら失敗
+#   (lazy_import で最初に使うときまで遅らせる約束)
+# - --verbose で -X importtime と同じ形の内訳 (累計の大きい順) を出す
+#
+#   python bench_import_time.py                 全スクリプトを5回ずつ測り、最小値で判定 (超えたら終了コード 1)
+#   (他のプロセスの影響は時間を増やす方向にしか出ないので、中央値より最小値のほうが安定する)
+#   python bench_import_time.py --verbose --only fm_utils
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# スクリプト -> 予算 (ms)。ワーカーと、Next.js の API から直接起動されるもの
+BUDGET_MS = {
+    "automation_worker": 60,
+    "launch_fm": 40,
+    "automate_action": 40,
+    "create_field_gui": 40,
+    "finalize_fm_dialog": 40,
+    "set_fm_clipboard": 25,
+    "run_field_fix": 60,
+    "generate_design_ai": 40,
+    "suggest_field_fix": 40,
+    "get_fm_fields": 50,
+    "batch_create_fields": 50,
+    "field_fixer": 40,
+    "apply_design": 50,
+}
+
+# 読み込み時に import してはいけない依存 (最初に使うときに lazy_import で読む)
+HEAVY = ("pywinauto", "pyautogui", "pygetwindow", "pyperclip", "cv2", "numpy", "PIL", "google", "dotenv",
+         "win32clipboard", "win32con", "comtypes")
+
+def parse_importtime(stderr):
+    """-X importtime の出力を [(名前, 深さ, self_us, cumulative_us)] にする"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(parts[0]), int(parts[1])))
+    return rows
+
+def measure(module, python=sys.executable):
+    proc = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], cwd=HERE,
+                          capture_output=True, text=True, timeout=60)
+    rows = parse_importtime(proc.stderr)
+    ok = proc.returncode == 0
+    top = next((r for r in reversed(rows) if r[0] == module), None)
+    return {"ok": ok, "cumulative_ms": top[3] / 1000 if top else None, "rows": rows,
+            "error": None if ok else proc.stderr.strip().splitlines()[-1:]}
+
+def breakdown(rows, module, limit=15):
+    """module の下で読み込まれたものを累計の大きい順に -X importtime と同じ形で返す"""
+    lines = [f"{'self [us]':>10} | {'cumulative':>10} | imported package"]
+    for name, depth, self_us, cum_us in sorted(rows, key=lambda r: -r[3])[:limit]:
+        lines.append(f"{self_us:>10} | {cum_us:>10} | {'  ' * depth}{name}")
+    return "\n".join(lines)
+
+def run(modules, repeat):
+    results = []
+    for module in modules:
+        runs = [measure(module) for _ in range(repeat)]
+        times = [r["cumulative_ms"] for r in runs if r["cumulative_ms"] is not None]
+        last = runs[-1]
+        heavy = sorted({name for name, _, _, _ in last["rows"] if name.split(".")[0] in HEAVY})
+        median = round(statistics.median(times), 2) if times else None
+        best = round(min(times), 2) if times else None
+        budget = BUDGET_MS.get(module)
+        results.append({
+            "module": module,
+            "ok": last["ok"] and not heavy and (best is not None and (budget is None or best <= budget)),
+            "median_ms": median,
+            "min_ms": best,
+            "budget_ms": budget,
+            "modules_imported": len(last["rows"]),
+            "heavy_imports": heavy,
+            "error": last["error"],
+            "_rows": last["rows"],
+        })
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="カンマ区切りのスクリプト名")
+    parser.add_argument("--verbose", action="store_true", help="-X importtime 形式の内訳を出す")
+    args = parser.parse_args()
+
+    modules = args.only.split(",") if args.only else list(BUDGET_MS)
+    results = run(modules, args.repeat)
+    for r in results:
+        rows = r.pop("_rows")
+        print(json.dumps(r, ensure_ascii=False))
+        if args.verbose:
+            print(breakdown(rows, r["module"]), file=sys.stderr)
+    failed = [r["module"] for r in results if not r["ok"]]
+    if failed:
+        print(f"Over budget or eager heavy imports: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,162 @@
+import re
+import json
+import time
+import argparse
+
+import json_extract
+import response_schema
+import generate_design_ai
+import suggest_chunks
+
+# モデルの応答でよくある崩れ (説明文・コードブロック・複数の JSON・末尾のカンマ・コメント・
+# カンマの抜け・"false" のような文字列の真偽値) を含む応答を作り、
+# 以前の取り出し方 (正規表現 / コードブロックの分割) と json_extract + response_schema を比べる。
+# 以前の方法で失敗した応答は、そのままモデルへの再問い合わせ (別のキー / チャンクの再試行) になる。
+#
+#   python bench_json_extract.py                 崩れ方ごとの成否と、応答サイズごとの時間
+
+def legacy_parse_design(text):
+    text = text.strip()
+    m = re.search(r'\{.*\}', text, re.DOTALL)
+    if m:
+        text = m.group(0)
+    data = json.loads(text)
+    if isinstance(data, list):
+        data = {"tables": data}
+    elif "design" in data and "tables" in data["design"]:
+        data = data["design"]
+    return data
+
+def legacy_parse_suggestions(text):
+    text = text.strip()
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0].strip()
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get("suggestions", data.get("fields"))
+    if not isinstance(data, list):
+        raise ValueError("suggestions is not a JSON array")
+    return data
+
+def make_design(tables, fields=8):
+    return {
+        "thoughts": ["顧客と注文を分けて管理します", "一覧を上部に配置します"],
+        "tables": [{"name": f"Table{t}", "fields": [{"name": f"field_{t}_{i}", "type": "Text"} for i in range(fields)]}
+                   for t in range(tables)],
+        "layouts": [{"name": f"Layout{t}", "table": f"Table{t}", "type": "form",
+                     "style": {"primaryColor": "#7C3AED", "accentColor": "#22D3EE", "theme": "dark"},
+                     "elements": [{"field": f"field_{t}_{i}", "label": f"項目{i}", "grid": {"x": (i % 3) * 4, "y": i // 3, "w": 4, "h": 1}}
+                                  for i in range(fields)]}
+                    for t in range(tables)],
+    }
+
+def make_suggestions(n):
+    # should_fix が False の行は名前も変えない (欠けた should_fix は変更の有無から決まるので、それと食い違わないように)
+    return [{"old_name": f"f{i}", "new_name": f"項目{i}" if i % 2 == 0 else f"f{i}", "new_type": "Text", "comment": "",
+             "should_fix": i % 2 == 0}
+            for i in range(n)]
+
+def _pretty(value):
+    return json.dumps(value, ensure_ascii=False, indent=2)
+
+def design_variants(design):
+    text = _pretty(design)
+    return {
+        "clean": text,
+        "fenced": f"```json\n{text}\n```",
+        "prose_around": f"以下が設計です。\n{text}\nご不明点があれば {{質問}} をどうぞ。",
+        "example_before": f'例えば {{"name": "sample"}} のような形式です。\n```json\n{text}\n```',
+        "two_objects": f"{text}\n\n補足の設定:\n{json.dumps({'note': 'optional'})}",
+        "trailing_commas": re.sub(r'(\]|\}|")(\s*\n\s*[\]}])', r'\1,\2', text),
+        "comments": text.replace('"tables": [', '"tables": [ // テーブル一覧\n', 1),
+        "missing_comma": text.replace('},\n', '}\n', 3),
+        "raw_newline_in_string": text.replace("顧客と注文を", "顧客と注文を\n", 1),
+    }
+
+def suggestion_variants(rows):
+    text = _pretty(rows)
+    no_flag = [{k: v for k, v in r.items() if k != "should_fix" or v} for r in rows]
+    string_flags = [{**r, "should_fix": "true" if r["should_fix"] else "false"} for r in rows]
+    return {
+        "clean": text,
+        "fenced": f"```json\n{text}\n```",
+        "prose_after": f"{text}\n\n注: [1] 型は推定です。",
+        "two_fences": f"```\n# 説明\n```\n```json\n{text}\n```",
+        "wrapped_dict": json.dumps({"suggestions": rows}, ensure_ascii=False),
+        "trailing_commas": re.sub(r'(\}|"|true|false)(\s*\n\s*[\]}])', r'\1,\2', text),
+        "missing_should_fix": _pretty(no_flag),
+        "string_should_fix": f"```json\n{_pretty(string_flags)}\n```",
+    }
+
+def design_ok(parse, text, expected):
+    try:
+        data = parse(text)
+    except Exception:
+        return False
+    return isinstance(data, dict) and len(data.get("tables") or []) == expected
+
+def suggestions_ok(parse, text, rows):
+    # suggest_chunks._merge_row と同じく bool(should_fix) で判定する ("false" を True と読んだら誤り)
+    try:
+        data = parse(text)
+    except Exception:
+        return False
+    return (len(data) == len(rows) and
+            all(bool(d.get("should_fix", False)) == r["should_fix"] for d, r in zip(data, rows)))
+
+def best_ms(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None or elapsed < best else best
+    return round(best, 3)
+
+def run_variants():
+    design = make_design(5)
+    rows = make_suggestions(20)
+    results = []
+    for name, text in design_variants(design).items():
+        results.append({"kind": "design", "variant": name,
+                        "legacy": design_ok(legacy_parse_design, text, 5),
+                        "new": design_ok(generate_design_ai.parse_design, text, 5)})
+    for name, text in suggestion_variants(rows).items():
+        results.append({"kind": "suggestions", "variant": name,
+                        "legacy": suggestions_ok(legacy_parse_suggestions, text, rows),
+                        "new": suggestions_ok(suggest_chunks.parse_suggestions, text, rows)})
+    return results
+
+def run_sizes(sizes):
+    rows = []
+    for tables in sizes:
+        text = "以下が設計です。\n```json\n" + _pretty(make_design(tables, 20)) + "\n```\n"
+        mb = len(text.encode("utf-8")) / 1e6
+        legacy = best_ms(lambda: legacy_parse_design(text))
+        extract = best_ms(lambda: json_extract.extract_all(text))
+        data = json_extract.extract(text)
+        validate = best_ms(lambda: response_schema.validate_design(json.loads(json.dumps(data))), 3)
+        copy_ms = best_ms(lambda: json.loads(json.dumps(data)), 3)
+        rows.append({"tables": tables, "mb": round(mb, 3), "legacy_ms": legacy, "extract_ms": extract,
+                     "extract_ms_per_mb": round(extract / mb, 1),
+                     "validate_ms": round(max(validate - copy_ms, 0), 3)})
+    return rows
+
+if __name__ == "__main__":
+    import contextlib, os
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,100,1000,4000", help="設計のテーブル数 (1テーブル約 4KB)")
+    args = parser.parse_args()
+
+    # parse_design の補正ログは stderr に出るので捨てる
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+        variants = run_variants()
+        sizes = run_sizes([int(s) for s in args.sizes.split(",")])
+    print(json.dumps({
+        "variants": variants,
+        "legacy_failures": sum(1 for v in variants if not v["legacy"]),
+        "new_failures": sum(1 for v in variants if not v["new"]),
+        "sizes": sizes,
+    }, ensure_ascii=False, indent=2))
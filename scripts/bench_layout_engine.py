@@ -0,0 +1,122 @@
+import io
+import os
+import re
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+import fm_layout
+
+# 大きな生成レイアウトで、fm_layout (NumPy でまとめて座標計算 + XML を分割して yield) と、
+# fm-xml.ts の generateLayoutXML をそのまま Python に移した要素ごとの文字列連結を比べる。
+# 座標が一致すること (小数点以下2桁で丸めた範囲) も確認する。
+#
+#   python bench_layout_engine.py --sizes 1000,10000,50000
+
+THEMES = ["dark", "light", "glass"]
+TYPES = ["form", "dashboard", "list"]
+
+def make_layout(n, kind="form", seed=0):
+    """12 カラムに左から詰めた n 要素のレイアウト"""
+    rng = random.Random(seed)
+    elements, x, y = [], 0, 0
+    for i in range(n):
+        w = rng.choice([2, 3, 4, 6])
+        h = rng.choice([1, 1, 1, 2])
+        if x + w > fm_layout.COLUMNS:
+            x, y = 0, y + 2
+        elements.append({"field": f"field_{i:05d}", "label": f"項目 {i} <&>", "grid": {"x": x, "y": y, "w": w, "h": h}})
+        x += w
+    return {"name": f"Bench{n}", "table": "Bench", "type": kind,
+            "style": {"primaryColor": "#7C3AED", "accentColor": "#22D3EE", "theme": rng.choice(THEMES)},
+            "elements": elements}
+
+def _escape(s):
+    return (s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            .replace('"', "&quot;").replace("'", "&apos;"))
+
+def naive_layout_xml(layout):
+    """generateLayoutXML (src/lib/fm-xml.ts) と同じ処理: 要素ごとに座標を計算して文字列を連結する"""
+    xml = '<FMPXmlSnippet type="LayoutObjectList">\n'
+    for el in layout["elements"]:
+        g = el["grid"]
+        left = g["x"] * 80 + 20
+        top = g["y"] * 60 + 20
+        width = g["w"] * 80 - 10
+        height = g["h"] * 60 - 10
+        xml += '  <LayoutObject type="Text">\n'
+        xml += f'    <Bounds top="{top}" left="{left}" bottom="{top + 20}" right="{left + width / 3}" />\n'
+        xml += f'    <TextContent>{_escape(el["label"])}</TextContent>\n'
+        xml += '  </LayoutObject>\n'
+        field_left = left + width / 3 + 10
+        xml += '  <LayoutObject type="Field">\n'
+        xml += f'    <Bounds top="{top}" left="{field_left}" bottom="{top + height}" right="{left + width}" />\n'
+        xml += f'    <FieldReference name="{el["field"]}" table="{layout["table"]}" />\n'
+        xml += '  </LayoutObject>\n'
+    return xml + '</FMPXmlSnippet>'
+
+_BOUNDS = re.compile(r'<Bounds top="([^"]+)" left="([^"]+)" bottom="([^"]+)" right="([^"]+)"')
+
+def bounds_match(a, b):
+    ba, bb = _BOUNDS.findall(a), _BOUNDS.findall(b)
+    return len(ba) == len(bb) and all(abs(float(x) - float(y)) <= 0.005 for ra, rb in zip(ba, bb) for x, y in zip(ra, rb))
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None or elapsed < best else best
+    return out, best
+
+def peak_kb(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(peak / 1024)
+
+def run(n, repeat):
+    layout = make_layout(n)
+    layout["type"] = "form"     # 比較は fm-xml.ts と同じ配置 (ラベルが左) で行う
+
+    def stream():
+        with open(os.devnull, "w", encoding="utf-8") as out:
+            return fm_layout.write_layout_snippet(layout, out)
+
+    naive, naive_s = timed(lambda: naive_layout_xml(layout), repeat)
+    plan, plan_s = timed(lambda: fm_layout.plan_layout(layout), repeat)
+    _, stream_s = timed(stream, repeat)
+    built, build_s = timed(lambda: fm_layout.build_layout_snippet(layout), repeat)
+    types = {}
+    for kind in TYPES:
+        layout["type"] = kind
+        _, types[kind] = timed(stream, 1)
+    layout["type"] = "form"
+    return {
+        "elements": n,
+        "ok": bounds_match(naive, built),
+        "naive_ms": round(naive_s * 1000, 1),
+        "plan_ms": round(plan_s * 1000, 1),
+        "stream_ms": round(stream_s * 1000, 1),
+        "build_ms": round(build_s * 1000, 1),
+        "speedup": round(naive_s / stream_s, 2),
+        "elements_per_s": round(n / stream_s),
+        "stream_ms_by_type": {k: round(v * 1000, 1) for k, v in types.items()},
+        "xml_kb": round(len(built.encode("utf-8")) / 1024),
+        "naive_peak_kb": peak_kb(lambda: naive_layout_xml(layout)),
+        "stream_peak_kb": peak_kb(stream),
+        "size": plan.size(),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = [run(int(n), args.repeat) for n in args.sizes.split(",")]
+    print(json.dumps(results, ensure_ascii=False, indent=2))
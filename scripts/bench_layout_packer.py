@@ -0,0 +1,84 @@
+import json
+import time
+import random
+import argparse
+import itertools
+
+import fm_layout
+import layout_packer
+
+# AI が返しがちな崩れたレイアウト (行の中の重なり・空いた行) を作り、
+# layout_packer の検出と詰め直しの時間、解消後の重なり・読む順番・行数を調べる。
+# 既定 (compact) は空いた行も詰めるので、その下の要素は全て移動に数えられる。no_compact は重なりの解消だけの移動。
+# 検出は要素の全ての組を比べる方法 (O(n^2)) とも比べる (--brute-max 件まで)。
+#
+#   python bench_layout_packer.py --sizes 100,300,1000,5000
+
+def make_elements(n, overlap_ratio=0.2, hole_ratio=0.1, seed=0):
+    rng = random.Random(seed)
+    elements, x, y, row_h = [], 0, 0, 1
+    for i in range(n):
+        w = rng.choice([2, 3, 4, 6])
+        h = rng.choice([1, 1, 1, 2])
+        if x + w > fm_layout.COLUMNS:
+            x, y, row_h = 0, y + row_h + (1 if rng.random() < hole_ratio else 0), 1
+        row_h = max(row_h, h)
+        gx = x
+        if rng.random() < overlap_ratio:
+            # 左の要素に食い込ませる / 同じ位置に重ねる
+            gx = max(0, x - rng.randint(1, 3))
+        elements.append({"field": f"field_{i:05d}", "label": f"項目{i}", "grid": {"x": gx, "y": y, "w": w, "h": h}})
+        x += w
+    return elements
+
+def brute_overlaps(grid):
+    boxes = grid.astype(int).tolist()
+    return [(i, j) for (i, a), (j, b) in itertools.combinations(enumerate(boxes), 2)
+            if a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]]
+
+def best_ms(fn, repeat):
+    best, out = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None or elapsed < best else best
+    return out, round(best, 2)
+
+def run(n, repeat, brute_max):
+    grid = fm_layout.grid_array(make_elements(n))
+    overlaps, detect_ms = best_ms(lambda: layout_packer.find_overlaps(grid), repeat)
+    (packed, report), pack_ms = best_ms(lambda: layout_packer.pack(grid), repeat)
+    # compact=False: 空いた行は残し、重なりを避けるための移動だけにする
+    (_, kept), keep_ms = best_ms(lambda: layout_packer.pack(grid, compact=False), repeat)
+    row = {
+        "elements": n,
+        "overlaps_before": len(overlaps),
+        "overlaps_after": report["overlaps_after"],
+        "order_preserved": layout_packer.reading_order(packed).tolist() == layout_packer.reading_order(grid).tolist(),
+        "moved": report["moved"],
+        "wrapped": report["wrapped"],
+        "rows_before": report["rows_before"],
+        "rows_after": report["rows_after"],
+        "max_distance_pt": report["max_distance_pt"],
+        "detect_ms": detect_ms,
+        "pack_ms": pack_ms,   # 前後の重なりの検出を含む
+        "no_compact": {"moved": kept["moved"], "rows_after": kept["rows_after"],
+                       "overlaps_after": kept["overlaps_after"], "pack_ms": keep_ms},
+    }
+    if n <= brute_max:
+        brute, brute_ms = best_ms(lambda: brute_overlaps(grid), 1)
+        row["brute_detect_ms"] = brute_ms
+        row["detect_matches_brute"] = brute == overlaps
+    return row
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,300,1000,5000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--brute-max", type=int, default=1000)
+    args = parser.parse_args()
+
+    layout_packer.find_overlaps(fm_layout.grid_array(make_elements(10)))   # NumPy の import を測定に含めない
+    results = [run(int(n), args.repeat, args.brute_max) for n in args.sizes.split(",")]
+    print(json.dumps(results, ensure_ascii=False, indent=2))
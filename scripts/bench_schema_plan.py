@@ -0,0 +1,60 @@
+import json
+import time
+import random
+import argparse
+
+import schema_planner
+
+# 現在のテーブルを少しだけ変えた設計 (一部改名・型変更・追加) に対して、
+# 「同名が無ければ作成」する従来の反映と差分プランナーを比較する。
+# 従来の方法は改名を新規作成として扱うため古いフィールドが残り、型変更は反映されない。
+
+TYPES = ["テキスト", "数値", "日付", "タイムスタンプ"]
+EN_TYPES = {"テキスト": "Text", "数値": "Number", "日付": "Date", "タイムスタンプ": "Timestamp"}
+
+def make_case(n, rename_ratio=0.1, retype_ratio=0.05, new_ratio=0.05, seed=0):
+    rng = random.Random(seed)
+    current = [{"name": f"項目{i:04d}_名称", "type": TYPES[i % len(TYPES)]} for i in range(n)]
+    target = []
+    expected = {"rename": 0, "retype": 0, "create": 0}
+    for f in current:
+        t = {"name": f["name"], "type": EN_TYPES[f["type"]]}
+        r = rng.random()
+        if r < rename_ratio:
+            t["name"] = f["name"].replace("_名称", "_表示名称")
+            expected["rename"] += 1
+        elif r < rename_ratio + retype_ratio:
+            t["type"] = "Text" if t["type"] != "Text" else "Number"
+            expected["retype"] += 1
+        target.append(t)
+    for i in range(int(n * new_ratio)):
+        target.append({"name": f"新規{i:03d}", "type": "Text"})
+        expected["create"] += 1
+    return current, target, expected
+
+def legacy_creates(current, target):
+    names = {f["name"] for f in current}
+    return sum(1 for t in target if t["name"] not in names)
+
+def run(n):
+    current, target, expected = make_case(n)
+    start = time.perf_counter()
+    ops = schema_planner.plan(current, target)
+    elapsed = time.perf_counter() - start
+    summary = schema_planner.summarize(ops)
+    return {
+        "fields": n,
+        "legacy_creates": legacy_creates(current, target),
+        "legacy_stale_fields_left": expected["rename"],
+        "legacy_missed_retypes": expected["retype"],
+        "planned_gui_ops": summary["rename"] + summary["retype"] + summary["create"],
+        "planned_skips": summary["skip"],
+        "expected": expected,
+        "plan_ms": round(elapsed * 1000, 1),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="50,200,500")
+    args = parser.parse_args()
+    print(json.dumps([run(int(n)) for n in args.sizes.split(",")], indent=2, ensure_ascii=False))
@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+from PIL import Image, ImageDraw
+
+import screenshot_store
+
+# 旧 capture_screen (撮影のたびに同期で PNG を保存、削除なし、一覧は全ファイルを stat) と
+# ScreenshotStore (変化なしは保存しない、書き出しは裏のスレッド、index.json、保持上限) を比較する。
+# 画面は合成画像。自動操作中の撮影を想定し、約半数は直前とほぼ同じ画面 (カーソル点滅程度の差) にする。
+
+def make_frames(n, size, unchanged_ratio, seed=0):
+    rng = random.Random(seed)
+    frames, base, dialogs = [], None, 0
+    for i in range(n):
+        if base is None or rng.random() >= unchanged_ratio:
+            # ダイアログが開いた・一覧が変わったなどの大きな変化
+            dialogs += 1
+            base = Image.new("RGB", size, (235, 235, 235))
+            draw = ImageDraw.Draw(base)
+            for j in range(40):
+                y = 40 + j * (size[1] - 80) // 40
+                draw.rectangle([40, y, 40 + rng.randint(200, size[0] - 80), y + 12], fill=(rng.randint(0, 120),) * 3)
+            x, y = rng.randint(100, size[0] // 2), rng.randint(100, size[1] // 2)
+            draw.rectangle([x, y, x + size[0] // 3, y + size[1] // 3], fill=(250, 250, 250), outline=(0, 0, 0), width=3)
+        frame = base.copy()
+        # カーソル点滅
+        ImageDraw.Draw(frame).line([60, 60, 60, 76], fill=(0, 0, 0) if i % 2 else (235, 235, 235), width=2)
+        frames.append(frame)
+    return frames, dialogs
+
+def legacy_run(frames, directory):
+    blocking = []
+    for i, frame in enumerate(frames):
+        start = time.perf_counter()
+        frame.save(os.path.join(directory, f"screenshot_{i:05d}.png"))
+        blocking.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    files = [f for f in os.listdir(directory) if f.endswith(".png")]
+    files.sort(key=lambda f: os.stat(os.path.join(directory, f)).st_mtime, reverse=True)
+    return blocking, time.perf_counter() - start, files
+
+def store_run(frames, directory, max_count):
+    store = screenshot_store.ScreenshotStore(directory, max_count=max_count)
+    blocking = []
+    start_all = time.perf_counter()
+    for frame in frames:
+        start = time.perf_counter()
+        store.submit(frame)
+        blocking.append(time.perf_counter() - start)
+    store.flush()
+    drain = time.perf_counter() - start_all
+    # 別プロセス (API) が一覧を読むのと同じく、index.json だけを読む
+    start = time.perf_counter()
+    with open(os.path.join(directory, screenshot_store.INDEX_FILE), encoding="utf-8") as f:
+        items = json.load(f)["items"]
+    return blocking, time.perf_counter() - start, items, drain, store.stats
+
+def dir_bytes(directory):
+    total = 0
+    for root, _, names in os.walk(directory):
+        total += sum(os.path.getsize(os.path.join(root, n)) for n in names)
+    return total
+
+def ms(values):
+    values = sorted(values)
+    return {"p50": round(values[len(values) // 2] * 1000, 2), "max": round(values[-1] * 1000, 2)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--captures", type=int, default=60)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--unchanged", type=float, default=0.5)
+    parser.add_argument("--max-count", type=int, default=20)
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.split("x"))
+    frames, changes = make_frames(args.captures, size, args.unchanged)
+    legacy_dir, store_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        l_block, l_list, l_files = legacy_run(frames, legacy_dir)
+        with contextlib.redirect_stderr(open(os.devnull, "w")):
+            s_block, s_list, s_items, s_drain, stats = store_run(frames, store_dir, args.max_count)
+        print(json.dumps({
+            "captures": args.captures, "distinct_screens": changes,
+            "legacy": {"blocking_ms": ms(l_block), "files": len(l_files), "dir_mb": round(dir_bytes(legacy_dir) / 2**20, 2),
+                       "list_ms": round(l_list * 1000, 2)},
+            "store": {"blocking_ms": ms(s_block), "background_drain_s": round(s_drain, 2), "files": len(s_items),
+                      "dir_mb": round(dir_bytes(store_dir) / 2**20, 2), "list_ms": round(s_list * 1000, 2), **stats},
+        }, indent=2))
+    finally:
+        shutil.rmtree(legacy_dir, ignore_errors=True)
+        shutil.rmtree(store_dir, ignore_errors=True)
@@ -0,0 +1,89 @@
+import json
+import time
+import random
+import argparse
+import threading
+
+import suggest_chunks
+
+# 一括の提案 (全フィールドを1回で問い合わせ、失敗したら全体をやり直す) と
+# チャンク分割 + 並行実行 + 失敗チャンクだけ再試行 を偽のモデルで比較する。
+# 偽モデルは出力トークン数に比例して遅くなり、出力上限を超えると JSON が途中で切れる。
+# 一定の確率で壊れた JSON も返す。時間は 1/100 に縮めている。
+
+class FakeModel:
+    def __init__(self, base_latency=0.01, per_token=0.00002, max_output_tokens=8000, broken_ratio=0.1, seed=0):
+        self.base_latency = base_latency
+        self.per_token = per_token
+        self.max_output_tokens = max_output_tokens
+        self.broken_ratio = broken_ratio
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, fields):
+        # 既存と衝突しやすい名前をわざと返す (例: 全部「名前」に寄せる)
+        suggestions = [{
+            "old_name": f["name"],
+            "new_name": f"項目_{i % 7}",
+            "old_type": f["type"],
+            "new_type": f["type"],
+            "comment": "わかりやすい名前に変更",
+            "should_fix": True,
+        } for i, f in enumerate(fields)]
+        text = json.dumps(suggestions, ensure_ascii=False)
+        tokens = suggest_chunks.estimate_tokens(text)
+        with self.lock:
+            self.calls += 1
+            broken = self.rng.random() < self.broken_ratio
+        time.sleep(self.base_latency + self.per_token * min(tokens, self.max_output_tokens))
+        if tokens > self.max_output_tokens:
+            # 出力上限で切れた応答
+            text = text[: len(text) * self.max_output_tokens // tokens]
+        elif broken:
+            text = text[:-5]
+        return text
+
+def make_fields(n):
+    types = ["Text", "Number", "Date", "Timestamp"]
+    return [{"name": f"field_{i:04d}", "type": types[i % len(types)]} for i in range(n)]
+
+def single_shot(model, fields, retries=2):
+    for _ in range(retries + 1):
+        try:
+            return suggest_chunks.parse_suggestions(model(fields))
+        except ValueError:
+            continue
+    return None
+
+def check_unique(fields, merged):
+    names = [r["new_name"].casefold() for r in merged]
+    return len(set(names)) == len(names) and [r["old_name"] for r in merged] == [f["name"] for f in fields]
+
+def run(n):
+    fields = make_fields(n)
+
+    model = FakeModel()
+    start = time.perf_counter()
+    result = single_shot(model, fields)
+    single = {"seconds": round(time.perf_counter() - start, 3), "calls": model.calls, "ok": result is not None}
+
+    model = FakeModel()
+    start = time.perf_counter()
+    chunks = suggest_chunks.chunk_fields(fields)
+    results, errors = suggest_chunks.run_chunks(chunks, lambda c: suggest_chunks.parse_suggestions(model(c)))
+    merged = suggest_chunks.merge_suggestions(fields, chunks, results)
+    chunked = {
+        "seconds": round(time.perf_counter() - start, 3),
+        "calls": model.calls,
+        "chunks": len(chunks),
+        "failed_chunks": sum(1 for r in results if r is None),
+        "unique_and_ordered": check_unique(fields, merged),
+    }
+    return {"fields": n, "single_shot": single, "chunked": chunked}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="50,300,800")
+    args = parser.parse_args()
+    print(json.dumps([run(int(n)) for n in args.sizes.split(",")], indent=2))
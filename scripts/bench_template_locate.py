@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import glob
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+import template_locator
+
+# 保存済みスクリーンショットでテンプレート探索を比較する (画面・FileMaker 不要)。
+# 旧 click_template (毎回 imread、画面全体を BGR で1倍率だけ照合) と TemplateLocator の
+# 初回 (全体探索) / 2回目以降 (前回位置の確認) を、表示倍率 100% / 125% / 150% で計測する。
+# 4K 画面を想定し、スクリーンショットを拡大したものを 3840x2160 の背景に置いて使う。
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SCREEN = (2160, 3840)
+
+def legacy_locate(template_path, screen_bgr, confidence=0.8):
+    template = cv2.imread(template_path)
+    h, w = template.shape[:2]
+    res = cv2.matchTemplate(screen_bgr, template, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(res)
+    return (max_loc[0] + w // 2, max_loc[1] + h // 2) if max_val >= confidence else None
+
+def crop_template(shot_bgr, size=(95, 30)):
+    """スクリーンショットから模様の多い (ボタンらしい) 部分を切り出す。(画像, 位置) を返す"""
+    gray = cv2.cvtColor(shot_bgr, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    w, h = size
+    best, best_pos = -1, (0, 0)
+    for y in range(0, gray.shape[0] - h, h):
+        for x in range(0, gray.shape[1] - w, w // 2):
+            std = float(gray[y:y + h, x:x + w].std())
+            if std > best:
+                best, best_pos = std, (x, y)
+    x, y = best_pos
+    return shot_bgr[y:y + h, x:x + w].copy(), best_pos
+
+def make_screen(shot_bgr, template_bgr, scale, pos=None, seed=0):
+    """
+    拡大したウィンドウ画像を 4K の背景に置き、テンプレートの中心座標を返す。
+    pos が無ければテンプレートをウィンドウ右下寄りに貼り付ける。
+    """
+    rng = np.random.default_rng(seed)
+    screen = rng.integers(200, 230, size=SCREEN + (3,), dtype=np.uint8)
+    window = cv2.resize(shot_bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+    h, w = min(window.shape[0], SCREEN[0] - 100), min(window.shape[1], SCREEN[1] - 200)
+    window = window[:h, :w].copy()
+    button = cv2.resize(template_bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+    if pos is None:
+        bx, by = int(w * 0.7), int(h * 0.85)
+        window[by:by + button.shape[0], bx:bx + button.shape[1]] = button
+    else:
+        bx, by = int(pos[0] * scale), int(pos[1] * scale)
+    ox, oy = 150, 60
+    screen[oy:oy + h, ox:ox + w] = window
+    rect = (ox, oy, w, h)
+    center = (ox + bx + button.shape[1] // 2, oy + by + button.shape[0] // 2)
+    return screen, rect, center
+
+def near(p, q, tol=4):
+    return p is not None and abs(p[0] - q[0]) <= tol and abs(p[1] - q[1]) <= tol
+
+def timed(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, round(sorted(times)[len(times) // 2], 2)
+
+def run_case(template_path, shot_path, scale, repeat, pos=None):
+    shot = cv2.imread(shot_path)
+    template = cv2.imread(template_path)
+    screen, rect, center = make_screen(shot, template, scale, pos)
+    left, top, w, h = rect
+
+    legacy_pos, legacy_ms = timed(lambda: legacy_locate(template_path, screen), repeat)
+
+    # 旧方式と同じく、撮影画像の変換も計測に含める (ウィンドウ矩形だけを切り出す)
+    window = screen[top:top + h, left:left + w]
+    locator = template_locator.TemplateLocator()
+    cold, cold_ms = timed(lambda: (locator.forget(), locator.locate(template_path, window, geometry=(w, h)))[1], 1)
+    warm, warm_ms = timed(lambda: locator.locate(template_path, window, geometry=(w, h)), repeat)
+    to_screen = lambda m: (m.center[0] + left, m.center[1] + top) if m else None
+    return {
+        "scale": scale,
+        "legacy": {"ms": legacy_ms, "found": near(legacy_pos, center)},
+        "locator_cold": {"ms": cold_ms, "found": near(to_screen(cold), center),
+                         "score": round(cold.score, 3) if cold else None},
+        "locator_warm": {"ms": warm_ms, "found": near(to_screen(warm), center),
+                         "source": warm.source if warm else None},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--template", default=None,
+                        help="テンプレート画像 (既定: スクリーンショットから切り出す。assets/ の画像は単色のため照合に使えない)")
+    parser.add_argument("--screenshot", default=None, help="背景に使うスクリーンショット (既定: public/screenshots の先頭)")
+    parser.add_argument("--scales", default="1.0,1.25,1.5")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    shot = args.screenshot or sorted(glob.glob(os.path.join(ROOT, "public", "screenshots", "*.png")))[0]
+    template, pos = args.template, None
+    if template is None:
+        patch, pos = crop_template(cv2.imread(shot))
+        template = os.path.join(tempfile.mkdtemp(), "template.png")
+        cv2.imwrite(template, patch)
+    print(json.dumps({
+        "template": os.path.basename(template),
+        "screenshot": os.path.basename(shot),
+        "cases": [run_case(template, shot, float(s), args.repeat, pos) for s in args.scales.split(",")],
+    }, indent=2))
@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+
+import fm_trace
+import fm_sim
+
+# 計測 (fm_trace) のコストと出力の確認。
+# 1. 無効時 / 有効時の span 1回あたりのオーバーヘッド
+# 2. 疑似 FileMaker (fm_sim) で batch_create_fields / batch_fix を計測付きで動かし、
+#    Chrome trace (chrome://tracing, ui.perfetto.dev で開ける) と区間ごとの集計表を書き出す
+#
+#   python bench_trace.py --fields 1000 --out ../data/traces/sim_trace.json
+
+def span_overhead(n=200000):
+    def loop():
+        start = time.perf_counter()
+        for _ in range(n):
+            with fm_trace.span("bench.span", field="x"):
+                pass
+        return (time.perf_counter() - start) / n * 1e9
+
+    def bare():
+        start = time.perf_counter()
+        for _ in range(n):
+            pass
+        return (time.perf_counter() - start) / n * 1e9
+
+    base = bare()
+    fm_trace.disable()
+    off = loop() - base
+    fm_trace.enable(os.devnull)
+    on = loop() - base
+    fm_trace.disable()
+    fm_trace.reset()
+    return {"disabled_ns": round(off, 1), "enabled_ns": round(on, 1)}
+
+def traced_run(fields, out, latency):
+    sim = fm_sim.FileMakerSim.with_fields(fields, latency=latency)
+    modules = fm_sim.install(sim)
+    fm_trace.reset()
+    fm_trace.enable(out)
+    new = [{"name": f"new_{i:03d}", "type": t} for i, t in enumerate(["Text", "Number", "Date", "Calculation"] * 10)]
+    step = max(fields // 10, 1)
+    fixes = [{"old_name": f"field_{r:05d}", "new_name": f"field_{r:05d}_fixed"} for r in range(0, fields, step)]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull), contextlib.redirect_stdout(devnull):
+        modules["batch_create_fields"].batch_create_fields(new)
+        modules["field_fixer"].batch_fix(fixes)
+    fm_trace.disable()
+    return fm_trace.dump(out), sim.stats()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fields", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--out", default=os.path.join(fm_trace.TRACE_DIR, "sim_trace.json"))
+    args = parser.parse_args()
+
+    print(json.dumps({"span_overhead": span_overhead()}), file=sys.stderr)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    path, stats = traced_run(args.fields, args.out, args.latency)
+    print(json.dumps({"trace": path, "spans": len(fm_trace.events()), **stats}, ensure_ascii=False))
@@ -0,0 +1,63 @@
+import sys
+import os
+import json
+import time
+import argparse
+import subprocess
+import statistics
+
+from automation_worker import WorkerClient
+
+# 常駐ワーカーと「1リクエスト = 1プロセス起動」の1件あたりレイテンシを比較する。
+# Linux でも動くよう疑似バックエンド (--backend fake) を使う。
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "automation_worker.py")
+
+SAMPLE_REQUESTS = [
+    ("get_existing_fields", {}),
+    ("batch_create_fields", {"fields": [{"name": "売上", "type": "Number"}]}),
+    ("batch_fix", {"fixes": [{"old_name": "売上", "new_name": "売上_合計"}]}),
+    ("suggest_field_fix", {"currentFields": [{"name": "id", "type": "Text"}]}),
+    ("generate_db_design", {"prompt": "伝票管理"}),
+]
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        "mean_ms": round(statistics.mean(samples), 2),
+        "p50_ms": round(samples[len(samples) // 2], 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+    }
+
+def bench_spawn(rounds):
+    samples = []
+    for i in range(rounds):
+        method, params = SAMPLE_REQUESTS[i % len(SAMPLE_REQUESTS)]
+        line = json.dumps({"id": i, "method": method, "params": params}) + "\n"
+        start = time.perf_counter()
+        subprocess.run([sys.executable, WORKER_PATH, "--backend", "fake"], input=line,
+                       capture_output=True, text=True, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return _summary(samples)
+
+def bench_worker(rounds):
+    samples = []
+    with WorkerClient(backend="fake") as client:
+        client.call("get_existing_fields")  # ウォームアップ
+        for i in range(rounds):
+            method, params = SAMPLE_REQUESTS[i % len(SAMPLE_REQUESTS)]
+            start = time.perf_counter()
+            client.call(method, params)
+            samples.append((time.perf_counter() - start) * 1000)
+    return _summary(samples)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    result = {
+        "spawn_per_request": bench_spawn(args.rounds),
+        "persistent_worker": bench_worker(args.rounds),
+    }
+    print(json.dumps(result, indent=2))
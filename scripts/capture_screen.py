@@ -1,8 +1,10 @@
-import pyautogui
-import os
-import datetime
+import lazy_import
+pyautogui = lazy_import.lazy("pyautogui")
 import time
-from pywinauto import Application, Desktop
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
+
+import screenshot_store
 
 def focus_filemaker():
     print("Searching for FileMaker by process...")
@@ -42,21 +44,25 @@ def focus_filemaker():
             pass
     return False
 
-def capture_screen(save_dir="public/screenshots"):
+def capture_screen(save_dir=None, wait=True, focus=True):
+    """
+    FileMaker を前面に出して撮影し、保存キューに入れる。
+    常駐ワーカーからは wait=False で呼び、書き出しを待たずに戻る。
+    """
     # キャプチャ前にFileMakerを前面へ
-    focus_filemaker()
-    
-    if not os.path.exists(save_dir):
-        os.makedirs(save_dir)
-    
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"screenshot_{timestamp}.png"
-    filepath = os.path.join(save_dir, filename)
-    
+    if focus:
+        focus_filemaker()
+
+    store = screenshot_store.get_store() if save_dir is None else screenshot_store.ScreenshotStore(save_dir)
     screenshot = pyautogui.screenshot()
-    screenshot.save(filepath)
-    print(f"Screenshot saved to: {filepath}")
-    return filepath
+    result = store.submit(screenshot)
+    if result["skipped"]:
+        print(f"Screen unchanged (distance {result['distance']}), not saved.")
+    else:
+        print(f"Screenshot queued: {result['file']}")
+    if wait:
+        store.flush()
+    return result
 
 if __name__ == "__main__":
     capture_screen()
@@ -1,33 +1,22 @@
-import cv2
-import numpy as np
-import pyautogui
-import time
+import lazy_import
+pyautogui = lazy_import.lazy("pyautogui")
 import os
 
+import template_locator
+
 def click_template(template_path, confidence=0.8):
     if not os.path.exists(template_path):
         print(f"Error: Template image not found at {template_path}")
         return False
 
-    # 現在の画面を撮影
-    screenshot = pyautogui.screenshot()
-    screenshot_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-    
-    # テンプレート画像を読み込み
-    template = cv2.imread(template_path)
-    h, w = template.shape[:2]
-
-    # テンプレートマッチング実行
-    res = cv2.matchTemplate(screenshot_cv, template, cv2.TM_CCOEFF_NORMED)
-    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+    # FileMaker のウィンドウだけを撮影し、表示倍率 (DPI) の違いも含めて探す
+    match = template_locator.locate_on_screen(template_path, confidence)
 
-    print(f"Match confidence for {os.path.basename(template_path)}: {max_val:.4f}")
-
-    if max_val >= confidence:
+    if match:
+        print(f"Match confidence for {os.path.basename(template_path)}: {match.score:.4f} (scale {match.scale})")
         # 中央の座標を計算
-        center_x = max_loc[0] + w // 2
-        center_y = max_loc[1] + h // 2
-        
+        center_x, center_y = match.center
+
         print(f"Found match! Clicking at ({center_x}, {center_y})")
         pyautogui.click(center_x, center_y)
         return True
@@ -0,0 +1,231 @@
+import sys
+import mmap
+import atexit
+import threading
+
+# FileMaker 向けクリップボード書き込み。
+# - 入力は str / bytes / bytearray / memoryview / mmap をそのまま受け取り、UTF-8 のバイト列はコピーせずに渡す
+# - 各形式 (FileMaker XML Snippet / Unicode テキスト / CF_TEXT / HTML) は必要になった時点で1回だけ変換する
+# - Windows では遅延レンダリング (SetClipboardData(fmt, None) + WM_RENDERFORMAT) で、
+#   貼り付け先が実際に要求した形式だけを作る
+# バックエンドは差し替えられる。MemoryBackend は Linux 上の検証用。
+
+FM_SNIPPET_FORMAT = "FileMaker XML Snippet"
+UNICODE_TEXT = "CF_UNICODETEXT"
+ANSI_TEXT = "CF_TEXT"
+HTML_FORMAT = "HTML Format"
+
+# FileMaker が読むのは先頭の形式。残りは他アプリへ貼り付けたとき用
+DEFAULT_FORMATS = (FM_SNIPPET_FORMAT, UNICODE_TEXT, ANSI_TEXT, HTML_FORMAT)
+
+class Payload:
+    """クリップボードに載せる XML。各表現は初めて要求されたときに1回だけ作る"""
+
+    def __init__(self, source):
+        self.source = source
+        self._utf8 = None
+        self._text = None
+
+    @classmethod
+    def from_file(cls, path):
+        """ファイルを mmap で開く (全体を読み込まない)"""
+        f = open(path, "rb")
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空ファイルは mmap できない
+            mapped = b""
+        finally:
+            f.close()
+        return cls(mapped)
+
+    def utf8(self):
+        """UTF-8 のバイト列 (bytes 系の入力ならコピーしない memoryview)"""
+        if self._utf8 is None:
+            if isinstance(self.source, str):
+                self._utf8 = memoryview(self.source.encode("utf-8"))
+            else:
+                self._utf8 = memoryview(self.source).cast("B")
+        return self._utf8
+
+    def text(self):
+        if self._text is None:
+            if isinstance(self.source, str):
+                self._text = self.source
+            else:
+                self._text = str(self.utf8(), "utf-8")
+        return self._text
+
+    def __len__(self):
+        return len(self.source) if isinstance(self.source, str) else self.utf8().nbytes
+
+def render(payload, fmt):
+    """形式ごとの変換 (呼ばれた形式だけ変換する)"""
+    if fmt == FM_SNIPPET_FORMAT:
+        return payload.utf8()
+    if fmt == UNICODE_TEXT:
+        return payload.text()
+    if fmt == ANSI_TEXT:
+        return payload.text().encode("ascii", "ignore")
+    if fmt == HTML_FORMAT:
+        return f"<html><body><!--StartFragment-->{payload.text()}<!--EndFragment--></body></html>".encode("utf-8")
+    raise ValueError(f"Unknown clipboard format: {fmt}")
+
+class MemoryBackend:
+    """テスト用: 形式ごとの変換関数を保持し、読まれたときに初めて変換する"""
+
+    def __init__(self):
+        self.renderers = {}
+        self.rendered = {}
+        self.render_counts = {}
+
+    def write(self, formats, renderer):
+        self.renderers = {fmt: renderer for fmt in formats}
+        self.rendered = {}
+        return True
+
+    def formats(self):
+        return list(self.renderers)
+
+    def get(self, fmt):
+        if fmt not in self.rendered:
+            if fmt not in self.renderers:
+                return None
+            self.rendered[fmt] = self.renderers[fmt](fmt)
+            self.render_counts[fmt] = self.render_counts.get(fmt, 0) + 1
+        return self.rendered[fmt]
+
+class Win32Backend:
+    """
+    win32clipboard を使う。delayed=True なら隠しウィンドウをクリップボードの所有者にして、
+    貼り付け先が要求した形式だけを WM_RENDERFORMAT で作る (常駐ワーカー向け)。
+    プロセスがすぐ終わる CLI では delayed=False で、各形式を1回ずつ変換して登録する。
+    """
+
+    WINDOW_CLASS = "ClubMakerClipboardOwner"
+
+    def __init__(self, delayed=True):
+        self.delayed = delayed
+        self.hwnd = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+        self.pending = {}  # format id -> renderer
+
+    def _format_id(self, fmt):
+        import win32clipboard
+        import win32con
+        if fmt == UNICODE_TEXT:
+            return win32con.CF_UNICODETEXT
+        if fmt == ANSI_TEXT:
+            return win32con.CF_TEXT
+        return win32clipboard.RegisterClipboardFormat(fmt)
+
+    def _window_loop(self):
+        import win32api
+        import win32con
+        import win32gui
+        import win32clipboard
+
+        def wndproc(hwnd, msg, wparam, lparam):
+            if msg == win32con.WM_RENDERFORMAT:
+                # OpenClipboard 無しで SetClipboardData してよいのはこのメッセージの中だけ
+                with self.lock:
+                    renderer = self.pending.pop(wparam, None)
+                if renderer is not None:
+                    win32clipboard.SetClipboardData(wparam, renderer())
+                return 0
+            if msg == win32con.WM_RENDERALLFORMATS:
+                # 所有者が終了する: 残りの形式をまとめて書き出す
+                with self.lock:
+                    pending, self.pending = self.pending, {}
+                if pending:
+                    win32clipboard.OpenClipboard(hwnd)
+                    try:
+                        if win32clipboard.GetClipboardOwner() == hwnd:
+                            for fmt_id, renderer in pending.items():
+                                win32clipboard.SetClipboardData(fmt_id, renderer())
+                    finally:
+                        win32clipboard.CloseClipboard()
+                return 0
+            if msg == win32con.WM_DESTROYCLIPBOARD:
+                # 他のアプリがクリップボードを書き換えた
+                with self.lock:
+                    self.pending = {}
+                return 0
+            if msg == win32con.WM_DESTROY:
+                win32gui.PostQuitMessage(0)
+                return 0
+            return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+
+        wc = win32gui.WNDCLASS()
+        wc.lpfnWndProc = wndproc
+        wc.lpszClassName = self.WINDOW_CLASS
+        wc.hInstance = win32api.GetModuleHandle(None)
+        try:
+            atom = win32gui.RegisterClass(wc)
+        except win32gui.error:
+            atom = self.WINDOW_CLASS  # 登録済み
+        self.hwnd = win32gui.CreateWindow(atom, "ClubMaker Clipboard", 0, 0, 0, 0, 0,
+                                          win32con.HWND_MESSAGE, 0, wc.hInstance, None)
+        self.ready.set()
+        win32gui.PumpMessages()
+
+    def _ensure_window(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._window_loop, name="ClipboardOwner", daemon=True)
+            self.thread.start()
+            self.ready.wait(2.0)
+        return self.hwnd
+
+    def write(self, formats, renderer):
+        import win32clipboard
+        owner = self._ensure_window() if self.delayed else None
+        win32clipboard.OpenClipboard(owner)
+        try:
+            win32clipboard.EmptyClipboard()
+            for fmt in formats:
+                fmt_id = self._format_id(fmt)
+                if owner:
+                    with self.lock:
+                        self.pending[fmt_id] = (lambda f=fmt: renderer(f))
+                    win32clipboard.SetClipboardData(fmt_id, None)
+                else:
+                    win32clipboard.SetClipboardData(fmt_id, renderer(fmt))
+        finally:
+            win32clipboard.CloseClipboard()
+        return True
+
+    def close(self):
+        """所有ウィンドウを閉じる (未変換の形式は WM_RENDERALLFORMATS で書き出される)"""
+        if self.hwnd:
+            import win32gui
+            import win32con
+            win32gui.PostMessage(self.hwnd, win32con.WM_CLOSE, 0, 0)
+            self.thread.join(timeout=2.0)
+            self.hwnd = None
+            self.thread = None
+
+class ClipboardWriter:
+    def __init__(self, backend=None):
+        self.backend = backend or Win32Backend(delayed=False)
+
+    def write_fm_snippet(self, xml, formats=DEFAULT_FORMATS):
+        """XML (str / bytes 系 / Payload) を FileMaker 用の形式で登録する"""
+        payload = xml if isinstance(xml, Payload) else Payload(xml)
+        ok = self.backend.write(formats, lambda fmt: render(payload, fmt))
+        print(f"Success: Registered {len(formats)} formats to clipboard for FileMaker. Length: {len(payload)}",
+              file=sys.stderr)
+        return ok
+
+_WRITER = None
+
+def get_writer():
+    """常駐プロセス用の共有ライター (遅延レンダリング)"""
+    global _WRITER
+    if _WRITER is None:
+        backend = Win32Backend(delayed=True)
+        # 終了時に未変換の形式を書き出す (そのままだと終了後の貼り付けが空になる)
+        atexit.register(backend.close)
+        _WRITER = ClipboardWriter(backend)
+    return _WRITER
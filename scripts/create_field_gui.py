@@ -1,12 +1,18 @@
-from pywinauto import Application, Desktop
-import pyautogui
-import pyperclip
-import time
+import lazy_import
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
+pyautogui = lazy_import.lazy("pyautogui")
+pyperclip = lazy_import.lazy("pyperclip")
 import sys
 import os
 import fm_utils  # Robust utility
+import fm_wait
 
-import ctypes
+
+def _formula_text(popup):
+    """「計算式の指定」ダイアログの計算式欄の文字列"""
+    edit = fm_utils.dialog_window(popup).child_window(control_type="Edit", found_index=0)
+    return (edit.window_text() or edit.get_value() or "").strip()
 
 def create_field_gui(name, field_type="Text", comment=""):
     print(f"--- GUI Robust Generate: {name} ---")
@@ -21,32 +27,41 @@ def create_field_gui(name, field_type="Text", comment=""):
             return False
 
         pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.5
+        # 画面遷移は fm_wait で条件待ちするため、キー操作ごとの一律待機は短くする
+        pyautogui.PAUSE = 0.1
 
         # 0. Ensure focus on the dialog (ensure_manage_database does this, but good to be sure before typing)
         # Note: ensure_manage_database leaves the dialog focused.
-        
+        # 各操作の後は、読める欄 (名前・タイプ) の値が変わるまで待つ
+        dialog = fm_utils.find_manage_database_dialog()
+        controls = fm_utils.get_controls(dialog) if dialog else None
+        name_edit = controls.get("name_edit") if controls else None
+
         # Navigate to Field Name box (Alt+F is standard)
         pyautogui.hotkey('alt', 'f')
-        time.sleep(0.3)
+        if controls is not None:
+            name_edit = fm_wait.wait_until(lambda: controls.get("name_edit"), timeout=2.0, name="select_fields_tab") or name_edit
 
         # 1. 既存文字のクリア
         pyautogui.hotkey('ctrl', 'a')
         pyautogui.press('backspace')
-        time.sleep(0.3)
+        if name_edit is not None:
+            fm_wait.wait_until(fm_wait.edit_cleared(name_edit), timeout=1.0, name="name_cleared")
         
         # 2. フィールド名入力
         pyperclip.copy(name)
         pyautogui.hotkey('ctrl', 'v')
-        time.sleep(0.3)
+        if name_edit is not None:
+            fm_wait.wait_until(fm_wait.text_equals(name_edit, name), timeout=1.0, name="name_entry")
         
-        # 3. 型選択
+        # 3. 型選択 (Tab の後は pyautogui.PAUSE だけ空ける)
         if field_type in ["Calculation", "Summary", "計算", "集計"]:
             pyautogui.press('tab')
-            time.sleep(0.2)
             key = "c" if field_type in ["Calculation", "計算"] else "s"
             pyautogui.write(key)
-            time.sleep(0.2)
+            type_combo = controls.get("type_combo") if controls else None
+            if type_combo is not None:
+                fm_wait.wait_until(fm_wait.text_in(type_combo, fm_utils.TYPE_LABELS[key]), timeout=1.0, name="type_select")
         
         # 4. 作成(Alt+E)
         pyautogui.hotkey('alt', 'e')
@@ -54,22 +69,24 @@ def create_field_gui(name, field_type="Text", comment=""):
         
         # 5. 計算ダイアログ等の特別な後処理
         if field_type in ["Calculation", "計算"]:
-            time.sleep(1.5)
+            popup = fm_wait.wait_until(fm_utils.find_popup, timeout=3.0, name="extra_dialog_open")
             # 数式入力を求められたら空文字を入れる
             pyperclip.copy('""')
             pyautogui.hotkey('ctrl', 'v')
-            time.sleep(0.3)
+            if popup is not None:
+                fm_wait.wait_until(lambda: _formula_text(popup) == '""', timeout=1.0, name="calc_formula")
             pyautogui.press('enter')
             print("  > Closed calculation dialog.")
         elif field_type in ["Summary", "集計"]:
-            time.sleep(1.5)
+            fm_wait.wait_until(fm_utils.find_popup, timeout=3.0, name="extra_dialog_open")
             # 集計設定ダイアログ
             # 集計フィールドは「OK」を押すだけでは済まない場合があるが（集計対象選択）、
             # デフォルトで一番上のフィールドが集計されることを期待してEnter
             pyautogui.press('enter')
             print("  > Closed summary dialog.")
 
-        time.sleep(0.8)
+        # 追加ダイアログが閉じるまで待つ
+        fm_wait.wait_gone(fm_utils.find_popup, timeout=2.0, name="extra_dialog_close")
         
         # 6. Post-Action Check: Did a warning pop up? (e.g., Duplicate Name)
         # If so, fm_utils.ensure_manage_database() in the NEXT loop iteration 
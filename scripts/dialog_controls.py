@@ -0,0 +1,157 @@
+import re
+import sys
+
+# 「データベースの管理」ダイアログの子コントロールを1回だけ探して使い回す。
+# child_window(...) の WindowSpecification は属性にアクセスするたびに FileMaker の要素ツリーを
+# プロセス越しに探し直すので、解決済みのラッパーを保持し、使う前に軽く (is_visible 1回) 確かめる。
+# ダイアログのハンドルが変わったら作り直し、タブを切り替えたら invalidate() で捨てる。
+#
+#   controls = fm_utils.get_controls(dialog)
+#   name_edit = controls.require("name_edit")
+#   create_btn = controls.get("create_btn")      # 見つからなければ None
+
+# 名前 -> (auto_id, control_type)。auto_id が無いもの・見つからないものは UI 言語のタイトルで探す
+CONTROLS = {
+    "field_list": ("IDC_DEFFIELDS_FIELD_LIST", "DataGrid"),
+    "name_edit": ("IDC_DEFFIELDS_FIELDNAME_EDIT", "Edit"),
+    "type_combo": ("IDC_FIELD_TYPE_MENU", "ComboBox"),
+    "comment_edit": ("IDC_DEFFIELDS_FIELDCOMMENT_EDIT", "Edit"),
+    "create_btn": ("IDC_DEFFIELDS_CREATE_BTN", "Button"),
+    "change_btn": ("IDC_DEFFIELDS_CHANGE_BTN", "Button"),
+    "delete_btn": ("IDC_DEFFIELDS_DELETE_BUTTON", "Button"),
+    "fields_tab": (None, "TabItem"),
+    "field_count": (None, "Text"),
+    # フィールドタブのテーブルメニューと、テーブルタブの名前欄・作成ボタン
+    "table_menu": ("IDC_DEFFIELDS_TABLE_MENU", "ComboBox"),
+    "tables_tab": (None, "TabItem"),
+    "table_count": (None, "Text"),
+    "table_name_edit": ("IDC_DEFTABLES_NAME_EDIT", "Edit"),
+    "table_create_btn": ("IDC_DEFTABLES_CREATE_BTN", "Button"),
+}
+
+# auto_id が版によって違い、タイトルでも探せないもの: 表示中の同じ種類の最初の要素 (除く auto_id)
+FIRST_OF_TYPE = {
+    "table_menu": "IDC_FIELD_TYPE_MENU",
+    "table_name_edit": None,
+}
+
+# UI 言語ごとのタイトル (言語を判定したときに1回だけコンパイルする)
+LOCALE_TITLES = {
+    "ja": {
+        "fields_tab": r"^フィールド",
+        "create_btn": r"作成",
+        "change_btn": r"^変更$",
+        "delete_btn": r"^削除$",
+        "field_count": r"\d+\s*フィールド",
+        "tables_tab": r"^テーブル",
+        "table_count": r"\d+\s*(個の)?テーブル",
+        "table_create_btn": r"作成",
+    },
+    "en": {
+        "fields_tab": r"^Fields",
+        "create_btn": r"Create",
+        "change_btn": r"^Change$",
+        "delete_btn": r"^Delete$",
+        "field_count": r"(?i)\d+\s*fields?\b",
+        "tables_tab": r"^Tables",
+        "table_count": r"(?i)\d+\s*tables?\b",
+        "table_create_btn": r"Create",
+    },
+}
+DIALOG_TITLES = {"ja": "データベースの管理", "en": "Manage Database"}
+
+_COMPILED = {}
+
+def detect_locale(title):
+    """ダイアログのタイトルから UI 言語を判定する (分からなければ ja)"""
+    for locale, text in DIALOG_TITLES.items():
+        if text in (title or ""):
+            return locale
+    return "ja"
+
+def locale_patterns(locale):
+    patterns = _COMPILED.get(locale)
+    if patterns is None:
+        patterns = _COMPILED[locale] = {k: re.compile(v) for k, v in LOCALE_TITLES[locale].items()}
+    return patterns
+
+def window_handle(dialog):
+    try:
+        return dialog.handle
+    except Exception:
+        return None
+
+def _usable(ctrl):
+    # 消えた要素は UIA が例外を返し、別タブに隠れた要素は見えない扱いになる
+    try:
+        return ctrl.is_visible()
+    except Exception:
+        return False
+
+class DialogControls:
+    def __init__(self, dialog, handle=None, title=None, stats=None):
+        self.dialog = dialog
+        self.handle = handle if handle is not None else window_handle(dialog)
+        if title is None:
+            try:
+                title = dialog.window_text()
+            except Exception:
+                title = ""
+        self.locale = detect_locale(title)
+        self.patterns = locale_patterns(self.locale)
+        self.controls = {}
+        # 開き直しで作り直しても、セッション全体の回数として引き継げるようにする
+        self.stats = stats if stats is not None else {"hits": 0, "misses": 0, "stale": 0, "invalidations": 0}
+
+    def get(self, name):
+        """解決済みのラッパー (見つからなければ None)"""
+        ctrl = self.controls.get(name)
+        if ctrl is not None:
+            if _usable(ctrl):
+                self.stats["hits"] += 1
+                return ctrl
+            self.stats["stale"] += 1
+            del self.controls[name]
+        self.stats["misses"] += 1
+        ctrl = self._resolve(name)
+        if ctrl is not None:
+            self.controls[name] = ctrl
+        return ctrl
+
+    def require(self, name):
+        ctrl = self.get(name)
+        if ctrl is None:
+            raise LookupError(f"Control not found in Manage Database dialog: {name}")
+        return ctrl
+
+    def _resolve(self, name):
+        auto_id, control_type = CONTROLS[name]
+        if auto_id:
+            try:
+                return self.dialog.child_window(auto_id=auto_id, control_type=control_type).wrapper_object()
+            except Exception:
+                pass
+        pattern = self.patterns.get(name)
+        if pattern is None and name not in FIRST_OF_TYPE:
+            return None
+        try:
+            for ctrl in self.dialog.descendants(control_type=control_type):
+                if pattern is not None:
+                    if pattern.search(ctrl.window_text() or ""):
+                        return ctrl
+                elif ctrl.element_info.automation_id != FIRST_OF_TYPE[name] and _usable(ctrl):
+                    return ctrl
+        except Exception as e:
+            print(f"  > Control lookup failed ({name}): {e}", file=sys.stderr)
+        return None
+
+    def invalidate(self):
+        """タブ切り替えなどで子コントロールが作り直されうるときに呼ぶ"""
+        if self.controls:
+            self.controls.clear()
+            self.stats["invalidations"] += 1
+
+    def summary(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return {**self.stats, "hit_rate": round(self.stats["hits"] / total, 3) if total else None,
+                "locale": self.locale}
@@ -0,0 +1,214 @@
+import re
+import sys
+import time
+import threading
+from collections import deque
+
+# FileMaker のポップアップ監視。
+# デスクトップ全体を UIA で走査する代わりに、バックグラウンドスレッドでトップレベルウィンドウの
+# ハンドル一覧 (EnumWindows、数ミリ秒) を差分で追い、新しく現れたウィンドウだけを1回分類する。
+# バッチ処理側は pending() / find() で分類済みのダイアログを安価に確認できる。
+# ウィンドウ列挙とテキスト読み取りは差し替えられるので、Windows 以外でも偽のデスクトップで検証できる。
+
+MANAGE_DATABASE_RE = re.compile(r"データベースの管理|Manage Database")
+CALC_RE = re.compile(r"計算式の指定|Specify Calculation")
+SUMMARY_RE = re.compile(r"集計フィールドのオプション|Options for Summary Field")
+ALERT_TITLE = "FileMaker Pro"
+
+DISCARD_KEYWORDS = ["破棄", "Discard"]
+SAVE_KEYWORDS = ["保存", "save", "変更しますか"]
+NAME_ERROR_KEYWORDS = ["すでに使用されています", "already in use", "無効", "invalid"]
+
+# pending() の既定で返す種類 (メインウィンドウや「データベースの管理」自体は含めない)
+POPUP_KINDS = ("discard", "save", "name_error", "info", "calc", "summary")
+ALERT_KINDS = ("discard", "save", "name_error", "info")
+EXTRA_KINDS = ("calc", "summary")
+
+# 本文が空の警告を読み直す期間 (秒)
+RECLASSIFY_SEC = 0.5
+
+def classify(title, read_text):
+    """タイトル (と必要ならダイアログ本文) から種類を決める。本文は警告ダイアログの場合だけ読む"""
+    if MANAGE_DATABASE_RE.search(title):
+        return "manage_database", ""
+    if CALC_RE.search(title):
+        return "calc", ""
+    if SUMMARY_RE.search(title):
+        return "summary", ""
+    if title != ALERT_TITLE:
+        return ("main" if "FileMaker" in title else "other"), ""
+    text = ""
+    try:
+        text = read_text() or ""
+    except Exception:
+        pass
+    if any(k in text for k in DISCARD_KEYWORDS):
+        return "discard", text
+    if any(k in text for k in SAVE_KEYWORDS):
+        return "save", text
+    if any(k in text for k in NAME_ERROR_KEYWORDS):
+        return "name_error", text
+    return "info", text
+
+class DialogInfo:
+    def __init__(self, handle, title, kind, text, seen_at):
+        self.handle = handle
+        self.title = title
+        self.kind = kind
+        self.text = text
+        self.seen_at = seen_at
+
+    def __repr__(self):
+        return f"DialogInfo({self.handle}, {self.title!r}, {self.kind})"
+
+# --- Windows 実装 (ctypes のみ。pywinauto は本文を読むときだけ使う) ---
+
+def win32_list_windows(pids=None):
+    """表示中のトップレベルウィンドウを {handle: title} で返す。pids を渡すとそのプロセスに限る"""
+    import ctypes
+    from ctypes import wintypes
+    user32 = ctypes.windll.user32
+    found = {}
+
+    @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    def callback(hwnd, _):
+        if not user32.IsWindowVisible(hwnd):
+            return True
+        if pids:
+            pid = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            if pid.value not in pids:
+                return True
+        length = user32.GetWindowTextLengthW(hwnd)
+        buf = ctypes.create_unicode_buffer(length + 1)
+        user32.GetWindowTextW(hwnd, buf, length + 1)
+        found[hwnd] = buf.value
+        return True
+
+    user32.EnumWindows(callback, 0)
+    return found
+
+def uia_read_text(handle):
+    """ダイアログ本文 (Static / Text 要素) を UIA で読む"""
+    from pywinauto import Desktop
+    win = Desktop(backend="uia").window(handle=handle)
+    texts = win.descendants(control_type="Static") or win.descendants(control_type="Text")
+    return "".join(t.window_text() for t in texts if t.window_text())
+
+class DialogWatcher:
+    def __init__(self, list_windows=None, read_text=None, interval=0.05, clock=time.monotonic):
+        self.list_windows = list_windows or win32_list_windows
+        self.read_text = read_text or uia_read_text
+        self.interval = interval
+        self.clock = clock
+        self.known = {}       # handle -> DialogInfo (表示中の全ウィンドウ)
+        self.handled = set()  # 処理済み (閉じるまで pending に出さない)
+        self.events = deque(maxlen=200)  # ("opened" | "closed", DialogInfo)
+        self.cond = threading.Condition()
+        self.poll_lock = threading.Lock()
+        self.thread = None
+        self.stopped = threading.Event()
+        self.stats = {"polls": 0, "classified": 0}
+
+    def poll_once(self):
+        """ハンドル一覧の差分を取り、新しいウィンドウだけを分類する"""
+        with self.poll_lock:
+            try:
+                current = self.list_windows()
+            except Exception as e:
+                print(f"  > [DialogWatcher] list failed: {e}", file=sys.stderr)
+                return
+            now = self.clock()
+            with self.cond:
+                self.stats["polls"] += 1
+                gone = [h for h in self.known if h not in current]
+                # 本文がまだ描画されていなかった警告は、次の差分でもう一度分類する
+                new = [(h, t) for h, t in current.items()
+                       if h not in self.known or self.known[h].title != t
+                       or (self.known[h].kind == "info" and not self.known[h].text
+                           and now - self.known[h].seen_at < RECLASSIFY_SEC)]
+            # 本文の読み取りはロックの外で行う (UIA は遅い)
+            classified = []
+            for handle, title in new:
+                kind, text = classify(title, lambda: self.read_text(handle))
+                classified.append(DialogInfo(handle, title, kind, text, now))
+            with self.cond:
+                for handle in gone:
+                    info = self.known.pop(handle)
+                    self.handled.discard(handle)
+                    self.events.append(("closed", info))
+                for info in classified:
+                    previous = self.known.get(info.handle)
+                    if previous is not None:
+                        info.seen_at = previous.seen_at
+                    self.known[info.handle] = info
+                    if previous is None or previous.kind != info.kind:
+                        self.events.append(("opened", info))
+                    self.stats["classified"] += 1
+                if gone or classified:
+                    self.cond.notify_all()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.poll_once()
+            self.stopped.wait(self.interval)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.poll_once()
+            self.thread = threading.Thread(target=self._run, name="DialogWatcher", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def pending(self, kinds=POPUP_KINDS, fresh=False):
+        """未処理のダイアログを古い順に返す。fresh=True ならその場で1回差分を取ってから返す"""
+        if fresh:
+            self.poll_once()
+        with self.cond:
+            return sorted((i for i in self.known.values() if i.kind in kinds and i.handle not in self.handled),
+                          key=lambda i: i.seen_at)
+
+    def find(self, kinds=POPUP_KINDS, fresh=False):
+        """未処理のダイアログを1つ返す (無ければ None)"""
+        found = self.pending(kinds, fresh)
+        return found[0] if found else None
+
+    def is_open(self, handle, fresh=False):
+        if fresh:
+            self.poll_once()
+        with self.cond:
+            return handle in self.known
+
+    def mark_handled(self, info):
+        """ボタンを押した後など、閉じるまで pending に出さないようにする"""
+        with self.cond:
+            self.handled.add(info.handle)
+
+    def wait_for(self, kinds=POPUP_KINDS, timeout=1.0):
+        """指定した種類のダイアログが現れるまで待つ (監視スレッドの通知で起きる)"""
+        deadline = self.clock() + timeout
+        while True:
+            if self.thread is None:
+                # 監視スレッドが無ければ自分で差分を取る
+                self.poll_once()
+            with self.cond:
+                found = [i for i in self.known.values() if i.kind in kinds and i.handle not in self.handled]
+                if found:
+                    return min(found, key=lambda i: i.seen_at)
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    return None
+                self.cond.wait(min(remaining, self.interval * 2))
+
+    def drain_events(self):
+        with self.cond:
+            events = list(self.events)
+            self.events.clear()
+            return events
@@ -0,0 +1,123 @@
+import os
+import time
+
+# Linux など FileMaker の無い環境でワーカーを動かすための疑似バックエンド。
+# 1操作あたりの処理時間は環境変数で調整できる (ベンチマーク用)。
+FAKE_LATENCY = float(os.getenv("CLUBMAKER_FAKE_LATENCY", "0"))
+
+_FIELDS = [{"name": "id", "type": "テキスト"}]
+
+def _work(n=1):
+    if FAKE_LATENCY > 0:
+        time.sleep(FAKE_LATENCY * n)
+
+def reset(fields=None):
+    """疑似フィールド一覧を初期化する"""
+    global _FIELDS
+    _FIELDS = [dict(f) for f in (fields or [])]
+
+def get_existing_fields():
+    _work(len(_FIELDS))
+    return {"success": True, "fields": [dict(f) for f in _FIELDS]}
+
+def batch_create_fields(field_list):
+    existing = {f["name"] for f in _FIELDS}
+    count = 0
+    for f in field_list:
+        name = f.get("name")
+        _work()
+        if not name or name in existing:
+            continue
+        _FIELDS.append({"name": name, "type": f.get("type", "Text")})
+        existing.add(name)
+        count += 1
+    return count
+
+def bulk_create_fields(field_list):
+    # スニペット貼り付けは件数によらず1操作
+    _work()
+    existing = {f["name"] for f in _FIELDS}
+    created = 0
+    for f in field_list:
+        name = f.get("name")
+        if name and name not in existing:
+            _FIELDS.append({"name": name, "type": f.get("type", "Text")})
+            existing.add(name)
+            created += 1
+    return {"success": True, "count": created, "method": "snippet"}
+
+def batch_fix(fix_list):
+    by_name = {f["name"]: f for f in _FIELDS}
+    success_count = 0
+    errors = []
+    for fix in fix_list:
+        if not fix.get("should_fix", True): continue
+        old_name = fix.get("old_name", "")
+        new_name = fix.get("new_name", old_name)
+        _work()
+        field = by_name.get(old_name)
+        if field is None or (new_name != old_name and new_name in by_name):
+            errors.append(old_name)
+            continue
+        del by_name[old_name]
+        field["name"] = new_name
+        if fix.get("new_type"):
+            field["type"] = fix["new_type"]
+        by_name[new_name] = field
+        success_count += 1
+    return {"success": True, "total": len(fix_list), "succeeded": success_count, "errors": errors}
+
+_TABLES = {"Sample": _FIELDS}
+
+def apply_design(design, emit=None):
+    # テーブル作成は1回の貼り付け、テーブルごとに切り替え1回 + 貼り付け1回
+    results = []
+    tables = design.get("tables") or []
+    new = [t for t in tables if t.get("name") and t["name"] not in _TABLES]
+    if new:
+        _work()
+    for i, table in enumerate(tables):
+        name = table.get("name")
+        if not name:
+            continue
+        _work(2)
+        fields = _TABLES.setdefault(name, [])
+        existing = {f["name"] for f in fields}
+        added = [{"name": f["name"], "type": f.get("type", "Text")} for f in table.get("fields") or []
+                 if f.get("name") and f["name"] not in existing]
+        fields.extend(added)
+        result = {"table": name, "success": True, "created": len(added), "fixed": 0,
+                  "status": "created" if table in new else ("updated" if added else "unchanged")}
+        results.append(result)
+        if emit:
+            emit({"event": "table", "index": i, "total": len(tables), **result})
+    return {"success": True, "tables": results}
+
+def generate_db_design(prompt):
+    _work()
+    return {
+        "thoughts": [f"疑似バックエンド: {prompt[:40]}"],
+        "tables": [{"name": "Sample", "fields": [{"name": "id", "type": "Text"}]}],
+        "layouts": []
+    }
+
+def stream_db_design(prompt, emit):
+    design = generate_db_design(prompt)
+    for key, event in (("thoughts", "thought"), ("tables", "table"), ("layouts", "layout")):
+        for index, value in enumerate(design[key]):
+            _work()
+            emit({"event": event, "index": index, "data": value})
+    emit({"event": "done", "design": design})
+    return design
+
+def suggest_field_fix(current_fields, context=""):
+    _work()
+    suggestions = [{
+        "old_name": f.get("name", ""),
+        "new_name": f.get("name", ""),
+        "old_type": f.get("type", ""),
+        "new_type": f.get("type", ""),
+        "comment": "",
+        "should_fix": False
+    } for f in current_fields]
+    return {"success": True, "suggestions": suggestions}
@@ -1,138 +1,184 @@
-from pywinauto import Application, Desktop
-import time
+import lazy_import
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
 import sys
 import json
-import ctypes
 import fm_utils  # Robust utility
+import field_seek
+import fm_wait
+import fm_trace
+import dialog_watcher
+import progress_journal
+from field_list_scan import scan_field_list, read_field_row, visible_items, row_key
 
 def find_manage_database_dialog(app):
     """fm_utilsの共通関数を使用する"""
     return fm_utils.find_manage_database_dialog()
 
+def _click_and_wait_closed(watcher, info, title_re):
+    win = fm_utils.dialog_window(info)
+    btn = win.child_window(title_re=title_re, control_type="Button")
+    if not btn.exists(timeout=0):
+        return False
+    btn.click_input()
+    watcher.mark_handled(info)
+    fm_wait.wait_gone(lambda: watcher.is_open(info.handle), timeout=1.0, name="dialog_close")
+    return True
+
 def handle_confirmation_dialog(app):
     """保存確認またはエラーダイアログが表示されたら適切に処理する"""
     try:
-        from pywinauto import Desktop
-        # すべてのトップレベルウィンドウを確認
-        for win in Desktop(backend="uia").windows():
-            title = win.window_text()
-            if "FileMaker" in title and win.control_type() == "Window":
-                content_text = ""
-                try:
-                    # UI構成要素からテキストを抽出
-                    texts = win.descendants(control_type="Static")
-                    if not texts:
-                        texts = win.descendants(control_type="Text")
-                    content_text = "".join([t.window_text() for t in texts if t.window_text()])
-                except:
-                    pass
-
-                print(f"  > [Dialog Debug] Title: '{title}', Content: '{content_text[:50]}...'", file=sys.stderr)
-
-                # 1. 保存確認の場合
-                if any(k in content_text for k in ["保存", "save", "変更しますか"]):
-                    save_btn = win.child_window(title_re=".*保存.*|.*はい.*|.*Yes.*", control_type="Button")
-                    if save_btn.exists():
-                        print(f"  > [Dialog: Save] Clicking Save/Yes", file=sys.stderr)
-                        save_btn.click_input()
-                        time.sleep(0.5)
-                        return True
-                
-                # 2. 名前重複エラーなどの警告の場合
-                if any(k in content_text for k in ["すでに使用されています", "already in use", "無効", "invalid"]):
-                    ok_btn = win.child_window(title_re=".*OK.*", control_type="Button")
-                    if ok_btn.exists():
-                        print(f"  > [CRITICAL ERROR] Duplicate name or invalid name detected: {content_text}", file=sys.stderr)
-                        ok_btn.click_input()
-                        time.sleep(0.5)
-                        # 重複エラー時は「異常」として即座に中断フラグを返す
-                        return "ABORT_ERROR"
-
-                # 3. その他の一般的な OK 案内の場合
-                ok_btn = win.child_window(title_re=".*OK.*|.*閉じる.*|.*Close.*", control_type="Button")
-                if ok_btn.exists():
-                    print(f"  > [Dialog: Info] Clicking 'OK/Close'", file=sys.stderr)
-                    ok_btn.click_input()
-                    time.sleep(0.5)
+        # 監視スレッドが分類済みのダイアログだけを見る (無ければすぐ戻る)
+        watcher = fm_utils.get_dialog_watcher()
+        for info in watcher.pending(dialog_watcher.ALERT_KINDS, fresh=True):
+            print(f"  > [Dialog Debug] Title: '{info.title}', Kind: {info.kind}, Content: '{info.text[:50]}...'", file=sys.stderr)
+
+            # 1. 保存確認の場合
+            if info.kind == "save":
+                if _click_and_wait_closed(watcher, info, ".*保存.*|.*はい.*|.*Yes.*"):
+                    print(f"  > [Dialog: Save] Clicking Save/Yes", file=sys.stderr)
                     return True
-                    
+
+            # 2. 名前重複エラーなどの警告の場合
+            if info.kind == "name_error":
+                if _click_and_wait_closed(watcher, info, ".*OK.*"):
+                    print(f"  > [CRITICAL ERROR] Duplicate name or invalid name detected: {info.text}", file=sys.stderr)
+                    # 重複エラー時は「異常」として即座に中断フラグを返す
+                    return "ABORT_ERROR"
+
+            # 3. その他の一般的な OK 案内の場合
+            if _click_and_wait_closed(watcher, info, ".*OK.*|.*閉じる.*|.*Close.*"):
+                print(f"  > [Dialog: Info] Clicking 'OK/Close'", file=sys.stderr)
+                return True
+
     except Exception as e:
         print(f"  > [Dialog Handler Exception] {e}", file=sys.stderr)
     return False
 
-def select_field_by_name(dialog_spec, field_name):
+def _name_visible(field_list, name):
+    return _row_landed(field_list, name)
+
+def _first_row_key(field_list):
+    items = visible_items(field_list)
+    return row_key(items[0]) if items else None
+
+def _row_landed(field_list, name, type_labels=None):
+    """表示中の行に name があるか (type_labels を渡せば型の表示もそのどれかか)"""
+    for item in visible_items(field_list):
+        try:
+            row_name, row_type = read_field_row(item)
+        except: continue
+        if row_name == name:
+            return type_labels is None or row_type in type_labels
+    return False
+
+def _press_home(dialog_spec, field_list):
+    """Home で先頭へ移動し、先頭行が選択される (名前欄に先頭行の名前が入る) まで待つ"""
+    import pyautogui
+    name_edit = fm_utils.get_controls(dialog_spec).get("name_edit")
+    pyautogui.press('home')
+
+    def at_top():
+        items = visible_items(field_list)
+        if not items or name_edit is None:
+            return bool(items)
+        return read_field_row(items[0])[0] == (name_edit.window_text() or name_edit.get_value() or "")
+    fm_wait.wait_until(at_top, timeout=1.0, name="list_home", adaptive=True)
+
+def select_field_by_name(dialog_spec, field_name, index=None):
     """
-    リストの最上部(Home)に移動し、Downキーで1つずつ走査して、
-    指定された名前のフィールドを確実に選択する。
+    指定された名前のフィールドを選択する。
+    インデックスがあれば目的の行へ直接シークし、なければ(または外れたら)
+    リストの最上部(Home)から1画面ずつ走査する。
     """
+    import pyautogui
     try:
-        field_list = dialog_spec.child_window(auto_id="IDC_DEFFIELDS_FIELD_LIST", control_type="DataGrid")
-        if not field_list.exists():
+        field_list = fm_utils.get_controls(dialog_spec).get("field_list")
+        if field_list is None:
             return False
         
         field_list.set_focus()
-        # リストの一番上へ移動
-        import pyautogui
-        pyautogui.press('home')
-        time.sleep(0.3)
-        
-        max_search = 300 # フィールド総数に応じた上限
-        
-        for i in range(max_search):
-            # 現在見えている(UIAで取得可能な)DataItemから、名前が一致するものを探す
-            # 1行ずつDownキーで送るため、常に現在の行はDataItemとして取得できるはず
-            items = field_list.descendants(control_type="DataItem")
-            
+
+        if index is not None and field_name in index:
+            if field_seek.seek_field(field_list, index, field_name, pyautogui.press):
+                print(f"  > Target found and selected: {field_name}", file=sys.stderr)
+                return True
+            print(f"  > Index seek failed. Falling back to full scan...", file=sys.stderr)
+
+        # リストの一番上へ移動し、表示が変わらなくなるまで1画面ずつ探す (行数の上限なし)
+        _press_home(dialog_spec, field_list)
+        last_view = None
+        stalled = 0
+        while stalled < 2:
+            items = visible_items(field_list)
             for item in items:
                 try:
-                    cells = item.children()
-                    if not cells: continue
-                    name_nodes = cells[0].descendants(control_type="Text")
-                    if not name_nodes: continue
-                    current_name = name_nodes[0].window_text()
-                    
-                    if current_name == field_name:
-                        # 名前が一致したら選択する
-                        try:
-                            item.select() # SelectionItem pattern
-                            time.sleep(0.1)
-                        except:
-                            item.click_input()
-                        
-                        # 確実に反映させるために最初のセルをクリック
-                        try:
-                            cells[0].click_input()
-                        except: pass
-                        
-                        print(f"  > Target found and selected: {field_name}", file=sys.stderr)
-                        return True
+                    current_name, _ = read_field_row(item)
                 except: continue
+                if current_name == field_name:
+                    field_seek._select_item(item)
+                    print(f"  > Target found and selected: {field_name}", file=sys.stderr)
+                    return True
 
-            # 次の行へ
-            pyautogui.press('down')
-            time.sleep(0.05)
+            view = tuple(row_key(item) for item in items)
+            stalled = stalled + 1 if view == last_view else 0
+            last_view = view
+            pyautogui.press('pagedown')
+            # 再描画が遅れても古い表示を読まないよう、先頭行が変わるまで待つ (最下部では変わらずに時間切れ)
+            first = view[0] if view else None
+            fm_wait.wait_until(lambda: _first_row_key(field_list) != first, timeout=0.5, name="page_scroll")
             
         return False
     except Exception as e:
         print(f"  > Select error: {e}", file=sys.stderr)
         return False
 
-def fix_single_field(dialog_spec, old_name, new_name, new_type=None, comment="AI最適化"):
+def build_field_index(dialog_spec):
+    """フィールド一覧を1回だけ走査して「名前 → 行位置」インデックスを作る"""
+    import pyautogui
+    try:
+        field_list = fm_utils.get_controls(dialog_spec).require("field_list")
+        field_list.set_focus()
+        _press_home(dialog_spec, field_list)
+        # 件数が読めれば揃った時点で止める (読めなければ最下部まで)
+        fields = scan_field_list(field_list, pyautogui.press, fm_utils.read_field_count(dialog_spec) or 0)
+        index = field_seek.FieldIndex([f["name"] for f in fields])
+        # 走査で最下部まで移動しているので、Home で先頭に戻しておく
+        pyautogui.press('home')
+        print(f"  > Field index built: {len(index)} fields", file=sys.stderr)
+        return index
+    except Exception as e:
+        print(f"  > Failed to build field index: {e}", file=sys.stderr)
+        return None
+
+def fix_single_field(dialog_spec, old_name, new_name, new_type=None, comment="AI最適化", index=None, journal=None):
     """
-    1つのフィールドを上から順に探して修整する。
+    1つのフィールドを探して修整する。index があれば変更後に名前を更新する。
+    journal があれば「変更」を押す直前に commit を記録する。
     """
+    with fm_trace.span("fix.field", field=old_name, new_name=new_name, new_type=new_type) as step:
+        ok = _fix_single_field(dialog_spec, old_name, new_name, new_type, comment, index, journal)
+        step.set(ok=ok)
+        return ok
+
+def _fix_single_field(dialog_spec, old_name, new_name, new_type, comment, index, journal=None):
+    import pyautogui
     print(f"\n[Fixing] {old_name} -> {new_name}", file=sys.stderr)
-    handle_confirmation_dialog(None)
+    with fm_trace.span("fix.dialog"):
+        handle_confirmation_dialog(None)
 
-    # 1. フィールドを上から順に検索して選択
-    if not select_field_by_name(dialog_spec, old_name):
+    # 1. フィールドを検索して選択
+    with fm_trace.span("fix.select"):
+        found = select_field_by_name(dialog_spec, old_name, index)
+    if not found:
         print(f"  > Error: Field '{old_name}' not found. Skipping to prevent accidental creation.", file=sys.stderr)
         return False
 
     try:
+        controls = fm_utils.get_controls(dialog_spec)
         # 2. 選択後の検証
-        name_edit = dialog_spec.child_window(auto_id="IDC_DEFFIELDS_FIELDNAME_EDIT", control_type="Edit")
-        if not name_edit.exists():
+        name_edit = controls.get("name_edit")
+        if name_edit is None:
              print("  > Error: Field Name edit box not found.", file=sys.stderr)
              return False
              
@@ -143,201 +189,251 @@ def fix_single_field(dialog_spec, old_name, new_name, new_type=None, comment="AI
         # 名前が一致しない場合でも、ひとまずフォーカスしてリトライを試みる
         if actual_val != old_name:
             print(f"  > Warning: Selection mismatch. Trying to re-select...", file=sys.stderr)
+            fm_trace.retry()
             # 再度検索
-            if not select_field_by_name(dialog_spec, old_name):
+            if not select_field_by_name(dialog_spec, old_name, index):
                  return False
             actual_val = name_edit.window_text() or name_edit.get_value() or ""
             if actual_val != old_name:
                 print(f"  > Selection still failing. Skipping '{old_name}'.", file=sys.stderr)
                 return False
 
-        # 3. 名前変更
-        print(f"  > Entering new name: '{new_name}'", file=sys.stderr)
-        # UIAの直接入力(set_text/set_edit_text)を試みる
-        entered_success = False
-        try:
-            name_edit.set_focus()
-            name_edit.set_text(new_name) # 速くて確実
-            time.sleep(0.2)
-            if name_edit.window_text() == new_name or name_edit.get_value() == new_name:
-                entered_success = True
-        except: pass
+        with fm_trace.span("fix.name_entry"):
+            # 3. 名前変更
+            print(f"  > Entering new name: '{new_name}'", file=sys.stderr)
+            # UIAの直接入力(set_text/set_edit_text)を試みる
+            entered_success = False
+            try:
+                name_edit.set_focus()
+                name_edit.set_text(new_name) # 速くて確実
+                if fm_wait.wait_until(fm_wait.text_equals(name_edit, new_name), timeout=0.5, name="name_entry"):
+                    entered_success = True
+            except: pass
         
-        if not entered_success:
-            # フォールバック: キー操作
-            print("  > Direct entry failed. Falling back to type_keys...", file=sys.stderr)
-            name_edit.click_input()
-            time.sleep(0.1)
-            name_edit.type_keys("^a{BACKSPACE}", with_spaces=True)
-            time.sleep(0.1)
-            name_edit.type_keys(new_name, with_spaces=True)
-            time.sleep(0.3)
+            if not entered_success:
+                # フォールバック: キー操作
+                print("  > Direct entry failed. Falling back to type_keys...", file=sys.stderr)
+                fm_trace.retry()
+                name_edit.click_input()
+                name_edit.type_keys("^a{BACKSPACE}", with_spaces=True)
+                fm_wait.wait_until(fm_wait.edit_cleared(name_edit), timeout=0.5, name="name_cleared")
+                name_edit.type_keys(new_name, with_spaces=True)
+                fm_wait.wait_until(fm_wait.text_equals(name_edit, new_name), timeout=1.0, name="name_entry_typed")
         
-        # 入力後の値を最終ダブルチェック
-        entered_val = name_edit.window_text() or name_edit.get_value() or ""
-        print(f"  > Value after entry: '{entered_val}'", file=sys.stderr)
+            # 入力後の値を最終ダブルチェック
+            entered_val = name_edit.window_text() or name_edit.get_value() or ""
+            print(f"  > Value after entry: '{entered_val}'", file=sys.stderr)
         
-        if not entered_val or entered_val == old_name:
-             print("  > Critical: Name was NOT updated in the edit box. Retrying with pyautogui...", file=sys.stderr)
-             name_edit.click_input()
-             pyautogui.hotkey('ctrl', 'a')
-             pyautogui.press('backspace')
-             pyautogui.typewrite(new_name)
-             time.sleep(0.5)
-
-        # 4. 型変更
-        if new_type:
-            try:
-                type_map = {
-                    "Text": "t", "テキスト": "t",
-                    "Number": "n", "数値": "n",
-                    "Date": "d", "日付": "d",
-                    "Time": "i", "時刻": "i",
-                    "Timestamp": "m", "タイムスタンプ": "m",
-                    "Container": "r", "オブジェクト": "r",
-                    "Calculation": "c", "計算": "c",
-                    "Summary": "s", "集計": "s"
-                }
-                type_combo = dialog_spec.child_window(auto_id="IDC_FIELD_TYPE_MENU", control_type="ComboBox")
-                key = type_map.get(new_type, "t")
-                type_combo.set_focus()
-                # 警告: ここで Enter を送ると「作成」が実行される可能性があるため、キーのみ送る
-                type_combo.type_keys(key)
-                time.sleep(0.3)
-            except Exception as e:
-                print(f"  > Warning: Type change failed: {e}", file=sys.stderr)
+            # 型だけの変更 (new_name == old_name) では名前が変わらないのが正しい
+            if entered_val != new_name:
+                 print("  > Critical: Name was NOT updated in the edit box. Retrying with pyautogui...", file=sys.stderr)
+                 name_edit.click_input()
+                 pyautogui.hotkey('ctrl', 'a')
+                 pyautogui.press('backspace')
+                 pyautogui.typewrite(new_name)
+                 fm_wait.wait_until(fm_wait.text_equals(name_edit, new_name), timeout=1.0, name="name_entry_typed")
+
+        with fm_trace.span("fix.type_select"):
+            # 4. 型変更
+            if new_type:
+                try:
+                    type_combo = controls.require("type_combo")
+                    key = fm_utils.TYPE_KEYS.get(new_type, "t")
+                    type_combo.set_focus()
+                    # 警告: ここで Enter を送ると「作成」が実行される可能性があるため、キーのみ送る
+                    type_combo.type_keys(key)
+                    fm_wait.wait_until(fm_wait.text_in(type_combo, fm_utils.TYPE_LABELS[key]), timeout=1.0, name="type_select")
+                except Exception as e:
+                    print(f"  > Warning: Type change failed: {e}", file=sys.stderr)
         
-        # 5. コメント変更
-        try:
-            comment_edit = dialog_spec.child_window(auto_id="IDC_DEFFIELDS_FIELDCOMMENT_EDIT", control_type="Edit")
-            if comment_edit.exists():
-                comment_edit.set_focus()
-                # 確実にクリアしてからセット
-                comment_edit.set_text(comment)
-                time.sleep(0.2)
-        except: pass
+        with fm_trace.span("fix.comment"):
+            # 5. コメント変更
+            try:
+                comment_edit = controls.get("comment_edit")
+                if comment_edit is not None:
+                    comment_edit.set_focus()
+                    # 確実にクリアしてからセット
+                    comment_edit.set_text(comment)
+                    fm_wait.wait_until(fm_wait.text_equals(comment_edit, comment), timeout=0.5, name="comment_entry")
+            except: pass
         
-        # 6. 変更確定
-        print(f"  > Finalizing change (Clicking 'Change')...", file=sys.stderr)
-        clicked = False
-        try:
-            # 変更ボタン (日本語: 変更, 英語: Change)
-            # 警告: 「作成」ボタン（IDC_DEFFIELDS_CREATE_BTN）は絶対にクリックしないよう厳格に特定
-            change_btn = dialog_spec.child_window(title_re="^変更$|^Change$", control_type="Button", auto_id="IDC_DEFFIELDS_CHANGE_BTN")
-            if not change_btn.exists():
-                # タイトルのみで再試行
-                change_btn = dialog_spec.child_window(title_re="^変更$|^Change$", control_type="Button")
+        with fm_trace.span("fix.commit"):
+            # 6. 変更確定
+            field_list = controls.require("field_list")
+            if journal is not None:
+                journal.commit(old_name)
+            print(f"  > Finalizing change (Clicking 'Change')...", file=sys.stderr)
+            clicked = False
+            try:
+                # 変更ボタン (日本語: 変更, 英語: Change)
+                # 警告: 「作成」ボタン（IDC_DEFFIELDS_CREATE_BTN）は絶対にクリックしないよう厳格に特定
+                # (auto_id で見つからなければ、UI 言語の「変更 / Change」に完全一致するものだけを探す)
+                change_btn = controls.get("change_btn")
             
-            if change_btn.exists():
-                print(f"  > Found 'Change' button. Clicking...", file=sys.stderr)
-                change_btn.click_input()
-                clicked = True
-        except Exception as e:
-            print(f"  > Change button search error: {e}", file=sys.stderr)
-
-        if not clicked:
-            # 日本語版の変更ショートカットは Alt+M (修整/Modify) の場合がある
-            print(f"  > Fallback: Sending Alt+M (Japanese Change shortcut)...", file=sys.stderr)
-            dialog_spec.type_keys("%m")
-            time.sleep(0.3)
-            # または Alt+A (Change)
-            dialog_spec.type_keys("%a")
+                if change_btn is not None:
+                    print(f"  > Found 'Change' button. Clicking...", file=sys.stderr)
+                    change_btn.click_input()
+                    clicked = True
+            except Exception as e:
+                print(f"  > Change button search error: {e}", file=sys.stderr)
+
+            if not clicked:
+                # 日本語版の変更ショートカットは Alt+M (修整/Modify) の場合がある
+                print(f"  > Fallback: Sending Alt+M (Japanese Change shortcut)...", file=sys.stderr)
+                dialog_spec.type_keys("%m")
+                # 反映されなければ Alt+A (Change)
+                if not fm_wait.wait_until(lambda: _name_visible(field_list, new_name), timeout=0.3, name="change_shortcut"):
+                    dialog_spec.type_keys("%a")
         
-        time.sleep(0.8) # 変更の反映待ち
+            # 変更の反映待ち: 一覧に新しい名前が現れるか、警告ダイアログが出るまで
+            landed = lambda: _row_landed(field_list, new_name, fm_utils.TYPE_LABELS[fm_utils.TYPE_KEYS.get(new_type, "t")] if new_type else None)
+            fm_wait.wait_until(lambda: landed() or fm_utils.find_popup(dialog_watcher.ALERT_KINDS),
+                               timeout=2.0, name="change_commit")
         
-        # 7. 完了確認 (Editボックスがクリアされるか、次の行が選択されるかなど)
-        # FileMakerでは「変更」を押すと、通常入力エリアが空になるか、引き続き選択されている
-        # ここでは特に待機のみ行い、ダイアログをチェック
-        handle_confirmation_dialog(None)
+        # 7. 完了確認: ダイアログを処理してから、一覧の行が新しい名前 (と型) になったかを読み直す
+        with fm_trace.span("fix.dialog"):
+            handle_confirmation_dialog(None)
+        if not landed():
+            print(f"  > Error: '{new_name}' did not appear in the field list after 'Change'.", file=sys.stderr)
+            return False
+        if index is not None:
+            index.rename(old_name, new_name)
         return True
     except Exception as e:
         print(f"  > Exception during fix: {e}", file=sys.stderr)
         return False
 
-def batch_fix(fix_list):
-    """一括修整を実行する"""
+def _recover_in_flight(journal, index):
+    """
+    前回落ちた時点の修整 (intent / commit のまま) が反映されていたか、読んだばかりの一覧で確かめる。
+    改名は一覧に新しい名前があり古い名前が無ければ反映済み。確かめられないもの (型だけの変更など) はやり直す。
+    """
+    for old_name in journal.in_flight():
+        new_name = journal.entries[old_name].get("new_name", old_name)
+        if index is not None and new_name != old_name and new_name in index and old_name not in index:
+            print(f"  > [Journal] '{old_name}' -> '{new_name}' was applied before the interruption.", file=sys.stderr)
+            journal.verified(old_name, recovered=True)
+        else:
+            journal.failed(old_name, "interrupted")
+
+def batch_fix(fix_list, current_fields=None):
+    """
+    一括修整を実行する。
+    current_fields (直前に読んだ一覧, 表示順) を渡すと、走査し直さずにそこからインデックスを作る。
+    """
     print(f"=== Starting Batch Fix (Selection Pattern): {len(fix_list)} fields ===", file=sys.stderr)
+    return batch_fix_stream([fix_list], current_fields, expected=len(fix_list))
+
+def batch_fix_stream(fix_chunks, current_fields=None, expected=None):
+    """
+    修整の一覧をチャンクごとに受け取りながら適用する (fix_chunks は list の iterable)。
+    AI の提案が届いた分から適用を始めるパイプライン (fix_pipeline) 用。準備 (ダイアログ・インデックス・
+    ジャーナル) は最初に1回だけ行い、チャンクごとに一覧の上から下へのスイープ順に並べ替える。
+    expected は進捗表示用のおおよその件数。
+    """
     fm_utils.set_input_block(True)
-    fm_utils.start_overlay()
+    fm_utils.start_overlay(f"フィールド修整: {expected or '...'}件")
+    linger = 0
+    # get_app() で失敗しても except で閉じられるよう、先に記録しないジャーナルを用意しておく
+    journal = progress_journal.Journal(None, "fix")
     try:
-        app = Application(backend="uia").connect(path="FileMaker Pro.exe")
+        app = fm_utils.get_app()
         
         success_count = 0
         errors = []
-        
-        for i, fix in enumerate(fix_list):
-            if not fix.get("should_fix", True): continue
-            
-            old_name = fix.get("old_name", "")
-            new_name = fix.get("new_name", old_name)
-            
-            # Update Overlay
-            fm_utils.update_overlay(f"【{i+1}/{len(fix_list)}】 フィールド修整中...\n{old_name} ➔ {new_name}")
-            
-            if not fm_utils.ensure_manage_database():
-                print("CRITICAL: 'データベースの管理' ダイアログが見つかりません。FileMakerが前面にあり、ダイアログが開いているか確認してください。", file=sys.stderr)
-                # フォールバック: 現在アクティブなウィンドウを試す
-                try:
-                    desktop = Desktop(backend="uia")
-                    dialog = desktop.top_window()
-                    print(f"  > Fallback: Attempting to use top window: '{dialog.window_text()}'", file=sys.stderr)
-                except:
-                    break
-            else:
-                dialog = fm_utils.find_manage_database_dialog()
+        index = None
+        total = 0
+        stop = False
 
-            if not dialog:
-                print("Error: Dialog open but handle not found?", file=sys.stderr)
-                errors.append(fix.get("old_name"))
-                continue
+        # 一覧を1回だけ走査してインデックスを作り、上から下への1回のスイープで適用できるよう並べ替える
+        if fm_utils.ensure_manage_database():
+            dialog = fm_utils.find_manage_database_dialog()
+            if dialog:
+                fm_utils.select_fields_tab(dialog)
+                if current_fields is not None:
+                    index = field_seek.FieldIndex([f["name"] for f in current_fields])
+                else:
+                    index = build_field_index(dialog)
+                journal = progress_journal.open_batch("fix", *fm_utils.read_table_context(dialog))
+                _recover_in_flight(journal, index)
+
+        for fix_list in fix_chunks:
+            if index is not None:
+                fix_list = index.sweep_order(fix_list)
+            for fix in fix_list:
+                total += 1
+                if not fix.get("should_fix", True): continue
+                
+                old_name = fix.get("old_name", "")
+                new_name = fix.get("new_name", old_name)
+                new_type = fix.get("new_type", None)
+                op_digest = progress_journal.digest({"old_name": old_name, "new_name": new_name, "new_type": new_type})
+                if journal.is_verified(old_name, op_digest):
+                    print(f"  > '{old_name}' -> '{new_name}' already applied (journal). Skipping.", file=sys.stderr)
+                    success_count += 1
+                    continue
                 
-            dialog_spec = dialog
-            dialog_spec.set_focus()
+                # Update Overlay
+                fm_utils.update_overlay(f"フィールド修整中...\n{old_name} ➔ {new_name}", total, max(expected or 0, total))
+                
+                if not fm_utils.ensure_manage_database():
+                    print("CRITICAL: 'データベースの管理' ダイアログが見つかりません。FileMakerが前面にあり、ダイアログが開いているか確認してください。", file=sys.stderr)
+                    # フォールバック: 現在アクティブなウィンドウを試す
+                    try:
+                        desktop = Desktop(backend="uia")
+                        dialog = desktop.top_window()
+                        print(f"  > Fallback: Attempting to use top window: '{dialog.window_text()}'", file=sys.stderr)
+                    except:
+                        stop = True
+                        break
+                else:
+                    dialog = fm_utils.find_manage_database_dialog()
 
-            # Ensure "Fields" tab is selected (Reliable check)
-            try:
-                # auto_id や control_type でより確実に特定
-                tab_control = dialog_spec.child_window(control_type="Tab")
-                if tab_control.exists():
-                    fields_tab = tab_control.child_window(title="フィールド", control_type="TabItem")
-                    if fields_tab.exists():
-                        if not fields_tab.is_selected():
-                            print(f"  > Selecting 'Fields' tab...", file=sys.stderr)
-                            fields_tab.click_input()
-                            time.sleep(0.8)
-                    else:
-                        # フォールバック: キー送信
-                        dialog_spec.type_keys("%f")
-                        time.sleep(0.5)
-            except Exception as e:
-                print(f"  > [Tab Selection Warning] {e}. Trying Atl+F...", file=sys.stderr)
-                dialog_spec.type_keys("%f")
-                time.sleep(0.5)
+                if not dialog:
+                    print("Error: Dialog open but handle not found?", file=sys.stderr)
+                    errors.append(fix.get("old_name"))
+                    continue
+                    
+                dialog_spec = dialog
+                dialog_spec.set_focus()
 
-            new_type = fix.get("new_type", None)
-            comment = fix.get("comment", "ClubMaker最適化")
-            
-            if fix_single_field(dialog_spec, old_name, new_name, new_type, comment):
-                success_count += 1
-            else:
-                errors.append(old_name)
-            
-            # 各フィールド修整後にダイアログが出た場合を考慮
-            diag_res = handle_confirmation_dialog(app)
-            if diag_res == "ABORT_ERROR":
-                print("CRITICAL: Aborting due to duplicate name error.", file=sys.stderr)
-                fm_utils.update_overlay("エラー発生: 名前重複。中断します。")
+                # Ensure "Fields" tab is selected (選択されるまで待機する)
+                fm_utils.select_fields_tab(dialog_spec)
+
+                comment = fix.get("comment", "ClubMaker最適化")
+                
+                journal.intent(old_name, op_digest, new_name=new_name)
+                ok = fix_single_field(dialog_spec, old_name, new_name, new_type, comment, index, journal)
+                
+                # 各フィールド修整後にダイアログが出た場合を考慮
+                diag_res = handle_confirmation_dialog(app)
+                if ok and diag_res != "ABORT_ERROR":
+                    success_count += 1
+                    journal.verified(old_name)
+                else:
+                    errors.append(old_name)
+                    journal.failed(old_name, "name conflict" if diag_res == "ABORT_ERROR" else "fix failed")
+                if diag_res == "ABORT_ERROR":
+                    print("CRITICAL: Aborting due to duplicate name error.", file=sys.stderr)
+                    fm_utils.update_overlay("中断しました", error="名前重複")
+                    stop = True
+                    break
+            if stop:
                 break
-            time.sleep(0.5) 
         
         fm_utils.update_overlay("完了しました！")
-        time.sleep(1.5)
-        return {"success": True, "total": len(fix_list), "succeeded": success_count, "errors": errors}
+        linger = 1.5
+        journal.close()
+        return {"success": True, "total": total, "succeeded": success_count, "errors": errors}
     except Exception as e:
+        journal.close(completed=False)
         return {"success": False, "error": str(e)}
     finally:
-        fm_utils.stop_overlay()
+        # 完了の表示はオーバーレイ側で少し残す (ここでは待たない)
+        fm_utils.stop_overlay(linger)
         fm_utils.set_input_block(False)
+        print(f"  > [Wait Stats] {json.dumps(fm_wait.summary(), ensure_ascii=False)}", file=sys.stderr)
+        print(f"  > [Control Cache] {json.dumps(fm_utils.control_stats(), ensure_ascii=False)}", file=sys.stderr)
 
 if __name__ == "__main__":
     if len(sys.argv) >= 2:
@@ -0,0 +1,113 @@
+import sys
+import time
+import itertools
+
+# 「データベースの管理」のフィールド一覧 (DataGrid) の読み取り。
+# pywinauto に依存しないので、合成グリッドに対しても同じコードでベンチマークできる。
+
+# ヘッダ系の文字列 (「完全一致」で除外。名前_1 などを誤って消さないため)
+HEADER_NAMES = {"名前", "フィールド名", "型", "タイプ", "オプション", "オプション / コメント", "並べ替え"}
+
+def _cell_text(cell):
+    nodes = cell.descendants(control_type="Text")
+    text = ""
+    if nodes:
+        text = " ".join([n.window_text() for n in nodes if n.window_text()]).strip()
+    if not text:
+        text = (cell.window_text() or "").strip()
+    return text
+
+def read_field_row(item):
+    """DataItem 1行から (名前, 型) を読み取る"""
+    cells = item.children()
+    n_text = _cell_text(cells[0]) if len(cells) >= 1 else ""
+    t_text = _cell_text(cells[1]) if len(cells) >= 2 else ""
+
+    # もし Cell から取れなかった場合、Whole Text から推測 (並べ替え 名前 型 ...)
+    if not n_text:
+        it_text = (item.window_text() or "").strip()
+        if "並べ替え" in it_text:
+            parts = it_text.split()
+            if len(parts) >= 3:
+                n_text = parts[1]
+                t_text = parts[2]
+    return n_text, t_text
+
+def row_key(item):
+    """行の同一性キー。セルを辿らずに取れる runtime_id を優先する"""
+    try:
+        rid = item.element_info.runtime_id
+        if rid:
+            return tuple(rid)
+    except: pass
+    return item.window_text()
+
+def visible_items(grid):
+    items = grid.children(control_type="DataItem")
+    if not items:
+        items = grid.descendants(control_type="DataItem")
+    return items
+
+def scan_field_list(grid, press, total_expected=0, settle=0.1, on_progress=None, max_pages=None):
+    """
+    フィールド一覧を1画面ずつ送りながら読み取る。
+    - 読み取り済みの名前はハッシュ集合で管理 (重複判定 O(1))
+    - 前回のステップで見えていなかった行だけセルを読む
+    - PageDown で1画面分進め、予定件数に達するか表示が変わらなくなったら終了
+    max_pages を省略すると画面数の上限は設けない (表示が変わらなくなれば必ず止まる)
+    """
+    ordered_fields = []
+    seen_names = set()
+    seen_rows = set()
+    last_view = None
+    stalled = 0
+    pages = itertools.count() if max_pages is None else range(max_pages)
+
+    for page in pages:
+        if on_progress:
+            on_progress(len(ordered_fields))
+        try:
+            items = visible_items(grid)
+        except Exception as e:
+            print(f"  > Scan error: {e}", file=sys.stderr)
+            items = []
+
+        keys = [row_key(item) for item in items]
+        view = tuple(keys)
+        if view == last_view:
+            # 最初の PageDown は選択を画面下端へ移すだけでスクロールしないため、2回続けて変化なしで終了
+            stalled += 1
+            if stalled >= 2:
+                print(f"  > Viewport unchanged. End of list.", file=sys.stderr)
+                break
+        else:
+            stalled = 0
+        last_view = view
+
+        new_rows = 0
+        for key, item in zip(keys, items):
+            if key in seen_rows:
+                continue
+            seen_rows.add(key)
+            new_rows += 1
+            try:
+                n_text, t_text = read_field_row(item)
+            except: continue
+            if n_text and n_text not in seen_names and n_text not in HEADER_NAMES:
+                seen_names.add(n_text)
+                print(f"    - Added: '{n_text}' ({t_text})", file=sys.stderr)
+                ordered_fields.append({"name": n_text, "type": t_text})
+
+        print(f"  > [Page {page}] Items visible: {len(items)}, New rows: {new_rows}, Collected: {len(ordered_fields)}", file=sys.stderr)
+
+        # 終了判定
+        if total_expected > 0 and len(ordered_fields) >= total_expected:
+            print(f"  > Reached expected total: {total_expected}", file=sys.stderr)
+            break
+
+        # 1画面分進める
+        press('pagedown')
+        if settle:
+            time.sleep(settle)
+
+    return ordered_fields
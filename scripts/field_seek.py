@@ -0,0 +1,142 @@
+import sys
+import time
+
+from field_list_scan import read_field_row, visible_items
+
+# フィールド一覧の「名前 → 行位置」インデックスと、それを使った直接シーク。
+# Home から Down で1行ずつ探す代わりに、ScrollPattern で目的の行付近へ飛ぶか、
+# 現在行からの最短キー操作で移動してから、見えている行の中で名前を照合する。
+# 一覧は作成順で表示されている前提 (名前変更しても行位置は変わらない)。
+
+class FieldIndex:
+    def __init__(self, names):
+        self.names = list(names)
+        self.rows = {name: i for i, name in enumerate(self.names)}
+        self.current = 0
+        self.viewport = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.rows
+
+    def row_of(self, name):
+        return self.rows.get(name)
+
+    def rename(self, old_name, new_name):
+        """変更が反映されたらインデックスも更新する"""
+        row = self.rows.pop(old_name, None)
+        if row is None:
+            return
+        self.names[row] = new_name
+        self.rows[new_name] = row
+
+    def sweep_order(self, fixes, key="old_name"):
+        """一覧の上から下へ1回で処理できるよう並べ替える (索引にないものは末尾、元の順序を維持)"""
+        missing = len(self.names)
+        return sorted(fixes, key=lambda f: self.rows.get(f.get(key, ""), missing))
+
+    def key_path(self, target):
+        """現在行から target 行へ移動する最短のキー列を返す"""
+        page = max(self.viewport - 1, 1)
+        last = len(self.names) - 1
+
+        def moves(delta):
+            if delta == 0:
+                return []
+            down = delta > 0
+            pages, rest = divmod(abs(delta), page)
+            return ["pagedown" if down else "pageup"] * pages + ["down" if down else "up"] * rest
+
+        candidates = [
+            moves(target - self.current),
+            ["home"] + moves(target),
+            ["end"] + moves(target - last),
+        ]
+        return min(candidates, key=len)
+
+def _scroll_to_row(grid, row, total):
+    """UIA ScrollPattern で縦スクロール位置を直接設定する。使えなければ False"""
+    if total <= 1:
+        return False
+    try:
+        grid.iface_scroll.SetScrollPercent(-1, min(100.0, row * 100.0 / (total - 1)))
+        return True
+    except:
+        return False
+
+def _find_visible(grid, field_name):
+    items = visible_items(grid)
+    for item in items:
+        try:
+            name, _ = read_field_row(item)
+        except: continue
+        if name == field_name:
+            return item, len(items)
+    return None, len(items)
+
+def _visible_rows(grid, index):
+    """見えている行の位置 (インデックス上の行番号) を返す"""
+    rows = []
+    for item in visible_items(grid):
+        try:
+            name, _ = read_field_row(item)
+        except: continue
+        if name in index:
+            rows.append(index.row_of(name))
+    return sorted(rows)
+
+def _select_item(item):
+    try:
+        item.select()  # SelectionItem pattern
+    except:
+        item.click_input()
+    # 確実に反映させるために最初のセルをクリック
+    try:
+        cells = item.children()
+        if cells:
+            cells[0].click_input()
+    except: pass
+
+def seek_field(grid, index, field_name, press, settle=0.05):
+    """インデックスを使って field_name の行へ移動し選択する"""
+    row = index.row_of(field_name)
+    if row is None:
+        return False
+
+    # 目的の行がすでに画面内にありそうな場合だけ、見えている行を先に確認する
+    item = None
+    if index.viewport == 0 or abs(row - index.current) < index.viewport:
+        item, visible = _find_visible(grid, field_name)
+        index.viewport = max(index.viewport, visible)
+
+    if item is None and _scroll_to_row(grid, row, len(index)):
+        if settle:
+            time.sleep(settle)
+        item, _ = _find_visible(grid, field_name)
+
+    # キー操作で移動。ページ送りの挙動で位置がずれたら、見えている行から現在位置を補正して再試行する
+    for attempt in range(3):
+        if item is not None:
+            break
+        for key in index.key_path(row):
+            press(key)
+        if settle:
+            time.sleep(settle)
+        index.current = row
+        item, visible = _find_visible(grid, field_name)
+        index.viewport = max(index.viewport, visible)
+        if item is None:
+            anchor = _visible_rows(grid, index)
+            if not anchor:
+                break
+            index.current = anchor[-1] if row > anchor[-1] else anchor[0]
+
+    if item is None:
+        print(f"  > Seek miss for '{field_name}' (row {row}).", file=sys.stderr)
+        return False
+
+    _select_item(item)
+    index.current = row
+    return True
@@ -1,33 +1,36 @@
-from pywinauto import Application, Desktop
-import pyautogui
+import lazy_import
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
+pyautogui = lazy_import.lazy("pyautogui")
 import time
 import sys
+import fm_wait
+import dialog_watcher
 
 def finalize_filemaker_dialog():
     """FileMakerの『データベースの管理』ダイアログでOKを押して保存終了する"""
     print("--- Finalize & Save FileMaker Changes ---")
     try:
         # 1. 警告ポップアップ（破棄・重複など）の徹底排除
-        desktop = Desktop(backend="uia")
+        # ハンドル一覧の差分で分類済みのダイアログだけを見る (UIA でデスクトップ全体は走査しない)
+        watcher = dialog_watcher.DialogWatcher()
         retries = 3
         while retries > 0:
             try:
-                # 「FileMaker Pro」というタイトルの小窓を探す
-                popups = [w for w in desktop.windows(title="FileMaker Pro", control_type="Window", top_level_only=True) if w.is_visible()]
-                if popups:
-                    popup = popups[0]
-                    text = "".join([t.window_text() for t in popup.descendants(control_type="Text")])
-                    print(f"  > Popup detected: '{text[:30]}...'")
+                popup = watcher.find(dialog_watcher.ALERT_KINDS, fresh=True)
+                if popup:
+                    print(f"  > Popup detected: '{popup.text[:30]}...'")
                     
-                    if "破棄" in text or "Discard" in text:
+                    if popup.kind == "discard":
                         # 破棄ダイアログが出ているなら「キャンセル」して本画面に戻る
-                        btn = popup.child_window(title_re="キャンセル|Cancel", control_type="Button")
+                        btn = Desktop(backend="uia").window(handle=popup.handle).child_window(title_re="キャンセル|Cancel", control_type="Button")
                         if btn.exists(): btn.click_input()
                         else: pyautogui.press('esc')
                     else:
                         # 重複警告などは Enter または Esc で閉じる
                         pyautogui.press('enter')
-                    time.sleep(0.5)
+                    watcher.mark_handled(popup)
+                    fm_wait.wait_gone(lambda: watcher.is_open(popup.handle, fresh=True), timeout=0.5, name="popup_close")
                 else: break
             except: break
             retries -= 1
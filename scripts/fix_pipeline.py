@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+import queue
+import threading
+
+import fm_trace
+
+# AI の提案と GUI での適用を重ねて動かすパイプライン (run_field_fix 用)。
+# 提案は別スレッドでチャンクごとに受け取り、上限付きのキューに入れる。GUI 側 (このスレッド) は
+# 最初のチャンクが届いたらすぐ適用を始め、その間に AI が残りのチャンクを処理する。
+# 全体の時間は「AI の時間 + GUI の時間」ではなく、おおよそ max(AI, GUI) になる。
+#
+#   result = fix_pipeline.run_field_fix()            # 一覧の読み取り → 提案 → 適用
+#   result["stats"]  -> 段階ごとの時間とキューの深さ
+#
+# キューが一杯 (GUI が遅い) なら AI 側は待ち、空 (AI が遅い) なら GUI 側が待つ。どちらで待ったかも記録する。
+
+QUEUE_SIZE = int(os.getenv("CLUBMAKER_FIX_QUEUE_SIZE", "4"))
+
+_END = object()
+
+class Pipeline:
+    """produce (チャンクの iterable) を別スレッドで回し、consume(チャンクの iterator) をこのスレッドで呼ぶ"""
+
+    def __init__(self, produce, consume, queue_size=QUEUE_SIZE):
+        self.produce = produce
+        self.consume = consume
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.stop = threading.Event()
+        self.error = None
+        self.stats = {"chunks": 0, "items": 0, "produce_s": 0.0, "first_chunk_s": None,
+                      "producer_blocked_s": 0.0, "consumer_wait_s": 0.0, "max_depth": 0, "depth_samples": []}
+
+    def _producer(self, start):
+        try:
+            with fm_trace.span("pipeline.produce", cat="pipeline"):
+                for chunk in self.produce:
+                    if self.stop.is_set():
+                        break
+                    if not chunk:
+                        continue
+                    if self.stats["first_chunk_s"] is None:
+                        self.stats["first_chunk_s"] = time.perf_counter() - start
+                    waited = time.perf_counter()
+                    # 一杯なら GUI 側が取り出すまで待つ (止められたら抜ける)
+                    while not self.stop.is_set():
+                        try:
+                            self.queue.put(chunk, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    self.stats["producer_blocked_s"] += time.perf_counter() - waited
+                    self.stats["chunks"] += 1
+                    self.stats["items"] += len(chunk)
+        except Exception as e:
+            self.error = e
+            print(f"  > [Pipeline] producer failed: {e}", file=sys.stderr)
+        finally:
+            self.stats["produce_s"] = time.perf_counter() - start
+            while not self.stop.is_set():
+                try:
+                    self.queue.put(_END, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def _chunks(self):
+        while True:
+            depth = self.queue.qsize()
+            self.stats["depth_samples"].append(depth)
+            self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+            waited = time.perf_counter()
+            chunk = self.queue.get()
+            self.stats["consumer_wait_s"] += time.perf_counter() - waited
+            if chunk is _END:
+                return
+            yield chunk
+
+    def run(self):
+        start = time.perf_counter()
+        thread = threading.Thread(target=self._producer, args=(start,), name="fix-pipeline-producer", daemon=True)
+        thread.start()
+        try:
+            with fm_trace.span("pipeline.consume", cat="pipeline"):
+                result = self.consume(self._chunks())
+        finally:
+            # GUI 側が途中でやめたら、AI 側も次のチャンクで止める
+            self.stop.set()
+            thread.join()
+        total = time.perf_counter() - start
+        return result, self.summary(total)
+
+    def summary(self, total):
+        s = self.stats
+        samples = s.pop("depth_samples")
+        consume_s = total - s["consumer_wait_s"]
+        return {
+            "total_s": round(total, 3),
+            "produce_s": round(s["produce_s"], 3),
+            "consume_s": round(consume_s, 3),
+            "first_chunk_s": round(s["first_chunk_s"], 3) if s["first_chunk_s"] is not None else None,
+            "consumer_wait_s": round(s["consumer_wait_s"], 3),
+            "producer_blocked_s": round(s["producer_blocked_s"], 3),
+            # 重ならなかったら produce_s + consume_s、完全に重なれば max(produce_s, consume_s)
+            "sequential_s": round(s["produce_s"] + consume_s, 3),
+            "overlap_s": round(s["produce_s"] + consume_s - total, 3),
+            "chunks": s["chunks"],
+            "items": s["items"],
+            "max_depth": s["max_depth"],
+            "mean_depth": round(sum(samples) / len(samples), 2) if samples else 0,
+        }
+
+def run_field_fix(current_fields=None, context="", stream=None, emit=None, queue_size=QUEUE_SIZE):
+    """
+    一覧を読み (current_fields があれば読まない)、AI の提案を受け取った分から適用する。
+    stream(current_fields, context) は提案のチャンクを返すジェネレーター (省略時は suggest_field_fix.stream_field_fix)。
+    emit を渡すとチャンクごとの提案を {"event": "suggestions", ...} で送る。
+    """
+    import field_fixer
+    emit = emit or (lambda event: None)
+    stages = {}
+
+    if current_fields is None:
+        import get_fm_fields
+        start = time.perf_counter()
+        fields_data = get_fm_fields.get_existing_fields()
+        stages["get_fields_s"] = round(time.perf_counter() - start, 3)
+        if not fields_data.get("success"):
+            return {"success": False, "error": fields_data.get("error"), "stages": stages}
+        current_fields = fields_data.get("fields", [])
+    if not current_fields:
+        return {"success": True, "message": "No fields", "stages": stages}
+
+    if stream is None:
+        import suggest_field_fix
+        stream = suggest_field_fix.stream_field_fix
+
+    errors = []
+
+    def produce():
+        for chunk in stream(current_fields, context):
+            if chunk.get("error"):
+                errors.append(chunk["error"])
+            fixes = [row for row in chunk["suggestions"] if row.get("should_fix")]
+            emit({"event": "suggestions", "index": chunk["index"], "total": chunk["total"], "fixes": fixes,
+                  "error": chunk.get("error")})
+            yield fixes
+
+    def consume(chunks):
+        return field_fixer.batch_fix_stream(chunks, current_fields, expected=len(current_fields))
+
+    pipeline = Pipeline(produce(), consume, queue_size)
+    applied, stats = pipeline.run()
+    stages.update(stats)
+    print(f"  > [Pipeline] {json.dumps(stages, ensure_ascii=False)}", file=sys.stderr)
+
+    if pipeline.error is not None and not stats["items"]:
+        return {"success": False, "error": f"AI suggestion error: {pipeline.error}", "stages": stages}
+    result = {"success": applied.get("success", False), "applied": applied, "stages": stages}
+    if errors or pipeline.error is not None:
+        result["suggest_errors"] = errors + ([str(pipeline.error)] if pipeline.error is not None else [])
+    return result
@@ -0,0 +1,263 @@
+import io
+import re
+import sys
+import json
+import argparse
+import lazy_import
+np = lazy_import.lazy("numpy")
+
+import fm_snippet
+
+# AI の設計 (layouts) の 12 カラムのグリッドを、FileMaker のレイアウトモードに貼り付ける
+# LayoutObjectList スニペット (ポイント座標) に変換する。形式は src/lib/fm-xml.ts の generateLayoutXML と同じで、
+# 各オブジェクトにレイアウトの style (theme / primaryColor / accentColor) から決めた Style を付ける。
+#
+#   plan = fm_layout.plan_layout(layout)          # 座標は NumPy でまとめて計算
+#   for part in plan.iter_xml(): out.write(part)  # XML は一定件数ごとに yield (全体を1つの文字列にしない)
+#   plan = fm_layout.plan_layout(layout, pack=True)  # 先に重なりを解消する (layout_packer)。plan.packing に移動量
+#
+# 数千件の要素でも要素ごとの計算を Python で回さないよう、グリッドは (n, 4) の配列にしてから一度に変換する。
+
+COLUMNS = 12
+GRID_X = 80          # 1 カラム = 80pt
+GRID_Y = 60          # 1 行 = 60pt
+MARGIN = 20
+GUTTER = 10          # 要素の間隔 (ラベルとフィールドの間も同じ)
+LABEL_H = 20
+LABEL_GAP = 4        # list でラベルを上に置くときの、ラベルとフィールドの間
+BATCH = 2048         # iter_xml が1回に yield する要素数
+
+FONT_SIZE = 12
+LABEL_FONT_SIZE = 11
+DASHBOARD_MAX_FONT_SIZE = 28
+
+# テーマごとの既定の色。primaryColor はフィールドの枠線、accentColor はラベルの文字色を上書きする
+THEMES = {
+    "light": {"label": "#475569", "text": "#0F172A", "fill": "#FFFFFF", "border": "#CBD5E1"},
+    "dark": {"label": "#94A3B8", "text": "#F8FAFC", "fill": "#1E293B", "border": "#334155"},
+    "glass": {"label": "#E2E8F0", "text": "#FFFFFF", "fill": "#FFFFFF1A", "border": "#FFFFFF33"},
+}
+DEFAULT_THEME = "light"
+
+_HEX = re.compile(r"^#(?:[0-9A-Fa-f]{3}|[0-9A-Fa-f]{6}|[0-9A-Fa-f]{8})$")
+
+def _color(value, default):
+    return value.upper() if isinstance(value, str) and _HEX.match(value.strip()) else default
+
+def resolve_style(layout):
+    """レイアウトの type / style から、ラベルとフィールドの配置と色を決める"""
+    style = layout.get("style") or {}
+    theme = style.get("theme") if style.get("theme") in THEMES else DEFAULT_THEME
+    colors = THEMES[theme]
+    kind = layout.get("type") or "form"
+    return {
+        "theme": theme,
+        "type": kind,
+        # list は列見出しのようにラベルを上に置く。form / dashboard は左に置く
+        "label_position": "top" if kind == "list" else "left",
+        "label_color": _color(style.get("accentColor"), colors["label"]),
+        "text_color": colors["text"],
+        "fill": colors["fill"],
+        "border": _color(style.get("primaryColor"), colors["border"]),
+    }
+
+def _num(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def grid_array(elements):
+    """要素の grid を (n, 4) の配列 [x, y, w, h] にする。欠けた値・範囲外の値は補正する"""
+    n = len(elements)
+    grids = [e.get("grid") or {} for e in elements]
+    rows = [(g.get("x"), g.get("y"), g.get("w"), g.get("h")) for g in grids]
+    try:
+        # None は nan になるので、あとで既定値に置き換える
+        grid = np.array(rows, dtype=float).reshape(n, 4)
+    except (TypeError, ValueError):
+        grid = np.array([[_num(v, np.nan) for v in row] for row in rows], dtype=float).reshape(n, 4)
+
+    # y が無ければ1要素1行で並べる
+    defaults = np.column_stack([np.zeros(n), np.arange(n, dtype=float), np.full(n, 4.0), np.ones(n)])
+    grid = np.where(np.isfinite(grid), grid, defaults)
+    x = np.clip(np.floor(grid[:, 0]), 0, COLUMNS - 1)
+    y = np.maximum(np.floor(grid[:, 1]), 0)
+    w = np.clip(np.rint(grid[:, 2]), 1, COLUMNS - x)
+    h = np.maximum(np.rint(grid[:, 3]), 1)
+    return np.column_stack([x, y, w, h])
+
+def compute_bounds(grid, label_position="left"):
+    """グリッドから (ラベル, フィールド) の Bounds を [top, left, bottom, right] の (n, 4) 配列で返す"""
+    x, y, w, h = grid[:, 0], grid[:, 1], grid[:, 2], grid[:, 3]
+    left = x * GRID_X + MARGIN
+    top = y * GRID_Y + MARGIN
+    width = w * GRID_X - GUTTER
+    height = h * GRID_Y - GUTTER
+    right = left + width
+    if label_position == "top":
+        label = np.column_stack([top, left, top + LABEL_H, right])
+        field = np.column_stack([top + LABEL_H + LABEL_GAP, left, top + height, right])
+    else:
+        # ラベルは幅の 1/3、残りをフィールドにする (fm-xml.ts と同じ)
+        split = left + width / 3
+        label = np.column_stack([top, left, top + LABEL_H, split])
+        field = np.column_stack([top, split + GUTTER, top + height, right])
+    return np.round(label, 2), np.round(field, 2)
+
+def font_sizes(grid, kind):
+    """dashboard は高さ (h) のある要素ほど文字を大きくする。それ以外は一律"""
+    if kind == "dashboard":
+        return np.clip(FONT_SIZE + 4 * (grid[:, 3] - 1), FONT_SIZE, DASHBOARD_MAX_FONT_SIZE).astype(int)
+    return np.full(len(grid), FONT_SIZE, dtype=int)
+
+def escape_all(values):
+    """文字列のリストをまとめてエスケープする (区切り文字でつないで1回で置き換え、分け直す)"""
+    joined = fm_snippet.escape("\x00".join(values))
+    parts = joined.split("\x00")
+    # 区切り文字を含む値があれば1件ずつに戻す (XML には書けない文字なので通常は起きない)
+    return parts if len(parts) == len(values) else list(map(fm_snippet.escape, values))
+
+def format_coords(values):
+    """
+    座標の配列を同じ形の文字列 (object) 配列にする。整数は "20"、それ以外は "86.67" (2桁に丸め済み)。
+    left / right はカラム数ぶんしか種類が無いので、同じ値は1回だけ整形する。
+    """
+    uniq, inverse = np.unique(values, return_inverse=True)
+    text = np.array([f"{v:.10g}" for v in uniq.tolist()] or [""], dtype=object)
+    return text[inverse.reshape(values.shape)]
+
+class LayoutPlan:
+    """1つのレイアウトの変換結果 (座標は配列のまま持ち、XML は iter_xml で必要な分だけ作る)"""
+
+    def __init__(self, layout, pack=False):
+        elements = [e for e in layout.get("elements") or [] if isinstance(e, dict) and (e.get("field") or e.get("label"))]
+        self.name = layout.get("name", "")
+        self.table = layout.get("table", "")
+        self.style = resolve_style(layout)
+        self.fields = [str(e.get("field") or "") for e in elements]
+        self.labels = [str(e.get("label") or e.get("field") or "") for e in elements]
+        self.grid = grid_array(elements)
+        self.packing = None
+        if pack:
+            import layout_packer
+            self.grid, self.packing = layout_packer.pack(self.grid)
+            for move in self.packing["moves"]:
+                move["field"] = self.fields[move["index"]]
+        self.label_bounds, self.field_bounds = compute_bounds(self.grid, self.style["label_position"])
+        self.font_sizes = font_sizes(self.grid, self.style["type"])
+
+    def __len__(self):
+        return len(self.fields)
+
+    def size(self):
+        """オブジェクト全体を囲む大きさ (右下の余白を含む)"""
+        if not len(self):
+            return {"width": 0, "height": 0}
+        # ラベルだけの要素はフィールドの Bounds を数えない
+        has_field = np.array([bool(f) for f in self.fields])
+        bounds = np.vstack([self.label_bounds, self.field_bounds[has_field]])
+        return {"width": float(bounds[:, 3].max()) + MARGIN, "height": float(bounds[:, 2].max()) + MARGIN}
+
+    def summary(self):
+        result = {"name": self.name, "table": self.table, "type": self.style["type"], "theme": self.style["theme"],
+                  "objects": len(self) + sum(1 for f in self.fields if f), **self.size()}
+        if self.packing is not None:
+            result["packing"] = self.packing
+        return result
+
+    def _templates(self):
+        """ラベルとフィールドの LayoutObject の % 書式 (レイアウト内で共通の Style・テーブル名は埋め込み済み)"""
+        s = self.style
+        table = fm_snippet.attr(self.table).replace("%", "%%")
+        label = ('  <LayoutObject type="Text">\n'
+                 '    <Bounds top="%s" left="%s" bottom="%s" right="%s" />\n'
+                 f'    <Style fontSize="{LABEL_FONT_SIZE}" textColor="{s["label_color"]}" />\n'
+                 '    <TextContent>%s</TextContent>\n'
+                 '  </LayoutObject>\n')
+        field = ('  <LayoutObject type="Field">\n'
+                 '    <Bounds top="%s" left="%s" bottom="%s" right="%s" />\n'
+                 f'    <Style fontSize="%s" textColor="{s["text_color"]}" fill="{s["fill"]}" border="{s["border"]}" />\n'
+                 f'    <FieldReference name="%s" table={table} />\n'
+                 '  </LayoutObject>\n')
+        return label, field
+
+    def iter_xml(self, batch=BATCH):
+        label_tmpl, field_tmpl = self._templates()
+        pair_tmpl = label_tmpl + field_tmpl
+        labels = escape_all(self.labels)
+        fields = escape_all(self.fields)
+
+        yield '<FMPXmlSnippet type="LayoutObjectList">\n'
+        for start in range(0, len(self), batch):
+            end = min(start + batch, len(self))
+            # 1要素 = [ラベルの Bounds x4, ラベル, フィールドの Bounds x4, 文字サイズ, フィールド名]
+            cols = np.empty((end - start, 11), dtype=object)
+            cols[:, 0:4] = format_coords(self.label_bounds[start:end])
+            cols[:, 4] = labels[start:end]
+            cols[:, 5:9] = format_coords(self.field_bounds[start:end])
+            cols[:, 9] = self.font_sizes[start:end]
+            cols[:, 10] = fields[start:end]
+            if all(fields[start:end]):
+                # 全要素にフィールドがあれば、書式を要素数ぶんつなげて1回で埋める
+                yield (pair_tmpl * (end - start)) % tuple(cols.ravel().tolist())
+                continue
+            parts = []
+            for row in cols.tolist():
+                parts.append(label_tmpl % tuple(row[0:5]))
+                if row[10]:
+                    parts.append(field_tmpl % tuple(row[5:11]))
+            yield "".join(parts)
+        yield '</FMPXmlSnippet>'
+
+def plan_layout(layout, pack=False):
+    return LayoutPlan(layout, pack)
+
+def plan_design(design, pack=False):
+    """設計全体 (layouts) を変換する"""
+    return [LayoutPlan(layout, pack) for layout in design.get("layouts") or [] if isinstance(layout, dict)]
+
+def find_layout(design, name=None):
+    """name のレイアウト (省略時は最初のもの) を返す。レイアウト1つだけの JSON はそのまま返す"""
+    if "elements" in design and "layouts" not in design:
+        return design if name is None or design.get("name") == name else None
+    layouts = [l for l in design.get("layouts") or [] if isinstance(l, dict)]
+    if name is None:
+        return layouts[0] if layouts else None
+    return next((l for l in layouts if l.get("name") == name), None)
+
+def build_layout_snippet(layout, pack=False):
+    buf = io.StringIO()
+    for part in plan_layout(layout, pack).iter_xml():
+        buf.write(part)
+    return buf.getvalue()
+
+def write_layout_snippet(layout, stream, pack=False):
+    """ファイルや stdout へ直接書き出す"""
+    plan = plan_layout(layout, pack)
+    for part in plan.iter_xml():
+        stream.write(part)
+    return plan
+
+if __name__ == "__main__":
+    # python fm_layout.py design.json [--name Layout] [-o out.xml]
+    # (design.json は generate_design_ai の出力、またはレイアウト1つ分の JSON)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("design")
+    parser.add_argument("--name", help="レイアウト名 (省略時は最初のレイアウト)")
+    parser.add_argument("-o", "--output", help="書き出し先 (省略時は stdout)")
+    parser.add_argument("--no-pack", action="store_true", help="重なりの解消 (layout_packer) をしない")
+    args = parser.parse_args()
+
+    with open(args.design, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    layout = find_layout(data, args.name)
+    if layout is None:
+        print(f"Error: Layout not found: {args.name or '(none)'}", file=sys.stderr)
+        sys.exit(1)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            plan = write_layout_snippet(layout, out, pack=not args.no_pack)
+    else:
+        plan = write_layout_snippet(layout, sys.stdout, pack=not args.no_pack)
+    print(json.dumps(plan.summary(), ensure_ascii=False), file=sys.stderr)
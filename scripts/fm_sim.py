@@ -0,0 +1,938 @@
+import os
+import re
+import sys
+import time
+import types
+
+# FileMaker の「データベースの管理」ダイアログをメモリ上で再現する疑似バックエンド。
+# install() で偽の pywinauto / pyautogui を sys.modules に登録するので、
+# get_fm_fields / field_fixer / batch_create_fields / reset_fields などを書き換えずに Linux 上で動かせる。
+#
+# 再現しているもの:
+#   - フィールド一覧 (DataGrid)。表示中の DataItem だけを返す仮想化リストで、Home/End/PageUp/PageDown/矢印で移動
+#   - フィールド名 Edit / タイプ ComboBox / コメント Edit / 作成・変更・削除ボタン / 「N フィールド」表示
+#   - 名前重複の警告、削除確認、計算式の指定・集計フィールドのオプションのダイアログ
+#   - 複数テーブル (フィールドタブのテーブルメニュー、テーブルタブの名前欄・作成ボタン)
+#   - Ctrl+V での FMField / FMTable スニペットの貼り付け (clipboard_writer の MemoryBackend から読む)
+# UIA 呼び出しとキー操作は数え、1回ごとに latency 秒の遅延を入れる。
+# virtual_time=True なら sleep と遅延は仮想時計を進めるだけで実際には待たない (ベンチマーク用)。
+
+TYPE_KEYS = {"t": "テキスト", "n": "数値", "d": "日付", "i": "時刻", "m": "タイムスタンプ",
+             "r": "オブジェクト", "c": "計算", "s": "集計"}
+EN_TYPES = {"Text": "テキスト", "Number": "数値", "Date": "日付", "Time": "時刻", "Timestamp": "タイムスタンプ",
+            "Container": "オブジェクト", "Calculation": "計算", "Summary": "集計"}
+
+MAIN_HANDLE = 100
+DIALOG_HANDLE = 200
+
+class ElementNotFoundError(Exception):
+    pass
+
+class SimClock:
+    """
+    fm_wait.Clock と同じ形。仮想時間なら sleep は offset を進めるだけ。
+    実時間のときは scale 倍に縮めて待つ (他のスレッドと並行に動かすベンチマーク用。0.01 なら 1/100)
+    """
+
+    def __init__(self, virtual=True, scale=1.0):
+        self.virtual = virtual
+        self.scale = scale
+        self.base = time.monotonic()
+        self.offset = 0.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        now = time.monotonic()
+        if not self.virtual and self.scale != 1.0:
+            now = self.base + (now - self.base) / self.scale
+        return now + self.offset
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        self.slept += seconds
+        if self.virtual:
+            self.offset += seconds
+        else:
+            time.sleep(seconds * self.scale)
+
+class TimeProxy:
+    """スクリプトの time モジュールの代わり。sleep だけ仮想時計に回す"""
+
+    def __init__(self, clock):
+        self._clock = clock
+
+    def sleep(self, seconds):
+        self._clock.sleep(seconds)
+
+    def monotonic(self):
+        return self._clock.monotonic()
+
+    def time(self):
+        return time.time() + self._clock.offset
+
+    def perf_counter(self):
+        return time.perf_counter() + self._clock.offset
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+class Popup:
+    def __init__(self, handle, title, text, buttons, on_accept=None, kind="alert"):
+        self.handle = handle
+        self.title = title
+        self.text = text
+        self.buttons = buttons  # 先頭が既定のボタン (Enter)
+        self.on_accept = on_accept
+        self.kind = kind
+
+# --- モデル ---
+
+class FileMakerSim:
+    def __init__(self, fields=(), viewport=20, latency=0.0, virtual_time=True, file_name="Sample", table="Sample",
+                 dialog_open=True, tables=None, time_scale=1.0):
+        self.clock = SimClock(virtual_time, time_scale)
+        self.latency = latency
+        self.viewport = viewport
+        self.file_name = file_name
+        self.table = table
+        self.dialog_open = dialog_open
+        self.fields = []
+        self._rows = {}  # field id -> 行位置 (削除後は作り直す)
+        self.next_id = 1
+        for f in fields:
+            self._append(f.get("name"), EN_TYPES.get(f.get("type"), f.get("type") or "テキスト"))
+        # テーブル名 -> フィールドの list (選択中のテーブルの list が self.fields)
+        self.tables = {table: self.fields}
+        for name, table_fields in (tables or {}).items():
+            self.tables[name] = [self._new_field(f.get("name"), f.get("type")) for f in table_fields]
+        self.table_name_value = ""
+        self.clipboard = None
+        self.pastes = 0
+        self.top = 0
+        self.selected = None
+        self.name_value = ""
+        self.type_value = "テキスト"
+        self.comment_value = ""
+        self.select_all = False
+        self.tab = "fields"
+        self.focus = None
+        self.popups = []
+        self.next_handle = 1000
+        self.calls = 0
+        self.keys = 0
+        self.searches = 0
+
+    @classmethod
+    def with_fields(cls, n, **kwargs):
+        types_ = list(TYPE_KEYS.values())[:4]
+        return cls([{"name": f"field_{i:05d}", "type": types_[i % len(types_)]} for i in range(n)], **kwargs)
+
+    @classmethod
+    def from_env(cls):
+        """ワーカーの --backend sim 用 (CLUBMAKER_SIM_FIELDS / _LATENCY / _VIRTUAL_TIME)"""
+        return cls.with_fields(int(os.getenv("CLUBMAKER_SIM_FIELDS", "20")),
+                               latency=float(os.getenv("CLUBMAKER_SIM_LATENCY", "0")),
+                               virtual_time=os.getenv("CLUBMAKER_SIM_VIRTUAL_TIME", "1") != "0")
+
+    def _append(self, name, f_type):
+        self.fields.append({"id": self.next_id, "name": name, "type": f_type})
+        if self._rows is not None:
+            self._rows[self.next_id] = len(self.fields) - 1
+        self.next_id += 1
+        return len(self.fields) - 1
+
+    def _new_field(self, name, f_type):
+        field = {"id": self.next_id, "name": name, "type": EN_TYPES.get(f_type, f_type or "テキスト")}
+        self.next_id += 1
+        return field
+
+    # 計測
+    def ui_call(self):
+        self.calls += 1
+        if self.latency:
+            self.clock.sleep(self.latency)
+
+    def search(self):
+        """WindowSpecification の解決 (プロセスをまたぐ要素ツリーの探索) 1回分"""
+        self.searches += 1
+        self.ui_call()
+
+    def stats(self):
+        return {"uia_calls": self.calls, "key_presses": self.keys, "tree_searches": self.searches,
+                "simulated_s": round(self.clock.offset, 3)}
+
+    def field_names(self, table=None):
+        fields = self.fields if table is None else self.tables[table]
+        return [f["name"] for f in fields]
+
+    # テーブル
+    def switch_table(self, name):
+        if self.popups or name not in self.tables:
+            return False
+        if name != self.table:
+            self.table = name
+            self.fields = self.tables[name]
+            self._rows = None
+            self.top = 0
+            self.selected = None
+            self.name_value = ""
+        return True
+
+    def _table_exists(self, name):
+        key = name.casefold()
+        return any(t.casefold() == key for t in self.tables)
+
+    def create_table(self):
+        if self.popups or self.tab != "tables":
+            return
+        name = self.table_name_value.strip()
+        if not name or self._table_exists(name):
+            self.open_popup("FileMaker Pro", f"このテーブル名「{name}」はすでに使用されています。", ["OK"])
+            return
+        self.tables[name] = []
+        self.table_name_value = ""
+
+    def paste(self):
+        """クリップボードの FMField / FMTable スニペットを今のタブに貼り付ける"""
+        if self.popups or self.clipboard is None:
+            return
+        import xml.etree.ElementTree as ET
+        data = self.clipboard.get("FileMaker XML Snippet")
+        if data is None:
+            return
+        self.pastes += 1
+        root = ET.fromstring(bytes(data))
+        duplicates = []
+        if root.get("type") == "FMField" and self.tab == "fields":
+            for el in root.findall("Field"):
+                name = el.get("name", "")
+                if self._duplicate(name):
+                    duplicates.append(name)
+                    continue
+                self._append(name, EN_TYPES.get(el.get("datatype"), "テキスト"))
+        elif root.get("type") == "FMTable" and self.tab == "tables":
+            for table in root.findall("Table"):
+                name = table.get("name", "")
+                if self._table_exists(name):
+                    duplicates.append(name)
+                    continue
+                self.tables[name] = [self._new_field(f.get("name"), f.get("datatype")) for f in table.findall("Field")]
+        if duplicates:
+            self.open_popup("FileMaker Pro", f"この名前「{duplicates[0]}」はすでに使用されています。", ["OK"])
+
+    # 一覧
+    def row_of_id(self, field_id):
+        if self._rows is None:
+            self._rows = {f["id"]: i for i, f in enumerate(self.fields)}
+        return self._rows.get(field_id)
+
+    def visible_rows(self):
+        return range(self.top, min(self.top + self.viewport, len(self.fields)))
+
+    def _scroll_into_view(self, row):
+        if row < self.top:
+            self.top = row
+        elif row >= self.top + self.viewport:
+            self.top = row - self.viewport + 1
+
+    def select_row(self, row):
+        if row is None or not (0 <= row < len(self.fields)):
+            return
+        self.selected = row
+        self._scroll_into_view(row)
+        # 選択したフィールドの内容が名前・タイプ欄に入る
+        self.name_value = self.fields[row]["name"]
+        self.type_value = self.fields[row]["type"]
+
+    def navigate(self, key):
+        if not self.fields:
+            return
+        last = len(self.fields) - 1
+        current = self.selected if self.selected is not None else -1
+        if key == "home":
+            row = 0
+        elif key == "end":
+            row = last
+        elif key == "down":
+            row = min(current + 1, last)
+        elif key == "up":
+            row = max(current - 1, 0)
+        elif key == "pageup":
+            row = self.top if current > self.top else max(current - self.viewport + 1, 0)
+        elif key == "pagedown":
+            # Windows のリストと同様、まず画面下端へ、下端なら1画面分進む
+            bottom = min(self.top + self.viewport - 1, last)
+            row = bottom if current < bottom else min(current + self.viewport - 1, last)
+        else:
+            return
+        self.select_row(row)
+
+    def scroll_percent(self, percent):
+        span = max(len(self.fields) - self.viewport, 0)
+        self.top = int(round(span * max(0.0, min(percent, 100.0)) / 100.0))
+
+    # ポップアップ
+    def open_popup(self, title, text, buttons, on_accept=None, kind="alert"):
+        popup = Popup(self.next_handle, title, text, buttons, on_accept, kind)
+        self.next_handle += 1
+        self.popups.append(popup)
+        return popup
+
+    def popup(self, handle):
+        for p in self.popups:
+            if p.handle == handle:
+                return p
+        return None
+
+    def close_popup(self, popup, accept):
+        if popup in self.popups:
+            self.popups.remove(popup)
+            if accept and popup.on_accept:
+                popup.on_accept()
+
+    def _duplicate(self, name, except_row=None):
+        key = name.casefold()
+        return any(i != except_row and f["name"].casefold() == key for i, f in enumerate(self.fields))
+
+    # ボタン
+    def create(self):
+        if self.popups or self.tab != "fields":
+            return
+        name = self.name_value.strip()
+        if not name or self._duplicate(name):
+            self.open_popup("FileMaker Pro", f"このフィールド名「{name}」はすでに使用されています。", ["OK"])
+            return
+        row = self._append(name, self.type_value)
+        self.select_row(row)
+        self.name_value = ""
+        if self.type_value == "計算":
+            self.open_popup("計算式の指定", "", ["OK", "キャンセル"], kind="calc")
+        elif self.type_value == "集計":
+            self.open_popup("集計フィールドのオプション", "", ["OK", "キャンセル"], kind="summary")
+
+    def change(self):
+        if self.popups or self.selected is None:
+            return
+        name = self.name_value.strip()
+        if not name or self._duplicate(name, self.selected):
+            self.open_popup("FileMaker Pro", f"このフィールド名「{name}」はすでに使用されています。", ["OK"])
+            return
+        field = self.fields[self.selected]
+        field["name"] = name
+        field["type"] = self.type_value
+
+    def delete(self):
+        if self.popups or self.selected is None:
+            return
+        field = self.fields[self.selected]
+
+        def accept():
+            row = self.row_of_id(field["id"])
+            if row is None:
+                return
+            del self.fields[row]
+            self._rows = None
+            self.selected = None
+            self.name_value = ""
+            self.top = max(0, min(self.top, len(self.fields) - self.viewport))
+            if self.fields:
+                self.select_row(min(row, len(self.fields) - 1))
+
+        self.open_popup("FileMaker Pro", f"フィールド「{field['name']}」を完全に削除しますか?", ["削除", "キャンセル"], accept)
+
+    # キーボード
+    def press(self, key):
+        self.keys += 1
+        key = key.lower()
+        if self.popups:
+            if key in ("enter", "return"):
+                self.close_popup(self.popups[-1], True)
+            elif key in ("esc", "escape"):
+                self.close_popup(self.popups[-1], False)
+            return
+        if self.focus == "grid":
+            self.navigate(key)
+        elif self.focus in ("name", "comment", "table_name") and key == "backspace":
+            attr = f"{self.focus}_value"
+            setattr(self, attr, "" if self.select_all else getattr(self, attr)[:-1])
+            self.select_all = False
+
+    def hotkey(self, *keys):
+        self.keys += 1
+        keys = tuple(k.lower() for k in keys)
+        if self.popups:
+            return
+        if keys == ("alt", "e"):
+            if self.tab == "tables":
+                self.create_table()
+            else:
+                self.create()
+        elif keys in (("alt", "m"), ("alt", "a")):
+            self.change()
+        elif keys == ("alt", "f"):
+            self.tab = "fields"
+        elif keys == ("alt", "t"):
+            self.tab = "tables"
+        elif keys == ("ctrl", "v"):
+            self.paste()
+        elif keys == ("ctrl", "a"):
+            self.select_all = True
+        elif keys == ("ctrl", "shift", "d"):
+            self.dialog_open = True
+
+    def typewrite(self, text):
+        self.keys += len(text)
+        if self.popups or self.focus not in ("name", "comment", "table_name"):
+            return
+        attr = f"{self.focus}_value"
+        setattr(self, attr, ("" if self.select_all else getattr(self, attr)) + text)
+        self.select_all = False
+
+    def type_keys(self, focus, keys):
+        """pywinauto の type_keys 記法 (%x = Alt+x, ^a = Ctrl+A, {BACKSPACE}) の一部"""
+        self.focus = focus
+        for token in re.findall(r"\{[A-Z]+\}|[%^].|.", keys):
+            if token[0] == "%":
+                self.hotkey("alt", token[1])
+            elif token[0] == "^":
+                self.hotkey("ctrl", token[1])
+            elif token.startswith("{"):
+                self.press(token[1:-1])
+            elif focus == "type":
+                self.keys += 1
+                if token.lower() in TYPE_KEYS:
+                    self.type_value = TYPE_KEYS[token.lower()]
+            else:
+                self.typewrite(token)
+
+    # トップレベルウィンドウ (dialog_watcher 用。EnumWindows 相当なので UIA 呼び出しには数えない)
+    def list_windows(self):
+        windows = {MAIN_HANDLE: f"FileMaker Pro - {self.file_name}"}
+        if self.dialog_open:
+            windows[DIALOG_HANDLE] = f"「{self.file_name}」のデータベースの管理"
+        for p in self.popups:
+            windows[p.handle] = p.title
+        return windows
+
+    def read_text(self, handle):
+        self.ui_call()
+        p = self.popup(handle)
+        return p.text if p else ""
+
+# --- UIA 要素 ---
+
+class _ElementInfo:
+    def __init__(self, automation_id="", runtime_id=None, handle=None):
+        self.automation_id = automation_id
+        self.runtime_id = runtime_id
+        self.handle = handle
+
+class _ScrollPattern:
+    def __init__(self, sim):
+        self._sim = sim
+
+    def SetScrollPercent(self, horizontal, vertical):
+        self._sim.ui_call()
+        self._sim.scroll_percent(vertical)
+
+class SimElement:
+    control = "Custom"
+    page = None  # タブのページ上の要素なら "fields" / "tables" (別のタブを選ぶと見えなくなる)
+
+    def __init__(self, sim, title="", auto_id="", handle=None):
+        self.sim = sim
+        self.title = title
+        self.auto_id = auto_id
+        self.handle = handle
+        self.element_info = _ElementInfo(auto_id, None, handle)
+
+    # 状態を読む系
+    def window_text(self):
+        self.sim.ui_call()
+        return self._text()
+
+    def _text(self):
+        return self.title
+
+    def control_type(self):
+        return self.control
+
+    def exists(self, timeout=None):
+        self.sim.ui_call()
+        return self._alive()
+
+    def _alive(self):
+        return self.page is None or self.sim.tab == self.page
+
+    def is_visible(self):
+        self.sim.ui_call()
+        return self._alive()
+
+    def is_enabled(self):
+        return True
+
+    def is_active(self):
+        self.sim.ui_call()
+        return self._alive()
+
+    def get_show_state(self):
+        return 1
+
+    def restore(self):
+        pass
+
+    def set_focus(self):
+        self.sim.ui_call()
+        self._focus()
+        return self
+
+    def _focus(self):
+        pass
+
+    def click_input(self, *args, **kwargs):
+        self.sim.ui_call()
+        self._focus()
+        self._click()
+
+    click = click_input
+
+    def _click(self):
+        pass
+
+    def type_keys(self, keys, **kwargs):
+        self.sim.ui_call()
+        self.sim.type_keys(self._focus_name(), keys)
+
+    def _focus_name(self):
+        return self.sim.focus
+
+    def _children(self):
+        return []
+
+    def children(self, **criteria):
+        self.sim.ui_call()
+        return [c for c in self._children() if _matches(c, criteria)]
+
+    def descendants(self, **criteria):
+        self.sim.ui_call()
+        found = []
+        stack = list(reversed(self._children()))
+        while stack:
+            el = stack.pop()
+            if _matches(el, criteria):
+                found.append(el)
+            stack.extend(reversed(el._children()))
+        return found
+
+    def child_window(self, **criteria):
+        return SimSpec(self.sim, lambda: self._find(criteria))
+
+    def _find(self, criteria):
+        stack = list(reversed(self._children()))
+        while stack:
+            el = stack.pop()
+            if _matches(el, criteria):
+                return el
+            stack.extend(reversed(el._children()))
+        return None
+
+    def wait(self, *args, **kwargs):
+        return self
+
+    def rectangle(self):
+        return _Rect(0, 0, 1280, 800)
+
+def _matches(el, criteria):
+    for key, value in criteria.items():
+        if key == "control_type" and value and el.control != value:
+            return False
+        if key == "auto_id" and el.auto_id != value:
+            return False
+        if key == "title" and el._text() != value:
+            return False
+        if key == "title_re" and not re.match(value, el._text() or ""):
+            return False
+        if key == "handle" and el.handle != value:
+            return False
+    return True
+
+class _Rect:
+    def __init__(self, left, top, right, bottom):
+        self.left, self.top, self.right, self.bottom = left, top, right, bottom
+
+    def width(self):
+        return self.right - self.left
+
+    def height(self):
+        return self.bottom - self.top
+
+class SimSpec:
+    """pywinauto の WindowSpecification 相当。属性にアクセスした時点で要素を探す"""
+
+    def __init__(self, sim, resolve):
+        self._sim = sim
+        self._resolve = resolve
+
+    def exists(self, timeout=None):
+        self._sim.search()
+        el = self._resolve()
+        return el is not None and el._alive()
+
+    def wrapper_object(self):
+        # pywinauto と同じく、属性にアクセスするたびに探し直す
+        self._sim.search()
+        el = self._resolve()
+        if el is None or not el._alive():
+            raise ElementNotFoundError()
+        return el
+
+    def __getattr__(self, name):
+        return getattr(self.wrapper_object(), name)
+
+class SimText(SimElement):
+    control = "Text"
+
+    def __init__(self, sim, title="", value=None):
+        super().__init__(sim, title)
+        self.value = value
+
+    def _text(self):
+        # 件数表示のように中身が変わるものは、読むたびに今の値を返す
+        return self.value() if self.value else self.title
+
+class SimButton(SimElement):
+    control = "Button"
+
+    def __init__(self, sim, title, auto_id="", action=None):
+        super().__init__(sim, title, auto_id)
+        self.action = action
+
+    def _click(self):
+        if self.action:
+            self.action()
+
+class SimTab(SimElement):
+    control = "TabItem"
+
+    def __init__(self, sim, title, tab):
+        super().__init__(sim, title)
+        self.tab = tab
+
+    def is_selected(self):
+        self.sim.ui_call()
+        return self.sim.tab == self.tab
+
+    def _click(self):
+        self.sim.tab = self.tab
+
+    def select(self):
+        self.click_input()
+
+class SimEdit(SimElement):
+    control = "Edit"
+
+    def __init__(self, sim, auto_id, field):
+        super().__init__(sim, "", auto_id)
+        self.field = field  # "name" / "comment"
+
+    def _text(self):
+        return getattr(self.sim, f"{self.field}_value")
+
+    def get_value(self):
+        self.sim.ui_call()
+        return self._text()
+
+    def _focus(self):
+        self.sim.focus = self.field
+
+    def _focus_name(self):
+        return self.field
+
+    def set_text(self, text):
+        self.sim.ui_call()
+        self.sim.focus = self.field
+        setattr(self.sim, f"{self.field}_value", str(text))
+
+    set_edit_text = set_text
+
+class SimCombo(SimElement):
+    control = "ComboBox"
+
+    def __init__(self, sim, auto_id, value):
+        super().__init__(sim, "", auto_id)
+        self.value = value
+
+    def _text(self):
+        return self.value()
+
+    def selected_text(self):
+        self.sim.ui_call()
+        return self.value()
+
+    def _focus(self):
+        self.sim.focus = "type" if self.auto_id == "IDC_FIELD_TYPE_MENU" else None
+
+    def _focus_name(self):
+        return "type" if self.auto_id == "IDC_FIELD_TYPE_MENU" else None
+
+class SimTableMenu(SimCombo):
+    def __init__(self, sim):
+        super().__init__(sim, "IDC_DEFFIELDS_TABLE_MENU", lambda: sim.table)
+
+    def texts(self):
+        self.sim.ui_call()
+        return list(self.sim.tables)
+
+    def item_count(self):
+        self.sim.ui_call()
+        return len(self.sim.tables)
+
+    def select(self, item):
+        self.sim.ui_call()
+        name = list(self.sim.tables)[item] if isinstance(item, int) else item
+        if not self.sim.switch_table(name):
+            raise ValueError(f"No such item: {item}")
+        return self
+
+class SimCell(SimElement):
+    control = "Custom"
+
+    def __init__(self, sim, row_item, text):
+        super().__init__(sim, "")
+        self.row_item = row_item
+        self.text = text
+
+    def _children(self):
+        return [SimText(self.sim, self.text)]
+
+    def _alive(self):
+        return self.row_item._alive()
+
+    def _click(self):
+        self.row_item._click()
+
+class SimRow(SimElement):
+    control = "DataItem"
+
+    def __init__(self, sim, field):
+        super().__init__(sim, "")
+        self.field = field
+        self.element_info = _ElementInfo("", (42, field["id"]))
+
+    def _row(self):
+        return self.sim.row_of_id(self.field["id"])
+
+    def _alive(self):
+        return self._row() is not None
+
+    def _text(self):
+        return ""
+
+    def _children(self):
+        return [SimCell(self.sim, self, self.field["name"]), SimCell(self.sim, self, self.field["type"]),
+                SimCell(self.sim, self, "")]
+
+    def _click(self):
+        self.sim.focus = "grid"
+        self.sim.select_row(self._row())
+
+    def select(self):
+        self.sim.ui_call()
+        self._click()
+
+class SimGrid(SimElement):
+    control = "DataGrid"
+
+    def __init__(self, sim):
+        super().__init__(sim, "", "IDC_DEFFIELDS_FIELD_LIST")
+        self.iface_scroll = _ScrollPattern(sim)
+
+    def _children(self):
+        return [SimRow(self.sim, self.sim.fields[r]) for r in self.sim.visible_rows()]
+
+    def _focus(self):
+        self.sim.focus = "grid"
+
+class SimWindow(SimElement):
+    control = "Window"
+
+    def _alive(self):
+        if self.handle == DIALOG_HANDLE:
+            return self.sim.dialog_open
+        if self.handle == MAIN_HANDLE:
+            return True
+        return self.sim.popup(self.handle) is not None
+
+    def _text(self):
+        return self.sim.list_windows().get(self.handle, "")
+
+    def _children(self):
+        sim = self.sim
+        if self.handle == DIALOG_HANDLE:
+            tabs = [
+                SimTab(sim, "テーブル", "tables"),
+                SimTab(sim, "フィールド", "fields"),
+                SimTab(sim, "リレーションシップ", "relationships"),
+            ]
+            # 選択中のタブのページの要素だけがツリーに出る
+            if sim.tab == "tables":
+                return tabs + _on_page("tables", [
+                    SimText(sim, value=lambda: f"{len(sim.tables)} テーブル"),
+                    SimEdit(sim, "IDC_DEFTABLES_NAME_EDIT", "table_name"),
+                    SimButton(sim, "作成", "IDC_DEFTABLES_CREATE_BTN", sim.create_table),
+                ])
+            if sim.tab != "fields":
+                return tabs
+            return tabs + _on_page("fields", [
+                SimText(sim, value=lambda: f"{len(sim.fields)} フィールド"),
+                SimTableMenu(sim),
+                SimGrid(sim),
+                SimEdit(sim, "IDC_DEFFIELDS_FIELDNAME_EDIT", "name"),
+                SimCombo(sim, "IDC_FIELD_TYPE_MENU", lambda: sim.type_value),
+                SimEdit(sim, "IDC_DEFFIELDS_FIELDCOMMENT_EDIT", "comment"),
+                SimButton(sim, "作成", "IDC_DEFFIELDS_CREATE_BTN", sim.create),
+                SimButton(sim, "変更", "IDC_DEFFIELDS_CHANGE_BTN", sim.change),
+                SimButton(sim, "削除", "IDC_DEFFIELDS_DELETE_BUTTON", sim.delete),
+            ])
+        popup = sim.popup(self.handle)
+        if popup is None:
+            return []
+        children = [SimText(sim, popup.text)] if popup.text else []
+        for i, label in enumerate(popup.buttons):
+            accept = i == 0 or label in ("OK", "削除", "保存", "はい")
+            children.append(SimButton(sim, label, "", lambda p=popup, a=accept: sim.close_popup(p, a)))
+        return children
+
+    def _focus(self):
+        if self.handle == DIALOG_HANDLE and self.sim.focus is None:
+            self.sim.focus = "dialog"
+
+def _on_page(page, elements):
+    for el in elements:
+        el.page = page
+    return elements
+
+# --- 偽の pywinauto / pyautogui ---
+
+def _top_windows(sim):
+    return [SimWindow(sim, "", handle=h) for h in sim.list_windows()]
+
+class Desktop:
+    SIM = None
+
+    def __init__(self, backend="uia"):
+        self.sim = Desktop.SIM
+
+    def windows(self, **criteria):
+        self.sim.ui_call()
+        return [w for w in _top_windows(self.sim) if _matches(w, criteria)]
+
+    def window(self, **criteria):
+        sim = self.sim
+        return SimSpec(sim, lambda: next((w for w in _top_windows(sim) if _matches(w, criteria)), None))
+
+    def top_window(self):
+        self.sim.ui_call()
+        return _top_windows(self.sim)[-1]
+
+class Application:
+    def __init__(self, backend="uia"):
+        self.sim = Desktop.SIM
+
+    def connect(self, **kwargs):
+        self.sim.ui_call()
+        return self
+
+    def is_process_running(self):
+        return True
+
+    def windows(self, **criteria):
+        return Desktop().windows(**criteria)
+
+    def window(self, **criteria):
+        return Desktop().window(**criteria)
+
+    def top_window(self):
+        return Desktop().top_window()
+
+def _pyautogui_module(sim):
+    mod = types.ModuleType("pyautogui")
+    mod.FAILSAFE = True
+    mod.PAUSE = 0.1
+    mod.press = lambda key, *a, **k: sim.press(key)
+    mod.hotkey = lambda *keys, **k: sim.hotkey(*keys)
+    mod.typewrite = lambda text, *a, **k: sim.typewrite(text)
+    mod.write = mod.typewrite
+    mod.click = lambda *a, **k: sim.ui_call()
+
+    def screenshot(*args, **kwargs):
+        raise RuntimeError("screenshot is not available in the simulated backend")
+
+    mod.screenshot = screenshot
+    return mod
+
+def _pywinauto_module():
+    mod = types.ModuleType("pywinauto")
+    mod.Desktop = Desktop
+    mod.Application = Application
+    findwindows = types.ModuleType("pywinauto.findwindows")
+    findwindows.ElementNotFoundError = ElementNotFoundError
+    mod.findwindows = findwindows
+    return mod, findwindows
+
+class _NullOverlay:
+    connected = True
+
+    def connect(self, *args, **kwargs):
+        return True
+
+    def begin(self, *args, **kwargs):
+        return True
+
+    def progress(self, *args, **kwargs):
+        return True
+
+    def end(self, *args, **kwargs):
+        return True
+
+# install() 後に time を差し替えるスクリプト
+SCRIPT_MODULES = ("fm_utils", "get_fm_fields", "field_fixer", "batch_create_fields", "reset_fields",
+                  "field_list_scan", "field_seek", "apply_design")
+
+def install(sim):
+    """偽の pywinauto / pyautogui を登録し、自動操作スクリプトを sim に向けて読み込む"""
+    Desktop.SIM = sim
+    pywinauto, findwindows = _pywinauto_module()
+    sys.modules["pywinauto"] = pywinauto
+    sys.modules["pywinauto.findwindows"] = findwindows
+    sys.modules["pyautogui"] = _pyautogui_module(sim)
+    # 既に読み込まれていれば捨てて、偽モジュールを import し直させる
+    for name in SCRIPT_MODULES:
+        sys.modules.pop(name, None)
+
+    import importlib
+    import fm_wait
+    import dialog_watcher
+    import fm_trace
+    fm_wait.set_clock(sim.clock)
+    # 計測する場合は UIA 呼び出し数と所要時間を sim から取る
+    fm_trace.set_uia_counter(lambda: sim.calls)
+    fm_trace.set_clock(lambda: int(sim.clock.monotonic() * 1e9))
+    proxy = TimeProxy(sim.clock)
+    modules = {}
+    for name in SCRIPT_MODULES:
+        mod = importlib.import_module(name)
+        mod.time = proxy
+        modules[name] = mod
+    fm_utils = modules["fm_utils"]
+    # オーバーレイは起動しない。ダイアログ監視はスレッドを使わず、その場の差分取得だけにする
+    fm_utils.OVERLAY = _NullOverlay()
+    fm_utils._DIALOG_WATCHER = dialog_watcher.DialogWatcher(list_windows=sim.list_windows, read_text=sim.read_text,
+                                                            clock=sim.clock.monotonic)
+    fm_utils._APP_CACHE.clear()
+    # クリップボードは sim が貼り付け時に読むメモリ上のものにする
+    import clipboard_writer
+    sim.clipboard = clipboard_writer.MemoryBackend()
+    clipboard_writer._WRITER = clipboard_writer.ClipboardWriter(sim.clipboard)
+    return modules
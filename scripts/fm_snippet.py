@@ -0,0 +1,108 @@
+import io
+
+import schema_planner
+
+# FileMaker の「データベースの管理 > フィールド」に貼り付ける FMField スニペットの生成。
+# 形式は src/lib/fm-xml.ts の generateFieldsXML と同じ。名前・計算式は必ずエスケープする。
+# 大量のフィールドでも文字列を何度も連結しないよう、断片を順に yield する。
+
+FIELD_TYPES = ("Text", "Number", "Date", "Time", "Timestamp", "Container", "Calculation", "Summary")
+
+# 属性値は常に二重引用符で囲む。改行・タブも文字参照にして計算式の改行を保つ
+ATTR_ENTITIES = {'"': "&quot;", "'": "&apos;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+# xml.sax.saxutils.escape と同じ置き換え (& を最初に置き換える)
+# xml.sax.saxutils は urllib / http / email まで読み込み、import だけで数十 ms かかるので使わない。
+# str.translate (辞書) は長い文字列で数倍遅いため、replace を順に適用する
+_REPLACEMENTS = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")) + tuple(ATTR_ENTITIES.items())
+
+def escape(value):
+    value = str(value)
+    for char, entity in _REPLACEMENTS:
+        if char in value:
+            value = value.replace(char, entity)
+    return value
+
+def attr(value):
+    return '"' + escape(value) + '"'
+
+def snippet_type(t):
+    """日本語の型名も英語にそろえる (不明な型は Text)"""
+    t = schema_planner.normalize_type(t or "Text")
+    return t if t in FIELD_TYPES else "Text"
+
+def iter_field_xml(field, indent="  "):
+    name = str(field.get("name", ""))
+    field_type = snippet_type(field.get("type"))
+    # id="0" allows FileMaker to auto-assign IDs
+    yield f'{indent}<Field datatype="{field_type}" id="0" name={attr(name)}>\n'
+    if field.get("global"):
+        yield f'{indent}  <Storage global="True" maxRepeat="1" />\n'
+    else:
+        yield f'{indent}  <Storage autoIndex="True" maxRepeat="1" onload="True" recalculate="True" />\n'
+    if field_type == "Calculation" and field.get("formula"):
+        yield (f'{indent}  <Calculation>\n{indent}    <Calculation formula={attr(field["formula"])} />\n'
+               f'{indent}  </Calculation>\n')
+    yield f'{indent}</Field>\n'
+
+def iter_fields_snippet(fields):
+    yield '<FMPXmlSnippet type="FMField">\n'
+    for field in fields:
+        yield from iter_field_xml(field)
+    yield '</FMPXmlSnippet>'
+
+def build_fields_snippet(fields):
+    buf = io.StringIO()
+    for part in iter_fields_snippet(fields):
+        buf.write(part)
+    return buf.getvalue()
+
+def iter_tables_snippet(tables):
+    """「テーブル」タブに貼り付ける FMTable スニペット (複数のテーブルをフィールドごと)"""
+    yield '<FMPXmlSnippet type="FMTable">\n'
+    for table in tables:
+        yield f'  <Table name={attr(table.get("name", ""))} id="0">\n'
+        for field in table.get("fields") or []:
+            yield from iter_field_xml(field, indent="    ")
+        yield '  </Table>\n'
+    yield '</FMPXmlSnippet>'
+
+def build_tables_snippet(tables):
+    buf = io.StringIO()
+    for part in iter_tables_snippet(tables):
+        buf.write(part)
+    return buf.getvalue()
+
+def write_fields_snippet(fields, stream):
+    """ファイルや stdout へ直接書き出す"""
+    for part in iter_fields_snippet(fields):
+        stream.write(part)
+
+def _name_key(name):
+    return str(name or "").strip().casefold()
+
+def check_paste(before_fields, after_fields, requested):
+    """
+    貼り付け前後のフィールド一覧を比べ、要求したフィールドを
+    created (今回作成された) / existing (元からあった) / missing (無い) に分ける。
+    FileMaker が重複名を別名で作った場合などは unexpected に入る。
+    """
+    before = {_name_key(f.get("name")) for f in before_fields}
+    after = {_name_key(f.get("name")): f.get("name") for f in after_fields}
+    result = {"created": [], "existing": [], "missing": []}
+    for field in requested:
+        key = _name_key(field.get("name"))
+        if key in before:
+            result["existing"].append(field.get("name"))
+        elif key in after:
+            result["created"].append(field.get("name"))
+        else:
+            result["missing"].append(field.get("name"))
+    requested_keys = {_name_key(f.get("name")) for f in requested}
+    result["unexpected"] = [name for key, name in after.items() if key not in before and key not in requested_keys]
+    return result
+
+def count_confirms(before_count, after_count, requested):
+    """フィールド数の増加だけで貼り付けの成功を判定する (一覧を走査せずに済む場合)"""
+    if before_count is None or after_count is None:
+        return False
+    return after_count - before_count == len(requested)
@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+from collections import deque
+
+# 自動操作の区間計測 (span)。
+# CLUBMAKER_TRACE=1 (または出力先のパス) で有効になり、終了時に Chrome trace / Perfetto で開ける JSON と
+# 区間名ごとの集計表を書き出す (常駐ワーカーではリクエストごとに dump_request で1ファイルずつ)。
+# 無効なら span() は何もしないオブジェクトを返すだけ。
+#
+#   with fm_trace.span("create.name_entry", field=name):
+#       ...
+#       fm_trace.retry()            # 再試行した回数を記録
+#
+#   @fm_trace.traced("fm_utils.select_fields_tab")
+#   def select_fields_tab(dialog): ...
+#
+# 各 span には所要時間・その間の UIA 呼び出し回数・再試行回数が入る。
+# UIA 呼び出しは instrument_pywinauto() で pywinauto のラッパーを数える (疑似バックエンドは set_uia_counter)。
+
+TRACE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "traces")
+MAX_EVENTS = 200000
+
+_ENABLED = False
+_OUTPUT = None
+_EVENTS = deque(maxlen=MAX_EVENTS)
+_LOCAL = threading.local()
+_PID = os.getpid()
+_THREADS = {}
+_UIA = {"calls": 0}
+_uia_counter = lambda: _UIA["calls"]
+_now_ns = time.perf_counter_ns
+_LAST_DUMPED = [None]
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+    def retry(self, n=1):
+        pass
+
+_NOOP = _NoopSpan()
+
+class Span:
+    __slots__ = ("name", "cat", "args", "start", "uia_start", "retries")
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.retries = 0
+
+    def __enter__(self):
+        stack = getattr(_LOCAL, "stack", None)
+        if stack is None:
+            stack = _LOCAL.stack = []
+        stack.append(self)
+        self.uia_start = _uia_counter()
+        self.start = _now_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = _now_ns()
+        _LOCAL.stack.pop()
+        args = dict(self.args) if self.args else {}
+        args["uia_calls"] = _uia_counter() - self.uia_start
+        if self.retries:
+            args["retries"] = self.retries
+        if exc_type is not None:
+            args["error"] = f"{exc_type.__name__}: {exc}"
+        tid = threading.get_ident()
+        if tid not in _THREADS:
+            _THREADS[tid] = threading.current_thread().name
+        _EVENTS.append({"name": self.name, "cat": self.cat, "ph": "X", "ts": self.start / 1000,
+                        "dur": (end - self.start) / 1000, "pid": _PID, "tid": tid, "args": args})
+        return False
+
+    def set(self, **args):
+        """終了前に引数を追加する (結果など)"""
+        if self.args is None:
+            self.args = {}
+        self.args.update(args)
+
+    def retry(self, n=1):
+        self.retries += n
+
+def enabled():
+    return _ENABLED
+
+def span(name, cat="fm", **args):
+    if not _ENABLED:
+        return _NOOP
+    return Span(name, cat, args)
+
+def current():
+    """実行中の span (無ければ何もしないオブジェクト)"""
+    stack = getattr(_LOCAL, "stack", None)
+    return stack[-1] if stack else _NOOP
+
+def retry(n=1):
+    """実行中の span に再試行を記録する"""
+    if _ENABLED:
+        current().retry(n)
+
+def traced(name=None, cat="fm"):
+    """関数全体を span で囲むデコレータ"""
+    def decorate(fn):
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return fn(*args, **kwargs)
+            with Span(span_name, cat, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# --- UIA 呼び出しの計数 ---
+
+def set_uia_counter(counter):
+    """UIA 呼び出しの累計を返す関数を差し替える (fm_sim など)"""
+    global _uia_counter
+    _uia_counter = counter
+
+def set_clock(now_ns):
+    """時刻の取得元 (ナノ秒) を差し替える。fm_sim の仮想時間で計るときに使う"""
+    global _now_ns
+    _now_ns = now_ns
+
+UIA_METHODS = ("window_text", "children", "descendants", "click_input", "set_focus", "type_keys", "set_edit_text",
+               "set_text", "get_value", "select", "is_selected", "selected_text", "exists", "wrapper_object")
+
+def instrument_pywinauto():
+    """pywinauto のラッパーのメソッドを数えるよう差し替える (有効化したときだけ呼ぶ)"""
+    try:
+        from pywinauto import base_wrapper, application
+        from pywinauto.controls import uiawrapper, uia_controls, hwndwrapper
+    except Exception:
+        return False
+    classes = [base_wrapper.BaseWrapper, uiawrapper.UIAWrapper, hwndwrapper.HwndWrapper,
+               application.WindowSpecification]
+    classes += [c for c in vars(uia_controls).values() if isinstance(c, type)]
+    for cls in classes:
+        for method in UIA_METHODS:
+            fn = cls.__dict__.get(method)
+            if fn is None or getattr(fn, "_fm_trace_counted", False) or not callable(fn):
+                continue
+
+            def counted(*args, __fn=fn, **kwargs):
+                _UIA["calls"] += 1
+                return __fn(*args, **kwargs)
+            counted._fm_trace_counted = True
+            functools.update_wrapper(counted, fn)
+            setattr(cls, method, counted)
+    return True
+
+# --- 出力 ---
+
+def enable(output=None):
+    """計測を始める。output を省略すると data/traces/trace_<日時>.json"""
+    global _ENABLED, _OUTPUT
+    if output in (None, "", "1", "true"):
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        output = os.path.join(TRACE_DIR, f"trace_{time.strftime('%Y%m%d_%H%M%S')}_{_PID}.json")
+    _OUTPUT = output
+    if not _ENABLED:
+        _ENABLED = True
+        if "pywinauto" in sys.modules or _pywinauto_available():
+            instrument_pywinauto()
+        atexit.unregister(_dump_at_exit)
+        atexit.register(_dump_at_exit)
+    return output
+
+def _pywinauto_available():
+    try:
+        import importlib.util
+        return importlib.util.find_spec("pywinauto") is not None
+    except Exception:
+        return False
+
+def disable():
+    global _ENABLED
+    _ENABLED = False
+
+def reset():
+    _EVENTS.clear()
+
+def events():
+    return list(_EVENTS)
+
+def chrome_trace():
+    meta = [{"name": "thread_name", "ph": "M", "pid": _PID, "tid": tid, "args": {"name": name}}
+            for tid, name in _THREADS.items()]
+    return {"traceEvents": meta + list(_EVENTS), "displayTimeUnit": "ms"}
+
+def summary():
+    """区間名ごとの集計 (回数・合計・平均・p95・最大・UIA 呼び出し・再試行)"""
+    groups = {}
+    for e in _EVENTS:
+        groups.setdefault(e["name"], []).append(e)
+    rows = {}
+    for name, evs in groups.items():
+        durs = sorted(e["dur"] / 1000 for e in evs)
+        rows[name] = {
+            "count": len(durs),
+            "total_ms": round(sum(durs), 2),
+            "mean_ms": round(sum(durs) / len(durs), 2),
+            "p95_ms": round(durs[min(len(durs) - 1, int(len(durs) * 0.95))], 2),
+            "max_ms": round(durs[-1], 2),
+            "uia_calls": sum(e["args"].get("uia_calls", 0) for e in evs),
+            "retries": sum(e["args"].get("retries", 0) for e in evs),
+            "errors": sum(1 for e in evs if "error" in e["args"]),
+        }
+    return dict(sorted(rows.items(), key=lambda kv: -kv[1]["total_ms"]))
+
+def format_summary(rows=None):
+    rows = summary() if rows is None else rows
+    if not rows:
+        return "(no spans)"
+    width = max(len(n) for n in rows)
+    head = f"{'span':<{width}}  {'count':>6} {'total_ms':>10} {'mean_ms':>9} {'p95_ms':>9} {'max_ms':>9} {'uia':>7} {'retry':>5}"
+    lines = [head, "-" * len(head)]
+    for name, r in rows.items():
+        lines.append(f"{name:<{width}}  {r['count']:>6} {r['total_ms']:>10.1f} {r['mean_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                     f"{r['max_ms']:>9.2f} {r['uia_calls']:>7} {r['retries']:>5}")
+    return "\n".join(lines)
+
+def dump(path=None):
+    """Chrome trace JSON と集計表 (<path>.summary.json) を書き出し、集計表を stderr に出す"""
+    path = path or _OUTPUT
+    if not path or not _EVENTS:
+        return None
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(chrome_trace(), f, ensure_ascii=False)
+        rows = summary()
+        with open(os.path.splitext(path)[0] + ".summary.json", "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        _LAST_DUMPED[0] = _EVENTS[-1]
+        print(f"  > [Trace] {len(_EVENTS)} spans -> {path}\n{format_summary(rows)}", file=sys.stderr)
+    except Exception as e:
+        print(f"  > [Trace] write failed: {e}", file=sys.stderr)
+        return None
+    return path
+
+def dump_request(label):
+    """
+    常駐ワーカー用: ここまでの区間を <出力先>_<label>.json に書き出して消す (1リクエスト1ファイル)。
+    終了時の書き出しだけだと、タイムアウトでワーカーが kill されたときに全部失われる。
+    """
+    if not _ENABLED or not _OUTPUT:
+        return None
+    base, ext = os.path.splitext(_OUTPUT)
+    path = dump(f"{base}_{label}{ext or '.json'}")
+    reset()
+    return path
+
+def _dump_at_exit():
+    # 明示的に dump() した後に増えた分が無ければ書き直さない
+    if _EVENTS and _EVENTS[-1] is not _LAST_DUMPED[0]:
+        dump()
+
+if os.getenv("CLUBMAKER_TRACE"):
+    enable(os.getenv("CLUBMAKER_TRACE"))
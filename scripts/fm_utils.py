@@ -1,55 +1,42 @@
-import time
 import sys
-import ctypes
-from pywinauto import Desktop, Application
-import pyautogui
-import subprocess
+import lazy_import
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+pyautogui = lazy_import.lazy("pyautogui")
+subprocess = lazy_import.lazy("subprocess")
 import os
+import re
+import fm_wait
+from overlay_channel import OverlayClient
+import dialog_watcher
+import dialog_controls
+import fm_trace
 
 # --- Overlay Utils ---
-OVERLAY_PROCESS = None
-STATUS_FILE = "overlay_status.txt"
+# オーバーレイは常駐プロセス (overlay.py)。進捗はソケットでイベントとして送る。
+OVERLAY = OverlayClient()
 
-def start_overlay():
+def start_overlay(title="準備中..."):
     try:
-        # Create initial status
-        with open(STATUS_FILE, "w", encoding="utf-8") as f:
-            f.write("準備中...")
-            
-        script_path = os.path.join(os.path.dirname(__file__), "overlay.py")
-        # shell=True を使わずに実行することで、terminate() が確実に python プロセスに届くようにする
-        OVERLAY_PROCESS = subprocess.Popen([sys.executable, script_path])
+        # 常駐ワーカーでは、前のバッチの後にオーバーレイが (アイドルで) 終了していることがある。
+        # connected は切断されたソケットを捨てるので、その場合は接続し直すか起動し直す
+        if not OVERLAY.connected and not OVERLAY.connect():
+            script_path = os.path.join(os.path.dirname(__file__), "overlay.py")
+            # 常駐させるため待たずに起動し、待ち受けが始まるまで接続を試みる
+            subprocess.Popen([sys.executable, script_path])
+            if not fm_wait.wait_until(OVERLAY.connect, timeout=3.0, name="overlay_connect"):
+                print("Failed to start overlay: no connection", file=sys.stderr)
+                return
+        OVERLAY.begin(title)
     except Exception as e:
         print(f"Failed to start overlay: {e}", file=sys.stderr)
 
-def update_overlay(message):
-    try:
-        with open(STATUS_FILE, "w", encoding="utf-8") as f:
-            f.write(message)
-    except Exception as e:
-        print(f"Failed to update overlay: {e}", file=sys.stderr)
+def update_overlay(message, index=None, total=None, error=None):
+    OVERLAY.progress(message, index, total, error)
 
-def stop_overlay():
-    global OVERLAY_PROCESS
-    try:
-        update_overlay("EXIT") # Signal to self-destruct
-        time.sleep(0.3)
-        if OVERLAY_PROCESS:
-            # プロセスが生きていれば終了させる
-            if OVERLAY_PROCESS.poll() is None:
-                OVERLAY_PROCESS.terminate()
-                try:
-                    OVERLAY_PROCESS.wait(timeout=1)
-                except:
-                    OVERLAY_PROCESS.kill()
-            OVERLAY_PROCESS = None
-        
-        # 強制終了のフォールバック (念のため)
-        if os.path.exists(STATUS_FILE):
-             try: os.remove(STATUS_FILE)
-             except: pass
-    except:
-        pass
+def stop_overlay(linger=0):
+    # バッチ終了: ウィンドウを隠すだけで、次のバッチのためにプロセスは残す (linger 秒は最後の表示を残す)
+    OVERLAY.end(linger)
 
 def set_input_block(block=True):
     """Block/Unblock user input (requires Admin privileges)."""
@@ -66,10 +53,25 @@ def set_input_block(block=True):
         print(f"BlockInput error: {e}", file=sys.stderr)
         return False
 
+_APP_CACHE = {}
+
+def get_app(backend="uia"):
+    """FileMaker への接続を使い回す (常駐ワーカーでは接続をウォームに保つ)"""
+    app = _APP_CACHE.get(backend)
+    if app is not None:
+        try:
+            if app.is_process_running():
+                return app
+        except:
+            pass
+    app = Application(backend=backend).connect(path="FileMaker Pro.exe")
+    _APP_CACHE[backend] = app
+    return app
+
 def find_main_window(backend="uia"):
     """Find the main FileMaker Pro window, handling custom app titles."""
     try:
-        app = Application(backend=backend).connect(path="FileMaker Pro.exe")
+        app = get_app(backend)
         # Get all windows for this process
         windows = app.windows()
         for w in windows:
@@ -116,6 +118,7 @@ def close_unwanted_dialogs():
     except Exception as e:
         print(f"Error closing dialogs: {e}", file=sys.stderr)
 
+@fm_trace.traced("fm_utils.find_manage_database_dialog")
 def find_manage_database_dialog():
     """FileMakerの「データベースの管理」ダイアログをDesktopレベルから徹底的に探す"""
     priority_keywords = ["データベースの管理", "Manage Database", "Manage", "の管理"]
@@ -143,28 +146,192 @@ def find_manage_database_dialog():
         pass
     return None
 
+# --- 子コントロールのキャッシュ ---
+_CONTROLS = None
+
+def get_controls(dialog):
+    """
+    ダイアログの子コントロールのキャッシュ (dialog_controls.DialogControls)。
+    別のダイアログ (ハンドルが変わった = 開き直された) なら作り直す。
+    """
+    global _CONTROLS
+    if _CONTROLS is not None and dialog is _CONTROLS.dialog:
+        return _CONTROLS
+    handle = dialog_controls.window_handle(dialog)
+    if _CONTROLS is None or handle is None or handle != _CONTROLS.handle:
+        stats = _CONTROLS.stats if _CONTROLS is not None else None
+        _CONTROLS = dialog_controls.DialogControls(dialog, handle, stats=stats)
+    else:
+        _CONTROLS.dialog = dialog
+    return _CONTROLS
+
+def control_stats():
+    return _CONTROLS.summary() if _CONTROLS is not None else None
+
+def _select_tab(dialog, tab, label, shortcut, ready):
+    controls = get_controls(dialog)
+    tab_item = controls.get(tab)
+    if tab_item is not None:
+        if not tab_item.is_selected():
+            print(f"  > Selecting '{label}' tab...", file=sys.stderr)
+            tab_item.click_input()
+            fm_wait.wait_until(tab_item.is_selected, timeout=2.0, name=f"select_{tab}")
+            # タブを切り替えると子コントロールが作り直されることがある
+            controls.invalidate()
+        return True
+    # ショートカット (日本語/英語共通)
+    print(f"  > Tab item not found via title. Trying {shortcut} shortcut...", file=sys.stderr)
+    dialog.type_keys(shortcut)
+    controls.invalidate()
+    fm_wait.wait_until(lambda: controls.get(ready) is not None, timeout=2.0, name=f"select_{tab}")
+    return True
+
+@fm_trace.traced("fm_utils.select_fields_tab")
 def select_fields_tab(dialog):
     """「フィールド」タブを確実に選択する"""
     try:
         # 日本語: フィールド(F) または フィールド
         # 英語: Fields または Fields (F)
-        tab_item = dialog.child_window(title_re="フィールド.*|Fields.*", control_type="TabItem")
-        if tab_item.exists():
-            if not tab_item.is_selected():
-                print("  > Selecting 'Fields' tab...", file=sys.stderr)
-                tab_item.click_input()
-                time.sleep(0.5)
-            return True
-        else:
-            # ショートカット Alt+F (日本語/英語共通)
-            print("  > Tab item not found via title. Trying Alt+F shortcut...", file=sys.stderr)
-            dialog.type_keys("%f")
-            time.sleep(0.5)
-            return True
+        return _select_tab(dialog, "fields_tab", "Fields", "%f", "field_list")
     except Exception as e:
         print(f"  > Tab selection error: {e}", file=sys.stderr)
         return False
 
+@fm_trace.traced("fm_utils.select_tables_tab")
+def select_tables_tab(dialog):
+    """「テーブル」タブを選択する"""
+    try:
+        return _select_tab(dialog, "tables_tab", "Tables", "%t", "table_name_edit")
+    except Exception as e:
+        print(f"  > Tab selection error: {e}", file=sys.stderr)
+        return False
+
+def list_tables(dialog):
+    """フィールドタブのテーブルメニューの項目 (読めなければ None)"""
+    try:
+        menu = get_controls(dialog).require("table_menu")
+        return [t for t in menu.texts() if t]
+    except Exception as e:
+        print(f"  > Could not read table menu: {e}", file=sys.stderr)
+        return None
+
+@fm_trace.traced("fm_utils.select_table")
+def select_table(dialog, name):
+    """フィールドタブで対象のテーブルに切り替える (既に選択中なら何もしない)"""
+    try:
+        menu = get_controls(dialog).require("table_menu")
+        if menu.selected_text() == name:
+            return True
+        print(f"  > Switching table to '{name}'...", file=sys.stderr)
+        menu.select(name)
+        return fm_wait.wait_until(lambda: menu.selected_text() == name, timeout=2.0, name="select_table")
+    except Exception as e:
+        print(f"  > Table switch error: {e}", file=sys.stderr)
+        return False
+
+# 型の選択キーと、選択後にタイプ欄に表示される名前 (日本語 / 英語)
+TYPE_KEYS = {
+    "Text": "t", "テキスト": "t",
+    "Number": "n", "数値": "n",
+    "Date": "d", "日付": "d",
+    "Time": "i", "時刻": "i",
+    "Timestamp": "m", "タイムスタンプ": "m",
+    "Container": "r", "オブジェクト": "r",
+    "Calculation": "c", "計算": "c",
+    "Summary": "s", "集計": "s"
+}
+TYPE_LABELS = {}
+for _name, _key in TYPE_KEYS.items():
+    TYPE_LABELS.setdefault(_key, set()).add(_name)
+
+FIELD_COUNT_RE = re.compile(r'(\d+)')
+
+def read_field_count(dialog):
+    """ダイアログ内の「XXX フィールド」表示から総数を読む (見つからなければ None)"""
+    try:
+        label = get_controls(dialog).get("field_count")
+        if label is not None:
+            m = FIELD_COUNT_RE.search(label.window_text() or "")
+            if m:
+                return int(m.group(1))
+    except: pass
+    try:
+        for el in dialog.descendants(control_type="Text"):
+            t = (el.window_text() or "").strip()
+            if "フィールド" in t or "field" in t.lower():
+                m = FIELD_COUNT_RE.search(t)
+                if m:
+                    return int(m.group(1))
+    except: pass
+    return None
+
+def read_table_count(dialog):
+    """テーブルタブの「N テーブル」表示から総数を読む (見つからなければ None)"""
+    try:
+        label = get_controls(dialog).get("table_count")
+        if label is not None:
+            m = FIELD_COUNT_RE.search(label.window_text() or "")
+            if m:
+                return int(m.group(1))
+    except: pass
+    return None
+
+# --- ダイアログ監視 ---
+# ポップアップの検出は常駐の DialogWatcher に任せる (デスクトップ全体の UIA 走査はしない)
+_DIALOG_WATCHER = None
+_DIALOG_WATCHER_PID = None
+
+def get_dialog_watcher():
+    """FileMaker のプロセスのウィンドウだけを見る DialogWatcher (FileMaker が起動し直したら作り直す)"""
+    global _DIALOG_WATCHER, _DIALOG_WATCHER_PID
+    if _DIALOG_WATCHER is not None and _DIALOG_WATCHER_PID is None:
+        # 外から差し込まれたもの (fm_sim など)
+        return _DIALOG_WATCHER
+    pid = get_app().process
+    if _DIALOG_WATCHER is not None and pid != _DIALOG_WATCHER_PID:
+        _DIALOG_WATCHER.stop()
+        _DIALOG_WATCHER = None
+    if _DIALOG_WATCHER is None:
+        pids = {pid}
+        _DIALOG_WATCHER = dialog_watcher.DialogWatcher(
+            list_windows=lambda: dialog_watcher.win32_list_windows(pids)).start()
+        _DIALOG_WATCHER_PID = pid
+    return _DIALOG_WATCHER
+
+def find_popup(kinds=dialog_watcher.EXTRA_KINDS):
+    """
+    FileMaker が前面に出したダイアログ (DialogInfo) を返す (無ければ None)。
+    既定は作成後に出るダイアログ (計算式の指定 / 集計フィールドのオプション)。
+    警告は kinds=dialog_watcher.ALERT_KINDS で探す。
+    """
+    try:
+        return get_dialog_watcher().find(kinds, fresh=True)
+    except Exception:
+        return None
+
+def dialog_window(info):
+    """DialogInfo を操作用の UIA ラッパーにする"""
+    return Desktop(backend="uia").window(handle=info.handle)
+
+DIALOG_FILE_RE = re.compile(r'[「"“](.+?)[」"”]')
+
+def read_table_context(dialog):
+    """「データベースの管理」のファイル名と、フィールドタブで選択中のテーブル名を読む (読めなければ None)"""
+    file_name, table = None, None
+    try:
+        m = DIALOG_FILE_RE.search(dialog.window_text() or "")
+        if m:
+            file_name = m.group(1)
+    except: pass
+    try:
+        # フィールドタイプ以外のコンボボックスがテーブル選択
+        combo = get_controls(dialog).get("table_menu")
+        if combo is not None:
+            table = combo.selected_text() if hasattr(combo, "selected_text") else combo.window_text()
+    except: pass
+    return file_name or None, table or None
+
+@fm_trace.traced("fm_utils.ensure_manage_database")
 def ensure_manage_database():
     """
     Robustly ensure 'Manage Database' dialog is Open and Focused.
@@ -173,6 +340,8 @@ def ensure_manage_database():
     
     max_retries = 3
     for attempt in range(max_retries):
+        if attempt > 0:
+            fm_trace.retry()
         try:
             # 1. Search for Dialog
             dialog = find_manage_database_dialog()
@@ -193,18 +362,18 @@ def ensure_manage_database():
                      print(f"  > Sending ESC to clear potential obstructions...", file=sys.stderr)
                      try:
                          main_win.set_focus()
-                         time.sleep(0.2)
+                         fm_wait.wait_until(main_win.is_active, timeout=1.0, name="main_window_focus")
                          pyautogui.press('esc')
-                         time.sleep(0.5)
+                         fm_wait.wait_until(lambda: main_win.is_active(), timeout=1.0, name="clear_obstruction")
                      except: pass
 
                 # 3. Send Open Shortcut
                 print("  > Sending Ctrl+Shift+D to open Manage Database...", file=sys.stderr)
                 try:
                     main_win.set_focus()
-                    time.sleep(0.2)
+                    fm_wait.wait_until(main_win.is_active, timeout=1.0, name="main_window_focus")
                     pyautogui.hotkey('ctrl', 'shift', 'd')
-                    time.sleep(2.0)
+                    fm_wait.wait_until(find_manage_database_dialog, timeout=5.0, name="open_manage_database")
                 except Exception as e:
                     print(f"  > Failed to focus/send keys: {e}", file=sys.stderr)
             else:
@@ -212,7 +381,8 @@ def ensure_manage_database():
                  
         except Exception as e:
             print(f"  > Attempt {attempt+1} error: {e}", file=sys.stderr)
-            time.sleep(1)
+            # 開きかけていたダイアログが現れれば次の試行ですぐ見つかる
+            fm_wait.wait_until(find_manage_database_dialog, timeout=1.0, name="manage_database_retry")
             
     print("ERROR: Could not open Manage Database after retries.", file=sys.stderr)
     return False
@@ -0,0 +1,132 @@
+import sys
+import time
+
+# 固定 sleep の代わりに使う共通の待機レイヤー。
+# 条件を短い間隔でポーリングし、満たされた時点ですぐに戻る。
+# 実際にかかった待ち時間は名前ごとに記録し、次回以降のタイムアウトに反映する (適応タイムアウト)。
+# pywinauto に依存しないので、SimulatedClock と偽の UI で Linux 上でも検証できる。
+
+class Clock:
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class SimulatedClock(Clock):
+    """テスト用の時計。sleep は時間を進めるだけで実際には待たない"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+CLOCK = Clock()
+
+# name -> 実測の待ち時間 (秒) のリスト
+WAIT_STATS = {}
+
+MIN_INTERVAL = 0.02
+MAX_INTERVAL = 0.25
+
+def set_clock(clock):
+    global CLOCK
+    CLOCK = clock
+
+def reset_stats():
+    WAIT_STATS.clear()
+
+def adaptive_timeout(name, default, floor=0.5, factor=3.0):
+    """過去の実測値の最大 x factor を上限とする (実測が無ければ default)"""
+    samples = WAIT_STATS.get(name)
+    if not samples:
+        return default
+    recent = samples[-20:]
+    return min(default, max(floor, max(recent) * factor))
+
+def wait_until(condition, timeout=5.0, name=None, interval=MIN_INTERVAL, adaptive=False, clock=None):
+    """
+    condition() が真になるまで待ち、その値を返す。タイムアウトしたら None。
+    ポーリング間隔は MIN_INTERVAL から MAX_INTERVAL まで徐々に広げる。
+    adaptive=True なら、同じ name の過去の実測値からタイムアウトを短縮する。
+    実測はワーカーの間ずっと残るので、adaptive は来なくても困らない待ち (任意の警告の確認など) にだけ使う。
+    必ず出るダイアログ (計算式の指定など) を待ち損ねると、次のキー操作がそのダイアログに入ってしまう。
+    """
+    clock = clock or CLOCK
+    if adaptive and name:
+        timeout = adaptive_timeout(name, timeout)
+
+    start = clock.monotonic()
+    result = None
+    while True:
+        try:
+            result = condition()
+        except Exception:
+            result = None
+        elapsed = clock.monotonic() - start
+        if result:
+            break
+        if elapsed >= timeout:
+            result = None
+            break
+        clock.sleep(min(interval, max(timeout - elapsed, 0)))
+        interval = min(interval * 1.5, MAX_INTERVAL)
+
+    if name:
+        WAIT_STATS.setdefault(name, []).append(elapsed)
+        if result is None:
+            print(f"  > [Wait] '{name}' timed out after {elapsed:.2f}s", file=sys.stderr)
+    return result
+
+def wait_gone(condition, timeout=5.0, name=None, **kwargs):
+    """condition() が偽になるまで待つ (ダイアログが閉じた、など)"""
+    return bool(wait_until(lambda: not condition(), timeout=timeout, name=name, **kwargs))
+
+def summary():
+    """名前ごとの待ち時間の集計 (回数・合計・平均・最大)"""
+    rows = {}
+    for name, samples in WAIT_STATS.items():
+        rows[name] = {
+            "count": len(samples),
+            "total_s": round(sum(samples), 3),
+            "mean_s": round(sum(samples) / len(samples), 3),
+            "max_s": round(max(samples), 3),
+        }
+    return rows
+
+# --- よく使う UI 条件 ---
+
+def _text(ctrl):
+    try:
+        return ctrl.window_text() or ctrl.get_value() or ""
+    except Exception:
+        return ctrl.window_text() or ""
+
+def text_equals(ctrl, expected):
+    return lambda: _text(ctrl) == expected
+
+def text_in(ctrl, values):
+    return lambda: _text(ctrl) in values
+
+def edit_cleared(ctrl):
+    return lambda: _text(ctrl) == ""
+
+def exists(spec):
+    return lambda: spec.exists(timeout=0)
+
+def window_alive(win):
+    """ラッパーが指すウィンドウがまだ表示されていれば真 (消えて例外になったら偽)"""
+    def check():
+        try:
+            return win.is_visible()
+        except Exception:
+            return False
+    return check
+
+def count_reached(read_count, expected):
+    """read_count() が expected 以上になったら真"""
+    return lambda: (read_count() or 0) >= expected
@@ -1,32 +1,17 @@
 import os
 import sys
 import json
-from google import genai
-from dotenv import load_dotenv
+import lazy_import
+genai = lazy_import.lazy("google.genai")
+import ai_cache
+import key_pool
+import json_stream
+import json_extract
+import response_schema
+import fm_trace
 
-load_dotenv()
 
-def generate_db_design(prompt):
-    # .env から全てのキーを取得
-    keys_str = os.getenv("GOOGLE_GENERATIVE_AI_API_KEY", "")
-    if not keys_str:
-        print(json.dumps({"error": "API Key not found in .env"}))
-        return
-
-    # モデル名を .env から取得 (デフォルトは gemini-2.0-flash-exp)
-    model_name = os.getenv("GOOGLE_GENERATIVE_AI_MODEL", "gemini-2.0-flash-exp")
-
-    # 空白を除去しつつリスト化
-    api_keys = [k.strip() for k in keys_str.split(",") if k.strip()]
-    
-    errors = []
-    
-    # 登録されている全キーを順番に試す
-    for i, api_key in enumerate(api_keys):
-        try:
-            client = genai.Client(api_key=api_key)
-            
-            system_instruction = """
+SYSTEM_INSTRUCTION = """
             You are an expert FileMaker database architect and UI/UX designer.
             Design a database structure and a modern UI layout based on the user's request.
 
@@ -73,40 +58,69 @@ def generate_db_design(prompt):
             Avoid any markdown formatting, only return raw JSON.
             """
 
+def _as_design(value):
+    """取り出した JSON を設計の形にそろえる (テーブルの配列だけ / {"design": ...} で包んだ形も受け付ける)"""
+    if isinstance(value, list) and value and all(isinstance(t, dict) and "fields" in t for t in value):
+        return {"tables": value}
+    if isinstance(value, dict):
+        if isinstance(value.get("design"), dict) and "tables" in value["design"]:
+            return value["design"]
+        if "tables" in value:
+            return value
+    return None
+
+def parse_design(text):
+    """応答テキストから設計 JSON を取り出し、構造を補正する (直せなければ ValueError)"""
+    design, repairs = response_schema.validate_design(json_extract.extract(text, accept=_as_design))
+    if repairs:
+        print(f"  > [Design] Repaired {len(repairs)} item(s): {'; '.join(repairs[:5])}", file=sys.stderr)
+    return design
+
+def generate_db_design(prompt, use_cache=True):
+    # .env から全てのキーを取得
+    lazy_import.load_dotenv()
+    keys_str = os.getenv("GOOGLE_GENERATIVE_AI_API_KEY", "")
+    if not keys_str:
+        print(json.dumps({"error": "API Key not found in .env"}))
+        return
+
+    # モデル名を .env から取得 (デフォルトは gemini-2.0-flash-exp)
+    model_name = os.getenv("GOOGLE_GENERATIVE_AI_MODEL", "gemini-2.0-flash-exp")
+
+    # キーは共有プール経由で使う (レート制限・クールダウン・サーキットブレーカー)
+    pool = key_pool.get_pool(keys_str)
+    
+    errors = []
+    
+    def ask(api_key):
+        client = genai.Client(api_key=api_key)
+
+        with fm_trace.span("gemini.generate_content", cat="ai", model=model_name):
             response = client.models.generate_content(
                 model=model_name,
-                contents=f"{system_instruction}\n\nUser Request: {prompt}"
+                contents=f"{SYSTEM_INSTRUCTION}\n\nUser Request: {prompt}"
             )
-            
-            text = response.text.strip()
-            
-            # JSON部分を抽出
-            import re
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
-            if json_match:
-                text = json_match.group(0)
-            
-            json_data = json.loads(text)
-            
-            # 構造の補正
-            if isinstance(json_data, list):
-                json_data = {"tables": json_data}
-            elif "design" in json_data and "tables" in json_data["design"]:
-                json_data = json_data["design"]
-            
-            # 成功したらJSONを出力して終了
-            print(json.dumps(json_data))
-            return
+        
+        return response.text
 
+    def request_design():
+        # 429 のキーはサーバー指定の時間だけ外し、空いている別のキーで再試行する
+        # JSON の解析失敗はキーの問題ではないので、プールの外で解析する
+        try:
+            with fm_trace.span("gemini.request", cat="ai", model=model_name):
+                text = pool.call(ask, hedge_after=key_pool.HEDGE_AFTER)
+            return parse_design(text)
         except Exception as e:
-            err_msg = str(e)
-            errors.append(f"Key {i+1} ({model_name}): {err_msg}")
-            
-            # 429 (クォータ切れ) の場合は1.5秒待機してから次へ
-            if "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg:
-                import time
-                time.sleep(1.5)
-            continue
+            errors.append(f"{model_name}: {e}")
+            return None
+
+    # 同じ要望の再生成はキャッシュから返す (use_cache=False で強制的に再生成)
+    cache_key = ai_cache.make_key(model_name, SYSTEM_INSTRUCTION, None, prompt)
+    json_data = ai_cache.cached(cache_key, request_design, use_cache)
+    if json_data is not None:
+        # 成功したらJSONを出力して終了
+        print(json.dumps(json_data))
+        return
 
     # 全てのキーが失敗した場合
     print(json.dumps({
@@ -114,9 +128,85 @@ def generate_db_design(prompt):
         "details": errors
     }))
 
+# ストリーミング時のイベント名 (配列キー -> event)
+STREAM_EVENTS = {"thoughts": "thought", "tables": "table", "layouts": "layout"}
+
+def replay_design(design, emit):
+    """完成した設計をストリーミングと同じイベント列で流す (キャッシュヒット時など)"""
+    for key, event in STREAM_EVENTS.items():
+        for index, value in enumerate(design.get(key) or []):
+            emit({"event": event, "index": index, "data": value})
+
+def stream_db_design(prompt, emit, use_cache=True):
+    """
+    応答をストリーミングで受け取り、thoughts / tables / layouts の要素が閉じるたびに
+    emit({"event": "thought"|"table"|"layout", "index": i, "data": ...}) を呼ぶ。
+    最後に {"event": "done", "design": ...} か {"event": "error", ...} を送り、設計 (または None) を返す。
+    """
+    lazy_import.load_dotenv()
+    keys_str = os.getenv("GOOGLE_GENERATIVE_AI_API_KEY", "")
+    if not keys_str:
+        emit({"event": "error", "error": "API Key not found in .env"})
+        return None
+
+    model_name = os.getenv("GOOGLE_GENERATIVE_AI_MODEL", "gemini-2.0-flash-exp")
+    pool = key_pool.get_pool(keys_str)
+    emitted = [0]
+
+    def ask(api_key):
+        client = genai.Client(api_key=api_key)
+        if emitted[0]:
+            # 前のキーが途中で失敗した。受け手に途中までの要素を捨ててもらう
+            emit({"event": "restart"})
+            emitted[0] = 0
+        streamer = json_stream.ArrayItemStreamer(STREAM_EVENTS)
+        text = ""
+        with fm_trace.span("gemini.generate_content_stream", cat="ai", model=model_name):
+            for chunk in client.models.generate_content_stream(
+                model=model_name,
+                contents=f"{SYSTEM_INSTRUCTION}\n\nUser Request: {prompt}"
+            ):
+                piece = chunk.text or ""
+                text += piece
+                for key, index, value in streamer.feed(piece):
+                    emit({"event": STREAM_EVENTS[key], "index": index, "data": value})
+                    emitted[0] += 1
+        return text
+
+    errors = []
+
+    def request_design():
+        # ヘッジすると2本のストリームのイベントが混ざるので、ここでは使わない
+        try:
+            return parse_design(pool.call(ask))
+        except Exception as e:
+            errors.append(f"{model_name}: {e}")
+            return None
+
+    cache_key = ai_cache.make_key(model_name, SYSTEM_INSTRUCTION, None, prompt)
+    design = ai_cache.cached(cache_key, request_design, use_cache)
+    if design is None:
+        emit({"event": "error", "error": "All API keys failed.", "details": errors})
+        return None
+    if not emitted[0]:
+        # キャッシュヒット、または要素を逐次取り出せない形の応答だった
+        replay_design(design, emit)
+    emit({"event": "done", "design": design})
+    return design
+
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        user_prompt = " ".join(sys.argv[1:])
-        generate_db_design(user_prompt)
+    args = sys.argv[1:]
+    use_cache = "--no-cache" not in args
+    stream = "--stream" in args
+    args = [a for a in args if a not in ("--no-cache", "--stream")]
+    if args:
+        user_prompt = " ".join(args)
+        if stream:
+            # NDJSON: 1行1イベント
+            def emit_line(event):
+                print(json.dumps(event), flush=True)
+            stream_db_design(user_prompt, emit_line, use_cache)
+        else:
+            generate_db_design(user_prompt, use_cache)
     else:
         print(json.dumps({"error": "No prompt provided"}))
@@ -1,20 +1,44 @@
-from pywinauto import Application, Desktop
+import lazy_import
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
 import json
 import sys
 import time
-import pyautogui
+pyautogui = lazy_import.lazy("pyautogui")
 
 def find_manage_database_dialog(app):
     """fm_utilsの共通関数を使用する"""
     return fm_utils.find_manage_database_dialog()
 
 import fm_utils
+import fm_wait
+import schema_snapshots
+from field_list_scan import scan_field_list, visible_items
+
+def read_fields(dialog, on_progress=None):
+    """フィールドタブで選択中のテーブルの全フィールドを読む (ダイアログは開いている前提)"""
+    file_name, table = fm_utils.read_table_context(dialog)
+
+    # 1. フィールド総数を取得 (「XXX フィールド」表示)
+    total_expected = fm_utils.read_field_count(dialog) or 0
+    if total_expected:
+        print(f"  > Detected total_expected: {total_expected}", file=sys.stderr)
+
+    # 2. スクロールしながら取得
+    grid = fm_utils.get_controls(dialog).require("field_list")
+    grid.set_focus()
+    pyautogui.press('home')
+    fm_wait.wait_until(lambda: visible_items(grid), timeout=1.0, name="field_list_ready")
+
+    def progress(collected):
+        if on_progress:
+            on_progress(collected, total_expected)
+
+    ordered_fields = scan_field_list(grid, pyautogui.press, total_expected, on_progress=progress)
+    return {"success": True, "fields": ordered_fields, "file": file_name, "table": table}
 
 def get_existing_fields():
-    fields_dict = {}  # 重複を避けるため名前をキーにする
-    total_expected = 0
-    fm_utils.start_overlay()
-    fm_utils.update_overlay("FileMakerから全フィールドを読み取っています...")
+    fm_utils.start_overlay("FileMakerから全フィールドを読み取っています...")
     fm_utils.set_input_block(True)
     
     try:
@@ -31,106 +55,13 @@ def get_existing_fields():
         # 2. 「フィールド」タブを確実に選択
         if not fm_utils.select_fields_tab(dialog):
             return {"success": False, "error": "Could not select 'Fields' tab."}
-        
-        time.sleep(0.5)
-        dialog_spec = dialog
-
-        # 1. フィールド総数を取得
-        total_expected = 0
-        import re
-        try:
-            # 「XXX フィールド」を探す
-            for el in dialog_spec.descendants(control_type="Text"):
-                t = (el.window_text() or "").strip()
-                if "フィールド" in t:
-                    m = re.search(r'(\d+)', t)
-                    if m:
-                        total_expected = int(m.group(1))
-                        print(f"  > Detected total_expected: {total_expected} from '{t}'", file=sys.stderr)
-                        break
-        except: pass
-        
-        # 2. スクロールしながら取得
-        grid = dialog_spec.child_window(auto_id="IDC_DEFFIELDS_FIELD_LIST", control_type="DataGrid")
-        grid.set_focus()
-        pyautogui.press('home')
-        time.sleep(0.5)
-
-        # 取得したフィールドの順序と内容を保持
-        ordered_fields = []
-        
-        # 最大ループ回数を少し余裕持たせる
-        max_loops = max(total_expected * 2, 20) if total_expected > 0 else 100
-        
-        for i in range(max_loops):
-            fm_utils.update_overlay(f"読み取り中: {len(ordered_fields)} / {total_expected if total_expected > 0 else '??'}")
-            
-            # 現在見えている全アイテムから、新規フィールドを探す
-            try:
-                # リフレッシュ
-                items = grid.descendants(control_type="DataItem")
-                if not items: items = grid.children(control_type="DataItem")
-                
-                print(f"  > [Loop {i}] Items visible: {len(items)}, Collected: {len(ordered_fields)}", file=sys.stderr)
-                
-                found_new_in_any_item = False
-                for item in items:
-                    try:
-                        # Item自体のテキストからも名前を推測（フォールバック）
-                        it_text = (item.window_text() or "").strip()
-                        
-                        cells = item.children()
-                        n_text = ""
-                        t_text = ""
-                        
-                        if len(cells) >= 1:
-                            # Cell 0 から名前
-                            n_nodes = cells[0].descendants(control_type="Text")
-                            if n_nodes:
-                                n_text = " ".join([n.window_text() for n in n_nodes if n.window_text()]).strip()
-                            if not n_text:
-                                n_text = (cells[0].window_text() or "").strip()
-                        
-                        if len(cells) >= 2:
-                            # Cell 1 から型
-                            t_nodes = cells[1].descendants(control_type="Text")
-                            if t_nodes:
-                                t_text = " ".join([n.window_text() for n in t_nodes if n.window_text()]).strip()
-                            if not t_text:
-                                t_text = (cells[1].window_text() or "").strip()
-
-                        # もし Cell から取れなかった場合、Whole Text から推測 (並べ替え 名前 型 ...)
-                        if not n_text and "並べ替え" in it_text:
-                            parts = it_text.split()
-                            if len(parts) >= 3:
-                                n_text = parts[1]
-                                t_text = parts[2]
-
-                        if n_text and not any(f["name"] == n_text for f in ordered_fields):
-                            # ヘッダ系の文字列を「完全一致」で除外 (名前_1 などを誤って消さないため)
-                            if n_text not in ["名前", "フィールド名", "型", "タイプ", "オプション", "オプション / コメント", "並べ替え"]:
-                                print(f"    - Added: '{n_text}' ({t_text})", file=sys.stderr)
-                                ordered_fields.append({"name": n_text, "type": t_text})
-                                found_new_in_any_item = True
-                    except: continue
-
-            except Exception as e:
-                print(f"  > Scan error: {e}", file=sys.stderr)
-
-            # 終了判定
-            if total_expected > 0 and len(ordered_fields) >= total_expected:
-                print(f"  > Reached expected total: {total_expected}", file=sys.stderr)
-                break
-                
-            # 次へ移動
-            pyautogui.press('down')
-            time.sleep(0.1)
-
-        fm_utils.update_overlay(f"読み取り完了: {len(ordered_fields)}件")
-        return {"success": True, "fields": ordered_fields}
-
-        fm_utils.update_overlay(f"読み取り完了: {len(ordered_fields)}件")
-        return {"success": True, "fields": ordered_fields}
+
+        def on_progress(collected, total_expected):
+            fm_utils.update_overlay("読み取り中", collected, total_expected or None)
+
+        result = read_fields(dialog, on_progress)
+        fm_utils.update_overlay(f"読み取り完了: {len(result['fields'])}件")
+        return result
 
     except Exception as e:
         import traceback
@@ -139,10 +70,8 @@ def get_existing_fields():
         fm_utils.set_input_block(False)
         fm_utils.stop_overlay()
 
-if __name__ == "__main__":
-    result = get_existing_fields()
-    
-    # Save to data/current_fields.json
+def save_current_fields(result):
+    """Save to data/current_fields.json, and add a versioned snapshot for the file/table"""
     try:
         import os
         data_dir = os.path.join(os.getcwd(), 'data')
@@ -151,9 +80,17 @@ if __name__ == "__main__":
         
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(result, f, ensure_ascii=False, indent=2)
+
+        if result.get("success"):
+            snapshot = schema_snapshots.save(result.get("file"), result.get("table"), result.get("fields", []))
+            result["snapshot_version"] = snapshot["version"]
     except Exception as e:
         print(f"Error saving to file: {e}", file=sys.stderr)
 
+if __name__ == "__main__":
+    result = get_existing_fields()
+    save_current_fields(result)
+
     # Still print to stdout for other scripts to use
     # use ensure_ascii=True to safely pass unicode via stdout on Windows
     print(json.dumps(result, ensure_ascii=True))
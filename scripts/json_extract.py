@@ -0,0 +1,135 @@
+import re
+import json
+
+# モデルの応答テキストから JSON (オブジェクト / 配列) を取り出す。
+# 前後の説明文・マークダウンのコードブロック・複数の JSON が混ざっていても、トップレベルの値を全て順に返す。
+# 正しい JSON は json の C 実装で読み、崩れた範囲だけ括弧の対応 (1回の走査) を求めて直す。
+#
+#   values = json_extract.extract_all(text)
+#   design = json_extract.extract(text, accept=lambda v: isinstance(v, dict) and "tables" in v)
+#
+# 文字列 ("...") の中の括弧は数えない。説明文の中の引用符に引きずられないよう、
+# 文字列として扱うのは括弧の内側だけにする。
+# 解析できない範囲は、末尾のカンマ・コメント・カンマの抜け・True/False/None を直してからもう一度読む (repair)。
+
+# 括弧の外: 開き括弧だけを探す。内側: 文字列 (閉じていなければ末尾まで) と括弧
+_OPEN = re.compile(r"[{\[]")
+_INNER = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"?|[{}\[\]]', re.S)
+_PAIRS = {"}": "{", "]": "["}
+
+def match_brackets(text):
+    """括弧の対応 {開き括弧の位置: 閉じ括弧の次の位置} を1回の走査で求める"""
+    matched = {}
+    stack = []
+    pos = 0
+    n = len(text)
+    while pos < n:
+        if not stack:
+            m = _OPEN.search(text, pos)
+            if m is None:
+                break
+            stack.append((m.group(), m.start()))
+            pos = m.end()
+            continue
+        m = _INNER.search(text, pos)
+        if m is None:
+            break
+        token = m.group()
+        pos = m.end()
+        if token in "{[":
+            stack.append((token, m.start()))
+        elif token in "}]":
+            # 種類の合わない閉じ括弧は、対応する開き括弧まで戻る (無ければ無視する)
+            opener = _PAIRS[token]
+            depth = next((i for i in range(len(stack) - 1, -1, -1) if stack[i][0] == opener), None)
+            if depth is None:
+                continue
+            matched[stack[depth][1]] = pos
+            del stack[depth:]
+    return matched
+
+# 直す対象。文字列はそのまま残す (文字列の中の // や True を書き換えないよう先に読み飛ばす)
+_REPAIR = re.compile(r'''
+    (?P<str>"[^"\\]*(?:\\.[^"\\]*)*")(?P<gap>\s*\n\s*(?="))?
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<close>[}\]])(?P<cgap>\s*)(?=[{\["])
+  | (?P<lit>\b(?:True|False|None)\b)
+''', re.S | re.X)
+_TRAILING_COMMA = re.compile(r'(?P<str>"[^"\\]*(?:\\.[^"\\]*)*")|,(?P<tail>\s*[}\]])', re.S)
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+def _repair_token(m):
+    if m.group("str") is not None:
+        # 改行をはさんで次の文字列が続く = カンマの抜け
+        return m.group("str") + ("," + m.group("gap") if m.group("gap") else "")
+    if m.group("comment") is not None:
+        return ""
+    if m.group("close") is not None:
+        return m.group("close") + "," + m.group("cgap")
+    return _LITERALS[m.group("lit")]
+
+def repair(text):
+    """よくある崩れ (コメント, 末尾のカンマ, カンマの抜け, Python の True/False/None) を直した文字列を返す"""
+    text = _REPAIR.sub(_repair_token, text)
+    return _TRAILING_COMMA.sub(lambda m: m.group("str") if m.group("str") is not None else m.group("tail"), text)
+
+def loads(text):
+    """json.loads (文字列の中の生の改行・タブは許す)。失敗したら repair してもう一度読む。戻り値は (値, 直したか)"""
+    try:
+        return json.loads(text, strict=False), False
+    except (ValueError, RecursionError):
+        pass
+    try:
+        return json.loads(repair(text), strict=False), True
+    except RecursionError as e:
+        raise ValueError("JSON is nested too deeply") from e
+
+_DECODER = json.JSONDecoder(strict=False)
+
+def iter_values(text):
+    """
+    トップレベルの JSON の値を (value, start, end, repaired) で順に返す。
+    開き括弧ごとにまず json の raw_decode (C 実装) で読み、読めなかったときだけ括弧の対応を求めて
+    その範囲を repair して読む。それでも読めない範囲 (深すぎる入れ子も) は飛ばす。閉じていない開き括弧 (説明文の "{") は1文字進める。
+    """
+    pairs = None
+    pos = 0
+    while True:
+        m = _OPEN.search(text, pos)
+        if m is None:
+            return
+        start = m.start()
+        try:
+            value, end = _DECODER.raw_decode(text, start)
+        except (ValueError, RecursionError):
+            # RecursionError: 深く入れ子になった (閉じていない) 括弧。repair 側で読めなければ飛ばす
+            pass
+        else:
+            yield value, start, end, False
+            pos = end
+            continue
+        if pairs is None:
+            pairs = match_brackets(text)
+        end = pairs.get(start)
+        if end is None:
+            pos = start + 1
+            continue
+        pos = end
+        try:
+            value = json.loads(repair(text[start:end]), strict=False)
+        except (ValueError, RecursionError):
+            continue
+        yield value, start, end, True
+
+def extract_all(text):
+    return [value for value, _, _, _ in iter_values(text)]
+
+def extract(text, accept=None):
+    """accept(value) が真になる最初の値 (省略時は最初の値)。accept が値を返せばそれを使う。無ければ ValueError"""
+    for value, _, _, _ in iter_values(text):
+        if accept is None:
+            return value
+        result = accept(value)
+        if result is not None and result is not False:
+            return value if result is True else result
+    raise ValueError("No JSON value found in response")
@@ -0,0 +1,94 @@
+import json_extract
+
+# ストリーミング応答の逐次 JSON 解析。
+# トップレベルのオブジェクトのうち、指定したキー (thoughts / tables / layouts) の配列要素を
+# 閉じた時点で1件ずつ取り出す。応答全体を待たずに最初のテーブルから処理を始められる。
+# 先頭のマークダウン (```json など) は最初の '{' まで読み飛ばす。応答全体は json_extract で読む。
+
+class ArrayItemStreamer:
+    def __init__(self, keys=("thoughts", "tables", "layouts")):
+        self.keys = set(keys)
+        self.text = ""
+        self.pos = 0
+        self.started = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_string = None
+        self.current_key = None
+        self.array_key = None   # 今読んでいる対象配列のキー
+        self.item_start = None  # 対象配列の要素の開始位置
+        self.counts = {}
+
+    def feed(self, chunk):
+        """chunk を追加し、新しく閉じた要素を (key, index, value) のリストで返す"""
+        self.text += chunk
+        items = []
+        text = self.text
+        while self.pos < len(text):
+            c = text[self.pos]
+            i = self.pos
+            self.pos += 1
+
+            if not self.started:
+                if c == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_string = text[self.string_start + 1:i]
+                    elif self.depth == 2 and self.array_key and self.item_start == self.string_start:
+                        self._emit(items, i + 1)
+                continue
+
+            if c == '"':
+                self.in_string = True
+                self.string_start = i
+                if self.depth == 2 and self.array_key and self.item_start is None:
+                    self.item_start = i
+            elif c in "{[":
+                if self.depth == 1 and c == "[" and self.current_key in self.keys:
+                    self.array_key = self.current_key
+                elif self.depth == 2 and self.array_key and self.item_start is None:
+                    self.item_start = i
+                self.depth += 1
+            elif c in "}]":
+                if self.depth == 2 and self.array_key and self.item_start is not None:
+                    # 数値などのプリミティブ要素が配列末尾だった
+                    self._emit(items, i)
+                self.depth -= 1
+                if self.depth == 2 and self.array_key and self.item_start is not None:
+                    self._emit(items, i + 1)
+                elif self.depth == 1:
+                    self.array_key = None
+            elif c == ":" and self.depth == 1:
+                self.current_key = self.last_string
+            elif c == ",":
+                if self.depth == 1:
+                    self.current_key = None
+                elif self.depth == 2 and self.array_key and self.item_start is not None:
+                    self._emit(items, i)
+            elif not c.isspace() and self.depth == 2 and self.array_key and self.item_start is None:
+                self.item_start = i
+        return items
+
+    def _emit(self, items, end):
+        raw = self.text[self.item_start:end]
+        self.item_start = None
+        try:
+            # 要素の中の末尾のカンマなども直して読む
+            value, _ = json_extract.loads(raw)
+        except ValueError:
+            return
+        index = self.counts.get(self.array_key, 0)
+        self.counts[self.array_key] = index + 1
+        items.append((self.array_key, index, value))
@@ -0,0 +1,232 @@
+import os
+import re
+import sys
+import time
+import threading
+
+import fm_trace
+import lazy_import
+
+futures = lazy_import.lazy("concurrent.futures")   # 並列で呼ぶときだけ読む (logging まで読み込むため)
+
+# Gemini API キーの共有プール。
+# - キーごとのトークンバケット (毎分のリクエスト数) とクールダウン (サーバーが返す retryDelay を優先)
+# - 通信エラー・5xx・認証エラーが続くキーはサーキットブレーカーで一定時間外す (時間が経てば1件だけ試す half-open)
+#   応答の中身の問題や要求の誤り (4xx) はキーの不調ではないので数えない
+# - 任意でヘッジ: 最初のキーが遅い場合、別の健全なキーにも同じ要求を送り、先に返った方を使う
+# 時計と呼び出し関数を差し替えられるので、429 や遅延を返す偽 API でも検証できる。
+
+RATE_PER_MIN = float(os.getenv("CLUBMAKER_KEY_RPM", "15"))
+DEFAULT_COOLDOWN = 30.0
+BREAKER_THRESHOLD = 3
+BREAKER_OPEN_SEC = 60.0
+# 0 ならヘッジしない
+HEDGE_AFTER = float(os.getenv("CLUBMAKER_HEDGE_AFTER", "0")) or None
+
+RETRY_DELAY_RE = re.compile(r"retry[_ ]?delay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", re.IGNORECASE)
+RETRY_IN_RE = re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+# httpx などの通信エラー (OSError の派生ではないもの) のクラス名
+TRANSPORT_ERROR_NAMES = {"TransportError", "NetworkError", "TimeoutException", "ConnectError", "RemoteProtocolError"}
+SERVER_ERROR_RE = re.compile(r"^\s*5\d\d\b|\b(?:UNAVAILABLE|INTERNAL|DEADLINE_EXCEEDED)\b")
+AUTH_ERROR_RE = re.compile(r"^\s*40[13]\b|\b(?:UNAUTHENTICATED|PERMISSION_DENIED|API_KEY_INVALID)\b|API key not valid")
+
+class RateLimited(Exception):
+    """偽 API やラッパーから投げる 429 相当の例外"""
+
+    def __init__(self, message="429 RESOURCE_EXHAUSTED", retry_delay=None):
+        super().__init__(message)
+        self.retry_delay = retry_delay
+
+def is_rate_limit(error):
+    msg = str(error)
+    return isinstance(error, RateLimited) or getattr(error, "code", None) == 429 \
+        or "429" in msg or "RESOURCE_EXHAUSTED" in msg
+
+def retry_delay_of(error):
+    """エラーからサーバー指定の待ち時間 (秒) を取り出す。無ければ None"""
+    delay = getattr(error, "retry_delay", None)
+    if delay is not None:
+        return float(delay)
+    msg = str(error)
+    m = RETRY_DELAY_RE.search(msg) or RETRY_IN_RE.search(msg)
+    return float(m.group(1)) if m else None
+
+def status_code_of(error):
+    code = getattr(error, "code", None)
+    if code is None:
+        code = getattr(error, "status_code", None)
+    return code if isinstance(code, int) else None
+
+def is_key_failure(error):
+    """サーキットブレーカーに数える失敗 (通信エラー・5xx・認証エラー) か"""
+    if isinstance(error, OSError) or any(c.__name__ in TRANSPORT_ERROR_NAMES for c in type(error).__mro__):
+        return True
+    code = status_code_of(error)
+    msg = str(error)
+    if code is not None and (code >= 500 or code in (401, 403)):
+        return True
+    # 無効なキーは 400 (API_KEY_INVALID) で返る
+    if AUTH_ERROR_RE.search(msg):
+        return True
+    return code is None and bool(SERVER_ERROR_RE.search(msg))
+
+class KeyState:
+    def __init__(self, key, rate_per_min, now, burst=None):
+        self.key = key
+        self.capacity = max(burst or rate_per_min, 1.0)
+        self.tokens = self.capacity
+        self.refill_per_sec = rate_per_min / 60.0
+        self.updated = now
+        self.cooldown_until = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.in_flight = 0
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_sec)
+        self.updated = now
+
+    def ready_at(self, now):
+        """このキーが使えるようになる時刻"""
+        self.refill(now)
+        t = max(now, self.cooldown_until, self.open_until)
+        if self.tokens < 1.0:
+            t = max(t, now + (1.0 - self.tokens) / max(self.refill_per_sec, 1e-9))
+        return t
+
+class KeyPool:
+    def __init__(self, keys, rate_per_min=RATE_PER_MIN, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        now = clock()
+        self.states = [KeyState(k, rate_per_min, now, burst) for k in keys]
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.states)
+
+    def acquire(self, exclude=(), max_wait=30.0):
+        """使えるキーを1つ確保する。全キーが待ち状態なら最短で空くものを待つ (max_wait 超なら None)"""
+        deadline = self.clock() + max_wait
+        while True:
+            with self.lock:
+                now = self.clock()
+                candidates = [s for s in self.states if s.key not in exclude and not s.probing]
+                if not candidates:
+                    return None
+                # 空く時刻が早い順、同時刻なら同時実行数・残りトークンで選ぶ
+                best = min(candidates, key=lambda s: (s.ready_at(now), s.in_flight, -s.tokens))
+                ready = best.ready_at(now)
+                if ready <= now:
+                    best.tokens -= 1.0
+                    best.in_flight += 1
+                    if best.open_until and now >= best.open_until:
+                        best.probing = True  # half-open: 1件だけ試す
+                    return best
+            if ready > deadline:
+                return None
+            self.sleep(min(ready - now, max(deadline - now, 0)))
+
+    def release(self, state, error=None):
+        with self.lock:
+            state.in_flight -= 1
+            state.probing = False
+            now = self.clock()
+            if error is None:
+                state.failures = 0
+                state.open_until = 0.0
+                return
+            if is_rate_limit(error):
+                delay = retry_delay_of(error)
+                state.cooldown_until = now + (delay if delay is not None else DEFAULT_COOLDOWN)
+                state.tokens = min(state.tokens, 0.0)
+                return
+            if not is_key_failure(error):
+                return
+            state.failures += 1
+            if state.failures >= BREAKER_THRESHOLD:
+                state.open_until = now + BREAKER_OPEN_SEC
+                print(f"  > [KeyPool] Circuit opened for key ...{state.key[-4:]}", file=sys.stderr)
+
+    def _run(self, state, fn):
+        try:
+            result = fn(state.key)
+        except Exception as e:
+            self.release(state, e)
+            raise
+        self.release(state)
+        return result
+
+    def call(self, fn, hedge_after=None, max_attempts=None, max_wait=30.0):
+        """
+        fn(api_key) を健全なキーで実行し、失敗したら別のキーで再試行する。
+        hedge_after 秒以内に返らなければ、別のキーで同じ要求を並行して送る。
+        429 は試行回数に数えず、max_wait 秒以内ならクールダウン明けのキーで再送する。
+        全て失敗したら最後の例外を送出する。
+        """
+        max_attempts = max_attempts or len(self.states)
+        deadline = self.clock() + max_wait
+        errors = []
+        tried = set()
+        pending = {}
+        attempts = 0
+        # 遅い方の完了を待たずに戻れるよう、with ではなく明示的に shutdown(wait=False) する
+        executor = futures.ThreadPoolExecutor(max_workers=2)
+        try:
+            while attempts < max_attempts or pending:
+                if not pending:
+                    # まだ試していないキーを優先し、全部試したら空いたものから再試行
+                    exclude = tried if len(tried) < len(self.states) else ()
+                    state = self.acquire(exclude=exclude, max_wait=max(deadline - self.clock(), 0))
+                    if state is None:
+                        break
+                    tried.add(state.key)
+                    attempts += 1
+                    if attempts > 1:
+                        fm_trace.retry()
+                    pending[executor.submit(self._run, state, fn)] = state
+
+                timeout = hedge_after if (hedge_after and len(pending) == 1 and attempts < max_attempts) else None
+                done, _ = futures.wait(list(pending), timeout=timeout, return_when=futures.FIRST_COMPLETED)
+                if not done:
+                    # ヘッジ: 別の健全なキーにも送る (すぐ使えるキーが無ければそのまま待つ)
+                    state = self.acquire(exclude=tried, max_wait=0)
+                    if state is not None:
+                        tried.add(state.key)
+                        attempts += 1
+                        fm_trace.current().set(hedged=True)
+                        fm_trace.retry()
+                        pending[executor.submit(self._run, state, fn)] = state
+                    else:
+                        hedge_after = None
+                    continue
+                for future in done:
+                    state = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors.append(e)
+                        if is_rate_limit(e):
+                            # キー側の一時的な制限なので、別のキー (または空いた同じキー) でやり直す
+                            attempts -= 1
+                            tried.discard(state.key)
+                        continue
+                    # 先に返った方を採用 (残りは結果を捨てる)
+                    return result
+        finally:
+            executor.shutdown(wait=False)
+        if errors:
+            raise errors[-1]
+        raise RuntimeError("No API key available")
+
+_POOLS = {}
+
+def get_pool(keys_str=None):
+    """GOOGLE_GENERATIVE_AI_API_KEY のキー群に対するプロセス内共有プール"""
+    keys_str = keys_str if keys_str is not None else os.getenv("GOOGLE_GENERATIVE_AI_API_KEY", "")
+    keys = tuple(k.strip() for k in keys_str.split(",") if k.strip())
+    pool = _POOLS.get(keys)
+    if pool is None:
+        pool = _POOLS[keys] = KeyPool(keys)
+    return pool
@@ -1,9 +1,12 @@
 import os
 import sys
 import time
-import subprocess
-from pywinauto import Application, Desktop
+import lazy_import
+subprocess = lazy_import.lazy("subprocess")
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
 import fm_utils
+import fm_wait
 
 def launch_filemaker(executable_path):
     print(f"--- Launch/Focus FileMaker Pro ---")
@@ -46,18 +49,20 @@ def launch_filemaker(executable_path):
         
         # 4. 起動を待つ
         print("Waiting for FileMaker window to appear...")
-        retries = 15
-        while retries > 0:
+        def visible_main_window():
             main_win = fm_utils.find_main_window(backend="uia") or fm_utils.find_main_window(backend="win32")
             if main_win and main_win.is_visible():
-                print(f"FileMaker window found: '{main_win.window_text()}'")
-                try:
-                    main_win.set_focus()
-                    return True
-                except:
-                    return True
-            time.sleep(2.0)
-            retries -= 1
+                return main_win
+            return None
+
+        main_win = fm_wait.wait_until(visible_main_window, timeout=30.0, name="launch_main_window")
+        if main_win:
+            print(f"FileMaker window found: '{main_win.window_text()}'")
+            try:
+                main_win.set_focus()
+            except:
+                pass
+            return True
         
         print("Timeout: Waiting for FileMaker window.")
         return False
@@ -76,6 +81,4 @@ if __name__ == "__main__":
         default_path = sys.argv[1]
     
     success = launch_filemaker(default_path)
-    if success:
-        time.sleep(1.0)
     sys.exit(0 if success else 1)
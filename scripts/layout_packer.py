@@ -0,0 +1,139 @@
+import math
+import lazy_import
+np = lazy_import.lazy("numpy")
+
+import fm_layout
+
+# AI が返すレイアウト (12 カラムのグリッド) の重なりを検出し、読む順番と行のまとまりを保ったまま詰め直す。
+#
+#   grid = fm_layout.grid_array(elements)                   # (n, 4) [x, y, w, h]
+#   pairs = layout_packer.find_overlaps(grid)               # 重なっている要素の組
+#   packed, report = layout_packer.pack(grid)               # 重なりを解消し、縦の空きを詰める
+#
+# 詰め方 (スカイライン):
+# - 要素を元の (y, x) の順 (読む順番) に並べ、元の y が同じ要素を1つの行 (グループ) として扱う
+# - 行の中で横に重なる要素は右へずらし、12 カラムに収まらなければ直下の続きの行へ送る
+# - 行はカラムごとの「埋まっている高さ」(スカイライン) のすぐ下に置く。前の行より上には置かない
+# グリッドは 12 カラムしかないので、区間木を使わなくてもカラムごとの高さで正確に判定できる。
+
+def find_overlaps(grid):
+    """重なっている要素の組 [(i, j), ...] (i < j) を返す。セルごとの持ち主を並べて同じセルを探す"""
+    n = len(grid)
+    if n < 2:
+        return []
+    g = np.asarray(grid, dtype=np.int64)
+    x, y, w, h = g[:, 0], g[:, 1], g[:, 2], g[:, 3]
+    area = w * h
+    owner = np.repeat(np.arange(n), area)
+    offset = np.arange(int(area.sum())) - np.repeat(np.cumsum(area) - area, area)
+    ww = np.repeat(w, area)
+    cell = (np.repeat(y, area) + offset // ww) * fm_layout.COLUMNS + np.repeat(x, area) + offset % ww
+
+    order = np.lexsort((owner, cell))
+    cell, owner = cell[order], owner[order]
+    shared = np.flatnonzero(cell[1:] == cell[:-1]).tolist()
+    if not shared:
+        return []
+    # cell[k] == cell[k + 1] の k が連続する区間が1つのセル。持ち主の全ての組を作る (3つ以上の重なりはまれ)
+    pairs = set()
+    start = prev = shared[0]
+    for k in shared[1:] + [-2]:
+        if k != prev + 1:
+            members = sorted(set(owner[start:prev + 2].tolist()))
+            pairs.update((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+            start = k
+        prev = k
+    return sorted(pairs)
+
+def reading_order(grid):
+    """(y, x, 元の順番) で並べた要素の番号"""
+    g = np.asarray(grid)
+    return np.lexsort((np.arange(len(g)), g[:, 0], g[:, 1])) if len(g) else np.arange(0)
+
+def pack(grid, compact=True):
+    """
+    重なりを解消した新しいグリッドと、各要素の移動量のレポートを返す。
+    compact=False なら縦の空きは詰めず、重なりを避けるためにずらした分だけ下の要素も下げる。
+    """
+    g = np.asarray(grid, dtype=np.int64)
+    n = len(g)
+    out = g.copy()
+    order = reading_order(g).tolist()
+    rows = g.tolist()
+
+    skyline = [0] * fm_layout.COLUMNS
+    prev_top = -1       # 直前に置いた行の y
+    shift = 0           # compact=False のときの、元の位置からの下げ幅
+    wrapped = 0
+    i = 0
+    while i < n:
+        # 元の y が同じ要素を1つの行として、左から順に置く
+        row_y = rows[order[i]][1]
+        group = []
+        while i < n and rows[order[i]][1] == row_y:
+            group.append(order[i])
+            i += 1
+
+        # 横の重なりは右へ送り、収まらない要素から続きの行にする
+        lines, line, cursor = [], [], 0
+        for idx in group:
+            x, _, w, _ = rows[idx]
+            nx = max(x, cursor)
+            if nx + w > fm_layout.COLUMNS:
+                lines.append(line)
+                line, nx = [], x
+                wrapped += 1
+            line.append((idx, nx))
+            cursor = nx + w
+        lines.append(line)
+
+        for line in lines:
+            top = max(max(skyline[nx:nx + rows[idx][2]]) for idx, nx in line)
+            top = max(top, prev_top + 1)
+            if not compact:
+                top = max(top, row_y + shift)
+            for idx, nx in line:
+                w, h = rows[idx][2], rows[idx][3]
+                out[idx, 0], out[idx, 1] = nx, top
+                for c in range(nx, nx + w):
+                    skyline[c] = max(skyline[c], top + h)
+            prev_top = top
+        if not compact:
+            shift = max(shift, prev_top - row_y)
+
+    report = movement_report(g, out, wrapped)
+    report["overlaps_before"] = len(find_overlaps(g))
+    report["overlaps_after"] = len(find_overlaps(out))
+    return out, report
+
+def movement_report(before, after, wrapped=0):
+    """要素ごとの移動量 (グリッドとポイント) と全体の集計"""
+    dx = (after[:, 0] - before[:, 0]).tolist()
+    dy = (after[:, 1] - before[:, 1]).tolist()
+    moves = []
+    for i, (mx, my) in enumerate(zip(dx, dy)):
+        if mx or my:
+            moves.append({"index": i, "from": [int(before[i, 0]), int(before[i, 1])],
+                          "to": [int(after[i, 0]), int(after[i, 1])], "dx": mx, "dy": my,
+                          "distance_pt": round(math.hypot(mx * fm_layout.GRID_X, my * fm_layout.GRID_Y), 2)})
+    rows_before = int((before[:, 1] + before[:, 3]).max()) if len(before) else 0
+    rows_after = int((after[:, 1] + after[:, 3]).max()) if len(after) else 0
+    return {
+        "elements": len(before),
+        "moved": len(moves),
+        "wrapped": wrapped,
+        "max_distance_pt": max((m["distance_pt"] for m in moves), default=0),
+        "rows_before": rows_before,
+        "rows_after": rows_after,
+        "moves": moves,
+    }
+
+def pack_layout(layout, compact=True):
+    """レイアウトの elements の grid を詰め直したコピーとレポートを返す (元のレイアウトは変えない)"""
+    elements = [e for e in layout.get("elements") or [] if isinstance(e, dict) and (e.get("field") or e.get("label"))]
+    packed, report = pack(fm_layout.grid_array(elements), compact)
+    for move in report["moves"]:
+        move["field"] = elements[move["index"]].get("field")
+    new_elements = [{**e, "grid": {"x": int(x), "y": int(y), "w": int(w), "h": int(h)}}
+                    for e, (x, y, w, h) in zip(elements, packed.tolist())]
+    return {**layout, "elements": new_elements}, report
@@ -0,0 +1,88 @@
+import sys
+import types
+import importlib
+
+# 重い依存 (pywinauto, pyautogui, cv2, google.genai, dotenv ...) を最初に使うときまで import しない。
+# 1リクエスト1プロセスで動かすと import の時間が短い呼び出しの大半を占めるので、
+# 引数エラーやキャッシュヒットのように使わない経路では読み込まずに済ませる。
+#
+#   pyautogui = lazy_import.lazy("pyautogui")                  # import pyautogui の代わり
+#   Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")     # from pywinauto import Desktop の代わり
+#   genai = lazy_import.lazy("google.genai")                    # from google import genai の代わり
+#
+# 読み込みは importlib.import_module に任せるので、sys.modules に差し込んだ偽モジュール (fm_sim) もそのまま使われる。
+# 入っていない依存は、使った時点で ImportError になる。
+
+class LazyModule(types.ModuleType):
+    """属性に最初にアクセスしたときに本物のモジュールを読み込む"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _lazy_load(self):
+        target = self.__dict__["_lazy_target"]
+        if target is None:
+            target = self.__dict__["_lazy_target"] = importlib.import_module(self.__name__)
+        return target
+
+    def __getattr__(self, attr):
+        return getattr(self._lazy_load(), attr)
+
+    def __setattr__(self, attr, value):
+        # pyautogui.PAUSE = 0.1 のような設定は本物に渡す
+        setattr(self._lazy_load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+class LazyAttr:
+    """from module import name の代わり。呼び出し・属性アクセスのときにモジュールを読み込む"""
+    __slots__ = ("_module", "_attr", "_target")
+
+    def __init__(self, module, attr):
+        self._module = module
+        self._attr = attr
+        self._target = None
+
+    def resolve(self):
+        if self._target is None:
+            self._target = getattr(importlib.import_module(self._module), self._attr)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        return f"<lazy {self._module}.{self._attr}>"
+
+def lazy(name):
+    """import name の代わり (既に読み込まれていれば本物を返す)"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+def lazy_attr(module, attr):
+    return LazyAttr(module, attr)
+
+def loaded(name):
+    return name in sys.modules
+
+_DOTENV_LOADED = [False]
+
+def load_dotenv():
+    """.env を最初に必要になったときに1回だけ読む (dotenv が無ければ環境変数だけを使う)"""
+    if _DOTENV_LOADED[0]:
+        return
+    _DOTENV_LOADED[0] = True
+    try:
+        from dotenv import load_dotenv as _load
+    except ImportError:
+        return
+    _load()
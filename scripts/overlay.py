@@ -1,28 +1,96 @@
 import tkinter as tk
 import sys
-import os
+import json
 import time
+import threading
+import socketserver
 
-STATUS_FILE = "overlay_status.txt"
+from overlay_channel import HOST, PORT
 
-def update_label(label, root):
-    try:
-        if os.path.exists(STATUS_FILE):
-            try:
-                with open(STATUS_FILE, "r", encoding="utf-8") as f:
-                    text = f.read().strip()
-                if text == "EXIT":
-                    root.destroy()
-                    return
-                label.config(text=text)
-            except:
-                pass # File access conflict likely
-    except Exception as e:
-        print(e)
-    
-    root.after(200, lambda: update_label(label, root))
+# 常駐オーバーレイ。overlay_channel 経由で進捗イベントを受け取り、ディスクを介さずに描画する。
+# 連続した更新は最新状態にまとめて (コアレス) 描画し、バッチ間はウィンドウを隠して待機する。
+
+RENDER_INTERVAL_MS = 50
+IDLE_EXIT_SEC = 600  # 隠れたまま一定時間イベントが来なければ終了
+
+class OverlayState:
+    """受信スレッドと Tk スレッドで共有する最新状態"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = {"step": "準備中...", "visible": False}
+        self.dirty = True
+        self.exit = False
+        self.last_event = time.monotonic()
+
+    def apply(self, event):
+        with self.lock:
+            kind = event.get("type", "progress")
+            self.last_event = time.monotonic()
+            if kind == "exit":
+                self.exit = True
+            elif kind == "begin":
+                self.state = {"step": event.get("title") or "準備中...", "visible": True}
+            elif kind == "end":
+                linger = event.get("linger") or 0
+                if linger > 0:
+                    self.state["hide_at"] = self.last_event + linger
+                else:
+                    self.state["visible"] = False
+            else:
+                self.state.pop("hide_at", None)
+                self.state.update({k: v for k, v in event.items() if k != "type"})
+                self.state["visible"] = True
+            self.dirty = True
+
+    def take(self):
+        """変更があれば最新状態のコピーを返す (無ければ None)"""
+        with self.lock:
+            hide_at = self.state.get("hide_at")
+            if hide_at is not None and time.monotonic() >= hide_at:
+                del self.state["hide_at"]
+                self.state["visible"] = False
+                self.dirty = True
+            if not self.dirty:
+                return None
+            self.dirty = False
+            return dict(self.state)
+
+def format_status(state):
+    lines = [str(state.get("step") or "")]
+    index, total = state.get("index"), state.get("total")
+    if index and total:
+        progress = f"{index} / {total}"
+        if state.get("eta") is not None:
+            progress += f"  (残り 約{int(state['eta'])}秒)"
+        lines.append(progress)
+    if state.get("error"):
+        lines.append(f"⚠ {state['error']}")
+    return "\n".join(lines)
+
+def start_server(shared):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                try:
+                    shared.apply(json.loads(raw.decode("utf-8")))
+                except ValueError:
+                    continue
+
+    socketserver.ThreadingTCPServer.daemon_threads = True
+    server = socketserver.ThreadingTCPServer((HOST, PORT), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
 
 def main():
+    shared = OverlayState()
+    try:
+        server = start_server(shared)
+    except OSError:
+        # すでに別のオーバーレイが常駐している
+        print("Overlay already running.", file=sys.stderr)
+        return
+
     root = tk.Tk()
     root.title("ClubMaker_Overlay") # Set title for potential identification
     root.overrideredirect(True) # Frameless
@@ -32,14 +100,10 @@ def main():
 
     # Dimensions
     w = 600
-    h = 100
-    
-    # Position: Bottom Right or Top Center? User said "Pop up", usually implies center.
-    # Let's put it top-center so it doesn't block the field list which is usually left/center.
-    # Actually, Manage Database is usually center.
+    h = 120
+
     # Let's put it at the very top of the screen.
     ws = root.winfo_screenwidth()
-    hs = root.winfo_screenheight()
     x = (ws // 2) - (w // 2)
     y = 50 # 50px from top
 
@@ -47,17 +111,27 @@ def main():
 
     label = tk.Label(root, text="Initializing...", font=("Meiryo", 16, "bold"), fg="white", bg="black", wraplength=580)
     label.pack(expand=True, fill='both', padx=20, pady=20)
+    root.withdraw()
+
+    def render():
+        if shared.exit:
+            server.shutdown()
+            root.destroy()
+            return
+        state = shared.take()
+        if state is not None:
+            if state.get("visible"):
+                label.config(text=format_status(state), fg="#ff8080" if state.get("error") else "white")
+                root.deiconify()
+                root.attributes('-topmost', True)
+            else:
+                root.withdraw()
+        elif time.monotonic() - shared.last_event > IDLE_EXIT_SEC and not shared.state.get("visible"):
+            shared.exit = True
+        root.after(RENDER_INTERVAL_MS, render)
 
-    # Initial check
-    update_label(label, root)
-    
+    render()
     root.mainloop()
 
 if __name__ == "__main__":
-    # Clean up old status
-    if os.path.exists(STATUS_FILE):
-        try:
-            os.remove(STATUS_FILE)
-        except: pass
-        
     main()
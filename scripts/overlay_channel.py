@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import socket
+
+# オーバーレイ (overlay.py) との進捗チャネル。
+# ローカル TCP ソケットに1行1イベントの JSON を送る。ファイルは使わない。
+#
+#   {"type": "begin", "title": "..."}                       バッチ開始 (ウィンドウ表示)
+#   {"type": "progress", "step": "...", "index": 3, "total": 10, "eta": 12.5, "error": null}
+#   {"type": "end", "linger": 1.5}                          バッチ終了 (linger 秒後にウィンドウを隠す。プロセスは常駐)
+#   {"type": "exit"}                                        オーバーレイ終了
+
+HOST = "127.0.0.1"
+PORT = int(os.getenv("CLUBMAKER_OVERLAY_PORT", "47653"))
+
+def encode(event):
+    return (json.dumps(event, ensure_ascii=True) + "\n").encode("utf-8")
+
+class OverlayClient:
+    """オーバーレイへイベントを送る。送信に失敗しても自動操作は止めない"""
+
+    def __init__(self, host=HOST, port=PORT):
+        self.host = host
+        self.port = port
+        self.sock = None
+        self.started = None
+
+    def connect(self, timeout=0.2):
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return True
+        except OSError:
+            self.sock = None
+            return False
+
+    @property
+    def connected(self):
+        """接続していて、相手 (オーバーレイ) がまだ閉じていなければ真。閉じていればソケットを捨てる"""
+        if self.sock is None:
+            return False
+        # オーバーレイは何も送ってこないので、読めるのは切断 (b"") かエラーのときだけ
+        try:
+            self.sock.setblocking(False)
+            try:
+                alive = self.sock.recv(1, socket.MSG_PEEK) != b""
+            finally:
+                self.sock.setblocking(True)
+        except BlockingIOError:
+            alive = True
+        except OSError:
+            alive = False
+        if not alive:
+            self.close()
+        return alive
+
+    def send(self, event):
+        """送る。オーバーレイが終了していたら (切断済み・送信失敗) 1回だけ接続し直して送る"""
+        if self.sock is None:
+            return False
+        # 切断されたソケットへの sendall は成功してしまう (イベントが消える) ので、先に確かめる
+        if not self.connected and not self.connect():
+            return False
+        for attempt in range(2):
+            try:
+                self.sock.sendall(encode(event))
+                return True
+            except OSError:
+                self.close()
+                if attempt or not self.connect():
+                    return False
+        return False
+
+    def begin(self, title=""):
+        self.started = time.monotonic()
+        return self.send({"type": "begin", "title": title})
+
+    def progress(self, step, index=None, total=None, error=None):
+        event = {"type": "progress", "step": step, "index": index, "total": total, "eta": None, "error": error}
+        # 経過時間と完了件数 (index は処理中の1始まりの番号) から残り時間を推定
+        if self.started is not None and index and total and index > 1:
+            done = index - 1
+            elapsed = time.monotonic() - self.started
+            event["eta"] = round(elapsed / done * (total - done), 1)
+        return self.send(event)
+
+    def end(self, linger=0):
+        # linger: 最後の表示 (「完了しました」など) を残す秒数。待つのはオーバーレイ側で、呼び出し元は待たない
+        self.started = None
+        return self.send({"type": "end", "linger": linger})
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
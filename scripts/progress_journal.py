@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import hashlib
+
+import schema_snapshots
+
+# バッチ処理 (フィールド作成・修整) の先行書き込みジャーナル。
+# 1件ごとに intent (これから操作する) → commit (確定キーを送る直前) → verified / failed (結果を確かめた) を
+# 追記し、1レコードごとに fsync する。途中で落ちても、同じテーブルで次に同じ操作を始めたときに
+#   - verified の操作はスキップ
+#   - intent / commit で止まっていた操作 (落ちた瞬間の1件) だけ実際に反映されたか確かめる
+# ことで、一覧の全件読み直しをせずに続きから再開できる。
+#
+#   journal = progress_journal.open_batch("create", file_name, table)
+#   key, digest = f["name"], progress_journal.digest(f)
+#   if journal.is_verified(key, digest): continue
+#   journal.intent(key, digest) ... journal.commit(key) ... journal.verified(key)
+#   journal.close()      # 全件 verified なら削除、失敗・未完了が残れば次回のために残す
+#
+# data/journals/<ファイル>/<テーブル>/<種類>.jsonl (1行1レコード)
+
+JOURNAL_DIR = os.getenv("CLUBMAKER_JOURNAL_DIR", os.path.join(os.getcwd(), "data", "journals"))
+# これより古いジャーナルは使わない (手作業で直された後の古い記録で誤ってスキップしないように)
+MAX_AGE_S = float(os.getenv("CLUBMAKER_JOURNAL_MAX_AGE", str(12 * 3600)))
+
+IN_FLIGHT = ("intent", "commit")
+
+def digest(op):
+    """操作の内容 (名前・型・改名先など) のハッシュ。同じキーでも内容が違えば別の操作として扱う"""
+    material = json.dumps(op, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+def journal_path(kind, file_name, table, root=None):
+    return os.path.join(schema_snapshots._table_dir(file_name, table, root or JOURNAL_DIR), f"{kind}.jsonl")
+
+def _read_records(path):
+    """記録を読む。書きかけで落ちた最後の行は捨て、ファイルも最後の改行まで切り詰める"""
+    with open(path, "rb") as f:
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    if end < len(data):
+        with open(path, "r+b") as f:
+            f.truncate(end)
+    records = []
+    for line in data[:end].splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+class Journal:
+    def __init__(self, path, kind, records=()):
+        self.path = path
+        self.kind = kind
+        self.entries = {}      # key -> {"digest", "state", ...}
+        self.written = 0
+        self._file = None
+        for record in records:
+            self._apply(record)
+        self.resumed = bool(self.entries)
+
+    def _apply(self, record):
+        key = record.get("key")
+        if key is None:
+            return
+        entry = self.entries.setdefault(key, {})
+        entry.update((k, v) for k, v in record.items() if k not in ("key", "t"))
+        if entry["state"] != "failed":
+            entry.pop("error", None)
+
+    def _append(self, record):
+        self._apply(record)
+        if self.path is None:
+            return
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, "ab")
+            self._file.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.written += 1
+        except OSError as e:
+            # 記録できなくても処理自体は続ける (再開できないだけ)
+            print(f"  > [Journal] write failed, continuing without journal: {e}", file=sys.stderr)
+            self.path = None
+
+    # --- 状態 ---
+
+    def state(self, key, digest=None):
+        """key の最後の状態 (digest が違う記録は別の操作なので None)"""
+        entry = self.entries.get(key)
+        if not entry or (digest is not None and entry.get("digest") != digest):
+            return None
+        return entry.get("state")
+
+    def is_verified(self, key, digest=None):
+        return self.state(key, digest) == "verified"
+
+    def in_flight(self):
+        """intent / commit のまま止まっている操作 (前回落ちた時点の1件)"""
+        return [key for key, entry in self.entries.items() if entry.get("state") in IN_FLIGHT]
+
+    def counts(self):
+        result = {}
+        for entry in self.entries.values():
+            result[entry.get("state")] = result.get(entry.get("state"), 0) + 1
+        return result
+
+    # --- 記録 ---
+
+    def intent(self, key, digest=None, **info):
+        self._append({"key": key, "state": "intent", "digest": digest, "t": round(time.time(), 3), **info})
+
+    def commit(self, key):
+        self._append({"key": key, "state": "commit", "t": round(time.time(), 3)})
+
+    def verified(self, key, **info):
+        self._append({"key": key, "state": "verified", "t": round(time.time(), 3), **info})
+
+    def failed(self, key, error=None):
+        self._append({"key": key, "state": "failed", "error": error, "t": round(time.time(), 3)})
+
+    def close(self, completed=True):
+        """
+        ファイルを閉じる。completed で全件 verified (途中の操作・失敗が無い) ならジャーナルを消す。
+        """
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+        counts = self.counts()
+        done = completed and all(state == "verified" for state in counts)
+        if done and self.path and os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        print(f"  > [Journal] {self.kind}: {json.dumps(counts)} ({'cleared' if done else 'kept for resume'})",
+              file=sys.stderr)
+        return counts
+
+def open_batch(kind, file_name, table, root=None):
+    """
+    file_name / table の kind ("create" / "fix") のジャーナルを開く。
+    前回の記録が残っていて新しければ読み込み (resumed=True)、古ければ捨てて新しく始める。
+    ファイル名かテーブル名が分からなければ記録しない (別のテーブルの記録で誤ってスキップしないように)。
+    """
+    if not file_name or not table:
+        print(f"  > [Journal] Table context unknown ({file_name}/{table}). Running {kind} without journal.", file=sys.stderr)
+        return Journal(None, kind)
+    path = journal_path(kind, file_name, table, root)
+    records = []
+    try:
+        if os.path.exists(path):
+            if time.time() - os.path.getmtime(path) > MAX_AGE_S:
+                print(f"  > [Journal] Discarding stale journal: {path}", file=sys.stderr)
+                os.remove(path)
+            else:
+                records = _read_records(path)
+    except OSError as e:
+        print(f"  > [Journal] Could not read {path}: {e}", file=sys.stderr)
+    journal = Journal(path, kind, records)
+    if journal.resumed:
+        print(f"  > [Journal] Resuming {kind} for {file_name}/{table}: {json.dumps(journal.counts())}", file=sys.stderr)
+    return journal
@@ -1,7 +1,9 @@
-from pywinauto import Application, Desktop
+import lazy_import
+Application = lazy_import.lazy_attr("pywinauto", "Application")
+Desktop = lazy_import.lazy_attr("pywinauto", "Desktop")
 import time
 import sys
-import pyautogui
+pyautogui = lazy_import.lazy("pyautogui")
 
 def find_manage_database_dialog(app):
     priority_keywords = ["データベースの管理", "Manage Database"]
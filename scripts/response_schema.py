@@ -0,0 +1,267 @@
+import copy
+
+# モデルの応答 (設計 / フィールド改善の提案) のスキーマ検証と補正。
+# スキーマは読み込み時に一度だけ検証関数 (クロージャの木) に変換しておき、応答ごとには辞書を辿るだけにする。
+# 直せるもの (文字列の数値や "true", 範囲外のグリッド, 不明な theme) はその場で直し、
+# 直せない要素 (名前の無いテーブルなど) は配列から外す。直したことは repairs に残す。
+#
+#   design, repairs = response_schema.validate_design(data)     # 直せなければ SchemaError
+#   rows, repairs = response_schema.validate_suggestions(data)
+#
+# スキーマの書き方 (JSON Schema の一部):
+#   {"type": "object", "properties": {...}, "required": [...], "fix": fn(value, path, repairs) (項目をまたぐ補正)}
+#   {"type": "array", "items": {...}, "drop_invalid": True}
+#   {"type": "string" | "integer" | "boolean", "default": ..., "enum": [...], "aliases": {...},
+#    "minimum": ..., "maximum": ...}
+#   プロパティに "optional": True を付けると、不正な値は既定値で埋めずにキーごと外す (欠けたのと同じ扱い)
+
+class SchemaError(ValueError):
+    pass
+
+_MISSING = object()
+_TRUE = {"true", "yes", "1", "y", "on"}
+_FALSE = {"false", "no", "0", "n", "off", ""}
+
+def _path(path):
+    # path は (親, キー) の入れ子 (ルートは None)。補正・エラーのときだけ文字列にする
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append(f"[{key}]" if isinstance(key, int) else f".{key}")
+    return "$" + "".join(reversed(keys))
+
+def _compile(schema):
+    kind = schema.get("type")
+    if kind == "object":
+        return _compile_object(schema)
+    if kind == "array":
+        return _compile_array(schema)
+    if kind == "string":
+        return _compile_string(schema)
+    if kind == "integer":
+        return _compile_integer(schema)
+    if kind == "boolean":
+        return _compile_boolean(schema)
+    raise ValueError(f"Unsupported schema type: {kind}")
+
+def _compile_object(schema):
+    props = [(name, _compile(sub), sub.get("default", _MISSING), sub.get("optional", False))
+             for name, sub in (schema.get("properties") or {}).items()]
+    required = set(schema.get("required") or ())
+    fix = schema.get("fix")
+
+    def check(value, path, repairs):
+        if not isinstance(value, dict):
+            raise SchemaError(f"{_path(path)}: expected object")
+        for name, sub, default, optional in props:
+            item = value.get(name, _MISSING)
+            if item is _MISSING or item is None:
+                if name in required:
+                    raise SchemaError(f"{_path((path, name))}: required")
+                if default is not _MISSING:
+                    value[name] = copy.deepcopy(default)
+                    repairs.append(f"{_path((path, name))}: default")
+                elif item is None:
+                    del value[name]
+                continue
+            try:
+                value[name] = sub(item, (path, name), repairs)
+            except SchemaError as e:
+                if optional and name not in required:
+                    del value[name]
+                    repairs.append(f"{e} (dropped)")
+                    continue
+                if name in required or default is _MISSING:
+                    raise
+                value[name] = copy.deepcopy(default)
+                repairs.append(f"{_path((path, name))}: invalid, default")
+        if fix is not None:
+            fix(value, path, repairs)
+        return value
+    return check
+
+def _compile_array(schema):
+    item_check = _compile(schema["items"]) if schema.get("items") else None
+    drop_invalid = schema.get("drop_invalid", False)
+
+    def check(value, path, repairs):
+        if isinstance(value, dict) and item_check is not None:
+            # 要素1つだけをオブジェクトで返してきた
+            value = [value]
+            repairs.append(f"{_path(path)}: wrapped in array")
+        if not isinstance(value, list):
+            raise SchemaError(f"{_path(path)}: expected array")
+        if item_check is None:
+            return value
+        out = []
+        for i, item in enumerate(value):
+            try:
+                out.append(item_check(item, (path, i), repairs))
+            except SchemaError as e:
+                if not drop_invalid:
+                    raise
+                repairs.append(f"{e} (dropped)")
+        value[:] = out
+        return value
+    return check
+
+def _compile_string(schema):
+    enum = {str(v).casefold(): v for v in schema.get("enum") or ()}
+    enum.update({str(k).casefold(): v for k, v in (schema.get("aliases") or {}).items()})
+    default = schema.get("default", _MISSING)
+
+    def check(value, path, repairs):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+            repairs.append(f"{_path(path)}: number to string")
+        if not isinstance(value, str):
+            raise SchemaError(f"{_path(path)}: expected string")
+        if enum:
+            key = value.strip().casefold()
+            if key in enum:
+                if enum[key] != value:
+                    repairs.append(f"{_path(path)}: {value!r} -> {enum[key]!r}")
+                return enum[key]
+            if default is _MISSING:
+                raise SchemaError(f"{_path(path)}: {value!r} not in {sorted(set(enum.values()))}")
+            repairs.append(f"{_path(path)}: {value!r} -> {default!r}")
+            return default
+        return value
+    return check
+
+def _compile_integer(schema):
+    lo = schema.get("minimum")
+    hi = schema.get("maximum")
+
+    def check(value, path, repairs):
+        if isinstance(value, bool):
+            raise SchemaError(f"{_path(path)}: expected integer")
+        if not isinstance(value, int):
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                raise SchemaError(f"{_path(path)}: expected integer")
+            if number != number or number in (float("inf"), float("-inf")):
+                raise SchemaError(f"{_path(path)}: expected integer")
+            repairs.append(f"{_path(path)}: {value!r} -> {round(number)}")
+            value = int(round(number))
+        if lo is not None and value < lo:
+            repairs.append(f"{_path(path)}: {value} -> {lo}")
+            value = lo
+        if hi is not None and value > hi:
+            repairs.append(f"{_path(path)}: {value} -> {hi}")
+            value = hi
+        return value
+    return check
+
+def _compile_boolean(schema):
+    def check(value, path, repairs):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, (int, float)):
+            repairs.append(f"{_path(path)}: {value!r} -> {bool(value)}")
+            return bool(value)
+        if isinstance(value, str):
+            key = value.strip().casefold()
+            if key in _TRUE or key in _FALSE:
+                repairs.append(f"{_path(path)}: {value!r} -> {key in _TRUE}")
+                return key in _TRUE
+        raise SchemaError(f"{_path(path)}: expected boolean")
+    return check
+
+def compile_schema(schema):
+    """schema を検証関数 validate(value) -> (補正した value, repairs) にする"""
+    check = _compile(schema)
+
+    def validate(value):
+        repairs = []
+        return check(value, None, repairs), repairs
+    return validate
+
+FIELD = {
+    "type": "object",
+    "required": ["name"],
+    "properties": {
+        "name": {"type": "string"},
+        "type": {"type": "string", "default": "Text"},
+        "formula": {"type": "string"},
+        "global": {"type": "boolean"},
+    },
+}
+TABLE = {
+    "type": "object",
+    "required": ["name"],
+    "properties": {
+        "name": {"type": "string"},
+        "fields": {"type": "array", "items": FIELD, "drop_invalid": True, "default": []},
+    },
+}
+
+def _fit_columns(grid, path, repairs):
+    # 右端が 12 カラムを超えないよう幅を縮める
+    if grid["x"] + grid["w"] > 12:
+        repairs.append(f"{_path((path, 'w'))}: {grid['w']} -> {12 - grid['x']}")
+        grid["w"] = 12 - grid["x"]
+
+# fm_layout と同じ 12 カラム
+GRID = {
+    "type": "object",
+    "fix": _fit_columns,
+    "properties": {
+        "x": {"type": "integer", "minimum": 0, "maximum": 11, "default": 0},
+        "y": {"type": "integer", "minimum": 0, "default": 0},
+        "w": {"type": "integer", "minimum": 1, "maximum": 12, "default": 4},
+        "h": {"type": "integer", "minimum": 1, "default": 1},
+    },
+}
+ELEMENT = {
+    "type": "object",
+    "properties": {
+        "field": {"type": "string", "default": ""},
+        "label": {"type": "string", "default": ""},
+        "grid": dict(GRID, default={"x": 0, "y": 0, "w": 4, "h": 1}),
+    },
+}
+LAYOUT = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "default": ""},
+        "table": {"type": "string", "default": ""},
+        "type": {"type": "string", "enum": ["dashboard", "form", "list"], "default": "form"},
+        "style": {
+            "type": "object",
+            "default": {},
+            "properties": {
+                "primaryColor": {"type": "string"},
+                "accentColor": {"type": "string"},
+                "theme": {"type": "string", "enum": ["dark", "light", "glass"],
+                          "aliases": {"glassmorphism": "glass"}, "default": "light"},
+            },
+        },
+        "elements": {"type": "array", "items": ELEMENT, "drop_invalid": True, "default": []},
+    },
+}
+DESIGN = {
+    "type": "object",
+    "required": ["tables"],
+    "properties": {
+        "thoughts": {"type": "array", "items": {"type": "string"}, "drop_invalid": True, "default": []},
+        "tables": {"type": "array", "items": TABLE, "drop_invalid": True},
+        "layouts": {"type": "array", "items": LAYOUT, "drop_invalid": True, "default": []},
+    },
+}
+SUGGESTION = {
+    "type": "object",
+    "properties": {
+        "old_name": {"type": "string"},
+        "new_name": {"type": "string"},
+        "new_type": {"type": "string"},
+        "comment": {"type": "string", "default": ""},
+        # 欠けていたら suggest_chunks が名前・型の変更の有無から決める (False で埋めると提案が消える)
+        "should_fix": {"type": "boolean", "optional": True},
+    },
+}
+SUGGESTIONS = {"type": "array", "items": SUGGESTION, "drop_invalid": True}
+
+validate_design = compile_schema(DESIGN)
+validate_suggestions = compile_schema(SUGGESTIONS)
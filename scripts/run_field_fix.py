@@ -2,6 +2,7 @@ import subprocess
 import json
 import os
 import sys
+import fix_pipeline
 
 def run_script(script_name, args=None):
     venv_python = os.path.join(os.getcwd(), '.venv', 'Scripts', 'python.exe')
@@ -27,38 +28,14 @@ def main():
     # 0. Activate FileMaker
     print("Activating FileMaker Pro...")
     run_script('activate_fm.py')
-    
-    # 1. Get existing fields
-    fields_output = run_script('get_fm_fields.py')
-    try:
-        fields_data = json.loads(fields_output)
-    except json.JSONDecodeError:
-        print('Failed to parse fields output', file=sys.stderr)
-        sys.exit(1)
-    if not fields_data.get('success'):
-        print('Failed to retrieve fields:', fields_data.get('error'), file=sys.stderr)
-        sys.exit(1)
-    current_fields = fields_data.get('fields', [])
 
-    # 2. Get AI suggestions
-    suggestion_input = {"currentFields": current_fields}
-    suggestions_output = run_script('suggest_field_fix.py', suggestion_input)
-    try:
-        suggestions_data = json.loads(suggestions_output)
-    except json.JSONDecodeError:
-        print('Failed to parse suggestions output', file=sys.stderr)
+    # 1. 一覧の読み取り → 2. AI の提案 → 3. 適用 を同じプロセスで動かす。
+    #    提案はチャンクごとにキューで受け取り、最初のチャンクが届いたら AI の残りを待たずに適用を始める
+    result = fix_pipeline.run_field_fix()
+    if not result.get('success'):
+        print('Field fix failed:', result.get('error'), file=sys.stderr)
         sys.exit(1)
-    if not suggestions_data.get('success'):
-        print('AI suggestion error:', suggestions_data.get('error'), file=sys.stderr)
-        sys.exit(1)
-    fixes = suggestions_data.get('suggestions', [])
-
-    # 3. Apply fixes via field_fixer.py
-    if not fixes:
-        print('No fixes to apply')
-        return
-    apply_output = run_script('field_fixer.py', fixes)
-    print('Field fixer output:', apply_output)
+    print('Field fixer output:', json.dumps(result, ensure_ascii=False))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,148 @@
+import os
+import re
+import difflib
+
+# 現在のフィールド一覧 (スナップショット) から目標の設計へ移るための最小の操作を計画する。
+#   skip   : 同名・同じ型で既にある
+#   retype : 同名で型だけ違う
+#   rename : 同じ型で名前がよく似たフィールドを改名する (型の変更とは組み合わせない)
+#   create : 対応するフィールドが無いので作成する
+# 目標に無い既存フィールドは削除しない (GUI 操作は増やさない)。
+# 出力は batch_create_fields / batch_fix の入力にそのまま変換できる。
+# 改名は推測なので fixes には入れず proposed として返す (確認してから batch_fix に渡す)。
+
+RENAME_THRESHOLD = 0.8
+
+# FileMaker の表示 (日本語) と設計 JSON (英語) の型名をそろえる
+TYPE_ALIASES = {
+    "テキスト": "Text", "数値": "Number", "日付": "Date", "時刻": "Time",
+    "タイムスタンプ": "Timestamp", "オブジェクト": "Container", "オブジェクト (コンテナ)": "Container",
+    "計算": "Calculation", "集計": "Summary",
+}
+
+def normalize_type(t):
+    t = str(t or "").strip()
+    return TYPE_ALIASES.get(t, t.capitalize() if t.isascii() else t)
+
+def _name_key(name):
+    # FileMaker のフィールド名は大文字小文字を区別しない
+    return str(name or "").strip().casefold()
+
+def _simplify(name):
+    """類似度計算用: 区切り文字と大文字小文字の違いを無視する"""
+    return "".join(c for c in _name_key(name) if c not in " _-・　")
+
+def _tokens(name):
+    """名前を語に分ける (区切り文字と camelCase の境目)"""
+    name = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", str(name or "").strip())
+    return {t for t in re.split(r"[\s_\-・　]+", name.casefold()) if t}
+
+def _related(a, b):
+    """改名候補の前提: 語を共有するか、先頭の半分以上が同じ"""
+    if _tokens(a) & _tokens(b):
+        return True
+    sa, sb = _simplify(a), _simplify(b)
+    prefix = len(os.path.commonprefix([sa, sb]))
+    return prefix >= 2 and prefix * 2 >= min(len(sa), len(sb))
+
+def similarity(a, b, same_type=False, floor=0.0):
+    matcher = difflib.SequenceMatcher(None, _simplify(a), _simplify(b))
+    # 上限の見積もりが floor に届かなければ正確な計算は省く
+    if matcher.real_quick_ratio() + 0.05 < floor or matcher.quick_ratio() + 0.05 < floor:
+        return 0.0
+    score = matcher.ratio()
+    # 型が同じなら少しだけ優先する
+    return min(1.0, score + (0.05 if same_type else 0.0))
+
+def plan(current_fields, target_fields, rename_threshold=RENAME_THRESHOLD):
+    """目標のフィールド順に操作のリストを返す"""
+    current_by_key = {}
+    for f in current_fields:
+        current_by_key.setdefault(_name_key(f.get("name")), f)
+
+    ops = [None] * len(target_fields)
+    used = set()
+    unmatched = []
+
+    # 1. 同名 (大文字小文字の違いは同名扱い)
+    seen_targets = set()
+    for i, target in enumerate(target_fields):
+        key = _name_key(target.get("name"))
+        if key in seen_targets:
+            # 設計内の重複は1つ目だけを扱う
+            ops[i] = {"op": "skip", "name": target.get("name"), "duplicate": True}
+            continue
+        seen_targets.add(key)
+        current = current_by_key.get(key)
+        if current is None:
+            unmatched.append(i)
+            continue
+        used.add(key)
+        if normalize_type(current.get("type")) == normalize_type(target.get("type", "Text")):
+            ops[i] = {"op": "skip", "name": current.get("name")}
+        else:
+            ops[i] = {"op": "retype", "name": current.get("name"),
+                      "old_type": current.get("type"), "new_type": target.get("type", "Text")}
+
+    # 2. 残りは同じ型で名前の類似度が高い組から順に改名として対応付ける
+    #    (customer_name -> customer_id や、型の違う CreatedBy -> created_at は組にしない)
+    candidates = [f for f in current_fields if _name_key(f.get("name")) not in used]
+    pairs = []
+    for i in unmatched:
+        target = target_fields[i]
+        target_type = normalize_type(target.get("type", "Text"))
+        for current in candidates:
+            if normalize_type(current.get("type")) != target_type:
+                continue
+            if not _related(current.get("name"), target.get("name")):
+                continue
+            score = similarity(current.get("name"), target.get("name"), floor=rename_threshold)
+            if score >= rename_threshold:
+                pairs.append((-score, i, _name_key(current.get("name")), current))
+    pairs.sort(key=lambda p: (p[0], p[1]))
+    for neg_score, i, key, current in pairs:
+        if ops[i] is not None or key in used:
+            continue
+        used.add(key)
+        target = target_fields[i]
+        ops[i] = {"op": "rename", "old_name": current.get("name"), "new_name": target.get("name"),
+                  "score": round(-neg_score, 3)}
+
+    # 3. 対応が無いものは作成
+    for i, target in enumerate(target_fields):
+        if ops[i] is None:
+            ops[i] = {"op": "create", "name": target.get("name"), "type": target.get("type", "Text")}
+            if target.get("comment"):
+                ops[i]["comment"] = target["comment"]
+    return ops
+
+def to_batch_inputs(ops, comment="ClubMaker設計反映"):
+    """
+    操作を batch_create_fields (fields) と batch_fix (fixes) の入力に分ける。
+    改名は確認が要るので proposed に分け、fixes には入れない (確認後にそのまま batch_fix に渡せる形)。
+    """
+    fields, fixes, proposed = [], [], []
+    for op in ops:
+        kind = op["op"]
+        if kind == "create":
+            fields.append({k: op[k] for k in ("name", "type", "comment") if k in op})
+        elif kind == "rename":
+            proposed.append({"old_name": op["old_name"], "new_name": op["new_name"],
+                             "new_type": None, "comment": comment, "should_fix": True})
+        elif kind == "retype":
+            fixes.append({"old_name": op["name"], "new_name": op["name"],
+                          "new_type": op["new_type"], "comment": comment, "should_fix": True})
+    return {"fields": fields, "fixes": fixes, "proposed": proposed}
+
+def summarize(ops):
+    counts = {"skip": 0, "retype": 0, "rename": 0, "create": 0}
+    for op in ops:
+        counts[op["op"]] += 1
+    return counts
+
+def plan_result(current_fields, target_fields):
+    """ワーカー / CLI 向け: 操作・件数・バッチ入力をまとめて返す"""
+    ops = plan(current_fields, target_fields)
+    result = {"success": True, "operations": ops, "summary": summarize(ops)}
+    result.update(to_batch_inputs(ops))
+    return result
@@ -0,0 +1,83 @@
+import os
+import re
+import json
+import time
+import hashlib
+
+# フィールド一覧のバージョン付きスナップショット。
+# data/snapshots/<ファイル>/<テーブル>/v0001.json のように、読み取るたびに1版ずつ追加する。
+# 直前の版と内容が同じなら新しい版は作らない。
+
+SNAPSHOT_DIR = os.getenv("CLUBMAKER_SNAPSHOT_DIR", os.path.join(os.getcwd(), "data", "snapshots"))
+KEEP_VERSIONS = int(os.getenv("CLUBMAKER_SNAPSHOT_KEEP", "50"))
+
+VERSION_RE = re.compile(r"^v(\d+)\.json$")
+UNSAFE_RE = re.compile(r'[\\/:*?"<>|\s]+')
+
+def _slug(name):
+    return UNSAFE_RE.sub("_", str(name or "default")).strip("_") or "default"
+
+def _table_dir(file_name, table, root=None):
+    return os.path.join(root or SNAPSHOT_DIR, _slug(file_name), _slug(table))
+
+def fields_hash(fields):
+    material = json.dumps([[f.get("name", ""), f.get("type", "")] for f in fields],
+                          ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def list_versions(file_name, table, root=None):
+    try:
+        names = os.listdir(_table_dir(file_name, table, root))
+    except OSError:
+        return []
+    return sorted(int(m.group(1)) for m in map(VERSION_RE.match, names) if m)
+
+def load(file_name, table, version=None, root=None):
+    """指定した版 (省略時は最新) を返す。無ければ None"""
+    if version is None:
+        versions = list_versions(file_name, table, root)
+        if not versions:
+            return None
+        version = versions[-1]
+    path = os.path.join(_table_dir(file_name, table, root), f"v{version:04d}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def latest(file_name, table, root=None):
+    return load(file_name, table, None, root)
+
+def save(file_name, table, fields, root=None, keep=None):
+    """新しい版として保存し、スナップショットを返す (直前と同じ内容なら保存せずに直前の版を返す)"""
+    digest = fields_hash(fields)
+    previous = latest(file_name, table, root)
+    if previous and previous.get("hash") == digest:
+        return previous
+
+    table_dir = _table_dir(file_name, table, root)
+    os.makedirs(table_dir, exist_ok=True)
+    versions = list_versions(file_name, table, root)
+    version = (versions[-1] if versions else 0) + 1
+    snapshot = {
+        "file": file_name,
+        "table": table,
+        "version": version,
+        "created": time.time(),
+        "hash": digest,
+        "fields": fields,
+    }
+    path = os.path.join(table_dir, f"v{version:04d}.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+    # 古い版を整理
+    keep = KEEP_VERSIONS if keep is None else keep
+    for old in versions[:max(0, len(versions) + 1 - keep)]:
+        try:
+            os.remove(os.path.join(table_dir, f"v{old:04d}.json"))
+        except OSError:
+            pass
+    return snapshot
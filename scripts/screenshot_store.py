@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import time
+import queue
+import threading
+
+import lazy_import
+Image = lazy_import.lazy("PIL.Image")
+features = lazy_import.lazy("PIL.features")
+
+# スクリーンショットの保存先 (public/screenshots) の管理。
+# - 前回の保存画像とほぼ同じ画面 (差分ハッシュの距離が小さい) なら保存しない
+# - PNG/WebP の書き出しとサムネイル作成はバックグラウンドのスレッドで行い、撮影側はすぐ戻る
+# - 一覧は index.json に持ち、API はファイルを stat せずに読める
+# - 枚数・合計サイズの上限を超えたら古いものから削除する
+
+DEFAULT_DIR = os.path.join(os.path.dirname(__file__), "..", "public", "screenshots")
+INDEX_FILE = "index.json"
+THUMB_DIR = "thumbs"
+
+# 保存形式 (png / webp)
+FORMAT = os.getenv("CLUBMAKER_SCREENSHOT_FORMAT", "png").lower()
+THUMB_WIDTH = 320
+# 差分ハッシュ (16x16 = 256bit) の距離がこれ以下なら「変化なし」とみなす
+DIFF_BITS = int(os.getenv("CLUBMAKER_SCREENSHOT_DIFF_BITS", "4"))
+MAX_COUNT = int(os.getenv("CLUBMAKER_SCREENSHOT_MAX_COUNT", "200"))
+MAX_BYTES = int(os.getenv("CLUBMAKER_SCREENSHOT_MAX_MB", "500")) * 1024 * 1024
+
+HASH_SIZE = 16
+
+def dhash(image, size=HASH_SIZE):
+    """横方向の明るさの変化から作る知覚ハッシュ (int)"""
+    # 先に整数倍で縮小してから変換する (4K 画面全体をグレースケール化するより数倍速い)
+    factor = max(1, image.width // (size * 8))
+    small = image.reduce(factor) if factor > 1 else image
+    small = small.convert("L").resize((size + 1, size), Image.BILINEAR)
+    px = small.tobytes()
+    bits = 0
+    for y in range(size):
+        row = px[y * (size + 1):(y + 1) * (size + 1)]
+        for x in range(size):
+            bits = (bits << 1) | (row[x] > row[x + 1])
+    return bits
+
+def hash_distance(a, b):
+    return bin(a ^ b).count("1")
+
+def _thumb_ext():
+    return "webp" if features.check("webp") else "jpg"
+
+class ScreenshotStore:
+    def __init__(self, directory=DEFAULT_DIR, fmt=FORMAT, max_count=MAX_COUNT, max_bytes=MAX_BYTES,
+                 diff_bits=DIFF_BITS):
+        self.directory = os.path.abspath(directory)
+        self.fmt = "webp" if fmt == "webp" and features.check("webp") else "png"
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.diff_bits = diff_bits
+        self.lock = threading.Lock()
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.items = None        # 古い順。index.json と同じ内容
+        self.last_hash = None
+        self.stats = {"saved": 0, "skipped": 0, "deleted": 0}
+
+    # --- index ---
+
+    def _index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _load(self):
+        if self.items is not None:
+            return
+        os.makedirs(os.path.join(self.directory, THUMB_DIR), exist_ok=True)
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                self.items = json.load(f).get("items", [])
+        except FileNotFoundError:
+            # 索引が無い (以前の版で撮った画像だけがある): 一度だけ走査して作る
+            self.items = self._scan()
+            self._save_index()
+        except Exception as e:
+            print(f"  > Screenshot index unreadable, rebuilding: {e}", file=sys.stderr)
+            self.items = self._scan()
+            self._save_index()
+        if self.items and self.items[-1].get("hash"):
+            self.last_hash = int(self.items[-1]["hash"], 16)
+
+    def _scan(self):
+        items = []
+        for name in os.listdir(self.directory):
+            if not name.lower().endswith((".png", ".jpg", ".webp")):
+                continue
+            st = os.stat(os.path.join(self.directory, name))
+            items.append({"file": name, "thumb": None, "time": st.st_mtime, "bytes": st.st_size})
+        items.sort(key=lambda i: i["time"])
+        return items
+
+    def _save_index(self):
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "items": self.items}, f, ensure_ascii=False)
+        os.replace(tmp, self._index_path())
+
+    def list(self):
+        """新しい順の一覧"""
+        with self.lock:
+            self._load()
+            return list(reversed(self.items))
+
+    # --- capture ---
+
+    def submit(self, image, label=None):
+        """
+        画像を保存キューに入れてすぐ戻る。変化が無ければ保存しない。
+        戻り値: {"success", "skipped", "file"?, "distance"?}
+        """
+        h = dhash(image)
+        with self.lock:
+            self._load()
+            if self.last_hash is not None:
+                distance = hash_distance(h, self.last_hash)
+                if distance <= self.diff_bits:
+                    self.stats["skipped"] += 1
+                    return {"success": True, "skipped": True, "distance": distance,
+                            "file": self.items[-1]["file"] if self.items else None}
+            self.last_hash = h
+            stamp = time.strftime("%Y%m%d_%H%M%S")
+            name = f"screenshot_{stamp}_{int(time.time() * 1000) % 1000:03d}"
+            if label:
+                name += f"_{label}"
+        self._ensure_thread()
+        self.jobs.put((image, name, h))
+        return {"success": True, "skipped": False, "file": f"{name}.{self.fmt}"}
+
+    def _ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="ScreenshotWriter", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            image, name, h = self.jobs.get()
+            try:
+                self._write(image, name, h)
+            except Exception as e:
+                print(f"  > Screenshot write failed ({name}): {e}", file=sys.stderr)
+            finally:
+                self.jobs.task_done()
+
+    def _write(self, image, name, h):
+        file_name = f"{name}.{self.fmt}"
+        path = os.path.join(self.directory, file_name)
+        if self.fmt == "webp":
+            image.save(path, "WEBP", lossless=True, method=0)
+        else:
+            image.save(path, "PNG")
+
+        thumb_name = f"{name}.{_thumb_ext()}"
+        thumb = image.copy()
+        thumb.thumbnail((THUMB_WIDTH, THUMB_WIDTH * 4))
+        if thumb.mode != "RGB":
+            thumb = thumb.convert("RGB")
+        thumb.save(os.path.join(self.directory, THUMB_DIR, thumb_name), quality=70)
+
+        item = {"file": file_name, "thumb": f"{THUMB_DIR}/{thumb_name}", "time": time.time(),
+                "bytes": os.path.getsize(path), "width": image.width, "height": image.height, "hash": f"{h:x}"}
+        with self.lock:
+            self.items.append(item)
+            self.stats["saved"] += 1
+            self._enforce_retention()
+            self._save_index()
+
+    def _enforce_retention(self):
+        """上限を超えた分を古い順に削除する (lock を取った状態で呼ぶ)"""
+        total = sum(i.get("bytes", 0) for i in self.items)
+        while self.items and (len(self.items) > self.max_count or total > self.max_bytes):
+            old = self.items.pop(0)
+            total -= old.get("bytes", 0)
+            for rel in (old["file"], old.get("thumb")):
+                if not rel:
+                    continue
+                try:
+                    os.remove(os.path.join(self.directory, rel))
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    print(f"  > Could not delete {rel}: {e}", file=sys.stderr)
+            self.stats["deleted"] += 1
+
+    def flush(self, timeout=None):
+        """キューの書き出しが終わるまで待つ (プロセス終了前に呼ぶ)"""
+        if timeout is None:
+            self.jobs.join()
+            return True
+        deadline = time.monotonic() + timeout
+        while self.jobs.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+_STORE = None
+
+def get_store():
+    global _STORE
+    if _STORE is None:
+        _STORE = ScreenshotStore()
+    return _STORE
@@ -1,62 +1,59 @@
-import win32clipboard
-import win32con
 import sys
 import os
 
-def set_fm_xml_clipboard(xml_data: str):
-    """FileMaker Pro 25対応 多形式クリップボード登録"""
-    try:
-        win32clipboard.OpenClipboard()
-        win32clipboard.EmptyClipboard()
-        
-        # 1. 基本Unicodeテキスト (CF_UNICODETEXT) - Windowsの標準
-        # win32clipboard.SetClipboardData(win32con.CF_UNICODETEXT, xml_data) は内部でUTF-16LEに変換される
-        win32clipboard.SetClipboardData(win32con.CF_UNICODETEXT, xml_data)
-        
-        # 2. FileMaker XML形式 (FileMaker XML Snippet) - これが貼り付けボタン活性化の鍵
-        try:
-            fm_format = win32clipboard.RegisterClipboardFormat("FileMaker XML Snippet")
-            win32clipboard.SetClipboardData(fm_format, xml_data.encode('utf-8'))
-        except Exception as e:
-            print(f"Warning: FileMaker XML Snippet error: {e}")
-
-        # 3. 旧形式テキスト (CF_TEXT) 
-        try:
-            win32clipboard.SetClipboardData(win32con.CF_TEXT, xml_data.encode('ascii', 'ignore'))
-        except Exception as e:
-            print(f"Warning: CF_TEXT error: {e}")
+import clipboard_writer
 
-        # 4. HTML形式 (HTML Format) - ブラウザ連携の互換性向上のため
-        try:
-            cf_html = win32clipboard.RegisterClipboardFormat("HTML Format")
-            html_content = f'<html><body><!--StartFragment-->{xml_data}<!--EndFragment--></body></html>'
-            win32clipboard.SetClipboardData(cf_html, html_content.encode('utf-8'))
-        except Exception as e:
-            print(f"Warning: HTML Format error: {e}")
-            
-        win32clipboard.CloseClipboard()
-        print(f"Success: Registered 4 formats to clipboard for FileMaker. Length: {len(xml_data)}")
-        return True
+def set_fm_xml_clipboard(xml_data, writer=None):
+    """FileMaker Pro 25対応 多形式クリップボード登録 (str / bytes / memoryview / mmap)"""
+    writer = writer or clipboard_writer.ClipboardWriter()
+    try:
+        return writer.write_fm_snippet(xml_data)
     except Exception as e:
-        print(f"Error setting multi-format clipboard: {e}")
-        try: win32clipboard.CloseClipboard()
+        print(f"Error setting multi-format clipboard: {e}", file=sys.stderr)
+        try:
+            import win32clipboard
+            win32clipboard.CloseClipboard()
         except: pass
         return False
 
+def set_layout_clipboard(path, name=None, writer=None, pack=True):
+    """
+    設計またはレイアウトの JSON ファイルからレイアウトのスニペットを作って登録する (fm_layout)。
+    重なりは先に解消し (layout_packer)、移動の集計を stdout に JSON で出す。
+    """
+    import io
+    import json
+    import fm_layout
+    with open(path, "r", encoding="utf-8") as f:
+        layout = fm_layout.find_layout(json.load(f), name)
+    if layout is None:
+        print(f"Error: Layout not found: {name or '(none)'}", file=sys.stderr)
+        return False
+    buf = io.StringIO()
+    plan = fm_layout.write_layout_snippet(layout, buf, pack=pack)
+    if plan.packing is not None:
+        print(json.dumps({k: v for k, v in plan.packing.items() if k != "moves"}))
+    return set_fm_xml_clipboard(buf.getvalue(), writer)
+
 if __name__ == "__main__":
-    # 引数または標準入力からXMLを取得
-    xml_input = ""
+    # --layout design.json [レイアウト名] [--no-pack]: レイアウトの JSON から XML を作って登録する
+    if len(sys.argv) > 2 and sys.argv[1] == "--layout":
+        rest = [a for a in sys.argv[3:] if a != "--no-pack"]
+        success = set_layout_clipboard(sys.argv[2], rest[0] if rest else None, pack="--no-pack" not in sys.argv)
+        sys.exit(0 if success else 1)
+
+    # 引数または標準入力からXMLを取得 (ファイルは mmap で読み、UTF-8 のまま登録する)
+    xml_input = None
     if len(sys.argv) > 1:
         # ファイルから読み込む（コマンドライン引数の制限回避のため）
         if os.path.exists(sys.argv[1]):
-            with open(sys.argv[1], 'r', encoding='utf-8') as f:
-                xml_input = f.read()
+            xml_input = clipboard_writer.Payload.from_file(sys.argv[1])
         else:
             xml_input = sys.argv[1]
-    
+
     if not xml_input:
-        xml_input = sys.stdin.read()
-        
+        xml_input = sys.stdin.buffer.read()
+
     if xml_input:
         success = set_fm_xml_clipboard(xml_input)
         sys.exit(0 if success else 1)
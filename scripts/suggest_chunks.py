@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import lazy_import
+import json_extract
+import response_schema
+
+futures = lazy_import.lazy("concurrent.futures")   # 並列で呼ぶときだけ読む (logging まで読み込むため)
+
+# suggest_field_fix の分割実行とマージ。
+# フィールド一覧をトークン数の上限で区切って並行に問い合わせ、失敗したチャンクだけ再試行する。
+# マージ時に new_name を既存フィールド全体に対して一意にし、入力順を保つ。
+# genai に依存しないので、偽の問い合わせ関数でも検証できる。
+
+CHUNK_TOKENS = int(os.getenv("CLUBMAKER_SUGGEST_CHUNK_TOKENS", "1500"))
+WORKERS = int(os.getenv("CLUBMAKER_SUGGEST_WORKERS", "4"))
+RETRIES = 2
+
+def estimate_tokens(text):
+    """おおよそのトークン数 (ASCII は4文字で1、それ以外は1文字で1として数える)"""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+def chunk_fields(fields, max_tokens=CHUNK_TOKENS, first_tokens=None):
+    """
+    入力順を保ったまま、1チャンクあたりの推定トークン数が max_tokens 以下になるよう分割する。
+    first_tokens を渡すと最初のチャンクを小さくし、以降は2倍ずつ max_tokens まで大きくする
+    (最初の結果を早く受け取り、次のチャンクが前のチャンクの処理中に届くようにしたいとき)
+    """
+    chunks, current, used = [], [], 0
+    for field in fields:
+        cost = estimate_tokens(json.dumps(field, ensure_ascii=False))
+        limit = min(max_tokens, first_tokens << len(chunks)) if first_tokens else max_tokens
+        if current and used + cost > limit:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(field)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _as_suggestions(value):
+    if isinstance(value, dict):
+        value = value.get("suggestions", value.get("fields"))
+    # 数値などの混ざった要素は検証で外す。オブジェクトが1つも無い配列 ([1] のような注記) は使わない
+    if isinstance(value, list) and (not value or any(isinstance(row, dict) for row in value)):
+        return value
+    return None
+
+def parse_suggestions(text):
+    """応答テキストから提案の配列を取り出す (欠けた should_fix などは補う)。配列でなければ ValueError"""
+    try:
+        data = json_extract.extract(text, accept=_as_suggestions)
+    except ValueError:
+        raise ValueError("suggestions is not a JSON array")
+    rows, _ = response_schema.validate_suggestions(data)
+    return rows
+
+def run_chunks(chunks, fetch, workers=WORKERS, retries=RETRIES):
+    """
+    fetch(chunk) を並行に実行する。失敗 (例外か None) したチャンクだけを最大 retries 回やり直す。
+    戻り値はチャンクと同じ並びの結果リスト (最後まで失敗したものは None) とエラー一覧。
+    """
+    results = [None] * len(chunks)
+    errors = []
+    todo = list(range(len(chunks)))
+
+    def attempt(i):
+        try:
+            return i, fetch(chunks[i]), None
+        except Exception as e:
+            return i, None, e
+
+    for round_no in range(retries + 1):
+        if not todo:
+            break
+        if round_no:
+            print(f"  > [Suggest] retrying {len(todo)} failed chunk(s)", file=sys.stderr)
+        with futures.ThreadPoolExecutor(max_workers=max(1, min(workers, len(todo)))) as executor:
+            outcomes = list(executor.map(attempt, todo))
+        todo = []
+        for i, value, error in outcomes:
+            if value is None:
+                todo.append(i)
+                errors.append(f"chunk {i + 1}: {error or 'no response'}")
+            else:
+                results[i] = value
+    return results, errors
+
+def iter_chunks(chunks, fetch, workers=WORKERS, retries=RETRIES):
+    """
+    run_chunks と同じく並行に実行するが、終わったチャンクから順に (番号, 結果, エラー) を返す。
+    失敗したチャンクは全体の終わりを待たずにすぐ投げ直す (最後まで失敗したら結果は None)。
+    チャンクは先頭から順に投げるので、先頭のチャンクほど早く返る。
+    """
+    def attempt(i):
+        try:
+            return fetch(chunks[i]), None
+        except Exception as e:
+            return None, e
+
+    if not chunks:
+        return
+    with futures.ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as executor:
+        pending = {executor.submit(attempt, i): (i, 0) for i in range(len(chunks))}
+        while pending:
+            done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                i, tries = pending.pop(future)
+                value, error = future.result()
+                if value is None and tries < retries:
+                    print(f"  > [Suggest] retrying chunk {i + 1}: {error or 'no response'}", file=sys.stderr)
+                    pending[executor.submit(attempt, i)] = (i, tries + 1)
+                    continue
+                yield i, value, (None if value is not None else f"chunk {i + 1}: {error or 'no response'}")
+
+def _name_key(name):
+    # FileMaker のフィールド名は大文字小文字を区別しない
+    return str(name).strip().casefold()
+
+def unique_name(name, taken):
+    """taken と衝突しない名前を返す (衝突したら _v2, _v3 ... を付ける)"""
+    if _name_key(name) not in taken:
+        return name
+    n = 2
+    while _name_key(f"{name}_v{n}") in taken:
+        n += 1
+    return f"{name}_v{n}"
+
+def merge_suggestions(fields, chunks, chunk_results):
+    """
+    チャンクごとの提案を入力のフィールド順に並べ直して1つのリストにする。
+    - 提案は old_name で対応付け、見つからなければチャンク内の位置で対応付ける
+    - 提案が無いフィールド (失敗したチャンク含む) は変更なしの行にする
+    - new_name は既存の全フィールド名とも、他の行の new_name とも重ならないようにする
+    """
+    by_field = {}
+    for chunk, suggestions in zip(chunks, chunk_results):
+        if not suggestions:
+            continue
+        by_name = {}
+        for s in suggestions:
+            if isinstance(s, dict) and s.get("old_name") is not None:
+                by_name.setdefault(_name_key(s["old_name"]), s)
+        for pos, field in enumerate(chunk):
+            s = by_name.get(_name_key(field.get("name", "")))
+            if s is None and pos < len(suggestions) and isinstance(suggestions[pos], dict) \
+                    and suggestions[pos].get("old_name") is None:
+                s = suggestions[pos]
+            if s is not None:
+                by_field[id(field)] = s
+
+    taken = reserve_names(fields)
+    return [_merge_row(field, by_field.get(id(field)) or {}, taken) for field in fields]
+
+def reserve_names(fields):
+    """改名しないフィールドの名前は残るので、最初から予約しておく"""
+    return {_name_key(f.get("name", "")) for f in fields}
+
+def merge_chunk(chunk, suggestions, taken):
+    """
+    1チャンク分の提案を merge_suggestions と同じ規則で行にする (チャンクが届いた順に使う)。
+    taken は reserve_names(全フィールド) で作って全チャンクで共有し、new_name が重ならないようにする。
+    """
+    by_name = {}
+    for s in suggestions or []:
+        if isinstance(s, dict) and s.get("old_name") is not None:
+            by_name.setdefault(_name_key(s["old_name"]), s)
+    rows = []
+    for pos, field in enumerate(chunk):
+        s = by_name.get(_name_key(field.get("name", "")))
+        if s is None and suggestions and pos < len(suggestions) and isinstance(suggestions[pos], dict) \
+                and suggestions[pos].get("old_name") is None:
+            s = suggestions[pos]
+        rows.append(_merge_row(field, s or {}, taken))
+    return rows
+
+def _merge_row(field, s, taken):
+    old_name = field.get("name", "")
+    old_type = field.get("type", "")
+    new_name = str(s.get("new_name") or old_name).strip()
+    new_type = s.get("new_type") or old_type
+    should_fix = s.get("should_fix")
+    if should_fix is None:
+        # 応答に should_fix が無ければ、名前か型を変える提案かどうかで決める
+        should_fix = new_name != old_name or new_type != old_type
+    row = {
+        "old_name": old_name,
+        "new_name": new_name,
+        "old_type": old_type,
+        "new_type": new_type,
+        "comment": s.get("comment", ""),
+        "should_fix": bool(should_fix),
+    }
+    if _name_key(new_name) != _name_key(old_name):
+        row["new_name"] = unique_name(new_name, taken)
+        taken.add(_name_key(row["new_name"]))
+    return row
@@ -1,23 +1,15 @@
 import os
 import sys
 import json
-from google import genai
-from dotenv import load_dotenv
+import lazy_import
+genai = lazy_import.lazy("google.genai")
+import ai_cache
+import key_pool
+import suggest_chunks
+import fm_trace
 
-# Load .env file
-load_dotenv()
 
-def suggest_field_fix(current_fields, context=""):
-    """現在のフィールド一覧を受け取り、AIが理想的な名前・型を提案する"""
-    
-    keys_str = os.getenv("GOOGLE_GENERATIVE_AI_API_KEY", "")
-    if not keys_str:
-        return {"success": False, "error": "API key not configured"}
-    
-    model_name = os.getenv("GOOGLE_GENERATIVE_AI_MODEL", "gemini-2.0-flash-exp")
-    api_keys = [k.strip() for k in keys_str.split(",") if k.strip()]
-    
-    system_instruction = """
+SYSTEM_INSTRUCTION = """
     You are a FileMaker database optimization expert.
     Given a list of existing fields, suggest improvements:
     - Rename to clearer, more descriptive Japanese names
@@ -44,44 +36,98 @@ def suggest_field_fix(current_fields, context=""):
     
     Do NOT add markdown formatting. Return raw JSON only.
     """
+
+# パイプライン (fix_pipeline) では最初のチャンクを小さくして (以降は2倍ずつ)、GUI での適用を早く始める
+FIRST_CHUNK_TOKENS = int(os.getenv("CLUBMAKER_SUGGEST_FIRST_CHUNK_TOKENS", "200"))
+
+def _chunk_fetcher(context, use_cache):
+    """チャンクを問い合わせる関数 (API キーが無ければ None)"""
+    # .env は API を使うときに初めて読む (dotenv の import も含めて)
+    lazy_import.load_dotenv()
+    keys_str = os.getenv("GOOGLE_GENERATIVE_AI_API_KEY", "")
+    if not keys_str:
+        return None
     
-    for api_key in api_keys:
-        try:
-            client = genai.Client(api_key=api_key)
-            
-            user_prompt = f"""
+    model_name = os.getenv("GOOGLE_GENERATIVE_AI_MODEL", "gemini-2.0-flash-exp")
+    pool = key_pool.get_pool(keys_str)
+    context_text = ai_cache.normalize_text(context)
+    
+    def fetch_chunk(chunk):
+        user_prompt = f"""
 現在のフィールド一覧:
-{json.dumps(current_fields, ensure_ascii=False, indent=2)}
+{json.dumps(chunk, ensure_ascii=False, indent=2)}
 
 コンテキスト: {context if context else "特になし"}
 
 上記のフィールドを最適化してください。日本語で分かりやすい名前に変更し、適切な型を提案してください。
 """
-            
-            response = client.models.generate_content(
-                model=model_name,
-                contents=user_prompt,
-                config={
-                    "system_instruction": system_instruction,
-                    "temperature": 0.3
-                }
-            )
-            
-            text = response.text.strip()
-            
-            # マークダウンのコードブロックを除去
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0].strip()
-            
-            suggestions = json.loads(text)
-            return {"success": True, "suggestions": suggestions}
-            
-        except Exception:
-            continue
-    
-    return {"success": False, "error": "All API keys failed"}
+
+        def ask(api_key):
+            client = genai.Client(api_key=api_key)
+            with fm_trace.span("gemini.generate_content", cat="ai", model=model_name, fields=len(chunk)):
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=user_prompt,
+                    config={
+                        "system_instruction": SYSTEM_INSTRUCTION,
+                        "temperature": 0.3
+                    }
+                )
+            return response.text
+
+        def request_suggestions():
+            # JSON の解析失敗はキーの問題ではないので、プールの外で解析する (失敗したらチャンクごと再試行)
+            with fm_trace.span("gemini.request", cat="ai", model=model_name, fields=len(chunk)):
+                text = pool.call(ask, hedge_after=key_pool.HEDGE_AFTER)
+            return suggest_chunks.parse_suggestions(text)
+
+        # チャンク単位でキャッシュするので、再実行時は失敗したチャンクだけが API に行く
+        cache_key = ai_cache.make_key(model_name, SYSTEM_INSTRUCTION, 0.3,
+                                      {"fields": chunk, "context": context_text})
+        return ai_cache.cached(cache_key, request_suggestions, use_cache)
+
+    return fetch_chunk
+
+def suggest_field_fix(current_fields, context="", use_cache=True):
+    """現在のフィールド一覧を受け取り、AIが理想的な名前・型を提案する"""
+    fetch_chunk = _chunk_fetcher(context, use_cache)
+    if fetch_chunk is None:
+        return {"success": False, "error": "API key not configured"}
+
+    # 大きなテーブルはトークン数で分割して並行に問い合わせる
+    chunks = suggest_chunks.chunk_fields(current_fields)
+    results, errors = suggest_chunks.run_chunks(chunks, fetch_chunk)
+    failed = sum(1 for r in results if r is None)
+    for err in errors:
+        print(f"  > [Suggest] {err}", file=sys.stderr)
+
+    if chunks and failed == len(chunks):
+        return {"success": False, "error": "All API keys failed", "details": errors}
+
+    suggestions = suggest_chunks.merge_suggestions(current_fields, chunks, results)
+    result = {"success": True, "suggestions": suggestions, "chunks": len(chunks)}
+    if failed:
+        # 失敗したチャンクのフィールドは「変更なし」として返す
+        result["failed_chunks"] = failed
+        result["warning"] = f"{failed} of {len(chunks)} chunk(s) failed"
+    return result
+
+def stream_field_fix(current_fields, context="", use_cache=True):
+    """
+    suggest_field_fix と同じ提案を、チャンクが届いた順に返すジェネレーター。
+    {"index", "total", "suggestions": [そのチャンクの行], "error"} を1チャンクずつ返す。
+    new_name の一意性は全チャンクをまたいで保つ (失敗したチャンクの行は変更なし)。
+    """
+    fetch_chunk = _chunk_fetcher(context, use_cache)
+    if fetch_chunk is None:
+        raise RuntimeError("API key not configured")
+    chunks = suggest_chunks.chunk_fields(current_fields, first_tokens=FIRST_CHUNK_TOKENS)
+    taken = suggest_chunks.reserve_names(current_fields)
+    for i, result, error in suggest_chunks.iter_chunks(chunks, fetch_chunk):
+        if error:
+            print(f"  > [Suggest] {error}", file=sys.stderr)
+        yield {"index": i, "total": len(chunks), "error": error,
+               "suggestions": suggest_chunks.merge_chunk(chunks[i], result, taken)}
 
 if __name__ == "__main__":
     if len(sys.argv) >= 2:
@@ -89,7 +135,7 @@ if __name__ == "__main__":
             data = json.loads(sys.argv[1])
             current_fields = data.get("currentFields", [])
             context = data.get("context", "")
-            result = suggest_field_fix(current_fields, context)
+            result = suggest_field_fix(current_fields, context, not data.get("noCache", False))
             print(json.dumps(result, ensure_ascii=True))
         except json.JSONDecodeError as e:
             print(json.dumps({"success": False, "error": f"Invalid JSON: {e}"}, ensure_ascii=True))
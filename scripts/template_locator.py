@@ -0,0 +1,220 @@
+import os
+import sys
+import time
+
+import lazy_import
+cv2 = lazy_import.lazy("cv2")
+np = lazy_import.lazy("numpy")
+
+# click_button 用のテンプレート探索。
+# - 画面全体ではなく FileMaker のウィンドウ矩形だけを撮る (グレースケールで照合)
+# - テンプレートはグレースケールで保持し、倍率ごとの縮小版もキャッシュする
+# - 縮小画像で全倍率を粗く探し、良い候補の周辺だけ等倍で照合し直す
+# - ウィンドウの大きさごとに前回の位置を覚え、次回はその周辺の小さな範囲を先に確かめる
+# 画像 (numpy 配列) を渡せば画面なしで動くので、保存済みスクリーンショットでベンチマークできる。
+
+# テンプレートは 100% 表示で切り出している前提。125% / 150% / 175% / 200% の表示倍率も探す
+SCALES = tuple(float(s) for s in os.environ.get("CLUBMAKER_TEMPLATE_SCALES", "1.0,1.25,1.5,1.75,2.0").split(","))
+CONFIDENCE = 0.8
+# 粗い探索で画像を何分の1にするか (テンプレートが小さすぎる場合は等倍で探す)
+COARSE = 0.5
+MIN_COARSE_SIZE = 12
+# 粗い探索から等倍で確かめる候補の数と、候補周辺の余白 (px)
+REFINE_TOP = 2
+REFINE_MARGIN = 6
+# 前回位置の確認に使う余白 (px)
+HIT_MARGIN = 8
+
+class Match:
+    def __init__(self, x, y, w, h, score, scale, source):
+        self.x, self.y, self.w, self.h = x, y, w, h
+        self.score = score
+        self.scale = scale
+        self.source = source  # "hit" (前回位置) / "search" (全体探索)
+
+    @property
+    def center(self):
+        return (self.x + self.w // 2, self.y + self.h // 2)
+
+    def to_dict(self):
+        return {"x": self.x, "y": self.y, "w": self.w, "h": self.h, "score": round(self.score, 4),
+                "scale": self.scale, "source": self.source}
+
+def to_gray(image):
+    """PIL 画像 / RGB / BGR / グレースケールの配列をグレースケールに (RGB と BGR の差は照合にほぼ影響しない)"""
+    arr = np.asarray(image)
+    if arr.ndim == 2:
+        return arr
+    if arr.shape[2] == 4:
+        return cv2.cvtColor(arr, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
+
+def _match(haystack, needle):
+    """(score, (x, y)) を返す。needle の方が大きければ None"""
+    if needle.shape[0] > haystack.shape[0] or needle.shape[1] > haystack.shape[1]:
+        return None
+    res = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(res)
+    return max_val, max_loc
+
+def _resize(image, factor):
+    if factor == 1.0:
+        return image
+    interp = cv2.INTER_AREA if factor < 1.0 else cv2.INTER_LINEAR
+    h, w = image.shape[:2]
+    return cv2.resize(image, (max(1, round(w * factor)), max(1, round(h * factor))), interpolation=interp)
+
+class TemplateLocator:
+    def __init__(self, scales=SCALES, coarse=COARSE):
+        self.scales = scales
+        self.coarse = coarse
+        self._templates = {}  # path -> (mtime, gray)
+        self._scaled = {}     # (path, mtime, scale, factor) -> gray
+        self._hits = {}       # (path, (w, h)) -> (x, y, scale) ウィンドウ内の相対位置
+        self.stats = {"hit": 0, "search": 0, "miss": 0, "template_loads": 0}
+
+    def template(self, path):
+        """グレースケールのテンプレート (ファイルが更新されたら読み直す)"""
+        mtime = os.path.getmtime(path)
+        cached = self._templates.get(path)
+        if cached and cached[0] == mtime:
+            return mtime, cached[1]
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise FileNotFoundError(f"Template image could not be read: {path}")
+        if gray.std() < 1.0:
+            # 単色の画像はどこにでも一致してしまう (score 1.0 の誤検出になる)
+            print(f"  > Warning: template {os.path.basename(path)} is a flat image; matches will be unreliable.",
+                  file=sys.stderr)
+        self._templates[path] = (mtime, gray)
+        self.stats["template_loads"] += 1
+        return mtime, gray
+
+    def scaled(self, path, scale, factor=1.0):
+        mtime, gray = self.template(path)
+        key = (path, mtime, scale, factor)
+        img = self._scaled.get(key)
+        if img is None:
+            img = _resize(gray, scale * factor)
+            self._scaled[key] = img
+        return img
+
+    def forget(self, path=None):
+        """前回位置を忘れる (画面構成が変わったとき)"""
+        self._hits = {k: v for k, v in self._hits.items() if path is not None and k[0] != path}
+
+    def _check_hit(self, path, image, hit, confidence):
+        x, y, scale = hit
+        needle = self.scaled(path, scale)
+        h, w = needle.shape[:2]
+        x0, y0 = max(0, x - HIT_MARGIN), max(0, y - HIT_MARGIN)
+        patch = image[y0:y + h + HIT_MARGIN, x0:x + w + HIT_MARGIN]
+        found = _match(patch, needle)
+        if found and found[0] >= confidence:
+            return Match(x0 + found[1][0], y0 + found[1][1], w, h, found[0], scale, "hit")
+        return None
+
+    def _search(self, path, image):
+        """縮小画像で全倍率を探し、上位候補だけ等倍で照合し直す"""
+        candidates = []
+        small = None
+        for scale in self.scales:
+            needle = self.scaled(path, scale)
+            if min(needle.shape[:2]) * self.coarse < MIN_COARSE_SIZE:
+                # 縮小すると潰れるテンプレートは等倍で直接探す
+                found = _match(image, needle)
+                if found:
+                    candidates.append((found[0], found[1], scale, False))
+                continue
+            if small is None:
+                small = _resize(image, self.coarse)
+            found = _match(small, self.scaled(path, scale, self.coarse))
+            if found:
+                candidates.append((found[0], found[1], scale, True))
+
+        best = None
+        for score, loc, scale, coarse in sorted(candidates, key=lambda c: -c[0])[:REFINE_TOP]:
+            needle = self.scaled(path, scale)
+            h, w = needle.shape[:2]
+            if not coarse:
+                match = Match(loc[0], loc[1], w, h, score, scale, "search")
+            else:
+                margin = REFINE_MARGIN + int(1 / self.coarse)
+                x0 = max(0, int(loc[0] / self.coarse) - margin)
+                y0 = max(0, int(loc[1] / self.coarse) - margin)
+                roi = image[y0:y0 + h + 2 * margin, x0:x0 + w + 2 * margin]
+                found = _match(roi, needle)
+                if not found:
+                    continue
+                match = Match(x0 + found[1][0], y0 + found[1][1], w, h, found[0], scale, "search")
+            if best is None or match.score > best.score:
+                best = match
+        return best
+
+    def locate(self, path, image, confidence=CONFIDENCE, geometry=None):
+        """
+        image (ウィンドウの撮影画像) の中から path のテンプレートを探す。
+        座標は image 内の位置。geometry はウィンドウの (幅, 高さ) で、前回位置の記憶に使う。
+        """
+        gray = to_gray(image)
+        key = (path, geometry or gray.shape[1::-1])
+        hit = self._hits.get(key)
+        if hit:
+            match = self._check_hit(path, gray, hit, confidence)
+            if match:
+                self.stats["hit"] += 1
+                return match
+            del self._hits[key]
+
+        match = self._search(path, gray)
+        if match and match.score >= confidence:
+            self.stats["search"] += 1
+            self._hits[key] = (match.x, match.y, match.scale)
+            return match
+        self.stats["miss"] += 1
+        if match:
+            print(f"  > Best match for {os.path.basename(path)}: {match.score:.4f} (scale {match.scale})", file=sys.stderr)
+        return None
+
+def window_rect():
+    """FileMaker のウィンドウ矩形 (left, top, width, height)。見つからなければ None (画面全体)"""
+    try:
+        import fm_utils
+        win = fm_utils.find_main_window()
+        if win is None:
+            return None
+        r = win.rectangle()
+        if r.width() > 0 and r.height() > 0:
+            return (r.left, r.top, r.width(), r.height())
+    except Exception as e:
+        print(f"  > Window rect error: {e}", file=sys.stderr)
+    return None
+
+def capture(rect=None):
+    """rect の範囲だけ撮影して (グレースケール画像, 左上座標) を返す"""
+    import pyautogui
+    if rect:
+        shot = pyautogui.screenshot(region=rect)
+        return to_gray(shot), (rect[0], rect[1])
+    return to_gray(pyautogui.screenshot()), (0, 0)
+
+_LOCATOR = None
+
+def get_locator():
+    global _LOCATOR
+    if _LOCATOR is None:
+        _LOCATOR = TemplateLocator()
+    return _LOCATOR
+
+def locate_on_screen(path, confidence=CONFIDENCE, rect=None):
+    """画面上の座標で Match を返す (rect 省略時は FileMaker のウィンドウ)"""
+    rect = rect or window_rect()
+    start = time.perf_counter()
+    image, (left, top) = capture(rect)
+    match = get_locator().locate(path, image, confidence, geometry=rect[2:] if rect else None)
+    print(f"  > Locate {os.path.basename(path)}: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({match.source if match else 'not found'})", file=sys.stderr)
+    if match:
+        match.x += left
+        match.y += top
+    return match
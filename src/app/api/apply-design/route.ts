@@ -0,0 +1,34 @@
+import { NextResponse } from 'next/server';
+import { streamWorker } from '@/lib/automation-worker';
+
+// 全テーブルの反映はテーブル数に比例して時間がかかるので、ワーカーの待ち時間を長めにとる
+const APPLY_TIMEOUT_MS = 30 * 60 * 1000;
+
+export async function POST(request: Request) {
+    try {
+        // confirmed: 前回の pending_fixes (既存テーブルの改名・型変更) を UI で確認した結果
+        const { design, confirmed } = await request.json();
+
+        if (!design || !Array.isArray(design.tables) || design.tables.length === 0) {
+            return NextResponse.json({ success: false, error: 'Design with tables is required' }, { status: 400 });
+        }
+
+        // NDJSON: tables_created / table (1テーブル終わるごと) / done / error
+        const encoder = new TextEncoder();
+        const body = new ReadableStream({
+            start(controller) {
+                const send = (event: any) => controller.enqueue(encoder.encode(JSON.stringify(event) + '\n'));
+                streamWorker('apply_design', { design, confirmed }, send, APPLY_TIMEOUT_MS)
+                    .then((result) => send({ event: 'done', result }))
+                    .catch((err) => send({ event: 'error', error: err.message }))
+                    .finally(() => controller.close());
+            },
+        });
+        return new Response(body, {
+            headers: { 'Content-Type': 'application/x-ndjson; charset=utf-8', 'Cache-Control': 'no-cache' },
+        });
+    } catch (err: any) {
+        console.error('Apply Design Error:', err);
+        return NextResponse.json({ success: false, error: err.message }, { status: 500 });
+    }
+}
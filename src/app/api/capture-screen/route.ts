@@ -1,27 +1,13 @@
 import { NextResponse } from 'next/server';
-import { exec } from 'child_process';
-import path from 'path';
-import fs from 'fs';
+import { callWorker } from '@/lib/automation-worker';
 
 export async function POST() {
-    const scriptPath = path.join(process.cwd(), 'scripts', 'capture_screen.py');
-    const venvPythonPath = path.join(process.cwd(), '.venv', 'Scripts', 'python.exe');
-    const pythonCommand = fs.existsSync(venvPythonPath) ? `"${venvPythonPath}"` : 'python';
-
-    if (!fs.existsSync(scriptPath)) {
-        return NextResponse.json({ success: false, error: 'Capture script not found' }, { status: 404 });
+    try {
+        // 常駐ワーカーが撮影して保存キューに入れる (PNG の書き出しとサムネイル作成は裏で行う)
+        const result = await callWorker('capture_screen', {});
+        return NextResponse.json(result);
+    } catch (err: any) {
+        console.error('Capture Error:', err);
+        return NextResponse.json({ success: false, error: err.message }, { status: 500 });
     }
-
-    const command = `${pythonCommand} "${scriptPath}"`;
-
-    return new Promise((resolve) => {
-        exec(command, (error, stdout, stderr) => {
-            if (error) {
-                console.error('Capture Error:', error);
-                resolve(NextResponse.json({ success: false, error: error.message }, { status: 500 }));
-                return;
-            }
-            resolve(NextResponse.json({ success: true, output: stdout }));
-        });
-    });
 }
@@ -7,23 +7,26 @@ import os from 'os';
 export async function POST(request: Request) {
     let tmpXmlFile: string | null = null;
     try {
-        const { xml } = await request.json();
+        const { xml, layout } = await request.json();
 
-        if (!xml) {
+        if (!xml && !layout) {
             return NextResponse.json({ success: false, error: 'No XML provided' }, { status: 400 });
         }
 
         // コマンドライン引数の長さ制限や特殊文字のエスケープ問題を避けるため、一時ファイルに保存
+        // レイアウトは JSON のまま渡し、XML への変換は Python 側 (fm_layout.py) で行う
         const tmpDir = os.tmpdir();
-        tmpXmlFile = path.join(tmpDir, `fm_clip_${Date.now()}.xml`);
-        fs.writeFileSync(tmpXmlFile, xml, { encoding: 'utf8' });
+        tmpXmlFile = path.join(tmpDir, `fm_clip_${Date.now()}.${layout ? 'json' : 'xml'}`);
+        fs.writeFileSync(tmpXmlFile, layout ? JSON.stringify(layout) : xml, { encoding: 'utf8' });
 
         // Pythonスクリプトのパス
         const scriptPath = path.join(process.cwd(), 'scripts', 'set_fm_clipboard.py');
         const venvPythonPath = path.join(process.cwd(), '.venv', 'Scripts', 'python.exe');
         const pythonCommand = fs.existsSync(venvPythonPath) ? `"${venvPythonPath}"` : 'python';
 
-        const command = `${pythonCommand} "${scriptPath}" "${tmpXmlFile}"`;
+        const command = layout
+            ? `${pythonCommand} "${scriptPath}" --layout "${tmpXmlFile}"`
+            : `${pythonCommand} "${scriptPath}" "${tmpXmlFile}"`;
 
         return new Promise((resolve) => {
             exec(command, (error, stdout, stderr) => {
@@ -1,51 +1,24 @@
 import { NextResponse } from 'next/server';
-import { exec } from 'child_process';
-import path from 'path';
-import fs from 'fs';
+import { callWorker } from '@/lib/automation-worker';
+
+// 一括処理はフィールド数に比例して時間がかかるので、ワーカーの待ち時間を長めにとる
+// (超えたらワーカーを再起動して GUI 操作を止める。続きはジャーナルから再開できる)
+const BATCH_TIMEOUT_MS = 60 * 60 * 1000;
 
 export async function POST(request: Request) {
     try {
-        const { fields } = await request.json();
+        const { fields, bulk = true } = await request.json();
 
         if (!fields || !Array.isArray(fields)) {
             return NextResponse.json({ success: false, error: 'Fields array is required' }, { status: 400 });
         }
 
-        const scriptPath = path.join(process.cwd(), 'scripts', 'batch_create_fields.py');
-        const venvPythonPath = path.join(process.cwd(), '.venv', 'Scripts', 'python.exe');
-        const pythonCommand = fs.existsSync(venvPythonPath) ? `"${venvPythonPath}"` : 'python';
-
-        // フィールドリストをテンポラリファイルに書き出す (コマンドライン引数の長さ制限回避)
-        const tempFilePath = path.join(process.cwd(), 'data', 'temp_create_batch.json');
-        fs.writeFileSync(tempFilePath, JSON.stringify(fields, null, 2), 'utf-8');
-
-        const command = `${pythonCommand} "${scriptPath}" "${tempFilePath}"`;
-
-        return new Promise((resolve) => {
-            exec(command, (error, stdout, stderr) => {
-                // テンポラリファイルを削除
-                try { fs.unlinkSync(tempFilePath); } catch (e) { }
-
-                if (error) {
-                    console.error('Batch Create Error:', error);
-                    resolve(NextResponse.json({
-                        success: false,
-                        error: error.message,
-                        details: stdout,
-                        stderr: stderr
-                    }, { status: 500 }));
-                    return;
-                }
-
-                try {
-                    const result = JSON.parse(stdout);
-                    resolve(NextResponse.json(result));
-                } catch (e) {
-                    resolve(NextResponse.json({ success: true, output: stdout }));
-                }
-            });
-        });
+        // 常駐ワーカーへ直接渡すため、テンポラリファイルや引数長の制限は不要
+        // 既定は XML スニペットの一括貼り付け (確認できなかった分だけ Python 側で1件ずつ GUI 作成)
+        const result = await callWorker(bulk ? 'bulk_create_fields' : 'batch_create_fields', { fields }, BATCH_TIMEOUT_MS);
+        return NextResponse.json(result);
     } catch (err: any) {
+        console.error('Batch Create Error:', err);
         return NextResponse.json({ success: false, error: err.message }, { status: 500 });
     }
 }
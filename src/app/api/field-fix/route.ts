@@ -1,7 +1,9 @@
 import { NextResponse } from 'next/server';
-import { exec } from 'child_process';
-import path from 'path';
-import fs from 'fs';
+import { callWorker } from '@/lib/automation-worker';
+
+// 一括処理はフィールド数に比例して時間がかかるので、ワーカーの待ち時間を長めにとる
+// (超えたらワーカーを再起動して GUI 操作を止める。続きはジャーナルから再開できる)
+const BATCH_TIMEOUT_MS = 60 * 60 * 1000;
 
 export async function POST(request: Request) {
     try {
@@ -11,41 +13,9 @@ export async function POST(request: Request) {
             return NextResponse.json({ success: false, error: 'No fixes provided' }, { status: 400 });
         }
 
-        const scriptPath = path.join(process.cwd(), 'scripts', 'field_fixer.py');
-        const venvPythonPath = path.join(process.cwd(), '.venv', 'Scripts', 'python.exe');
-        const pythonCommand = fs.existsSync(venvPythonPath) ? `"${venvPythonPath}"` : 'python';
-
-        // JSON引数を安全にエスケープ
-        const fixesJson = JSON.stringify(fixes).replace(/"/g, '\\"');
-        const command = `${pythonCommand} "${scriptPath}" "${fixesJson}"`;
-
-        return new Promise((resolve) => {
-            exec(command, { timeout: 120000 }, (error, stdout, stderr) => {
-                console.log('Field Fixer Output:', stdout);
-                if (stderr) console.error('Field Fixer Stderr:', stderr);
-
-                if (error) {
-                    resolve(NextResponse.json({
-                        success: false,
-                        error: error.message,
-                        log: stdout
-                    }, { status: 500 }));
-                } else {
-                    try {
-                        // 最後の行がJSONのはず
-                        const lines = stdout.trim().split('\n');
-                        const lastLine = lines[lines.length - 1];
-                        const result = JSON.parse(lastLine);
-                        resolve(NextResponse.json(result));
-                    } catch (e) {
-                        resolve(NextResponse.json({
-                            success: true,
-                            log: stdout
-                        }));
-                    }
-                }
-            });
-        });
+        const result = await callWorker('batch_fix', { fixes }, BATCH_TIMEOUT_MS);
+        console.log('Field Fixer Output:', result);
+        return NextResponse.json(result);
     } catch (err: any) {
         return NextResponse.json({ success: false, error: err.message }, { status: 500 });
     }
@@ -1,40 +1,38 @@
 import { NextResponse } from 'next/server';
-import { exec } from 'child_process';
-import path from 'path';
-import fs from 'fs';
+import { callWorker, streamWorker } from '@/lib/automation-worker';
 
 export async function POST(request: Request) {
     try {
-        const { prompt } = await request.json();
+        const { prompt, noCache, stream } = await request.json();
 
         if (!prompt) {
             return NextResponse.json({ success: false, error: 'Prompt is required' }, { status: 400 });
         }
 
-        const scriptPath = path.join(process.cwd(), 'scripts', 'generate_design_ai.py');
-        const venvPythonPath = path.join(process.cwd(), '.venv', 'Scripts', 'python.exe');
-        const pythonCommand = fs.existsSync(venvPythonPath) ? `"${venvPythonPath}"` : 'python';
-
-        // プロンプトを安全に渡す
-        const command = `${pythonCommand} "${scriptPath}" "${prompt.replace(/"/g, '\\"')}"`;
-
-        return new Promise((resolve) => {
-            exec(command, (error, stdout, stderr) => {
-                if (error) {
-                    console.error('AI Generation Error:', error);
-                    resolve(NextResponse.json({ success: false, error: error.message, details: stdout }, { status: 500 }));
-                    return;
-                }
-                try {
-                    const design = JSON.parse(stdout.trim());
-                    resolve(NextResponse.json({ success: true, design }));
-                } catch (parseError) {
-                    console.error('JSON Parse Error:', parseError, stdout);
-                    resolve(NextResponse.json({ success: false, error: 'Failed to parse AI response', details: stdout }, { status: 500 }));
-                }
+        if (stream) {
+            // NDJSON: one event per line (thought / table / layout / restart / done / error)
+            const encoder = new TextEncoder();
+            const body = new ReadableStream({
+                start(controller) {
+                    const send = (event: any) => controller.enqueue(encoder.encode(JSON.stringify(event) + '\n'));
+                    streamWorker('generate_db_design_stream', { prompt, noCache: !!noCache }, (event) => {
+                        // done is re-sent below from the final result
+                        if (event.event !== 'done') send(event);
+                    })
+                        .then((design) => send({ event: 'done', design }))
+                        .catch((err) => send({ event: 'error', error: err.message }))
+                        .finally(() => controller.close());
+                },
+            });
+            return new Response(body, {
+                headers: { 'Content-Type': 'application/x-ndjson; charset=utf-8', 'Cache-Control': 'no-cache' },
             });
-        });
+        }
+
+        const design = await callWorker('generate_db_design', { prompt, noCache: !!noCache });
+        return NextResponse.json({ success: true, design });
     } catch (err: any) {
+        console.error('AI Generation Error:', err);
         return NextResponse.json({ success: false, error: err.message }, { status: 500 });
     }
 }
@@ -1,36 +1,13 @@
 import { NextResponse } from 'next/server';
-import { exec } from 'child_process';
-import path from 'path';
-import fs from 'fs';
+import { callWorker } from '@/lib/automation-worker';
 
 export async function GET() {
     try {
-        const scriptPath = path.join(process.cwd(), 'scripts', 'get_fm_fields.py');
-        const venvPythonPath = path.join(process.cwd(), '.venv', 'Scripts', 'python.exe');
-        const pythonCommand = fs.existsSync(venvPythonPath) ? `\"${venvPythonPath}\"` : 'python';
-
-        const command = `${pythonCommand} \"${scriptPath}\"`;
-
-        return new Promise((resolve) => {
-            // maxBuffer を拡大し、実行時間を考慮してタイムアウトも設定可能にする
-            exec(command, { maxBuffer: 1024 * 1024 }, (error, stdout, stderr) => {
-                if (stderr) {
-                    console.log(`[get_fm_fields.py Log]: ${stderr}`);
-                }
-                if (error) {
-                    console.error(`[get_fm_fields.py Error]: ${error}`);
-                    resolve(NextResponse.json({ success: false, error: error.message }, { status: 500 }));
-                } else {
-                    try {
-                        const result = JSON.parse(stdout);
-                        resolve(NextResponse.json(result));
-                    } catch (e) {
-                        resolve(NextResponse.json({ success: false, error: 'Failed to parse JSON', details: stdout }, { status: 500 }));
-                    }
-                }
-            });
-        });
+        // 常駐ワーカー経由で取得 (Python の起動・import・FileMaker 接続を毎回やり直さない)
+        const result = await callWorker('get_existing_fields');
+        return NextResponse.json(result);
     } catch (err: any) {
+        console.error(`[get_fm_fields Error]: ${err}`);
         return NextResponse.json({ success: false, error: err.message }, { status: 500 });
     }
 }
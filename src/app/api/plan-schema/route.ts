@@ -0,0 +1,18 @@
+import { NextResponse } from 'next/server';
+import { callWorker } from '@/lib/automation-worker';
+
+export async function POST(request: Request) {
+    try {
+        const { targetFields, currentFields, file, table } = await request.json();
+
+        if (!targetFields || !Array.isArray(targetFields)) {
+            return NextResponse.json({ success: false, error: 'targetFields is required' }, { status: 400 });
+        }
+
+        // currentFields が無ければ、ワーカーが file/table の最新スナップショットを使う
+        const result = await callWorker('plan_schema', { targetFields, currentFields, file, table });
+        return NextResponse.json(result);
+    } catch (err: any) {
+        return NextResponse.json({ success: false, error: err.message }, { status: 500 });
+    }
+}
@@ -2,28 +2,42 @@ import { NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
 
+interface IndexItem {
+    file: string;
+    thumb?: string | null;
+    time: number;
+}
+
 export async function GET() {
     const screenshotDir = path.join(process.cwd(), 'public', 'screenshots');
 
     // publicフォルダがない場合は作成
     if (!fs.existsSync(screenshotDir)) {
         fs.mkdirSync(screenshotDir, { recursive: true });
-        return NextResponse.json({ screenshots: [] });
+        return NextResponse.json({ screenshots: [], items: [] });
     }
 
     try {
-        const files = fs.readdirSync(screenshotDir);
-        const screenshots = files
-            .filter(file => file.endsWith('.png') || file.endsWith('.jpg'))
-            .sort((a, b) => {
-                // ファイル名（タイムスタンプ含む）で降順ソート
-                return fs.statSync(path.join(screenshotDir, b)).mtime.getTime() -
-                    fs.statSync(path.join(screenshotDir, a)).mtime.getTime();
-            })
-            .map(file => `/screenshots/${file}`);
+        // scripts/screenshot_store.py が書く index.json (古い順) を読む。ファイルごとの stat は不要
+        const indexPath = path.join(screenshotDir, 'index.json');
+        let items: IndexItem[];
+        if (fs.existsSync(indexPath)) {
+            items = (JSON.parse(fs.readFileSync(indexPath, 'utf-8')).items || []).slice().reverse();
+        } else {
+            // 索引がまだ無い (一度も保存キュー経由で撮っていない) 場合は従来通り走査する
+            items = fs.readdirSync(screenshotDir)
+                .filter(file => file.endsWith('.png') || file.endsWith('.jpg') || file.endsWith('.webp'))
+                .map(file => ({ file, thumb: null, time: fs.statSync(path.join(screenshotDir, file)).mtime.getTime() / 1000 }))
+                .sort((a, b) => b.time - a.time);
+        }
 
-        return NextResponse.json({ screenshots });
+        const result = items.map(item => ({
+            src: `/screenshots/${item.file}`,
+            thumb: item.thumb ? `/screenshots/${item.thumb}` : `/screenshots/${item.file}`,
+            time: item.time,
+        }));
+        return NextResponse.json({ screenshots: result.map(r => r.src), items: result });
     } catch (err) {
-        return NextResponse.json({ screenshots: [], error: 'Failed to read screenshots' }, { status: 500 });
+        return NextResponse.json({ screenshots: [], items: [], error: 'Failed to read screenshots' }, { status: 500 });
     }
 }
@@ -1,7 +1,7 @@
 'use client';
 
 import { useState, useEffect } from 'react';
-import { generateFieldsXML, generateTableXML, generateLayoutXML, FMTable } from '@/lib/fm-xml';
+import { generateFieldsXML, generateTableXML, FMTable, FMLayout } from '@/lib/fm-xml';
 
 const PRESET_PROMPT = `夜店クラブの「伝票・売上管理」ミニマムシステム
 - 伝票テーブル(dp): 日付, tableno, total, castid, custid, paytype
@@ -19,7 +19,7 @@ export default function Home() {
   } | null>(null);
   const [isLaunching, setIsLaunching] = useState(false);
   const [isCapturing, setIsCapturing] = useState(false);
-  const [screenshots, setScreenshots] = useState<string[]>([]);
+  const [screenshots, setScreenshots] = useState<{ src: string, thumb: string }[]>([]);
   const [status, setStatus] = useState<{ msg: string; isError: boolean } | null>(null);
   const [cooldown, setCooldown] = useState(0);
 
@@ -39,6 +39,10 @@ export default function Home() {
   const [isSuggesting, setIsSuggesting] = useState(false);
   const [isFixing, setIsFixing] = useState(false);
 
+  // 全テーブル一括反映の state (テーブル名 -> 結果)
+  const [isApplying, setIsApplying] = useState(false);
+  const [tableStatus, setTableStatus] = useState<Record<string, { status: string, error?: string }>>({});
+
   // クールダウンのカウントダウン
   useEffect(() => {
     if (cooldown > 0) {
@@ -52,7 +56,7 @@ export default function Home() {
     try {
       const res = await fetch('/api/screenshots');
       const data = await res.json();
-      setScreenshots(data.screenshots || []);
+      setScreenshots(data.items || (data.screenshots || []).map((src: string) => ({ src, thumb: src })));
     } catch (err) {
       console.error('Failed to fetch screenshots');
     }
@@ -84,8 +88,13 @@ export default function Home() {
       const res = await fetch('/api/capture-screen', { method: 'POST' });
       const data = await res.json();
       if (!data.success) throw new Error(data.error);
-      setStatus({ msg: '✅ キャプチャ完了', isError: false });
-      await fetchScreenshots();
+      if (data.skipped) {
+        setStatus({ msg: '✅ 画面に変化がないため保存をスキップしました', isError: false });
+      } else {
+        setStatus({ msg: '✅ キャプチャ完了', isError: false });
+        // 書き出しはワーカーの裏で行われるので、少し待ってから一覧を読み直す
+        setTimeout(fetchScreenshots, 800);
+      }
     } catch (err: any) {
       setStatus({ msg: `❌ キャプチャ失敗: ${err.message}`, isError: true });
     } finally {
@@ -105,15 +114,65 @@ export default function Home() {
       const res = await fetch('/api/generate-design', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ prompt }),
+        body: JSON.stringify({ prompt, stream: true }),
       });
-      const data = await res.json();
-
-      if (!data.success) {
+      if (!res.ok || !res.body) {
+        const data = await res.json().catch(() => ({}));
         throw new Error(data.error || '生成に失敗しました');
       }
 
-      let extractedDesign = data.design;
+      // NDJSON ストリーム: テーブルやレイアウトが1つ完成するたびに画面へ反映する
+      const partial = { tables: [] as FMTable[], layouts: [] as any[], thoughts: [] as string[] };
+      let finalDesign: any = null;
+      const handleEvent = (ev: any) => {
+        switch (ev.event) {
+          case 'thought':
+            partial.thoughts[ev.index] = ev.data;
+            break;
+          case 'table':
+            partial.tables[ev.index] = ev.data;
+            setStatus({ msg: `テーブル「${ev.data?.name}」を受信しました。続きを生成中...`, isError: false });
+            break;
+          case 'layout':
+            partial.layouts[ev.index] = ev.data;
+            break;
+          case 'restart':
+            partial.tables = [];
+            partial.layouts = [];
+            partial.thoughts = [];
+            break;
+          case 'done':
+            finalDesign = ev.design;
+            return;
+          case 'error': {
+            const details = ev.details ? `\n詳細:\n${ev.details.join('\n')}` : '';
+            throw new Error(`${ev.error || '生成に失敗しました'}${details}`);
+          }
+          default:
+            return;
+        }
+        setDesign({ tables: [...partial.tables], layouts: [...partial.layouts], thoughts: [...partial.thoughts] });
+      };
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+          const line = buffer.slice(0, newline).trim();
+          buffer = buffer.slice(newline + 1);
+          if (line) handleEvent(JSON.parse(line));
+        }
+      }
+      if (!finalDesign) {
+        throw new Error('生成が途中で終了しました');
+      }
+
+      let extractedDesign = finalDesign;
       if (!extractedDesign.tables && extractedDesign.design?.tables) {
         extractedDesign = extractedDesign.design;
       }
@@ -148,17 +207,24 @@ export default function Home() {
     }
   };
 
-  const copyToFM = async (xml: string) => {
+  // レイアウトは { layout } で送り、Python 側でXMLに変換する
+  const copyToFM = async (payload: string | { layout: FMLayout }) => {
     setStatus({ msg: 'クリップボードに登録中...', isError: false });
     try {
       const res = await fetch('/api/copy-fm', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ xml }),
+        body: JSON.stringify(typeof payload === 'string' ? { xml: payload } : payload),
       });
       const data = await res.json();
       if (!data.success) throw new Error(data.error);
-      setStatus({ msg: '✅ クリップボードに登録完了！FileMakerで貼り付けできます。', isError: false });
+      // レイアウトは Python 側で重なりを解消してから登録される (集計が JSON で返る)
+      let packed = '';
+      try {
+        const report = JSON.parse(data.result || '');
+        if (report.moved > 0) packed = `（重なり ${report.overlaps_before} 件を解消、${report.moved} 要素を移動）`;
+      } catch (e) { }
+      setStatus({ msg: `✅ クリップボードに登録完了！FileMakerで貼り付けできます。${packed}`, isError: false });
     } catch (err: any) {
       setStatus({ msg: `❌ エラー: ${err.message}`, isError: true });
     }
@@ -196,21 +262,69 @@ export default function Home() {
     if (!confirm(`${fields.length} 個のフィールドを順番にGUI生成します。既に存在するフィールドはスキップされます。よろしいですか？`)) return;
 
     setStatus({ msg: 'FileMakerの現在の状態を確認中...', isError: false });
-    let existingFields: string[] = [];
+    let currentFields: any[] | undefined;
+    let context: { file?: string; table?: string } = {};
     try {
       const res = await fetch(`/api/get-fm-fields?t=${Date.now()}`);
       const data = await res.json();
       if (data.success) {
-        existingFields = data.fields.map((f: any) => f.name.toLowerCase());
+        currentFields = data.fields;
+        context = { file: data.file, table: data.table };
+      }
+    } catch (err) {
+      console.warn('進捗の取得に失敗しました。前回のスナップショットで差分を計画します。', err);
+    }
+
+    // 現在のスキーマとの差分から、作成・改名・型変更の最小の操作を計画する
+    let remainingFields = fields;
+    let plannedFixes: any[] = [];
+    try {
+      const res = await fetch('/api/plan-schema', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ targetFields: fields, currentFields, ...context }),
+      });
+      const plan = await res.json();
+      if (plan.success) {
+        remainingFields = plan.fields;
+        plannedFixes = plan.fixes;
+        // 改名は名前の類似からの推測なので、確認できたものだけ適用する (断ったものは新規に作成する)
+        const proposed: any[] = plan.proposed || [];
+        if (proposed.length > 0) {
+          const list = proposed.map((p: any) => `${p.old_name} → ${p.new_name}`).join('\n');
+          if (confirm(`次の既存フィールドを改名して使いますか？\n${list}\n\n[キャンセル] で改名せずに新規作成します。`)) {
+            plannedFixes = [...plannedFixes, ...proposed];
+          } else {
+            const names = new Set(proposed.map((p: any) => p.new_name));
+            remainingFields = [...remainingFields, ...fields.filter((f: any) => names.has(f.name))];
+          }
+        }
+      } else {
+        console.warn('差分の計画に失敗しました。全件作成を試みます。', plan.error);
       }
     } catch (err) {
-      console.warn('進捗の取得に失敗しました。全件作成を試みます。', err);
+      console.warn('差分の計画に失敗しました。全件作成を試みます。', err);
     }
 
-    const remainingFields = fields.filter(f => !existingFields.includes(f.name.toLowerCase()));
+    // 改名・型変更を先に適用する (同名フィールドの作成と衝突しないように)
+    if (plannedFixes.length > 0) {
+      setStatus({ msg: `${plannedFixes.length} 件のフィールドを改名・型変更中...`, isError: false });
+      try {
+        const res = await fetch('/api/field-fix', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ fixes: plannedFixes }),
+        });
+        const data = await res.json();
+        if (!data.success) throw new Error(data.error);
+      } catch (err: any) {
+        setStatus({ msg: `❌ 改名・型変更エラー: ${err.message}`, isError: true });
+        return;
+      }
+    }
 
     if (remainingFields.length === 0) {
-      setStatus({ msg: '✅ 全てのフィールドは既に存在します。', isError: false });
+      setStatus({ msg: plannedFixes.length > 0 ? `✅ ${plannedFixes.length} 件の改名・型変更が完了しました。` : '✅ 全てのフィールドは既に存在します。', isError: false });
       await handleFinalizeFM();
       return;
     }
@@ -234,6 +348,95 @@ export default function Home() {
     }
   };
 
+  // 設計の全テーブルをまとめて反映する (無いテーブルの作成 → テーブルごとに差分を反映)
+  const handleApplyDesign = async () => {
+    if (!design?.tables?.length) return;
+    if (!confirm(`${design.tables.length} 個のテーブルをFileMakerに一括反映します。無いテーブルは作成し、既存のテーブルは差分だけを反映します。よろしいですか？`)) return;
+
+    setIsApplying(true);
+    setTableStatus({});
+    setStatus({ msg: `${design.tables.length} 個のテーブルを反映中...（FileMakerを確認してください）`, isError: false });
+    // confirmed: 前回の確認待ち (pending_fixes) への回答 { テーブル名: [修整 + accept] }
+    const runApply = async (tables: any[], confirmed?: Record<string, any[]>) => {
+      const res = await fetch('/api/apply-design', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ design: { tables }, confirmed }),
+      });
+      if (!res.ok || !res.body) {
+        const data = await res.json().catch(() => ({}));
+        throw new Error(data.error || '反映に失敗しました');
+      }
+
+      let result: any = null;
+      const handleEvent = (ev: any) => {
+        switch (ev.event) {
+          case 'tables_created':
+            if (ev.failed?.length) console.warn('作成できなかったテーブル:', ev.failed, ev.alerts);
+            break;
+          case 'table':
+            setTableStatus(prev => ({ ...prev, [ev.table]: { status: ev.status, error: ev.error } }));
+            setStatus({ msg: `テーブル「${ev.table}」を反映しました (${ev.index + 1}/${ev.total})`, isError: false });
+            break;
+          case 'done':
+            result = ev.result;
+            break;
+          case 'error':
+            throw new Error(ev.error || '反映に失敗しました');
+        }
+      };
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+          const line = buffer.slice(0, newline).trim();
+          buffer = buffer.slice(newline + 1);
+          if (line) handleEvent(JSON.parse(line));
+        }
+      }
+      if (!result) throw new Error('反映が途中で終了しました');
+      if (!result.success && !result.tables) throw new Error(result.error);
+      return result;
+    };
+
+    try {
+      let result = await runApply(design.tables);
+      // 既存のテーブルの改名・型変更は自動では行わないので、確認してからもう一度反映する
+      const pending = (result.tables || []).filter((t: any) => t.pending_fixes?.length);
+      if (pending.length > 0) {
+        const list = pending.flatMap((t: any) => t.pending_fixes.map((f: any) =>
+          `${t.table}: ${f.old_name}${f.new_name !== f.old_name ? ` → ${f.new_name}` : ''}${f.new_type ? ` (${f.new_type})` : ''}`)).join('\n');
+        const accept = confirm(`既存のフィールドの改名・型変更が必要です。適用しますか？\n${list}\n\n[キャンセル] で改名・型変更をせず、改名先は新規に作成します。`);
+        const confirmed = Object.fromEntries(pending.map((t: any) =>
+          [t.table, t.pending_fixes.map((f: any) => ({ ...f, accept }))]));
+        setStatus({ msg: `${pending.length} 個のテーブルに確認した変更を反映中...`, isError: false });
+        // 確認待ちのあったテーブルだけをもう一度反映し、その結果で置き換える
+        const again = await runApply(design.tables.filter((t: any) => t.name in confirmed), confirmed);
+        const byName = new Map((again.tables || []).map((t: any) => [t.table, t]));
+        result = { ...result, tables: result.tables.map((t: any) => byName.get(t.table) || t) };
+      }
+
+      const failed = (result.tables || []).filter((t: any) => !t.success);
+      if (failed.length > 0) {
+        setStatus({ msg: `⚠️ ${failed.length} 個のテーブルで失敗しました: ${failed.map((t: any) => t.table).join(', ')}`, isError: true });
+      } else {
+        setStatus({ msg: `✅ ${result.tables.length} 個のテーブルの反映が完了しました。`, isError: false });
+      }
+      await handleFinalizeFM();
+    } catch (err: any) {
+      console.error(err);
+      setStatus({ msg: `❌ 一括反映エラー: ${err.message}`, isError: true });
+    } finally {
+      setIsApplying(false);
+    }
+  };
+
   const handleLoadCurrentFields = async () => {
     setIsLoadingFields(true);
     setStatus({ msg: 'FileMakerから現在のフィールドを読み取っています...', isError: false });
@@ -504,7 +707,17 @@ export default function Home() {
                         <p className="text-sm mt-2">AIの出力を解析できませんでした。もう一度指示を変えて試してみてください。</p>
                       </div>
                     ) : (
-                      design.tables.map((table) => (
+                      <>
+                      <div className="flex justify-end">
+                        <button
+                          onClick={handleApplyDesign}
+                          disabled={isApplying}
+                          className="px-5 py-2.5 bg-gradient-to-r from-indigo-600 to-purple-600 hover:from-indigo-500 hover:to-purple-500 disabled:opacity-50 text-white rounded-xl text-xs font-black tracking-wide transition-all active:scale-95 shadow-lg shadow-indigo-500/20"
+                        >
+                          {isApplying ? '反映中...' : `全テーブルを一括反映 (${design.tables.length})`}
+                        </button>
+                      </div>
+                      {design.tables.map((table) => (
                         <div key={table.name} className="bg-panel-bg backdrop-blur-md border border-panel-border rounded-3xl overflow-hidden shadow-2xl transition-colors">
                           <div className="bg-panel-bg p-6 flex justify-between items-center border-b border-panel-border">
                             <div>
@@ -512,6 +725,11 @@ export default function Home() {
                                 {table.name}
                               </h3>
                               <p className="text-[10px] text-text-sub uppercase font-bold mt-1 tracking-widest">Database Table</p>
+                              {tableStatus[table.name] && (
+                                <p className={`text-[10px] font-bold mt-1 ${tableStatus[table.name].status === 'failed' ? 'text-red-400' : 'text-emerald-400'}`} title={tableStatus[table.name].error}>
+                                  {({ created: '✅ 作成しました', updated: '✅ 差分を反映しました', unchanged: '✅ 変更なし', failed: '❌ 失敗' } as Record<string, string>)[tableStatus[table.name].status] || tableStatus[table.name].status}
+                                </p>
+                              )}
                             </div>
                             <div className="flex gap-3">
                               <button
@@ -550,7 +768,8 @@ export default function Home() {
                             ))}
                           </div>
                         </div>
-                      ))
+                      ))}
+                      </>
                     )}
                   </div>
                 ) : currentFields.length > 0 ? (
@@ -611,7 +830,7 @@ export default function Home() {
                             </div>
                             <div className="flex gap-4 items-center">
                               <button
-                                onClick={() => copyToFM(generateLayoutXML(lyt))}
+                                onClick={() => copyToFM({ layout: lyt })}
                                 className="px-6 py-2 bg-gradient-to-r from-purple-600 to-indigo-600 hover:from-purple-500 hover:to-indigo-500 text-white rounded-2xl text-xs font-bold shadow-lg shadow-purple-500/20 transition-all active:scale-95"
                               >
                                 レイアウトXMLをコピー
@@ -772,9 +991,9 @@ export default function Home() {
                     画像がありません
                   </div>
                 ) : (
-                  screenshots.map((src, i) => (
-                    <div key={i} className="group relative aspect-video bg-input-bg rounded-xl overflow-hidden border border-input-border hover:border-pink-500/50 transition-all cursor-pointer shadow-lg">
-                      <img src={src} alt="Capture" className="w-full h-full object-cover opacity-80 group-hover:opacity-100 transition-opacity" />
+                  screenshots.map(({ src, thumb }, i) => (
+                    <div key={i} onClick={() => window.open(src, '_blank')} className="group relative aspect-video bg-input-bg rounded-xl overflow-hidden border border-input-border hover:border-pink-500/50 transition-all cursor-pointer shadow-lg">
+                      <img src={thumb} alt="Capture" className="w-full h-full object-cover opacity-80 group-hover:opacity-100 transition-opacity" />
                       <div className="absolute inset-0 bg-gradient-to-t from-black/80 via-transparent to-transparent opacity-0 group-hover:opacity-100 transition-opacity flex items-end p-3">
                         <span className="text-[10px] font-bold text-white truncate w-full">{src.split('/').pop()}</span>
                       </div>
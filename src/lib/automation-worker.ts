@@ -0,0 +1,136 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import path from 'path';
+import fs from 'fs';
+import readline from 'readline';
+
+/**
+ * Long-lived Python automation worker (scripts/automation_worker.py).
+ * Spawned once per server process so pywinauto/genai imports and the FileMaker connection stay warm.
+ * The worker serves one request at a time, so requests wait in a FIFO here and are written to it one by one.
+ */
+
+interface Pending {
+  id: number;
+  method: string;
+  params: Record<string, unknown>;
+  resolve: (value: any) => void;
+  reject: (reason: Error) => void;
+  timeoutMs: number;
+  timer?: NodeJS.Timeout;
+  onEvent?: (event: any) => void;
+  child?: ChildProcessWithoutNullStreams;
+}
+
+let worker: ChildProcessWithoutNullStreams | null = null;
+let nextId = 0;
+let running: Pending | null = null;
+const queue: Pending[] = [];
+
+function startWorker(): ChildProcessWithoutNullStreams {
+  const scriptPath = path.join(process.cwd(), 'scripts', 'automation_worker.py');
+  const venvPythonPath = path.join(process.cwd(), '.venv', 'Scripts', 'python.exe');
+  const pythonCommand = fs.existsSync(venvPythonPath) ? venvPythonPath : 'python';
+
+  const child = spawn(pythonCommand, [scriptPath], {
+    cwd: process.cwd(),
+    env: { ...process.env, PYTHONIOENCODING: 'utf-8' },
+  });
+
+  readline.createInterface({ input: child.stdout }).on('line', (line) => {
+    let response: any;
+    try {
+      response = JSON.parse(line);
+    } catch (e) {
+      console.error('[automation-worker] Invalid response:', line);
+      return;
+    }
+    const entry = running;
+    if (!entry || entry.child !== child || entry.id !== response.id) return;
+    if (response.event !== undefined) {
+      // Progress event from a streaming method; the final result follows later.
+      entry.onEvent?.(response.event);
+      return;
+    }
+    clearTimeout(entry.timer);
+    running = null;
+    if (response.error) {
+      entry.reject(new Error(response.error.message));
+    } else {
+      entry.resolve(response.result);
+    }
+    pump();
+  });
+
+  child.stderr.on('data', (data) => {
+    console.log(`[automation-worker Log]: ${data}`);
+  });
+
+  child.on('exit', (code, signal) => {
+    console.error(`[automation-worker] exited with code ${code}${signal ? ` (${signal})` : ''}`);
+    if (worker === child) worker = null;
+    const entry = running;
+    if (entry && entry.child === child) {
+      clearTimeout(entry.timer);
+      running = null;
+      entry.reject(new Error('Automation worker exited'));
+    }
+    // Queued requests were never sent to this process; they run on a fresh worker.
+    pump();
+  });
+
+  return child;
+}
+
+/**
+ * Writes the next queued request once the previous one has finished. Its timeout starts here,
+ * so time spent waiting behind a long batch does not count against it.
+ */
+function pump() {
+  if (running || queue.length === 0) return;
+  const entry = queue.shift()!;
+  if (!worker) {
+    worker = startWorker();
+  }
+  const child = worker;
+  entry.child = child;
+  running = entry;
+  if (entry.timeoutMs > 0) {
+    entry.timer = setTimeout(() => {
+      // Only the running request can time out, so restarting the worker never interrupts another request.
+      if (running !== entry) return;
+      running = null;
+      entry.reject(new Error(`Automation worker timed out: ${entry.method}`));
+      console.error(`[automation-worker] ${entry.method} timed out after ${entry.timeoutMs} ms. Restarting worker.`);
+      if (worker === child) worker = null;
+      child.kill();
+      pump();
+    }, entry.timeoutMs);
+  }
+  child.stdin.write(JSON.stringify({ id: entry.id, method: entry.method, params: entry.params }) + '\n');
+}
+
+/**
+ * Sends one request to the worker and resolves with its result (timeoutMs <= 0 waits indefinitely).
+ * The timeout covers the request's own run, not the time it waits in the queue. On timeout the worker
+ * is restarted: a cancel message could not reach it while it is busy driving the GUI.
+ */
+export function callWorker<T = any>(method: string, params: Record<string, unknown> = {}, timeoutMs = 120000): Promise<T> {
+  return streamWorker<T>(method, params, undefined, timeoutMs);
+}
+
+/**
+ * Like callWorker, but also delivers the intermediate events of a streaming method
+ * (e.g. generate_db_design_stream) to onEvent as they arrive.
+ */
+export function streamWorker<T = any>(
+  method: string,
+  params: Record<string, unknown> = {},
+  onEvent?: (event: any) => void,
+  timeoutMs = 120000,
+): Promise<T> {
+  const id = ++nextId;
+  return new Promise<T>((resolve, reject) => {
+    queue.push({ id, method, params, resolve, reject, timeoutMs, onEvent });
+    pump();
+  });
+}
@@ -20,7 +20,7 @@ export function generateFieldsXML(fields: FMField[]): string {
 
   fields.forEach((field) => {
     // id="0" allows FileMaker to auto-assign IDs
-    xml += `  <Field datatype="${field.type}" id="0" name="${field.name}">\n`;
+    xml += `  <Field datatype="${field.type}" id="0" name="${escapeXml(field.name)}">\n`;
 
     if (field.global) {
       xml += '    <Storage global="True" maxRepeat="1" />\n';
@@ -44,10 +44,10 @@ export function generateFieldsXML(fields: FMField[]): string {
  */
 export function generateTableXML(table: FMTable): string {
   let xml = '<FMPXmlSnippet type="FMTable">\n';
-  xml += `  <Table name="${table.name}" id="0">\n`;
+  xml += `  <Table name="${escapeXml(table.name)}" id="0">\n`;
 
   table.fields.forEach((field) => {
-    xml += `    <Field datatype="${field.type}" id="0" name="${field.name}">\n`;
+    xml += `    <Field datatype="${field.type}" id="0" name="${escapeXml(field.name)}">\n`;
     xml += '      <Storage autoIndex="True" maxRepeat="1" onload="True" recalculate="True" />\n';
     xml += '    </Field>\n';
   });